@@ -0,0 +1,62 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
+
+from dependencies.admin_dependencies import verify_admin_api_key
+from dependencies.wallet_dependencies import get_wallet_service
+from dto.bulk_wallet_create_dto import BulkWalletCreateDto
+from dto.ledger_verification_response_dto import LedgerVerificationResponseDto
+from dto.profile_response_dto import FunctionProfileDto, ProfileResponseDto
+from dto.provisioned_wallet_response_dto import ProvisionedWalletResponseDto
+from service.ledger_verifier import get_ledger_verifier
+from service.sampling_profiler import get_sampling_profiler
+from service.wallet_service import WalletService
+
+admin_router = APIRouter(prefix="/admin", tags=["admin"],
+                         dependencies=[Depends(verify_admin_api_key)])
+
+# Sync handlers, so the sampling runs on a worker thread and the profiled
+# requests keep being served.
+@admin_router.get("/profile")
+def get_profile(
+    seconds: float = Query(5.0, gt=0, le=60),
+    interval_ms: float = Query(5.0, ge=1, le=1000)
+) -> ProfileResponseDto:
+    profile = get_sampling_profiler().profile(seconds, interval_ms / 1000)
+    return ProfileResponseDto(
+        duration_seconds=profile.duration_seconds,
+        interval_seconds=profile.interval_seconds,
+        samples=profile.samples,
+        idle_samples=profile.idle_samples,
+        functions=[FunctionProfileDto(
+            function=function.function,
+            self_samples=function.self_samples,
+            cumulative_samples=function.cumulative_samples,
+            cumulative_seconds=function.cumulative_seconds
+        ) for function in profile.functions],
+        collapsed_stacks=profile.collapsed()
+    )
+
+@admin_router.get("/profile/collapsed", response_class=PlainTextResponse)
+def get_collapsed_profile(
+    seconds: float = Query(5.0, gt=0, le=60),
+    interval_ms: float = Query(5.0, ge=1, le=1000)
+) -> str:
+    return get_sampling_profiler().profile(seconds, interval_ms / 1000).collapsed()
+
+@admin_router.post("/ledger/verify")
+def verify_ledger() -> LedgerVerificationResponseDto:
+    verification = get_ledger_verifier().verify_once()
+    return LedgerVerificationResponseDto(
+        checked_postings=verification.checked_postings,
+        verified_through=verification.verified_through,
+        problems=verification.problems
+    )
+
+@admin_router.post("/wallets")
+def create_wallets(
+    request: BulkWalletCreateDto,
+    wallet_service: Annotated[WalletService, Depends(get_wallet_service)]
+) -> list[ProvisionedWalletResponseDto]:
+    return wallet_service.create_wallets(request.user_ids)
@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from service.metrics import get_metrics_registry
+
+metrics_router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+@metrics_router.get("", response_class=PlainTextResponse)
+def get_metrics() -> str:
+    return get_metrics_registry().render()
@@ -1,22 +1,43 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Header
+from fastapi import APIRouter, Depends, Query
 
+from dependencies.admin_dependencies import verify_admin_api_key
 from dependencies.transaction_dependencies import get_transaction_service
 from dto.statistics_response_dto import StatisticsResponseDto
-from exception.exceptions import UnauthorizedError
+from dto.transfer_stats_response_dto import (
+    UserTransferStatsResponseDto,
+    WalletTransferStatsResponseDto,
+)
+from repository.transfer_stats_repository import TransferStatsMetric
 from service.transaction_service import TransactionService
 
-statistics_router = APIRouter(prefix="/statistics", tags=["statistics"])
-ADMIN_API_KEY = "secret_admin_api_key"
+statistics_router = APIRouter(prefix="/statistics", tags=["statistics"],
+                              dependencies=[Depends(verify_admin_api_key)])
 
 @statistics_router.get("")
 def get_statistics(
     transaction_service: Annotated
-        [TransactionService, Depends(get_transaction_service)],
-    admin_api_key: str = Header(...)
+        [TransactionService, Depends(get_transaction_service)]
 ) -> StatisticsResponseDto:
-    if admin_api_key != ADMIN_API_KEY:
-        raise UnauthorizedError("Invalid admin API key")
-
     return transaction_service.get_statistics()
+
+
+@statistics_router.get("/top-users")
+def get_top_users(
+    transaction_service: Annotated
+        [TransactionService, Depends(get_transaction_service)],
+    by: Annotated[TransferStatsMetric, Query()] = "fees_paid",
+    limit: Annotated[int, Query(ge=1, le=1000)] = 10
+) -> list[UserTransferStatsResponseDto]:
+    return transaction_service.get_top_users(by, limit)
+
+
+@statistics_router.get("/top-wallets")
+def get_top_wallets(
+    transaction_service: Annotated
+        [TransactionService, Depends(get_transaction_service)],
+    by: Annotated[TransferStatsMetric, Query()] = "fees_paid",
+    limit: Annotated[int, Query(ge=1, le=1000)] = 10
+) -> list[WalletTransferStatsResponseDto]:
+    return transaction_service.get_top_wallets(by, limit)
@@ -1,6 +1,7 @@
+from datetime import datetime
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Header
+from fastapi import APIRouter, Depends, Header, Query
 
 from dependencies.wallet_dependencies import get_wallet_service
 from dto.basic_wallet_response_dto import BasicWalletResponseDto
@@ -22,9 +23,12 @@ def create_wallet(
 def get_wallet(
     address: str,
     wallet_service: Annotated[WalletService, Depends(get_wallet_service)],
-    x_api_key: str = Header(...)
+    x_api_key: str = Header(...),
+    as_of: Annotated[int | datetime | None, Query(
+        description="Transaction id or ISO 8601 time (UTC unless given) to "
+                    "report the balance at")] = None
 ) -> WalletResponseDto:
-    return wallet_service.get_wallet(address, x_api_key)
+    return wallet_service.get_wallet(address, x_api_key, as_of)
 
 @wallet_router.get("")
 def get_wallets(
@@ -1,10 +1,33 @@
+import asyncio
+from collections.abc import AsyncGenerator
+from contextlib import aclosing, suppress
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Header
+from fastapi import APIRouter, Depends, Header, Query, WebSocket, status
+from fastapi.responses import StreamingResponse
 
-from dependencies.transaction_dependencies import get_transaction_service
+from config import settings
+from dependencies.transaction_dependencies import (
+    TransactionServiceScope,
+    get_transaction_service,
+    get_transaction_service_scope,
+)
+from dto.posting_response_dto import PostingResponseDto
 from dto.transaction_response_dto import TransactionResponseDto
+from dto.transfer_event_dto import TransferEventDto
+from entity.wallet import Wallet
+from exception.exceptions import (
+    TransferOrderUnavailableError,
+    UnauthorizedWalletAccessError,
+    UserNotFoundError,
+    WalletNotFoundError,
+)
 from service.transaction_service import TransactionService
+from service.transfer_events import (
+    format_server_sent_event,
+    get_transfer_event_broker,
+    stream_transfer_events,
+)
 
 wallet_transaction_router = APIRouter(prefix="/wallets",tags=["wallet_transactions"])
 
@@ -16,3 +39,106 @@ def get_wallet_transactions(
     x_api_key: str = Header(...)
 ) -> list[TransactionResponseDto]:
     return transaction_service.get_wallet_related_transactions(address, x_api_key)
+
+
+@wallet_transaction_router.get("/{address}/postings")
+def get_wallet_postings(
+    address: str,
+    transaction_service: Annotated
+        [TransactionService, Depends(get_transaction_service)],
+    x_api_key: str = Header(...),
+    after_sequence: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=1000)
+) -> list[PostingResponseDto]:
+    return transaction_service.get_wallet_postings(address, x_api_key,
+                                                   after_sequence, limit)
+
+
+def get_owned_wallet(service_scope: TransactionServiceScope, address: str,
+                     api_key: str) -> Wallet:
+    if settings.DB_SHARD_COUNT > 1:
+        # Refused before the stream starts, as its catch-up would be.
+        raise TransferOrderUnavailableError(
+            "Transfer streams are not available on a sharded database"
+        )
+    with service_scope() as transaction_service:
+        return transaction_service.get_owned_wallet(address, api_key)
+
+
+def transfer_events(service_scope: TransactionServiceScope, wallet: Wallet,
+                    after_id: int) -> AsyncGenerator[TransferEventDto | None]:
+    def catch_up(last_id: int) -> list[TransferEventDto]:
+        with service_scope() as transaction_service:
+            return transaction_service.get_transfer_events_after(wallet, last_id)
+
+    return stream_transfer_events(
+        get_transfer_event_broker(), wallet.wallet_address, after_id, catch_up,
+        settings.TRANSFER_STREAM_HEARTBEAT_SECONDS
+    )
+
+
+@wallet_transaction_router.get("/{address}/transactions/stream",
+                               response_class=StreamingResponse)
+async def stream_wallet_transactions(
+    address: str,
+    service_scope: Annotated
+        [TransactionServiceScope, Depends(get_transaction_service_scope)],
+    x_api_key: str = Header(...),
+    last_event_id: int | None = Header(None),
+    after: int = 0
+) -> StreamingResponse:
+    """Server-Sent Events of the wallet's transfers with an id above
+    ``after``; reconnecting clients resume through Last-Event-ID."""
+    wallet = await asyncio.to_thread(get_owned_wallet, service_scope, address,
+                                     x_api_key)
+
+    async def body() -> AsyncGenerator[str]:
+        async with aclosing(transfer_events(
+                service_scope, wallet, last_event_id or after)) as events:
+            async for event in events:
+                yield format_server_sent_event(event)
+
+    return StreamingResponse(body(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache"})
+
+
+@wallet_transaction_router.websocket("/{address}/transactions/ws")
+async def wallet_transactions_websocket(
+    websocket: WebSocket,
+    address: str,
+    service_scope: Annotated
+        [TransactionServiceScope, Depends(get_transaction_service_scope)],
+    after: int = 0
+) -> None:
+    """Sends the wallet's transfers with an id above ``after`` as
+    ``{"type": "transfer", ...}`` messages, with ``{"type": "heartbeat"}``
+    while there are none."""
+    try:
+        wallet = await asyncio.to_thread(
+            get_owned_wallet, service_scope, address,
+            websocket.headers.get("x-api-key", ""))
+    except (UserNotFoundError, WalletNotFoundError,
+            UnauthorizedWalletAccessError,
+            TransferOrderUnavailableError) as exception:
+        await websocket.close(status.WS_1008_POLICY_VIOLATION, str(exception))
+        return
+
+    async def send_events() -> None:
+        async with aclosing(transfer_events(service_scope, wallet, after)) as events:
+            async for event in events:
+                if event is None:
+                    await websocket.send_json({"type": "heartbeat"})
+                else:
+                    await websocket.send_json(
+                        {"type": "transfer", **event.model_dump()})
+
+    await websocket.accept()
+    sending = asyncio.create_task(send_events())
+    try:
+        # Clients send nothing; reading is how their disconnect is noticed.
+        while (await websocket.receive())["type"] != "websocket.disconnect":
+            pass
+    finally:
+        sending.cancel()
+        with suppress(asyncio.CancelledError):
+            await sending
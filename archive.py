@@ -0,0 +1,37 @@
+"""Moves old transfers out of the Transactions table into archive partition
+files, in batches, while the API keeps running.
+
+    python archive.py --keep-recent 1000000 --partition-rows 5000000
+
+Safe to rerun (for example from cron); an interrupted run resumes where it
+stopped.
+"""
+import argparse
+
+from config import settings
+from database.database_init import init_db
+from database.transaction_archive import archive_transactions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", default=settings.DB_PATH)
+    parser.add_argument("--archive-dir", default=settings.TRANSACTION_ARCHIVE_DIR)
+    parser.add_argument("--keep-recent", type=int, default=1_000_000,
+                        help="newest transfers to keep in the hot table")
+    parser.add_argument("--partition-rows", type=int, default=5_000_000)
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--pause-ms", type=float, default=10,
+                        help="pause between batches to let transfers in")
+    args = parser.parse_args()
+
+    init_db(args.db)
+    stats = archive_transactions(args.db, args.archive_dir, args.keep_recent,
+                                 args.partition_rows, args.batch_size,
+                                 args.pause_ms / 1000)
+    print(f"Archived {stats.moved} transfers in {stats.batches} batches, "
+          f"{stats.partitions_created} new partitions, {stats.seconds:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
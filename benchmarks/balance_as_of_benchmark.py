@@ -0,0 +1,106 @@
+"""Compares point-in-time balance queries on one wallet with a long history:
+
+* replaying the wallet's transfers up to the requested transaction, which is
+  what answering from the Transactions table alone takes,
+* ``LedgerRepository.balance_as_of``, which finds the balance checkpoints
+  around the transaction and reads at most one checkpoint interval of
+  postings.
+
+Wallet 1 sends to and receives from wallet 2 in alternating transfers, so
+every transfer is part of wallet 1's history.
+
+    python -m benchmarks.balance_as_of_benchmark --transfers 1000000
+"""
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from database.database_init import init_db
+from entity.transaction import Transaction
+from repository.ledger_repository import LedgerRepository
+from repository.wallet_repository import WalletRepository
+
+CHUNK = 20_000
+OPENING_BALANCE = 10 ** 12
+
+REPLAY_SQL = """
+    SELECT SUM(CASE WHEN sender_wallet_id = ?1 THEN -transfer_amount
+                    ELSE transfer_amount - transfer_fee END)
+    FROM Transactions
+    WHERE (sender_wallet_id = ?1 OR receiver_wallet_id = ?1) AND id <= ?2
+"""
+
+
+def seed(db_path: str, transfers: int, interval: int) -> None:
+    init_db(db_path)
+    connection = sqlite3.connect(db_path)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.execute("INSERT INTO Users (name, api_key) VALUES ('u', 'k')")
+    wallets = WalletRepository(connection)
+    wallets.insert_wallet(1, OPENING_BALANCE, "W1")
+    wallets.insert_wallet(1, OPENING_BALANCE, "W2")
+    ledger = LedgerRepository(connection, interval)
+
+    for start in range(1, transfers + 1, CHUNK):
+        chunk = [
+            Transaction(id=transaction_id,
+                        sender_wallet_id=1 if transaction_id % 2 else 2,
+                        receiver_wallet_id=2 if transaction_id % 2 else 1,
+                        transfer_amount=100 + transaction_id % 7,
+                        transfer_fee=transaction_id % 3)
+            for transaction_id in range(start, min(start + CHUNK, transfers + 1))
+        ]
+        connection.executemany(
+            "INSERT INTO Transactions (id, sender_wallet_id, receiver_wallet_id, "
+            "transfer_amount, transfer_fee) VALUES (?, ?, ?, ?, ?)",
+            [(tr.id, tr.sender_wallet_id, tr.receiver_wallet_id,
+              tr.transfer_amount, tr.transfer_fee) for tr in chunk])
+        ledger.record_transfers(chunk)
+        connection.commit()
+    connection.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transfers", type=int, default=1_000_000)
+    parser.add_argument("--interval", type=int, default=1000)
+    parser.add_argument("--queries", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = str(Path(directory) / "bench.db")
+        started = time.perf_counter()
+        seed(db_path, args.transfers, args.interval)
+        print(f"seeded {args.transfers} transfers in "
+              f"{time.perf_counter() - started:.1f} s")
+
+        connection = sqlite3.connect(db_path)
+        connection.row_factory = sqlite3.Row
+        ledger = LedgerRepository(connection, args.interval)
+        rng = random.Random(3)
+        targets = [rng.randint(1, args.transfers) for _ in range(args.queries)]
+
+        started = time.perf_counter()
+        replayed = [OPENING_BALANCE + connection.execute(
+            REPLAY_SQL, (1, target)).fetchone()[0] for target in targets]
+        replay_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        checkpointed = [ledger.balance_as_of(1, transaction_id=target)
+                        for target in targets]
+        checkpoint_seconds = time.perf_counter() - started
+        connection.close()
+
+        if replayed != checkpointed:
+            raise AssertionError("Checkpointed balances differ from the replay")
+        for name, seconds in (("replay of Transactions", replay_seconds),
+                              ("checkpoint + postings window", checkpoint_seconds)):
+            print(f"{name:<32}{seconds / args.queries * 1e3:>10.3f} ms/query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Compares wallet addresses stored as 36-character TEXT with the 16-byte
+BLOBs of ``WALLET_COMPACT_KEYS`` on one database of many wallets:
+
+* the size of the UNIQUE index on ``Wallets.wallet_address``, of the table
+  and of the whole file,
+* the index probe alone: the lookup statement run with addresses already in
+  the stored form,
+* ``WalletRepository.get_wallet_by_address`` on random addresses, which
+  adds the conversion at the repository boundary.
+
+Timings are the best of three passes over the same addresses.
+
+The database is seeded with TEXT addresses, measured, converted with
+``convert_stored_keys`` (what ``compact_keys.py`` runs) and vacuumed, then
+measured again.
+
+    python -m benchmarks.key_storage_benchmark --wallets 3000000
+"""
+import argparse
+import random
+import sqlite3
+import tempfile
+import time
+import uuid
+from collections.abc import Callable
+from functools import partial
+from pathlib import Path
+
+from config import settings
+from database.database_init import init_db
+from repository import sql_catalog
+from repository.key_codec import convert_stored_keys, encode_key
+from repository.wallet_repository import WalletRepository
+
+CHUNK = 50_000
+ADDRESS_INDEX = "sqlite_autoindex_Wallets_1"
+
+
+def seed(db_path: str, wallets: int) -> list[str]:
+    init_db(db_path)
+    rng = random.Random(5)
+    addresses = [str(uuid.UUID(int=rng.getrandbits(128), version=4))
+                 for _ in range(wallets)]
+    with sqlite3.connect(db_path) as connection:
+        connection.execute("PRAGMA synchronous = OFF")
+        connection.execute("INSERT INTO Users (name, api_key) VALUES ('u', 'k')")
+        for start in range(0, wallets, CHUNK):
+            connection.executemany(
+                sql_catalog.INSERT_WALLET,
+                [(1, 1000, address) for address in addresses[start:start + CHUNK]])
+    return addresses
+
+
+def sizes(connection: sqlite3.Connection) -> tuple[int, int, int]:
+    def size_of(name: str) -> int:
+        return int(connection.execute(
+            "SELECT SUM(pgsize) FROM dbstat WHERE name = ?", (name,)).fetchone()[0])
+
+    page_size, pages = (connection.execute(f"PRAGMA {pragma}").fetchone()[0]
+                        for pragma in ("page_size", "page_count"))
+    return size_of(ADDRESS_INDEX), size_of("Wallets"), page_size * pages
+
+
+def best_of_three(lookup: Callable[[], None]) -> float:
+    timings = []
+    for _ in range(3):
+        started = time.perf_counter()
+        lookup()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def probe(connection: sqlite3.Connection, keys: list[str | bytes]) -> None:
+    for key in keys:
+        connection.execute(sql_catalog.SELECT_WALLET_BY_ADDRESS, (key,)).fetchone()
+
+
+def repository_lookups(connection: sqlite3.Connection, addresses: list[str]) -> None:
+    wallets = WalletRepository(connection)
+    for address in addresses:
+        if wallets.get_wallet_by_address(address) is None:
+            raise AssertionError(f"Wallet {address} not found")
+
+
+def measure(db_path: str, addresses: list[str], compact: bool) -> None:
+    settings.COMPACT_KEYS = compact
+    connection = sqlite3.connect(db_path)
+    connection.row_factory = sqlite3.Row
+    index_bytes, table_bytes, file_bytes = sizes(connection)
+    keys = [encode_key(address) for address in addresses]
+    probe_seconds = best_of_three(partial(probe, connection, keys))
+    lookup_seconds = best_of_three(
+        partial(repository_lookups, connection, addresses))
+    connection.close()
+    name = "BLOB (16 bytes)" if compact else "TEXT (36 chars)"
+    print(f"{name:<18}index {index_bytes / 2**20:>7.1f} MiB  "
+          f"table {table_bytes / 2**20:>7.1f} MiB  "
+          f"file {file_bytes / 2**20:>7.1f} MiB  "
+          f"probe {probe_seconds / len(addresses) * 1e6:>6.2f} us  "
+          f"repository {lookup_seconds / len(addresses) * 1e6:>6.2f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--wallets", type=int, default=3_000_000)
+    parser.add_argument("--queries", type=int, default=200_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = str(Path(directory) / "bench.db")
+        started = time.perf_counter()
+        addresses = seed(db_path, args.wallets)
+        print(f"seeded {args.wallets} wallets in "
+              f"{time.perf_counter() - started:.1f} s")
+        with sqlite3.connect(db_path) as connection:
+            connection.execute("VACUUM")
+        queries = random.Random(7).choices(addresses, k=args.queries)
+        measure(db_path, queries, compact=False)
+
+        started = time.perf_counter()
+        with sqlite3.connect(db_path) as connection:
+            convert_stored_keys(connection, compact=True)
+        print(f"converted in {time.perf_counter() - started:.1f} s")
+        with sqlite3.connect(db_path) as connection:
+            connection.execute("VACUUM")
+        measure(db_path, queries, compact=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Measures cold start: the import time of ``main`` broken down per module,
+and how long ``init_db`` takes on a fresh and on an up-to-date database.
+
+    python -m benchmarks.startup_benchmark --runs 5 --top 25
+"""
+import argparse
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from database.database_init import init_db
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def import_times() -> tuple[dict[str, int], dict[str, int]]:
+    """Runs ``import main`` in a fresh interpreter and returns the self and
+    cumulative import time of every module, in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        capture_output=True, text=True, check=True
+    )
+    self_times: dict[str, int] = {}
+    cumulative_times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, _, module = match.groups()
+            self_times[module] = int(self_us)
+            cumulative_times[module] = int(cumulative_us)
+    return self_times, cumulative_times
+
+
+def top_level_package(module: str) -> str:
+    return module.split(".")[0]
+
+
+def time_init_db(db_path: str) -> float:
+    started = time.perf_counter()
+    init_db(db_path)
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    self_samples: dict[str, list[int]] = defaultdict(list)
+    cumulative_samples: dict[str, list[int]] = defaultdict(list)
+    for _ in range(args.runs):
+        self_times, cumulative_times = import_times()
+        for module, self_us in self_times.items():
+            self_samples[module].append(self_us)
+            cumulative_samples[module].append(cumulative_times[module])
+
+    per_package: dict[str, float] = defaultdict(float)
+    for module, samples in self_samples.items():
+        per_package[top_level_package(module)] += statistics.median(samples)
+
+    total_ms = statistics.median(cumulative_samples["main"]) / 1000
+    print(f"import main: {total_ms:.1f} ms (median of {args.runs} runs)\n")
+
+    print(f"{'package':<32}{'self ms':>10}")
+    for package, package_us in sorted(per_package.items(),
+                                   key=lambda item: -item[1])[:args.top]:
+        print(f"{package:<32}{package_us / 1000:>10.1f}")
+
+    print(f"\n{'module':<48}{'cumulative ms':>15}")
+    ranked = sorted(cumulative_samples.items(),
+                    key=lambda item: -statistics.median(item[1]))
+    for module, samples in ranked[:args.top]:
+        print(f"{module:<48}{statistics.median(samples) / 1000:>15.1f}")
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = str(Path(directory) / "startup.db")
+        fresh = time_init_db(db_path)
+        current = time_init_db(db_path)
+    print(f"\ninit_db fresh: {fresh * 1000:.2f} ms, "
+          f"already current: {current * 1000:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
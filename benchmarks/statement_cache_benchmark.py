@@ -0,0 +1,105 @@
+"""Compares the cost of the id-list queries behind ``get_wallets_by_ids`` and
+``get_transactions_by_wallet_ids`` when
+
+* every request opens a fresh connection and renders ``IN (?, ?, ...)``
+  (the old behaviour),
+* a pooled connection is reused but the IN list still changes the SQL text
+  with every length, thrashing the statement cache,
+* a pooled connection runs the fixed ``sql_catalog`` statements.
+
+The Transactions table is kept small so that statement preparation and
+connection setup, rather than the unindexed OR scan, dominate the numbers.
+
+    python -m benchmarks.statement_cache_benchmark --queries 20000
+"""
+import argparse
+import json
+import random
+import sqlite3
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from database.database_init import init_db
+from repository import sql_catalog
+
+WALLETS = 2_000
+TRANSACTIONS = 500
+
+
+def seed(db_path: str) -> None:
+    init_db(db_path)
+    with sqlite3.connect(db_path) as connection:
+        connection.execute("INSERT INTO Users (name, api_key) VALUES ('u', 'k')")
+        connection.executemany(
+            "INSERT INTO Wallets (user_id, balance, wallet_address) "
+            "VALUES (1, 0, ?)", [(f"W{i}",) for i in range(WALLETS)])
+        rng = random.Random(1)
+        connection.executemany(
+            "INSERT INTO Transactions (sender_wallet_id, receiver_wallet_id, "
+            "transfer_amount, transfer_fee) VALUES (?, ?, 100, 1)",
+            [(rng.randint(1, WALLETS), rng.randint(1, WALLETS))
+             for _ in range(TRANSACTIONS)])
+
+
+def in_list_queries(connection: sqlite3.Connection, ids: list[int]) -> None:
+    placeholders = ",".join("?" for _ in ids)
+    connection.execute(
+        f"SELECT id, user_id, balance, wallet_address FROM Wallets "
+        f"WHERE id IN ({placeholders})", ids).fetchall()
+    connection.execute(
+        f"SELECT id, sender_wallet_id, receiver_wallet_id, transfer_amount, "
+        f"transfer_fee FROM Transactions WHERE sender_wallet_id in "
+        f"({placeholders}) OR receiver_wallet_id in ({placeholders})",
+        ids + ids).fetchall()
+
+
+def catalog_queries(connection: sqlite3.Connection, ids: list[int]) -> None:
+    encoded = json.dumps(ids)
+    connection.execute(sql_catalog.SELECT_WALLETS_BY_IDS, (encoded,)).fetchall()
+    connection.execute(
+        sql_catalog.SELECT_TRANSACTIONS_BY_WALLET_IDS, (encoded,)).fetchall()
+
+
+def run(db_path: str, id_lists: list[list[int]], pooled: bool,
+        queries: Callable[[sqlite3.Connection, list[int]], None]) -> float:
+    pooled_connection = sqlite3.connect(db_path, cached_statements=64)
+    started = time.perf_counter()
+    for ids in id_lists:
+        if pooled:
+            queries(pooled_connection, ids)
+        else:
+            connection = sqlite3.connect(db_path)
+            queries(connection, ids)
+            connection.close()
+    elapsed = time.perf_counter() - started
+    pooled_connection.close()
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--queries", type=int, default=5_000)
+    parser.add_argument("--max-ids", type=int, default=64)
+    args = parser.parse_args()
+
+    rng = random.Random(2)
+    id_lists = [rng.sample(range(1, WALLETS + 1), rng.randint(1, args.max_ids))
+                for _ in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        db_path = str(Path(directory) / "bench.db")
+        seed(db_path)
+        scenarios = [
+            ("connection per request, IN lists", False, in_list_queries),
+            ("pooled connection, IN lists", True, in_list_queries),
+            ("pooled connection, sql_catalog", True, catalog_queries),
+        ]
+        for name, pooled, queries in scenarios:
+            elapsed = run(db_path, id_lists, pooled, queries)
+            print(f"{name:<36}{elapsed / args.queries * 1e6:>10.1f} us/request")
+
+
+if __name__ == "__main__":
+    main()
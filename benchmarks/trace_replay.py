@@ -0,0 +1,304 @@
+"""Replays recorded or synthetic request traces against a running API.
+
+Record a trace by starting the API with ``WALLET_TRACE_PATH=trace.jsonl``,
+or synthesize one with a chosen request mix:
+
+    python -m benchmarks.trace_replay synthesize trace.jsonl --rate 200 \\
+        --duration 30 --mix make_transaction=0.7,get_wallet=0.2,get_transactions=0.1
+
+Seed a database, start the API on it and replay at twice the recorded rate:
+
+    python -m benchmarks.trace_replay seed replay.db --users 1000
+    WALLET_DB_PATH=replay.db python serve.py --workers 4
+    python -m benchmarks.trace_replay replay trace.jsonl --users 1000 --scale 2
+
+Replay is open loop: each request is sent at its scheduled time whether or
+not earlier ones have completed, and latency is measured from that scheduled
+time, so queueing in an overloaded server shows up in the tail.
+"""
+import argparse
+import asyncio
+import math
+import random
+import sqlite3
+import time
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterable
+from contextlib import closing
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+
+from config import settings
+from database.database_init import init_db
+from middleware.trace_recorder import TraceEvent
+from repository.wallet_repository import WalletRepository
+
+SEED_BALANCE = 10**12
+TRANSFER_AMOUNT = 1_000
+
+# Named request kinds for synthetic mixes, as (method, route template).
+REQUEST_KINDS = {
+    "make_transaction": ("POST", "/transactions"),
+    "get_transactions": ("GET", "/transactions"),
+    "get_wallet": ("GET", "/wallets/{address}"),
+    "get_wallets": ("GET", "/wallets"),
+    "get_wallet_transactions": ("GET", "/wallets/{address}/transactions"),
+    "create_wallet": ("POST", "/wallets"),
+    "create_user": ("POST", "/users"),
+    "get_statistics": ("GET", "/statistics"),
+}
+
+
+def api_key(user_index: int) -> str:
+    return f"replay-key-{user_index}"
+
+
+def wallet_address(user_index: int, wallet_index: int) -> str:
+    return f"replay-wallet-{user_index}-{wallet_index}"
+
+
+def seed(db_path: str, users: int, wallets_per_user: int) -> None:
+    """Creates the users and wallets ``replay`` addresses, named
+    deterministically so both sides agree without a manifest. Wallets are
+    opened in the ledger like any other."""
+    init_db(db_path)
+    with closing(sqlite3.connect(db_path)) as connection, connection:
+        connection.executemany(
+            "INSERT INTO Users (id, name, api_key) VALUES (?, ?, ?)",
+            [(index + 1, f"replay user {index}", api_key(index))
+             for index in range(users)]
+        )
+        WalletRepository(connection).insert_wallets(
+            [(index + 1, SEED_BALANCE, wallet_address(index, wallet))
+             for index in range(users) for wallet in range(wallets_per_user)]
+        )
+
+
+def synthesize(rate: float, duration: float, mix: dict[str, float],
+               users: int, rng: random.Random) -> list[TraceEvent]:
+    """Poisson arrivals at ``rate`` requests per second, each drawn from
+    ``mix`` and sent by a uniformly chosen seeded user."""
+    kinds = list(mix)
+    weights = [mix[kind] for kind in kinds]
+    events = []
+    at = rng.expovariate(rate)
+    while at < duration:
+        method, route = REQUEST_KINDS[rng.choices(kinds, weights)[0]]
+        events.append(TraceEvent(
+            at=round(at, 6), method=method, route=route,
+            key=format(rng.randrange(users), "x"), request_bytes=0,
+            response_bytes=0, status=0, duration_ms=0.0
+        ))
+        at += rng.expovariate(rate)
+    return events
+
+
+@dataclass(frozen=True)
+class PlannedRequest:
+    at: float
+    route: str
+    method: str
+    path: str
+    headers: dict[str, str]
+    body: dict[str, Any] | None
+
+
+class RequestPlanner:
+    """Turns trace events into concrete requests against the seeded data.
+
+    Recorded keys are hashes, so each distinct key is mapped onto a seeded
+    user; requests with the same key keep acting as the same user.
+    """
+
+    def __init__(self, users: int, wallets_per_user: int,
+                 rng: random.Random) -> None:
+        self.users = users
+        self.wallets_per_user = wallets_per_user
+        self.rng = rng
+        self._builders: dict[tuple[str, str], Callable[[int], tuple[
+            str, dict[str, str], dict[str, Any] | None]]] = {
+            ("POST", "/transactions"): self._make_transaction,
+            ("GET", "/transactions"): lambda user: (
+                "/transactions", self._auth(user), None),
+            ("GET", "/wallets/{address}"): lambda user: (
+                f"/wallets/{self._own_wallet(user)}", self._auth(user), None),
+            ("GET", "/wallets"): lambda user: ("/wallets", self._auth(user), None),
+            ("GET", "/wallets/{address}/transactions"): lambda user: (
+                f"/wallets/{self._own_wallet(user)}/transactions",
+                self._auth(user), None),
+            ("POST", "/wallets"): lambda user: ("/wallets", self._auth(user), None),
+            ("POST", "/users"): lambda user: (
+                "/users", {}, {"name": f"replay user {user}"}),
+            ("GET", "/users"): lambda _: ("/users", {}, None),
+            ("GET", "/users/{user_id}"): lambda user: (f"/users/{user + 1}", {}, None),
+            ("GET", "/statistics"): lambda _: (
+                "/statistics", {"admin-api-key": settings.ADMIN_API_KEY}, None),
+            ("GET", "/metrics"): lambda _: ("/metrics", {}, None),
+        }
+
+    def _user_for(self, key: str | None) -> int:
+        if key is None:
+            return self.rng.randrange(self.users)
+        return int(key, 16) % self.users
+
+    def _auth(self, user: int) -> dict[str, str]:
+        return {"x-api-key": api_key(user)}
+
+    def _own_wallet(self, user: int) -> str:
+        return wallet_address(user, self.rng.randrange(self.wallets_per_user))
+
+    def _make_transaction(
+            self, user: int) -> tuple[str, dict[str, str], dict[str, Any]]:
+        receiver = self.rng.randrange(self.users)
+        return "/transactions", self._auth(user), {
+            "sender_wallet_address": self._own_wallet(user),
+            "receiver_wallet_address": self._own_wallet(receiver),
+            "transfer_amount": TRANSFER_AMOUNT,
+        }
+
+    def plan(self, event: TraceEvent, scale: float) -> PlannedRequest | None:
+        builder = self._builders.get((event.method, event.route))
+        if builder is None:
+            return None
+        path, headers, body = builder(self._user_for(event.key))
+        return PlannedRequest(event.at / scale, event.route, event.method,
+                              path, headers, body)
+
+
+@dataclass(frozen=True)
+class Outcome:
+    route: str
+    status: int
+    latency_ms: float
+
+
+def percentile(sorted_values: list[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+async def replay(requests: list[PlannedRequest], base_url: str,
+                 max_connections: int, timeout: float) -> list[Outcome]:
+    outcomes: list[Outcome] = []
+    limits = httpx.Limits(max_connections=max_connections)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits,
+                                 timeout=timeout) as client:
+
+        async def send(request: PlannedRequest, scheduled: float) -> None:
+            try:
+                response = await client.request(
+                    request.method, request.path, headers=request.headers,
+                    json=request.body)
+                status = response.status_code
+            except httpx.HTTPError:
+                status = 0
+            outcomes.append(Outcome(
+                request.route, status, (time.perf_counter() - scheduled) * 1000))
+
+        tasks = []
+        started = time.perf_counter()
+        for request in requests:
+            scheduled = started + request.at
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(send(request, scheduled)))
+        await asyncio.gather(*tasks)
+    return outcomes
+
+
+def report(outcomes: Iterable[Outcome], wall_seconds: float) -> list[str]:
+    by_route: dict[str, list[float]] = defaultdict(list)
+    statuses: Counter[int] = Counter()
+    for outcome in outcomes:
+        by_route[outcome.route].append(outcome.latency_ms)
+        by_route["all"].append(outcome.latency_ms)
+        statuses[outcome.status] += 1
+
+    total = len(by_route["all"])
+    lines = [f"{total} requests in {wall_seconds:.1f}s "
+             f"({total / wall_seconds if wall_seconds else 0:.0f} req/s), "
+             f"status counts {dict(sorted(statuses.items()))}",
+             f"{'route':<36}{'count':>8}{'p50 ms':>10}{'p95 ms':>10}"
+             f"{'p99 ms':>10}{'max ms':>10}"]
+    for route, latencies in sorted(by_route.items()):
+        latencies.sort()
+        lines.append(
+            f"{route:<36}{len(latencies):>8}"
+            f"{percentile(latencies, 0.50):>10.1f}"
+            f"{percentile(latencies, 0.95):>10.1f}"
+            f"{percentile(latencies, 0.99):>10.1f}{latencies[-1]:>10.1f}")
+    return lines
+
+
+def parse_mix(text: str) -> dict[str, float]:
+    mix = {}
+    for part in text.split(","):
+        kind, _, weight = part.partition("=")
+        if kind not in REQUEST_KINDS:
+            raise argparse.ArgumentTypeError(f"unknown request kind {kind!r}")
+        mix[kind] = float(weight)
+    return mix
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    seed_parser = commands.add_parser("seed")
+    seed_parser.add_argument("db")
+
+    synthesize_parser = commands.add_parser("synthesize")
+    synthesize_parser.add_argument("trace")
+    synthesize_parser.add_argument("--rate", type=float, default=100)
+    synthesize_parser.add_argument("--duration", type=float, default=10)
+    synthesize_parser.add_argument(
+        "--mix", type=parse_mix,
+        default=parse_mix("make_transaction=0.6,get_wallet=0.3,get_transactions=0.1"))
+
+    replay_parser = commands.add_parser("replay")
+    replay_parser.add_argument("trace")
+    replay_parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    replay_parser.add_argument("--scale", type=float, default=1.0,
+                               help="arrival rate multiplier")
+    replay_parser.add_argument("--max-connections", type=int, default=256)
+    replay_parser.add_argument("--timeout", type=float, default=30)
+
+    for sub_parser in (seed_parser, synthesize_parser, replay_parser):
+        sub_parser.add_argument("--users", type=int, default=100)
+        sub_parser.add_argument("--wallets-per-user", type=int, default=3)
+        sub_parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    if args.command == "seed":
+        seed(args.db, args.users, args.wallets_per_user)
+    elif args.command == "synthesize":
+        with open(args.trace, "w") as trace:
+            for event in synthesize(args.rate, args.duration, args.mix,
+                                    args.users, rng):
+                trace.write(event.to_json() + "\n")
+    else:
+        planner = RequestPlanner(args.users, args.wallets_per_user, rng)
+        with open(args.trace) as trace:
+            planned = [planner.plan(TraceEvent.from_json(line), args.scale)
+                       for line in trace if line.strip()]
+        # Events are written as requests finish, so restore arrival order.
+        requests = sorted((request for request in planned if request is not None),
+                          key=lambda request: request.at)
+        print(f"Replaying {len(requests)} requests, skipped "
+              f"{len(planned) - len(requests)} on unknown routes")
+        started = time.perf_counter()
+        outcomes = asyncio.run(replay(requests, args.base_url,
+                                      args.max_connections, args.timeout))
+        print("\n".join(report(outcomes, time.perf_counter() - started)))
+
+
+if __name__ == "__main__":
+    main()
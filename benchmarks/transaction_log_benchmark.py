@@ -0,0 +1,110 @@
+"""Compares sustained transfer throughput of the SQLite and "log" durability
+modes and measures how long the log mode takes to recover its state.
+
+    python -m benchmarks.transaction_log_benchmark --transfers 20000
+"""
+import argparse
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from database.database_init import init_db
+from database.log_structured_store import LogStructuredStore
+from database.transaction_log import TransactionLog
+from dto.transaction_create_dto import TransactionCreateDto
+from repository.logged_transaction_repository import LoggedTransactionRepository
+from repository.logged_wallet_repository import LoggedWalletRepository
+from repository.transaction_repository import TransactionRepository
+from repository.user_repository import UserRepository
+from repository.wallet_repository import WalletRepository
+from service.transaction_service import TransactionService
+
+INITIAL_BALANCE = 10**12
+TRANSFER_AMOUNT = 1_000
+
+
+def open_connection(db_path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(db_path, check_same_thread=False)
+    connection.row_factory = sqlite3.Row
+    connection.execute("PRAGMA foreign_keys = ON;")
+    return connection
+
+
+def seed(db_path: str) -> list[tuple[str, str, str]]:
+    """Creates two users with one wallet each and returns the transfer
+    directions as (api_key, sender_address, receiver_address)."""
+    init_db(db_path)
+    connection = open_connection(db_path)
+    user_repo = UserRepository(connection)
+    wallet_repo = WalletRepository(connection)
+    first, second = user_repo.create_user("first"), user_repo.create_user("second")
+    wallet_repo.insert_wallet(first.id, INITIAL_BALANCE, "W1")
+    wallet_repo.insert_wallet(second.id, INITIAL_BALANCE, "W2")
+    connection.commit()
+    connection.close()
+    return [(first.api_key, "W1", "W2"), (second.api_key, "W2", "W1")]
+
+
+def run_transfers(db_path: str, transfers: int,
+                  store: LogStructuredStore | None) -> float:
+    directions = seed(db_path)
+    if store is not None:
+        store.recover()
+
+    started = time.perf_counter()
+    for index in range(transfers):
+        api_key, sender, receiver = directions[index % 2]
+        # One connection and one commit per transfer, as get_db does.
+        connection = open_connection(db_path)
+        if store is None:
+            service = TransactionService(
+                UserRepository(connection), WalletRepository(connection),
+                TransactionRepository(connection))
+        else:
+            service = TransactionService(
+                UserRepository(connection),
+                LoggedWalletRepository(connection, store),
+                LoggedTransactionRepository(connection, store))
+        service.make_transaction(
+            TransactionCreateDto(sender_wallet_address=sender,
+                                 receiver_wallet_address=receiver,
+                                 transfer_amount=TRANSFER_AMOUNT), api_key)
+        connection.commit()
+        connection.close()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transfers", type=int, default=5_000)
+    parser.add_argument("--snapshot-interval", type=int, default=10_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        sqlite_seconds = run_transfers(
+            str(Path(directory) / "sqlite.db"), args.transfers, None)
+
+        db_path = str(Path(directory) / "log.db")
+        log_path = str(Path(directory) / "log.log")
+        store = LogStructuredStore(
+            db_path, TransactionLog(log_path), args.snapshot_interval)
+        log_seconds = run_transfers(db_path, args.transfers, store)
+        store.log.close()
+
+        recovering = LogStructuredStore(
+            db_path, TransactionLog(log_path), args.snapshot_interval)
+        started = time.perf_counter()
+        replayed = recovering.recover()
+        recovery_seconds = time.perf_counter() - started
+        recovering.close()
+
+    print(f"transfers:            {args.transfers}")
+    print(f"sqlite make_transaction: {args.transfers / sqlite_seconds:10.0f} tx/s")
+    print(f"log make_transaction:    {args.transfers / log_seconds:10.0f} tx/s")
+    print(f"recovery: replayed {replayed} records in "
+          f"{recovery_seconds * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
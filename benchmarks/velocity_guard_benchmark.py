@@ -0,0 +1,49 @@
+"""Times ``VelocityGuard.admit`` with count and volume rules per wallet and
+per user, over transfers spread across many wallets, at one transfer per
+millisecond of simulated time so the windows keep sliding.
+
+    python -m benchmarks.velocity_guard_benchmark --transfers 200000
+"""
+import argparse
+import random
+import time
+from unittest.mock import MagicMock
+
+from exception.exceptions import VelocityLimitExceededError
+from service.metrics import MetricsRegistry
+from service.velocity_guard import TransferAttempt, VelocityGuard, parse_velocity_rules
+
+RULES = "wallet:count:20/60,wallet:volume:1000000/3600,user:count:100/60"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--transfers", type=int, default=200_000)
+    parser.add_argument("--wallets", type=int, default=10_000)
+    parser.add_argument("--buckets", type=int, default=60)
+    args = parser.parse_args()
+
+    guard = VelocityGuard(parse_velocity_rules(RULES), MagicMock(), args.buckets,
+                          MetricsRegistry())
+    rng = random.Random(5)
+    attempts = [
+        TransferAttempt(sender_wallet_id=wallet_id, sender_user_id=wallet_id // 4,
+                        amount=rng.randint(1, 10_000), at=1_000_000 + n / 1000)
+        for n, wallet_id in enumerate(rng.randrange(args.wallets)
+                                      for _ in range(args.transfers))
+    ]
+
+    rejected = 0
+    started = time.perf_counter()
+    for attempt in attempts:
+        try:
+            guard.admit(attempt)
+        except VelocityLimitExceededError:
+            rejected += 1
+    seconds = time.perf_counter() - started
+    print(f"{args.transfers} admissions, {rejected} rejected: "
+          f"{seconds / args.transfers * 1e6:.2f} us per admission")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Exports or imports Users, Wallets and Transactions as chunked binary files.
+
+    python bulk.py export wallet.bulk
+    python bulk.py import wallet.bulk
+
+Run it while the API is stopped. A failed import can be rerun with the same
+file and resumes after the last committed chunk.
+"""
+import argparse
+
+from config import settings
+from database.bulk_data import DEFAULT_CHUNK_ROWS, BulkStats, export_data, import_data
+
+
+def report_chunk(table_name: str, rows: int, stats: BulkStats) -> None:
+    print(f"{table_name}: {rows} rows, {stats.rows} total "
+          f"({stats.rows_per_second:,.0f} rows/s)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("command", choices=["export", "import"])
+    parser.add_argument("path")
+    parser.add_argument("--db", default=settings.DB_PATH)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        stats = export_data(args.db, args.path, args.chunk_rows, report_chunk)
+    else:
+        stats = import_data(args.db, args.path, report_chunk)
+        if stats.skipped_chunks:
+            print(f"Resumed after {stats.skipped_chunks} imported chunks")
+
+    print(f"{args.command}ed {stats.rows} rows in {stats.chunks} chunks, "
+          f"{stats.seconds:.2f}s ({stats.rows_per_second:,.0f} rows/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+from functools import cache
+
+from cache.invalidating_cache import InvalidatingCache
+from cache.invalidation_channel import get_invalidation_channel
+from config import settings
+from entity.user import User
+from entity.wallet import Wallet
+
+
+@cache
+def get_user_cache() -> InvalidatingCache[User]:
+    return InvalidatingCache(
+        get_invalidation_channel(), "user", settings.USER_CACHE_MAX_ENTRIES
+    )
+
+
+@cache
+def get_wallet_cache() -> InvalidatingCache[Wallet]:
+    return InvalidatingCache(
+        get_invalidation_channel(), "wallet", settings.WALLET_CACHE_MAX_ENTRIES
+    )
+
+
+@cache
+def get_btc_rate_cache() -> InvalidatingCache[float]:
+    return InvalidatingCache(
+        get_invalidation_channel(), "btc_rate", 1,
+        ttl_seconds=settings.BTC_PRICE_CACHE_TTL_SECONDS
+    )
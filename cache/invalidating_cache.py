@@ -0,0 +1,63 @@
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+
+from cache.invalidation_channel import InvalidationChannel
+
+
+class InvalidatingCache[V]:
+    """Bounded LRU cache whose entries are dropped when their key is bumped
+    on the ``InvalidationChannel`` by any worker, or once ``ttl_seconds``
+    have passed."""
+
+    def __init__(self, channel: InvalidationChannel, namespace: str,
+                 max_entries: int, ttl_seconds: float | None = None) -> None:
+        self.channel = channel
+        self.namespace = namespace
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[int, float, V]] = OrderedDict()
+
+    def _channel_key(self, key: str) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: str) -> V | None:
+        generation = self.channel.generation(self._channel_key(key))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            loaded_generation, loaded_at, value = entry
+            expired = (self.ttl_seconds is not None and
+                       time.monotonic() - loaded_at >= self.ttl_seconds)
+            if loaded_generation != generation or expired:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def load(self, key: str, loader: Callable[[], V | None]) -> V | None:
+        cached = self.get(key)
+        if cached is not None:
+            return cached
+
+        # The generation is read before loading, so a bump that lands while
+        # the loader runs leaves the new entry already stale.
+        generation = self.channel.generation(self._channel_key(key))
+        value = loader()
+        if value is not None:
+            with self._lock:
+                self._entries[key] = (generation, time.monotonic(), value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, key: str) -> None:
+        self.channel.bump(self._channel_key(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,70 @@
+import fcntl
+import mmap
+import os
+import struct
+import threading
+import zlib
+from functools import cache
+
+from config import settings
+
+STRIPES = 4096
+_COUNTER = struct.Struct("<Q")
+CHANNEL_SIZE = STRIPES * _COUNTER.size
+
+
+def create_channel_file(path: str) -> None:
+    with open(path, "wb") as channel_file:
+        channel_file.truncate(CHANNEL_SIZE)
+
+
+class InvalidationChannel:
+    """Generation counters shared by every worker process.
+
+    Keys are hashed onto a fixed number of 64-bit counters in a memory-mapped
+    file. Caches remember the generation a value was loaded at and drop it as
+    soon as the counter moves, so reading a key's generation is a single
+    memory load and invalidating it is one locked increment. Unrelated keys
+    sharing a stripe only cause a spurious reload. Without a path the counters
+    live in anonymous memory and only cover the current process.
+    """
+
+    def __init__(self, path: str | None = None) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd: int | None = None
+        if path is None:
+            self._map = mmap.mmap(-1, CHANNEL_SIZE)
+        else:
+            self._fd = os.open(path, os.O_RDWR)
+            self._map = mmap.mmap(self._fd, CHANNEL_SIZE)
+
+    @staticmethod
+    def _offset(key: str) -> int:
+        return (zlib.crc32(key.encode()) % STRIPES) * _COUNTER.size
+
+    def generation(self, key: str) -> int:
+        generation: int = _COUNTER.unpack_from(self._map, self._offset(key))[0]
+        return generation
+
+    def bump(self, key: str) -> None:
+        offset = self._offset(key)
+        with self._lock:
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                current = _COUNTER.unpack_from(self._map, offset)[0]
+                _COUNTER.pack_into(self._map, offset, current + 1)
+            finally:
+                if self._fd is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        self._map.close()
+        if self._fd is not None:
+            os.close(self._fd)
+
+
+@cache
+def get_invalidation_channel() -> InvalidationChannel:
+    return InvalidationChannel(settings.INVALIDATION_CHANNEL_PATH)
@@ -0,0 +1,37 @@
+"""Converts the API keys and wallet addresses already stored in a database
+to 16-byte BLOBs, or with ``--expand`` back to TEXT, in one transaction.
+
+    python compact_keys.py --db bitcoin_wallet.db
+    python compact_keys.py --db bitcoin_wallet.db --expand
+
+Run it with the application stopped, then start it with
+``WALLET_COMPACT_KEYS`` set to match (``1`` after compacting, ``0`` after
+expanding); lookups in the other form find nothing.
+"""
+import argparse
+import sqlite3
+import time
+from contextlib import closing
+
+from config import settings
+from database.database_init import init_db
+from repository.key_codec import convert_stored_keys
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", default=settings.DB_PATH)
+    parser.add_argument("--expand", action="store_true",
+                        help="convert BLOB keys back to TEXT")
+    args = parser.parse_args()
+
+    init_db(args.db)
+    started = time.perf_counter()
+    connection = sqlite3.connect(args.db, timeout=settings.DB_BUSY_TIMEOUT_SECONDS)
+    with closing(connection), connection:
+        converted = convert_stored_keys(connection, compact=not args.expand)
+    print(f"Converted {converted} keys in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
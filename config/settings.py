@@ -0,0 +1,200 @@
+import os
+
+DB_PATH = os.environ.get("WALLET_DB_PATH", "bitcoin_wallet.db")
+
+# Sent as the admin-api-key header by /statistics and /admin callers.
+ADMIN_API_KEY = os.environ.get("WALLET_ADMIN_API_KEY", "secret_admin_api_key")
+
+# "sqlite" writes every transfer straight to the Wallets/Transactions tables,
+# "log" appends transfers to TRANSACTION_LOG_PATH and keeps balances in memory.
+DURABILITY_MODE = os.environ.get("WALLET_DURABILITY_MODE", "sqlite")
+TRANSACTION_LOG_PATH = os.environ.get(
+    "WALLET_TRANSACTION_LOG_PATH", "bitcoin_wallet.log"
+)
+TRANSACTION_LOG_FSYNC_BATCH_SIZE = int(
+    os.environ.get("WALLET_TRANSACTION_LOG_FSYNC_BATCH_SIZE", "64")
+)
+TRANSACTION_LOG_FSYNC_INTERVAL_SECONDS = float(
+    os.environ.get("WALLET_TRANSACTION_LOG_FSYNC_INTERVAL_SECONDS", "0.05")
+)
+TRANSACTION_LOG_SNAPSHOT_INTERVAL = int(
+    os.environ.get("WALLET_TRANSACTION_LOG_SNAPSHOT_INTERVAL", "10000")
+)
+
+# Several uvicorn workers share DB_PATH; writers wait this long for the lock.
+WORKERS = int(os.environ.get("WALLET_WORKERS", "1"))
+DB_BUSY_TIMEOUT_SECONDS = float(os.environ.get("WALLET_DB_BUSY_TIMEOUT_SECONDS", "5"))
+# Set by serve.py so every worker maps the same invalidation counters.
+INVALIDATION_CHANNEL_PATH = os.environ.get("WALLET_INVALIDATION_CHANNEL_PATH")
+USER_CACHE_MAX_ENTRIES = int(os.environ.get("WALLET_USER_CACHE_MAX_ENTRIES", "10000"))
+WALLET_CACHE_MAX_ENTRIES = int(
+    os.environ.get("WALLET_WALLET_CACHE_MAX_ENTRIES", "10000")
+)
+BTC_PRICE_CACHE_TTL_SECONDS = float(
+    os.environ.get("WALLET_BTC_PRICE_CACHE_TTL_SECONDS", "30")
+)
+
+# The background refresher polls the BTC price and request handlers read the
+# last published rate; a rate older than the threshold raises the stale alert.
+PRICE_REFRESH_ENABLED = os.environ.get("WALLET_PRICE_REFRESH_ENABLED", "1") == "1"
+PRICE_REFRESH_INTERVAL_SECONDS = float(
+    os.environ.get("WALLET_PRICE_REFRESH_INTERVAL_SECONDS", "15")
+)
+PRICE_REFRESH_MAX_BACKOFF_SECONDS = float(
+    os.environ.get("WALLET_PRICE_REFRESH_MAX_BACKOFF_SECONDS", "300")
+)
+PRICE_STALENESS_THRESHOLD_SECONDS = float(
+    os.environ.get("WALLET_PRICE_STALENESS_THRESHOLD_SECONDS", "120")
+)
+# Wallet responses wait at most this long for a BTC rate that is not cached
+# yet; past it they leave balance_usd empty while the lookup continues in the
+# background. 0 waits for the rate however long it takes.
+PRICE_LOOKUP_BUDGET_SECONDS = float(
+    os.environ.get("WALLET_PRICE_LOOKUP_BUDGET_SECONDS", "0.5")
+)
+
+# JSON fee rules (see service.fee_schedule.parse_fee_rules); without a file
+# every transfer between different users pays the flat 1.5%.
+FEE_SCHEDULE_PATH = os.environ.get("WALLET_FEE_SCHEDULE_PATH")
+FEE_SCHEDULE_RELOAD_INTERVAL_SECONDS = float(
+    os.environ.get("WALLET_FEE_SCHEDULE_RELOAD_INTERVAL_SECONDS", "5")
+)
+
+# Pooled connections keep their prepared statements between requests.
+DB_POOL_MAX_IDLE = int(os.environ.get("WALLET_DB_POOL_MAX_IDLE", "16"))
+DB_STATEMENT_CACHE_SIZE = int(
+    os.environ.get("WALLET_DB_STATEMENT_CACHE_SIZE", "64")
+)
+
+# Every request is appended to TRACE_PATH as a JSON line for
+# benchmarks.trace_replay; API keys are hashed with TRACE_KEY_SALT.
+TRACE_PATH = os.environ.get("WALLET_TRACE_PATH")
+TRACE_KEY_SALT = os.environ.get("WALLET_TRACE_KEY_SALT", "")
+
+# Service methods marked read_only query a separate pool of mode=ro
+# connections, so reporting reads never hold the writer's connection.
+DB_READ_SPLIT_ENABLED = os.environ.get("WALLET_DB_READ_SPLIT_ENABLED", "1") == "1"
+DB_READ_POOL_MAX_IDLE = int(os.environ.get("WALLET_DB_READ_POOL_MAX_IDLE", "16"))
+
+# Archived Transactions partitions (see database.transaction_archive) are
+# read through small pools of mode=ro connections, one pool per file.
+DB_ARCHIVE_POOL_MAX_IDLE = int(os.environ.get("WALLET_DB_ARCHIVE_POOL_MAX_IDLE", "2"))
+TRANSACTION_ARCHIVE_DIR = os.environ.get("WALLET_TRANSACTION_ARCHIVE_DIR", "archive")
+
+# Token buckets per x-api-key and for the whole server, off unless enabled;
+# serve.py points RATE_LIMIT_STORE_PATH at a file shared by every worker.
+# Load shedding is off while both of its thresholds are 0.
+RATE_LIMIT_ENABLED = os.environ.get("WALLET_RATE_LIMIT_ENABLED", "0") == "1"
+RATE_LIMIT_PER_KEY_RATE = float(os.environ.get("WALLET_RATE_LIMIT_PER_KEY_RATE", "50"))
+RATE_LIMIT_PER_KEY_BURST = float(
+    os.environ.get("WALLET_RATE_LIMIT_PER_KEY_BURST", "100")
+)
+RATE_LIMIT_GLOBAL_RATE = float(os.environ.get("WALLET_RATE_LIMIT_GLOBAL_RATE", "2000"))
+RATE_LIMIT_GLOBAL_BURST = float(
+    os.environ.get("WALLET_RATE_LIMIT_GLOBAL_BURST", "4000")
+)
+RATE_LIMIT_STORE_PATH = os.environ.get("WALLET_RATE_LIMIT_STORE_PATH")
+LOAD_SHED_MAX_IN_FLIGHT = int(os.environ.get("WALLET_LOAD_SHED_MAX_IN_FLIGHT", "0"))
+LOAD_SHED_MAX_P99_MS = float(os.environ.get("WALLET_LOAD_SHED_MAX_P99_MS", "0"))
+
+# CoinGecko is called over a pooled keep-alive session; failed calls are
+# retried with jitter, and after PRICE_CIRCUIT_FAILURE_THRESHOLD failed calls
+# in a row it is left alone for PRICE_CIRCUIT_RESET_SECONDS while the last
+# known rate is served.
+PRICE_HTTP_TIMEOUT_SECONDS = float(
+    os.environ.get("WALLET_PRICE_HTTP_TIMEOUT_SECONDS", "2")
+)
+PRICE_HTTP_MAX_ATTEMPTS = int(os.environ.get("WALLET_PRICE_HTTP_MAX_ATTEMPTS", "3"))
+PRICE_HTTP_BACKOFF_SECONDS = float(
+    os.environ.get("WALLET_PRICE_HTTP_BACKOFF_SECONDS", "0.2")
+)
+PRICE_HTTP_POOL_SIZE = int(os.environ.get("WALLET_PRICE_HTTP_POOL_SIZE", "4"))
+PRICE_CIRCUIT_FAILURE_THRESHOLD = int(
+    os.environ.get("WALLET_PRICE_CIRCUIT_FAILURE_THRESHOLD", "3")
+)
+PRICE_CIRCUIT_RESET_SECONDS = float(
+    os.environ.get("WALLET_PRICE_CIRCUIT_RESET_SECONDS", "30")
+)
+
+# Comma-separated price sources (coingecko, coinbase, kraken, bitstamp), each
+# optionally followed by ":<deadline seconds>". With several sources the rate
+# is the median of those answering within their deadline, and at least
+# PRICE_SOURCES_MIN_ANSWERS of them must answer.
+PRICE_SOURCES = os.environ.get("WALLET_PRICE_SOURCES", "coingecko")
+PRICE_SOURCE_DEADLINE_SECONDS = float(
+    os.environ.get("WALLET_PRICE_SOURCE_DEADLINE_SECONDS", "1.5")
+)
+PRICE_SOURCES_MIN_ANSWERS = int(os.environ.get("WALLET_PRICE_SOURCES_MIN_ANSWERS", "1"))
+
+# Transfer event streams (SSE and WebSocket) send a heartbeat and re-read
+# the wallet's newest transfers after this long without events; a client
+# that falls TRANSFER_STREAM_MAX_PENDING events behind is caught up from
+# the database instead.
+TRANSFER_STREAM_HEARTBEAT_SECONDS = float(
+    os.environ.get("WALLET_TRANSFER_STREAM_HEARTBEAT_SECONDS", "15")
+)
+TRANSFER_STREAM_MAX_PENDING = int(
+    os.environ.get("WALLET_TRANSFER_STREAM_MAX_PENDING", "256")
+)
+
+# Every transfer queues a notification for each comma-separated webhook URL
+# in the Outbox table, in the transfer's own transaction. A background task
+# delivers them (see service.webhook_dispatcher).
+WEBHOOK_URLS = [
+    url.strip() for url in os.environ.get("WALLET_WEBHOOK_URLS", "").split(",")
+    if url.strip()
+]
+WEBHOOK_BATCH_SIZE = int(os.environ.get("WALLET_WEBHOOK_BATCH_SIZE", "100"))
+WEBHOOK_MAX_CONCURRENCY = int(os.environ.get("WALLET_WEBHOOK_MAX_CONCURRENCY", "4"))
+WEBHOOK_MAX_ATTEMPTS = int(os.environ.get("WALLET_WEBHOOK_MAX_ATTEMPTS", "10"))
+WEBHOOK_BACKOFF_SECONDS = float(os.environ.get("WALLET_WEBHOOK_BACKOFF_SECONDS", "1"))
+WEBHOOK_MAX_BACKOFF_SECONDS = float(
+    os.environ.get("WALLET_WEBHOOK_MAX_BACKOFF_SECONDS", "600")
+)
+WEBHOOK_TIMEOUT_SECONDS = float(os.environ.get("WALLET_WEBHOOK_TIMEOUT_SECONDS", "5"))
+WEBHOOK_POLL_INTERVAL_SECONDS = float(
+    os.environ.get("WALLET_WEBHOOK_POLL_INTERVAL_SECONDS", "0.5")
+)
+
+# Every LEDGER_VERIFY_INTERVAL_SECONDS (0 disables it) a background job
+# checks up to LEDGER_VERIFY_BATCH_SIZE ledger postings added since its last
+# checkpoint (see service.ledger_verifier).
+LEDGER_VERIFY_INTERVAL_SECONDS = float(
+    os.environ.get("WALLET_LEDGER_VERIFY_INTERVAL_SECONDS", "60")
+)
+LEDGER_VERIFY_BATCH_SIZE = int(
+    os.environ.get("WALLET_LEDGER_VERIFY_BATCH_SIZE", "10000")
+)
+
+# Every LEDGER_CHECKPOINT_INTERVAL-th posting of an account is indexed in
+# BalanceCheckpoints; a point-in-time balance reads at most this many postings.
+LEDGER_CHECKPOINT_INTERVAL = int(
+    os.environ.get("WALLET_LEDGER_CHECKPOINT_INTERVAL", "1000")
+)
+
+# Velocity limits on the sender of every transfer, as comma-separated
+# "<wallet|user>:<count|volume>:<limit>/<window seconds>" rules, for example
+# "wallet:count:10/60,user:volume:100000000/3600". Counters are kept in memory
+# in VELOCITY_WINDOW_BUCKETS buckets per window and take in other workers'
+# transfers every VELOCITY_SYNC_INTERVAL_SECONDS (0 disables that).
+VELOCITY_RULES = os.environ.get("WALLET_VELOCITY_RULES", "")
+VELOCITY_WINDOW_BUCKETS = int(os.environ.get("WALLET_VELOCITY_WINDOW_BUCKETS", "60"))
+VELOCITY_SYNC_INTERVAL_SECONDS = float(
+    os.environ.get("WALLET_VELOCITY_SYNC_INTERVAL_SECONDS", "1")
+)
+
+# With DB_SHARD_COUNT > 1, users and their wallets are spread over that many
+# database files next to DB_PATH (see database.shards). Global reads query
+# the shards on up to DB_SHARD_FAN_OUT_WORKERS threads, and credits owed to
+# another shard that a failure left behind are applied every
+# SHARD_TRANSFER_RECOVERY_INTERVAL_SECONDS (0 only applies them at startup).
+DB_SHARD_COUNT = int(os.environ.get("WALLET_DB_SHARD_COUNT", "1"))
+DB_SHARD_FAN_OUT_WORKERS = int(os.environ.get("WALLET_DB_SHARD_FAN_OUT_WORKERS", "16"))
+SHARD_TRANSFER_RECOVERY_INTERVAL_SECONDS = float(
+    os.environ.get("WALLET_SHARD_TRANSFER_RECOVERY_INTERVAL_SECONDS", "5")
+)
+
+# Store API keys and wallet addresses as 16-byte BLOBs instead of 36
+# characters of TEXT (see repository.key_codec). Convert the existing keys
+# with compact_keys.py before turning it on or off.
+COMPACT_KEYS = os.environ.get("WALLET_COMPACT_KEYS", "0") == "1"
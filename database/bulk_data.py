@@ -0,0 +1,317 @@
+"""Streaming bulk export and import of Users, Wallets, Transactions and the
+ledger's Postings.
+
+A bulk file is ``MAGIC`` plus a 16-byte export id, followed by chunks framed
+like the transaction log as <payload length><crc32 of payload><payload>.
+Each payload holds a table code, a row count and the rows, with integers
+packed as ``<q``, floats as ``<d`` and strings as a ``<I`` byte length plus
+UTF-8. Chunks are
+written in foreign key order: every Users chunk, then Wallets, then
+Transactions, then Postings. Transactions moved into archive partition files
+are exported first, in id order, and imported back into the Transactions
+table.
+
+Both directions are meant for a stopped application. In the ``log``
+durability mode, transfers since the last snapshot are only in the
+transaction log and are not exported.
+"""
+import json
+import sqlite3
+import struct
+import time
+import uuid
+import zlib
+from collections.abc import Callable, Iterator, Sequence
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, BinaryIO
+
+from database.database_init import init_db
+from repository import sql_catalog
+from repository.key_codec import decode_key, encode_key
+from repository.ledger_repository import rebuild_balance_checkpoints
+from repository.transfer_stats_repository import TransferStatsRepository
+
+MAGIC = b"WALLETBULK\x01"
+DEFAULT_CHUNK_ROWS = 50_000
+
+_EXPORT_ID = struct.Struct("<16s")
+_FRAME_HEADER = struct.Struct("<II")
+_CHUNK_HEADER = struct.Struct("<BI")
+_INTEGER = struct.Struct("<q")
+_FLOAT = struct.Struct("<d")
+_STRING_LENGTH = struct.Struct("<I")
+
+
+@dataclass(frozen=True)
+class BulkTable:
+    code: int
+    name: str
+    columns: tuple[str, ...]
+    # One character per column: "q" for integers, "d" for floats, "s" for
+    # strings and "k" for API keys and wallet addresses, which are written as
+    # strings whatever form the database keeps them in.
+    kinds: str
+
+    @property
+    def select_sql(self) -> str:
+        return f"SELECT {', '.join(self.columns)} FROM {self.name} ORDER BY id"
+
+    @property
+    def select_range_sql(self) -> str:
+        return (f"SELECT {', '.join(self.columns)} FROM {self.name} "
+                f"WHERE id >= ? AND id <= ? ORDER BY id")
+
+    @property
+    def insert_sql(self) -> str:
+        placeholders = ", ".join("?" for _ in self.columns)
+        return (f"INSERT INTO {self.name} ({', '.join(self.columns)}) "
+                f"VALUES ({placeholders})")
+
+
+TABLES = (
+    BulkTable(1, "Users", ("id", "name", "api_key"), "qsk"),
+    BulkTable(2, "Wallets", ("id", "user_id", "balance", "wallet_address"), "qqqk"),
+    BulkTable(3, "Transactions", ("id", "sender_wallet_id", "receiver_wallet_id",
+                                  "transfer_amount", "transfer_fee"), "qqqqq"),
+    BulkTable(4, "Postings", ("id", "entry_id", "account_id", "sequence",
+                              "amount", "balance_after", "posted_at"), "qqqqqqd"),
+)
+_TABLES_BY_CODE = {table.code: table for table in TABLES}
+
+
+@dataclass
+class BulkStats:
+    rows: int = 0
+    chunks: int = 0
+    skipped_chunks: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+# Called after every chunk with the table name, the chunk's row count and
+# the running totals.
+ChunkCallback = Callable[[str, int, BulkStats], None]
+
+
+def encode_chunk(table: BulkTable, rows: Sequence[Sequence[Any]]) -> bytes:
+    parts = [_CHUNK_HEADER.pack(table.code, len(rows))]
+    for row in rows:
+        for kind, value in zip(table.kinds, row, strict=True):
+            if kind == "q":
+                parts.append(_INTEGER.pack(value))
+            elif kind == "d":
+                parts.append(_FLOAT.pack(value))
+            else:
+                encoded = (decode_key(value) if kind == "k" else value).encode()
+                parts.append(_STRING_LENGTH.pack(len(encoded)))
+                parts.append(encoded)
+    payload = b"".join(parts)
+    return _FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_chunk(payload: bytes) -> tuple[BulkTable, list[tuple[Any, ...]]]:
+    code, row_count = _CHUNK_HEADER.unpack_from(payload)
+    table = _TABLES_BY_CODE.get(code)
+    if table is None:
+        raise ValueError(f"Unknown bulk table code {code}")
+
+    offset = _CHUNK_HEADER.size
+    rows = []
+    for _ in range(row_count):
+        row: list[Any] = []
+        for kind in table.kinds:
+            if kind == "q":
+                row.append(_INTEGER.unpack_from(payload, offset)[0])
+                offset += _INTEGER.size
+            elif kind == "d":
+                row.append(_FLOAT.unpack_from(payload, offset)[0])
+                offset += _FLOAT.size
+            else:
+                length = _STRING_LENGTH.unpack_from(payload, offset)[0]
+                offset += _STRING_LENGTH.size
+                text = payload[offset:offset + length].decode()
+                row.append(encode_key(text) if kind == "k" else text)
+                offset += length
+        rows.append(tuple(row))
+    return table, rows
+
+
+def read_export_id(source: BinaryIO) -> str:
+    if source.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a wallet bulk data file")
+    header = source.read(_EXPORT_ID.size)
+    if len(header) < _EXPORT_ID.size:
+        raise ValueError("Truncated bulk data header")
+    return uuid.UUID(bytes=_EXPORT_ID.unpack(header)[0]).hex
+
+
+def read_frames(source: BinaryIO) -> Iterator[bytes]:
+    """Yields every chunk payload, raising on a torn or corrupt chunk."""
+    while header := source.read(_FRAME_HEADER.size):
+        if len(header) < _FRAME_HEADER.size:
+            raise ValueError("Truncated bulk data chunk header")
+        length, checksum = _FRAME_HEADER.unpack(header)
+        payload = source.read(length)
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            raise ValueError("Corrupt bulk data chunk")
+        yield payload
+
+
+def export_data(db_path: str, path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS,
+                on_chunk: ChunkCallback | None = None) -> BulkStats:
+    """Streams every table into ``path`` with ``fetchmany``, so at most
+    ``chunk_rows`` rows are held in memory. All tables are read from one
+    snapshot."""
+    stats = BulkStats()
+    started = time.perf_counter()
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    with closing(connection), open(path, "wb") as target:
+        target.write(MAGIC + _EXPORT_ID.pack(uuid.uuid4().bytes))
+
+        def write_rows(table: BulkTable, cursor: sqlite3.Cursor) -> None:
+            while rows := cursor.fetchmany(chunk_rows):
+                target.write(encode_chunk(table, rows))
+                stats.rows += len(rows)
+                stats.chunks += 1
+                stats.seconds = time.perf_counter() - started
+                if on_chunk:
+                    on_chunk(table.name, len(rows), stats)
+
+        connection.execute("BEGIN")
+        for table in TABLES:
+            if table.name == "Transactions":
+                partitions = connection.execute(
+                    sql_catalog.SELECT_ALL_PARTITIONS).fetchall()
+                for partition_path, min_id, max_id in sorted(
+                        partitions, key=lambda partition: partition[1]):
+                    # Rows past the cataloged range are not archived yet.
+                    archive = sqlite3.connect(
+                        Path(partition_path).absolute().as_uri() + "?mode=ro",
+                        uri=True)
+                    with closing(archive):
+                        write_rows(table, archive.execute(
+                            table.select_range_sql, (min_id, max_id)))
+            write_rows(table, connection.execute(table.select_sql))
+        connection.execute("ROLLBACK")
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+
+def _secondary_indexes(connection: sqlite3.Connection) -> list[tuple[str, str]]:
+    # Automatic indexes behind PRIMARY KEY and UNIQUE have no SQL and
+    # cannot be dropped.
+    names = [table.name for table in TABLES]
+    rows = connection.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+        "AND sql IS NOT NULL AND tbl_name IN (SELECT value FROM json_each(?))",
+        (json.dumps(names),)
+    ).fetchall()
+    return [(name, sql) for name, sql in rows]
+
+
+def _start_import(connection: sqlite3.Connection, export_id: str) -> int | None:
+    """Returns the number of chunks already imported, or None when the
+    whole file was. Secondary indexes are dropped on the first attempt and
+    their DDL kept in BulkImportProgress, so a crashed import still
+    rebuilds them."""
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        row = connection.execute(
+            "SELECT chunks_done, completed FROM BulkImportProgress "
+            "WHERE export_id = ?", (export_id,)
+        ).fetchone()
+        if row is None:
+            indexes = _secondary_indexes(connection)
+            for name, _ in indexes:
+                connection.execute(f'DROP INDEX "{name}"')
+            connection.execute(
+                "INSERT INTO BulkImportProgress "
+                "(export_id, chunks_done, deferred_indexes) VALUES (?, 0, ?)",
+                (export_id, json.dumps([sql for _, sql in indexes]))
+            )
+        connection.execute("COMMIT")
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+
+    if row is None:
+        return 0
+    chunks_done, completed = row
+    return None if completed else int(chunks_done)
+
+
+def _finish_import(connection: sqlite3.Connection, export_id: str) -> None:
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        deferred_indexes = connection.execute(
+            "SELECT deferred_indexes FROM BulkImportProgress WHERE export_id = ?",
+            (export_id,)
+        ).fetchone()[0]
+        for sql in json.loads(deferred_indexes):
+            connection.execute(sql.replace("CREATE INDEX",
+                                           "CREATE INDEX IF NOT EXISTS", 1))
+        # Balance checkpoints and transfer totals are derived, not exported.
+        rebuild_balance_checkpoints(connection)
+        TransferStatsRepository(connection).recompute()
+        connection.execute(
+            "UPDATE BulkImportProgress SET completed = 1 WHERE export_id = ?",
+            (export_id,)
+        )
+        connection.execute("COMMIT")
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+
+
+def import_data(db_path: str, path: str,
+                on_chunk: ChunkCallback | None = None) -> BulkStats:
+    """Loads a file written by ``export_data``.
+
+    Every chunk is inserted with ``executemany`` in its own transaction,
+    together with the BulkImportProgress row recording it. Running the
+    import again after a failure skips the chunks already committed.
+    Secondary indexes are rebuilt once, after the last chunk.
+    """
+    stats = BulkStats()
+    started = time.perf_counter()
+    init_db(db_path)
+    connection = sqlite3.connect(db_path, isolation_level=None)
+    with closing(connection), open(path, "rb") as source:
+        # WAL keeps the database consistent with synchronous=NORMAL; only
+        # the last chunks may need importing again after a power loss.
+        connection.execute("PRAGMA synchronous = NORMAL")
+        export_id = read_export_id(source)
+        chunks_done = _start_import(connection, export_id)
+        if chunks_done is None:
+            return stats
+
+        for index, payload in enumerate(read_frames(source)):
+            if index < chunks_done:
+                stats.skipped_chunks += 1
+                continue
+            table, rows = decode_chunk(payload)
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany(table.insert_sql, rows)
+                connection.execute(
+                    "UPDATE BulkImportProgress SET chunks_done = ? "
+                    "WHERE export_id = ?", (index + 1, export_id)
+                )
+                connection.execute("COMMIT")
+            except Exception:
+                connection.execute("ROLLBACK")
+                raise
+            stats.rows += len(rows)
+            stats.chunks += 1
+            stats.seconds = time.perf_counter() - started
+            if on_chunk:
+                on_chunk(table.name, len(rows), stats)
+
+        _finish_import(connection, export_id)
+    stats.seconds = time.perf_counter() - started
+    return stats
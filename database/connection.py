@@ -0,0 +1,119 @@
+import sqlite3
+from collections.abc import Callable
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Protocol
+
+from database.identity_map import IdentityMap, check_write_count
+
+_reads_only: ContextVar[bool] = ContextVar("reads_only", default=False)
+
+
+def read_only[**P, R](method: Callable[P, R]) -> Callable[P, R]:
+    """Marks a service method as read-only, so the repositories it calls
+    query a read-only connection instead of the request's writer."""
+    @wraps(method)
+    def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+        token = _reads_only.set(True)
+        try:
+            return method(*args, **kwargs)
+        finally:
+            _reads_only.reset(token)
+    return wrapper
+
+
+class ReadConnectionSource(Protocol):
+    def acquire(self) -> sqlite3.Connection: ...
+
+    def release(self, connection: sqlite3.Connection) -> None: ...
+
+
+class WalletConnection(sqlite3.Connection):
+    """sqlite3 connection that runs registered callbacks once the current
+    transaction has been committed, and drops them on rollback. Callbacks
+    registered with ``after_rollback`` run the other way round.
+
+    ``identity_map`` holds the entities the current request has loaded and
+    the writes it deferred. Deferred writes are flushed in one
+    ``executemany`` per statement before the next cursor is handed out or
+    the transaction commits, and the map is cleared at commit and rollback.
+
+    With a ``ReadConnectionSource`` set through ``route_reads_to``, cursors
+    opened inside a ``read_only`` method come from a connection borrowed
+    from that source for the rest of the request. Once this connection has
+    uncommitted writes, reads stay on it so they see those writes.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._after_commit: list[Callable[[], None]] = []
+        self._after_rollback: list[Callable[[], None]] = []
+        self.identity_map = IdentityMap()
+        self._read_source: ReadConnectionSource | None = None
+        self._reader: sqlite3.Connection | None = None
+
+    def after_commit(self, callback: Callable[[], None]) -> None:
+        self._after_commit.append(callback)
+
+    def after_rollback(self, callback: Callable[[], None]) -> None:
+        self._after_rollback.append(callback)
+
+    def commit(self) -> None:
+        self.flush()
+        super().commit()
+        self.identity_map.clear()
+        self._after_rollback.clear()
+        callbacks, self._after_commit = self._after_commit, []
+        for callback in callbacks:
+            callback()
+
+    def rollback(self) -> None:
+        super().rollback()
+        self.identity_map.clear()
+        self._after_commit.clear()
+        callbacks, self._after_rollback = self._after_rollback, []
+        for callback in callbacks:
+            callback()
+
+    def flush(self) -> None:
+        for sql, parameters in self.identity_map.take_deferred_writes().items():
+            cursor = super().cursor().executemany(sql, parameters)
+            check_write_count(sql, len(parameters), cursor.rowcount)
+
+    def route_reads_to(self, source: ReadConnectionSource | None) -> None:
+        self._read_source = source
+
+    def cursor(self, *args: Any, **kwargs: Any) -> Any:
+        self.flush()
+        if (self._read_source is not None and _reads_only.get() and
+                not self.in_transaction):
+            if self._reader is None:
+                self._reader = self._read_source.acquire()
+            return self._reader.cursor(*args, **kwargs)
+        return super().cursor(*args, **kwargs)
+
+    def release_reader(self) -> None:
+        reader, self._reader = self._reader, None
+        if reader is not None and self._read_source is not None:
+            self._read_source.release(reader)
+        self._read_source = None
+
+
+def identity_map_of(connection: sqlite3.Connection) -> IdentityMap | None:
+    if isinstance(connection, WalletConnection):
+        return connection.identity_map
+    return None
+
+
+def run_after_commit(connection: sqlite3.Connection,
+                     callback: Callable[[], None]) -> None:
+    if isinstance(connection, WalletConnection):
+        connection.after_commit(callback)
+    else:
+        callback()
+
+
+def run_after_rollback(connection: sqlite3.Connection,
+                       callback: Callable[[], None]) -> None:
+    if isinstance(connection, WalletConnection):
+        connection.after_rollback(callback)
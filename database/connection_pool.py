@@ -0,0 +1,88 @@
+import sqlite3
+import threading
+from functools import cache
+from pathlib import Path
+
+from config import settings
+from database.connection import WalletConnection
+
+
+class ConnectionPool:
+    """Keeps up to ``max_idle`` open connections around between requests.
+
+    Reusing a connection keeps its prepared statement cache warm, so the
+    fixed statements in ``repository.sql_catalog`` are parsed once per
+    connection rather than once per request.
+
+    A ``read_only`` pool opens its connections with ``mode=ro``; under WAL
+    they read the last committed state without ever blocking the writer.
+    Shard pools turn ``foreign_keys`` off, since a transfer between shards
+    names a wallet that lives in another file.
+    """
+
+    def __init__(self, db_path: str, max_idle: int,
+                 statement_cache_size: int, busy_timeout_seconds: float,
+                 read_only: bool = False, foreign_keys: bool = True) -> None:
+        self.db_path = db_path
+        self.max_idle = max_idle
+        self.statement_cache_size = statement_cache_size
+        self.busy_timeout_seconds = busy_timeout_seconds
+        self.read_only = read_only
+        self.foreign_keys = foreign_keys
+        self._lock = threading.Lock()
+        self._idle: list[sqlite3.Connection] = []
+
+    def _connect(self) -> sqlite3.Connection:
+        database = self.db_path
+        if self.read_only:
+            database = Path(self.db_path).absolute().as_uri() + "?mode=ro"
+        connection = sqlite3.connect(
+            database, timeout=self.busy_timeout_seconds,
+            check_same_thread=False, factory=WalletConnection,
+            cached_statements=self.statement_cache_size, uri=self.read_only
+        )
+        connection.row_factory = sqlite3.Row
+        if self.foreign_keys:
+            connection.execute("PRAGMA foreign_keys = ON;")
+        return connection
+
+    def acquire(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        return self._connect()
+
+    def release(self, connection: sqlite3.Connection) -> None:
+        if connection.in_transaction:
+            connection.rollback()
+        if isinstance(connection, WalletConnection):
+            connection.release_reader()
+            connection.identity_map.clear()
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(connection)
+                return
+        connection.close()
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for connection in idle:
+            connection.close()
+
+
+@cache
+def get_connection_pool() -> ConnectionPool:
+    return ConnectionPool(
+        settings.DB_PATH, settings.DB_POOL_MAX_IDLE,
+        settings.DB_STATEMENT_CACHE_SIZE, settings.DB_BUSY_TIMEOUT_SECONDS
+    )
+
+
+@cache
+def get_read_connection_pool() -> ConnectionPool:
+    return ConnectionPool(
+        settings.DB_PATH, settings.DB_READ_POOL_MAX_IDLE,
+        settings.DB_STATEMENT_CACHE_SIZE, settings.DB_BUSY_TIMEOUT_SECONDS,
+        read_only=True
+    )
@@ -1,36 +1,263 @@
 import sqlite3
+from collections.abc import Callable
 
+from config import settings
+from repository.ledger_repository import rebuild_balance_checkpoints
 
-def init_db(db_path: str = "bitcoin_wallet.db") -> None:
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
-    cursor.execute("PRAGMA foreign_keys = ON;")
-
-    cursor.executescript("""
-    CREATE TABLE IF NOT EXISTS Users (
-         id INTEGER PRIMARY KEY AUTOINCREMENT,
-         name TEXT NOT NULL,
-         api_key TEXT NOT NULL UNIQUE
-    );
-
-    CREATE TABLE IF NOT EXISTS Wallets (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        user_id INTEGER NOT NULL,
-        balance INTEGER NOT NULL DEFAULT 0,
-        wallet_address TEXT NOT NULL UNIQUE,
-        FOREIGN KEY (user_id) REFERENCES Users(id)
-    );
-
-    CREATE TABLE IF NOT EXISTS Transactions (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        sender_wallet_id INTEGER NOT NULL,
-        receiver_wallet_id INTEGER NOT NULL,
-        transfer_amount INTEGER NOT NULL,
-        transfer_fee INTEGER NOT NULL,
-        FOREIGN KEY (sender_wallet_id) REFERENCES Wallets(id),
-        FOREIGN KEY (receiver_wallet_id) REFERENCES Wallets(id)
-    );
-    """)
-
-    conn.commit()
-    conn.close()
+# A statement that depends on the settings runs as a function of the
+# connection instead of fixed SQL.
+type MigrationStep = str | Callable[[sqlite3.Connection], None]
+
+# MIGRATIONS[n] holds the statements that upgrade a database from schema
+# version n to n + 1. The current version is kept in PRAGMA user_version, so
+# startup can skip all DDL once the file is up to date.
+MIGRATIONS: list[tuple[MigrationStep, ...]] = [
+    (
+        """
+        CREATE TABLE IF NOT EXISTS Users (
+             id INTEGER PRIMARY KEY AUTOINCREMENT,
+             name TEXT NOT NULL,
+             api_key TEXT NOT NULL UNIQUE
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Wallets (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER NOT NULL,
+            balance INTEGER NOT NULL DEFAULT 0,
+            wallet_address TEXT NOT NULL UNIQUE,
+            FOREIGN KEY (user_id) REFERENCES Users(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS Transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            sender_wallet_id INTEGER NOT NULL,
+            receiver_wallet_id INTEGER NOT NULL,
+            transfer_amount INTEGER NOT NULL,
+            transfer_fee INTEGER NOT NULL,
+            FOREIGN KEY (sender_wallet_id) REFERENCES Wallets(id),
+            FOREIGN KEY (receiver_wallet_id) REFERENCES Wallets(id)
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS TransactionLogSnapshot (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_transaction_id INTEGER NOT NULL
+        )
+        """,
+    ),
+    (
+        """
+        CREATE TABLE IF NOT EXISTS BulkImportProgress (
+            export_id TEXT PRIMARY KEY,
+            chunks_done INTEGER NOT NULL,
+            deferred_indexes TEXT NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+    ),
+    (
+        """
+        CREATE TABLE IF NOT EXISTS TransactionPartitions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            path TEXT NOT NULL UNIQUE,
+            min_id INTEGER NOT NULL,
+            max_id INTEGER NOT NULL,
+            transaction_count INTEGER NOT NULL,
+            transfer_fee_sum INTEGER NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS TransactionPartitionWallets (
+            wallet_id INTEGER NOT NULL,
+            partition_id INTEGER NOT NULL,
+            PRIMARY KEY (wallet_id, partition_id),
+            FOREIGN KEY (partition_id) REFERENCES TransactionPartitions(id)
+        ) WITHOUT ROWID
+        """,
+    ),
+    (
+        """
+        CREATE TABLE IF NOT EXISTS Outbox (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            transaction_id INTEGER NOT NULL,
+            endpoint TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            next_attempt_at REAL NOT NULL,
+            last_error TEXT
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_outbox_next_attempt_at "
+        "ON Outbox (next_attempt_at)",
+        """
+        CREATE TABLE IF NOT EXISTS OutboxDeadLetters (
+            id INTEGER PRIMARY KEY,
+            transaction_id INTEGER NOT NULL,
+            endpoint TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            attempts INTEGER NOT NULL,
+            last_error TEXT,
+            failed_at REAL NOT NULL
+        )
+        """,
+    ),
+    (
+        # Double-entry ledger: the postings of an entry sum to zero. A
+        # transfer's entry_id is its transaction id; a wallet's opening
+        # balance is entry -wallet_id, drawn from the issuance account.
+        # account_id is a wallet id, or negative for the system accounts in
+        # repository.ledger_repository.
+        """
+        CREATE TABLE IF NOT EXISTS Postings (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            entry_id INTEGER NOT NULL,
+            account_id INTEGER NOT NULL,
+            sequence INTEGER NOT NULL,
+            amount INTEGER NOT NULL,
+            balance_after INTEGER NOT NULL,
+            UNIQUE (account_id, sequence)
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_postings_entry_id ON Postings (entry_id)",
+        """
+        CREATE TABLE IF NOT EXISTS LedgerCheckpoint (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            last_posting_id INTEGER NOT NULL
+        )
+        """,
+        "INSERT OR IGNORE INTO LedgerCheckpoint (id, last_posting_id) VALUES (1, 0)",
+        # Existing wallets open with their current balance.
+        """
+        INSERT INTO Postings (entry_id, account_id, sequence, amount, balance_after)
+        SELECT -id, id, 1, balance, balance FROM Wallets ORDER BY id
+        """,
+        """
+        INSERT INTO Postings (entry_id, account_id, sequence, amount, balance_after)
+        SELECT -id, -1, ROW_NUMBER() OVER (ORDER BY id), -balance,
+               -SUM(balance) OVER (ORDER BY id)
+        FROM Wallets ORDER BY id
+        """,
+    ),
+    (
+        # Postings written before this migration are stamped with its time.
+        "ALTER TABLE Postings ADD COLUMN posted_at REAL NOT NULL DEFAULT 0",
+        "UPDATE Postings SET posted_at = (julianday('now') - 2440587.5) * 86400.0",
+        # Every LEDGER_CHECKPOINT_INTERVAL-th posting of an account, so a
+        # point-in-time balance reads at most that many postings.
+        """
+        CREATE TABLE IF NOT EXISTS BalanceCheckpoints (
+            account_id INTEGER NOT NULL,
+            sequence INTEGER NOT NULL,
+            entry_id INTEGER NOT NULL,
+            posted_at REAL NOT NULL,
+            PRIMARY KEY (account_id, sequence)
+        ) WITHOUT ROWID
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_balance_checkpoints_entry_id "
+        "ON BalanceCheckpoints (account_id, entry_id)",
+        "CREATE INDEX IF NOT EXISTS idx_balance_checkpoints_posted_at "
+        "ON BalanceCheckpoints (account_id, posted_at)",
+        rebuild_balance_checkpoints,
+    ),
+    (
+        # Running transfer totals per wallet and per user. Existing
+        # databases fill them with rebuild_transfer_stats.py.
+        """
+        CREATE TABLE IF NOT EXISTS WalletStats (
+            wallet_id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            transfers_sent INTEGER NOT NULL DEFAULT 0,
+            transfers_received INTEGER NOT NULL DEFAULT 0,
+            volume_sent INTEGER NOT NULL DEFAULT 0,
+            volume_received INTEGER NOT NULL DEFAULT 0,
+            fees_paid INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS UserStats (
+            user_id INTEGER PRIMARY KEY,
+            transfers_sent INTEGER NOT NULL DEFAULT 0,
+            transfers_received INTEGER NOT NULL DEFAULT 0,
+            volume_sent INTEGER NOT NULL DEFAULT 0,
+            volume_received INTEGER NOT NULL DEFAULT 0,
+            fees_paid INTEGER NOT NULL DEFAULT 0
+        )
+        """,
+        "CREATE INDEX IF NOT EXISTS idx_wallet_stats_fees_paid "
+        "ON WalletStats (fees_paid)",
+        "CREATE INDEX IF NOT EXISTS idx_wallet_stats_volume_sent "
+        "ON WalletStats (volume_sent)",
+        "CREATE INDEX IF NOT EXISTS idx_wallet_stats_volume_received "
+        "ON WalletStats (volume_received)",
+        "CREATE INDEX IF NOT EXISTS idx_user_stats_fees_paid "
+        "ON UserStats (fees_paid)",
+        "CREATE INDEX IF NOT EXISTS idx_user_stats_volume_sent "
+        "ON UserStats (volume_sent)",
+        "CREATE INDEX IF NOT EXISTS idx_user_stats_volume_received "
+        "ON UserStats (volume_received)",
+    ),
+    (
+        # Transfers between shards (see database.shard_transfers): the
+        # sender's shard keeps an intent for every credit it still owes
+        # another shard, the receiving shard the ids of the transfers it has
+        # credited.
+        """
+        CREATE TABLE IF NOT EXISTS ShardTransferIntents (
+            transaction_id INTEGER PRIMARY KEY,
+            sender_wallet_id INTEGER NOT NULL,
+            receiver_wallet_id INTEGER NOT NULL,
+            transfer_amount INTEGER NOT NULL,
+            transfer_fee INTEGER NOT NULL,
+            created_at REAL NOT NULL
+        )
+        """,
+        """
+        CREATE TABLE IF NOT EXISTS ShardTransferCredits (
+            transaction_id INTEGER PRIMARY KEY
+        )
+        """,
+    ),
+    (
+        # Counting a user's wallets against MAX_WALLETS_PER_USER.
+        "CREATE INDEX IF NOT EXISTS idx_wallets_user_id ON Wallets (user_id)",
+    ),
+]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+def get_schema_version(conn: sqlite3.Connection) -> int:
+    version: int = conn.execute("PRAGMA user_version").fetchone()[0]
+    return version
+
+
+def run_migration(conn: sqlite3.Connection,
+                  statements: tuple[MigrationStep, ...]) -> None:
+    for statement in statements:
+        if callable(statement):
+            statement(conn)
+        else:
+            conn.execute(statement)
+
+
+def init_db(db_path: str = settings.DB_PATH) -> None:
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        if get_schema_version(conn) >= SCHEMA_VERSION:
+            return
+
+        # WAL lets readers in every worker proceed while one of them writes.
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # Another worker may have migrated while we waited for the lock.
+            for statements in MIGRATIONS[get_schema_version(conn):]:
+                run_migration(conn, statements)
+            conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+    finally:
+        conn.close()
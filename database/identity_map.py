@@ -0,0 +1,78 @@
+from dataclasses import replace
+from typing import Any
+
+from entity.user import User
+from entity.wallet import Wallet
+from exception.exceptions import ConcurrentUpdateError
+
+
+class IdentityMap:
+    """Users and wallets already loaded by the current request, plus the
+    writes deferred until the connection next runs SQL or commits.
+
+    Entities are never mutated in place: a new balance replaces the mapped
+    wallet, so objects shared with the process-wide caches stay untouched.
+    """
+
+    def __init__(self) -> None:
+        self.users_by_api_key: dict[str, User] = {}
+        self.users_by_id: dict[int, User] = {}
+        self.wallets_by_address: dict[str, Wallet] = {}
+        self.wallets_by_id: dict[int, Wallet] = {}
+        self._loaded_balances: dict[str, int] = {}
+        self._deferred_writes: dict[tuple[str, object],
+                                    tuple[str, tuple[Any, ...]]] = {}
+
+    def add_user(self, user: User) -> User:
+        user = self.users_by_id.setdefault(user.id, user)
+        self.users_by_api_key[user.api_key] = user
+        return user
+
+    def add_wallet(self, wallet: Wallet) -> Wallet:
+        wallet = self.wallets_by_id.setdefault(wallet.id, wallet)
+        self.wallets_by_address[wallet.wallet_address] = wallet
+        self._loaded_balances.setdefault(wallet.wallet_address, wallet.balance)
+        return wallet
+
+    def loaded_balance(self, wallet_address: str) -> int | None:
+        """The balance the wallet had when this request first loaded it."""
+        return self._loaded_balances.get(wallet_address)
+
+    def set_wallet_balance(self, wallet_address: str, balance: int) -> None:
+        wallet = self.wallets_by_address.get(wallet_address)
+        if wallet is not None:
+            wallet = replace(wallet, balance=balance)
+            self.wallets_by_address[wallet_address] = wallet
+            self.wallets_by_id[wallet.id] = wallet
+
+    def defer_write(self, key: tuple[str, object], sql: str,
+                    parameters: tuple[Any, ...]) -> None:
+        """Queues a write that must change exactly one row; a later write
+        with the same key replaces it."""
+        self._deferred_writes.pop(key, None)
+        self._deferred_writes[key] = (sql, parameters)
+
+    def take_deferred_writes(self) -> dict[str, list[tuple[Any, ...]]]:
+        """Returns the queued writes grouped by statement, in the order each
+        statement was first queued, and forgets them."""
+        grouped: dict[str, list[tuple[Any, ...]]] = {}
+        for sql, parameters in self._deferred_writes.values():
+            grouped.setdefault(sql, []).append(parameters)
+        self._deferred_writes.clear()
+        return grouped
+
+    def clear(self) -> None:
+        self.users_by_api_key.clear()
+        self.users_by_id.clear()
+        self.wallets_by_address.clear()
+        self.wallets_by_id.clear()
+        self._loaded_balances.clear()
+        self._deferred_writes.clear()
+
+
+def check_write_count(sql: str, expected: int, actual: int) -> None:
+    if actual != expected:
+        raise ConcurrentUpdateError(
+            f"{expected - actual} of {expected} deferred writes matched no row "
+            f"after a concurrent update ({sql.split(' WHERE')[0].strip()})"
+        )
@@ -0,0 +1,214 @@
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from dataclasses import replace
+from functools import cache
+
+from config import settings
+from database.transaction_log import TransactionLog
+from entity.transaction import Transaction
+from exception.exceptions import NotEnoughBalanceError, WalletNotFoundError
+from repository.ledger_repository import LedgerRepository
+from repository.transfer_stats_repository import TransferStatsRepository
+
+logger = logging.getLogger(__name__)
+
+
+class LogStructuredStore:
+    """Keeps wallet balances in memory and makes transfers durable through
+    the append-only ``TransactionLog``.
+
+    Every ``snapshot_interval`` transfers the in-memory state is compacted
+    into SQLite (balances plus the pending Transactions rows) and the log is
+    reset. On startup ``recover`` loads the last snapshot and replays the
+    log tail on top of it. A snapshot that fails, say because another
+    writer holds the database, keeps everything pending and is retried
+    ``snapshot_interval`` transfers later; the transfers are durable in the
+    log meanwhile.
+    """
+
+    def __init__(self, db_path: str, log: TransactionLog,
+                 snapshot_interval: int) -> None:
+        self.db_path = db_path
+        self.log = log
+        self.snapshot_interval = snapshot_interval
+        self._lock = threading.Lock()
+        self._balances: dict[int, int] = {}
+        self._dirty_wallet_ids: set[int] = set()
+        self._pending: list[Transaction] = []
+        # Pending transfers at which the next snapshot is attempted.
+        self._snapshot_at = snapshot_interval
+        self._snapshot_transaction_id = 0
+        self._last_transaction_id = 0
+        # When the last snapshot committed; every pending transfer is later.
+        self._snapshotted_at = 0.0
+
+    def recover(self) -> int:
+        with self._lock, closing(sqlite3.connect(self.db_path)) as connection:
+            self._balances = dict(
+                connection.execute("SELECT id, balance FROM Wallets").fetchall()
+            )
+            row = connection.execute(
+                "SELECT last_transaction_id FROM TransactionLogSnapshot"
+                " WHERE id = 1"
+            ).fetchone()
+            snapshot_transaction_id = row[0] if row else 0
+            max_transaction_id = connection.execute(
+                "SELECT COALESCE(MAX(id), 0) FROM Transactions"
+            ).fetchone()[0]
+
+            self._snapshot_transaction_id = max(
+                snapshot_transaction_id, max_transaction_id
+            )
+            self._last_transaction_id = self._snapshot_transaction_id
+            self._dirty_wallet_ids.clear()
+            self._pending.clear()
+            self._snapshot_at = self.snapshot_interval
+            # The log does not say when the replayed transfers were made.
+            self._snapshotted_at = 0.0
+
+            replayed = 0
+            for transaction in self.log.replay():
+                assert transaction.id is not None
+                if transaction.id <= self._snapshot_transaction_id:
+                    continue
+                self._apply(transaction)
+                self._last_transaction_id = transaction.id
+                replayed += 1
+
+            return replayed
+
+    def register_wallet(self, wallet_id: int, balance: int) -> None:
+        with self._lock:
+            self._balances.setdefault(wallet_id, balance)
+
+    def balance_of(self, wallet_id: int, default: int) -> int:
+        return self._balances.get(wallet_id, default)
+
+    def pending_transactions(self) -> tuple[list[Transaction], int]:
+        """Returns the transfers not yet in SQLite and the id up to which
+        the Transactions table is complete."""
+        with self._lock:
+            return list(self._pending), self._snapshot_transaction_id
+
+    def pending_transfers(self) -> tuple[list[Transaction], float]:
+        """Returns the transfers not yet in SQLite and the time of the last
+        snapshot, which they were all made after."""
+        with self._lock:
+            return list(self._pending), self._snapshotted_at
+
+    def apply_transfer(self, transaction: Transaction) -> Transaction:
+        with self._lock:
+            sender_balance = self._balances.get(transaction.sender_wallet_id)
+            if sender_balance is None:
+                raise WalletNotFoundError(
+                    f"Wallet with id {transaction.sender_wallet_id} not found."
+                )
+            if transaction.receiver_wallet_id not in self._balances:
+                raise WalletNotFoundError(
+                    f"Wallet with id {transaction.receiver_wallet_id} not found."
+                )
+            if sender_balance < transaction.transfer_amount:
+                raise NotEnoughBalanceError(
+                    f"Wallet with id {transaction.sender_wallet_id} "
+                    f"does not have enough balance to make this transaction. "
+                    f"Current balance: {sender_balance}, Transfer Amount: "
+                    f"{transaction.transfer_amount}"
+                )
+
+            logged = replace(transaction, id=self._last_transaction_id + 1)
+            self.log.append(logged)
+            self._last_transaction_id += 1
+            self._apply(logged)
+
+            if len(self._pending) >= self._snapshot_at:
+                try:
+                    self._snapshot()
+                except sqlite3.Error:
+                    # The transfer already happened; only its compaction
+                    # into SQLite has to wait.
+                    logger.warning("Snapshot of %d pending transfers failed; "
+                                   "retrying after %d more", len(self._pending),
+                                   self.snapshot_interval, exc_info=True)
+                    self._snapshot_at = len(self._pending) + self.snapshot_interval
+
+            return logged
+
+    def _apply(self, transaction: Transaction) -> None:
+        self._balances[transaction.sender_wallet_id] -= transaction.transfer_amount
+        self._balances[transaction.receiver_wallet_id] += (
+            transaction.transfer_amount - transaction.transfer_fee
+        )
+        self._dirty_wallet_ids.add(transaction.sender_wallet_id)
+        self._dirty_wallet_ids.add(transaction.receiver_wallet_id)
+        self._pending.append(transaction)
+
+    def sync(self) -> None:
+        with self._lock:
+            self.log.sync()
+
+    def snapshot(self) -> None:
+        with self._lock:
+            self._snapshot()
+
+    def _snapshot(self) -> None:
+        if not self._pending:
+            return
+
+        self.log.sync()
+        with closing(sqlite3.connect(self.db_path)) as connection, connection:
+            connection.executemany(
+                "UPDATE Wallets SET balance = ? WHERE id = ?",
+                [(self._balances[wallet_id], wallet_id)
+                 for wallet_id in self._dirty_wallet_ids]
+            )
+            connection.executemany(
+                """
+                INSERT INTO Transactions (
+                    id, sender_wallet_id, receiver_wallet_id,
+                    transfer_amount, transfer_fee)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                [(tr.id, tr.sender_wallet_id, tr.receiver_wallet_id,
+                  tr.transfer_amount, tr.transfer_fee) for tr in self._pending]
+            )
+            LedgerRepository(connection).record_transfers(self._pending)
+            TransferStatsRepository(connection).record_transfers(self._pending)
+            connection.execute(
+                """
+                INSERT INTO TransactionLogSnapshot (id, last_transaction_id)
+                VALUES (1, ?) ON CONFLICT(id) DO UPDATE
+                SET last_transaction_id = excluded.last_transaction_id
+                """, (self._last_transaction_id,)
+            )
+
+        # A crash between the commit above and this reset is harmless:
+        # recover() skips log records already covered by the snapshot.
+        self.log.reset()
+        self._snapshotted_at = time.time()
+        self._snapshot_transaction_id = self._last_transaction_id
+        self._dirty_wallet_ids.clear()
+        self._pending.clear()
+        self._snapshot_at = self.snapshot_interval
+
+    def close(self) -> None:
+        with self._lock:
+            self._snapshot()
+            self.log.close()
+
+
+@cache
+def get_log_structured_store() -> LogStructuredStore:
+    store = LogStructuredStore(
+        settings.DB_PATH,
+        TransactionLog(
+            settings.TRANSACTION_LOG_PATH,
+            fsync_batch_size=settings.TRANSACTION_LOG_FSYNC_BATCH_SIZE,
+            fsync_interval_seconds=settings.TRANSACTION_LOG_FSYNC_INTERVAL_SECONDS
+        ),
+        settings.TRANSACTION_LOG_SNAPSHOT_INTERVAL
+    )
+    store.recover()
+    return store
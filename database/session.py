@@ -1,11 +1,17 @@
 import sqlite3
 from collections.abc import Generator
 
+from config import settings
+from database.connection import WalletConnection
+from database.connection_pool import get_connection_pool, get_read_connection_pool
+from database.shards import ShardSession, get_shard_set
+
 
 def get_db() -> Generator[sqlite3.Connection]:
-    connection = sqlite3.connect("bitcoin_wallet.db", check_same_thread=False)
-    connection.row_factory = sqlite3.Row
-    connection.execute("PRAGMA foreign_keys = ON;")
+    pool = get_connection_pool()
+    connection = pool.acquire()
+    if settings.DB_READ_SPLIT_ENABLED and isinstance(connection, WalletConnection):
+        connection.route_reads_to(get_read_connection_pool())
     try:
         yield connection
         connection.commit()
@@ -13,4 +19,25 @@ def get_db() -> Generator[sqlite3.Connection]:
         connection.rollback()
         raise
     finally:
-        connection.close()
+        pool.release(connection)
+
+
+def get_shard_session() -> Generator[ShardSession]:
+    session = ShardSession(get_shard_set())
+    try:
+        yield session
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
+
+def get_database() -> Generator[sqlite3.Connection | ShardSession]:
+    """The request's connection, or its shard session once DB_SHARD_COUNT
+    splits the data over several files."""
+    if settings.DB_SHARD_COUNT > 1:
+        yield from get_shard_session()
+    else:
+        yield from get_db()
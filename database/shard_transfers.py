@@ -0,0 +1,127 @@
+import asyncio
+import logging
+import sqlite3
+import time
+from collections.abc import Callable
+from functools import cache
+
+from database.shards import ShardSet, get_shard_set
+from entity.transaction import Transaction
+from repository import sql_catalog
+from repository.ledger_repository import LedgerRepository
+from repository.transfer_stats_repository import TransferStatsRepository
+from service.metrics import MetricsRegistry, get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+def construct_intent(row: sqlite3.Row) -> Transaction:
+    return Transaction(
+        id=row["transaction_id"], sender_wallet_id=row["sender_wallet_id"],
+        receiver_wallet_id=row["receiver_wallet_id"],
+        transfer_amount=row["transfer_amount"], transfer_fee=row["transfer_fee"]
+    )
+
+
+class ShardTransferCoordinator:
+    """Applies the credit half of transfers between shards.
+
+    SQLite cannot keep a prepared transaction across a crash, so the
+    protocol has its decision in the sender's shard: phase one commits the
+    debit, the Transactions row and an intent naming the credit in one local
+    transaction, and from then on the transfer has happened. Phase two,
+    ``complete``, credits the receiver on its own shard and marks the
+    transfer there in the same transaction, so a credit is applied once
+    however often it is retried, then retires the intent. Intents left by a
+    failed phase two are finished by ``recover``.
+    """
+
+    def __init__(self, shard_set: ShardSet, metrics: MetricsRegistry,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.shard_set = shard_set
+        self.clock = clock
+        self._recovered = metrics.counter(
+            "shard_transfers_recovered_total",
+            "Credits of cross-shard transfers applied by recovery rather than "
+            "by the transfer's own request."
+        )
+
+    def _shard(self, wallet_id: int) -> int:
+        shard = self.shard_set.shard_of_id(wallet_id)
+        if shard is None:
+            raise ValueError(f"Wallet id {wallet_id} belongs to no shard")
+        return shard
+
+    def _credit(self, transaction: Transaction) -> None:
+        pool = self.shard_set.pools[self._shard(transaction.receiver_wallet_id)]
+        connection = pool.acquire()
+        try:
+            connection.execute("BEGIN IMMEDIATE")
+            if connection.execute(sql_catalog.INSERT_SHARD_TRANSFER_CREDIT,
+                                  (transaction.id,)).rowcount:
+                credited = connection.execute(
+                    sql_catalog.ADD_TO_WALLET_BALANCE_BY_ID,
+                    (transaction.transfer_amount - transaction.transfer_fee,
+                     transaction.receiver_wallet_id)
+                ).rowcount
+                if credited != 1:
+                    raise ValueError(
+                        f"Wallet {transaction.receiver_wallet_id} of transfer "
+                        f"{transaction.id} is missing from its shard"
+                    )
+                LedgerRepository(connection).record_incoming_transfer(transaction)
+                TransferStatsRepository(connection).record_transfers([transaction])
+            connection.commit()
+        finally:
+            pool.release(connection)
+
+    def _retire(self, transaction: Transaction) -> None:
+        pool = self.shard_set.pools[self._shard(transaction.sender_wallet_id)]
+        connection = pool.acquire()
+        try:
+            connection.execute(sql_catalog.DELETE_SHARD_TRANSFER_INTENT,
+                               (transaction.id,))
+            connection.commit()
+        finally:
+            pool.release(connection)
+
+    def complete(self, transaction: Transaction) -> None:
+        """Phase two for a transfer whose debit has just committed. A
+        failure is only logged: the intent stays for ``recover``."""
+        try:
+            self._credit(transaction)
+            self._retire(transaction)
+        except Exception:
+            logger.warning("Crediting cross-shard transfer %s failed; leaving "
+                           "it to recovery", transaction.id, exc_info=True)
+
+    def recover(self, min_age_seconds: float = 0) -> int:
+        """Completes the intents at least ``min_age_seconds`` old on every
+        shard; returns how many. Younger ones may still be completing in
+        their own request."""
+        intents = self.shard_set.fan_out(lambda connection: [
+            construct_intent(row) for row in connection.execute(
+                sql_catalog.SELECT_SHARD_TRANSFER_INTENTS,
+                (self.clock() - min_age_seconds,))
+        ])
+        completed = 0
+        for transaction in (intent for shard in intents for intent in shard):
+            self._credit(transaction)
+            self._retire(transaction)
+            completed += 1
+        self._recovered.inc(completed)
+        return completed
+
+    async def run(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await asyncio.to_thread(self.recover, interval_seconds)
+            except Exception:
+                logger.warning("Recovering cross-shard transfers failed",
+                               exc_info=True)
+
+
+@cache
+def get_shard_transfer_coordinator() -> ShardTransferCoordinator:
+    return ShardTransferCoordinator(get_shard_set(), get_metrics_registry())
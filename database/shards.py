@@ -0,0 +1,165 @@
+"""Users and their wallets spread over several database files.
+
+A user lives on the shard their API key hashes to, and each of their
+wallets gets an address that hashes to the same shard, so every request
+finds its file from the key or address it carries. Each shard hands out
+Users, Wallets and Transactions ids from its own range, starting at
+``shard << SHARD_ID_BITS``, so ids stay unique across shards and name the
+shard that holds them.
+"""
+import hashlib
+import sqlite3
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from functools import cache, partial
+from pathlib import Path
+
+from config import settings
+from database.connection_pool import ConnectionPool
+from database.database_init import init_db
+from exception.exceptions import CrossShardWriteError
+from repository import sql_catalog
+
+SHARD_ID_BITS = 40
+_SHARDED_TABLES = ("Users", "Wallets", "Transactions")
+
+
+def shard_paths(db_path: str, count: int) -> list[str]:
+    path = Path(db_path)
+    return [str(path.with_name(f"{path.stem}.shard{index}{path.suffix}"))
+            for index in range(count)]
+
+
+def shard_of_key(key: str, count: int) -> int:
+    digest = hashlib.blake2b(key.encode(), digest_size=8).digest()
+    return int.from_bytes(digest) % count
+
+
+def init_shards(db_path: str, count: int) -> None:
+    for index, path in enumerate(shard_paths(db_path, count)):
+        init_db(path)
+        first_id = index << SHARD_ID_BITS
+        with closing(sqlite3.connect(path)) as connection, connection:
+            for table in _SHARDED_TABLES:
+                connection.execute(sql_catalog.INSERT_SHARD_SEQUENCE,
+                                   (table, first_id))
+                connection.execute(sql_catalog.RAISE_SHARD_SEQUENCE,
+                                   (table, first_id))
+
+
+class ShardSet:
+    """A connection pool per shard file, and the threads that global reads
+    fan out on."""
+
+    def __init__(self, pools: list[ConnectionPool], fan_out_workers: int) -> None:
+        self.pools = pools
+        self._executor = ThreadPoolExecutor(fan_out_workers,
+                                            thread_name_prefix="shard-read")
+
+    @property
+    def count(self) -> int:
+        return len(self.pools)
+
+    def shard_of_key(self, key: str) -> int:
+        return shard_of_key(key, self.count)
+
+    def shard_of_id(self, entity_id: int) -> int | None:
+        """The shard holding a user, wallet or transaction id; None for an
+        id no shard hands out."""
+        shard = entity_id >> SHARD_ID_BITS
+        return shard if entity_id > 0 and shard < self.count else None
+
+    def fan_out[R](self, read: Callable[[sqlite3.Connection], R]) -> list[R]:
+        """Runs ``read`` on every shard at once, each on a pooled connection
+        of its own, and returns the results in shard order."""
+        return list(self._executor.map(partial(_read_shard, read), self.pools))
+
+    def close(self) -> None:
+        self._executor.shutdown()
+        for pool in self.pools:
+            pool.close()
+
+
+def _read_shard[R](read: Callable[[sqlite3.Connection], R],
+                   pool: ConnectionPool) -> R:
+    connection = pool.acquire()
+    try:
+        return read(connection)
+    finally:
+        pool.release(connection)
+
+
+class ShardSession:
+    """The connections one request holds, at most one per shard.
+
+    A request writes to one shard only, the first it writes to, so the
+    session commits as one local transaction. A transfer to a wallet on
+    another shard records the credit it owes with ``owe_credit``; the
+    transfer's repository then takes it over into an intent committed with
+    the debit (see ``database.shard_transfers``), and committing with a
+    credit nobody took over is refused.
+    """
+
+    def __init__(self, shard_set: ShardSet) -> None:
+        self.shard_set = shard_set
+        self.write_shard: int | None = None
+        self._connections: dict[int, sqlite3.Connection] = {}
+        self._owed_credits: dict[int, int] = {}
+
+    def connection(self, shard: int) -> sqlite3.Connection:
+        connection = self._connections.get(shard)
+        if connection is None:
+            connection = self.shard_set.pools[shard].acquire()
+            self._connections[shard] = connection
+        return connection
+
+    def write_connection(self, shard: int) -> sqlite3.Connection:
+        if self.write_shard is None:
+            self.write_shard = shard
+        elif shard != self.write_shard:
+            raise CrossShardWriteError(
+                f"Cannot write to shard {shard}: this request already writes "
+                f"to shard {self.write_shard}"
+            )
+        return self.connection(shard)
+
+    def owe_credit(self, wallet_id: int, amount: int) -> None:
+        self._owed_credits[wallet_id] = self._owed_credits.get(wallet_id, 0) + amount
+
+    def take_credit(self, wallet_id: int) -> int:
+        return self._owed_credits.pop(wallet_id, 0)
+
+    def commit(self) -> None:
+        if self._owed_credits:
+            raise CrossShardWriteError(
+                f"Balance changes on other shards without a transfer to carry "
+                f"them: wallets {sorted(self._owed_credits)}"
+            )
+        for connection in self._connections.values():
+            connection.commit()
+
+    def rollback(self) -> None:
+        self._owed_credits.clear()
+        for connection in self._connections.values():
+            connection.rollback()
+
+    def close(self) -> None:
+        connections, self._connections = self._connections, {}
+        for shard, connection in connections.items():
+            self.shard_set.pools[shard].release(connection)
+        self.write_shard = None
+
+
+@cache
+def get_shard_set() -> ShardSet:
+    if settings.DURABILITY_MODE == "log" or settings.VELOCITY_RULES:
+        raise ValueError("Sharded databases support neither the log durability "
+                         "mode nor velocity rules")
+    return ShardSet(
+        [ConnectionPool(path, settings.DB_POOL_MAX_IDLE,
+                        settings.DB_STATEMENT_CACHE_SIZE,
+                        settings.DB_BUSY_TIMEOUT_SECONDS, foreign_keys=False)
+         for path in shard_paths(settings.DB_PATH, settings.DB_SHARD_COUNT)],
+        settings.DB_SHARD_FAN_OUT_WORKERS
+    )
@@ -0,0 +1,190 @@
+"""Moves old Transactions rows into archive database files.
+
+Archived rows live in partition files that each hold one contiguous id
+range. The main database keeps a catalog of them: ``TransactionPartitions``
+records every file's id range, row count and fee sum, and
+``TransactionPartitionWallets`` records which wallets appear in which file.
+Wallet history queries therefore only open the partitions that can hold
+matching rows, and statistics read the aggregates without opening any.
+
+A batch is committed to its partition file first. Then one short
+transaction in the main database deletes the hot rows and extends the
+catalog. A crash between the two leaves rows in the file beyond the
+cataloged range; readers ignore them and the next run rewrites them.
+"""
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+from dataclasses import dataclass
+from functools import cache
+from typing import Any
+
+from config import settings
+from database.connection_pool import ConnectionPool
+
+ARCHIVE_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS Transactions (
+        id INTEGER PRIMARY KEY,
+        sender_wallet_id INTEGER NOT NULL,
+        receiver_wallet_id INTEGER NOT NULL,
+        transfer_amount INTEGER NOT NULL,
+        transfer_fee INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_archive_sender ON Transactions (sender_wallet_id)",
+    "CREATE INDEX IF NOT EXISTS idx_archive_receiver "
+    "ON Transactions (receiver_wallet_id)",
+)
+
+
+@cache
+def get_archive_pool(path: str) -> ConnectionPool:
+    return ConnectionPool(path, settings.DB_ARCHIVE_POOL_MAX_IDLE,
+                          settings.DB_STATEMENT_CACHE_SIZE,
+                          settings.DB_BUSY_TIMEOUT_SECONDS, read_only=True)
+
+
+def read_archive(path: str, sql: str,
+                 parameters: tuple[Any, ...]) -> list[sqlite3.Row]:
+    pool = get_archive_pool(path)
+    connection = pool.acquire()
+    try:
+        rows: list[sqlite3.Row] = connection.execute(sql, parameters).fetchall()
+        return rows
+    finally:
+        pool.release(connection)
+
+
+@dataclass
+class ArchiveStats:
+    moved: int = 0
+    batches: int = 0
+    partitions_created: int = 0
+    seconds: float = 0.0
+
+
+def _open_partition(connection: sqlite3.Connection,
+                    partition_rows: int) -> tuple[int, int] | None:
+    """Returns (id, free rows) of the newest partition if it has room."""
+    row = connection.execute(
+        "SELECT id, transaction_count FROM TransactionPartitions "
+        "ORDER BY max_id DESC LIMIT 1"
+    ).fetchone()
+    if row is None or row[1] >= partition_rows:
+        return None
+    return row[0], partition_rows - row[1]
+
+
+def _write_partition(path: str, rows: list[tuple[int, int, int, int, int]]) -> None:
+    with closing(sqlite3.connect(path)) as archive:
+        archive.execute("PRAGMA journal_mode = WAL")
+        for statement in ARCHIVE_SCHEMA:
+            archive.execute(statement)
+        with archive:
+            archive.executemany(
+                "INSERT OR REPLACE INTO Transactions (id, sender_wallet_id, "
+                "receiver_wallet_id, transfer_amount, transfer_fee) "
+                "VALUES (?, ?, ?, ?, ?)", rows
+            )
+
+
+def _catalog_batch(connection: sqlite3.Connection, partition_id: int | None,
+                   path: str, rows: list[tuple[int, int, int, int, int]]) -> bool:
+    first_id, last_id = rows[0][0], rows[-1][0]
+    wallet_ids = sorted({row[1] for row in rows} | {row[2] for row in rows})
+    fees = sum(row[4] for row in rows)
+
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        if partition_id is None:
+            partition_id = connection.execute(
+                "INSERT INTO TransactionPartitions (path, min_id, max_id, "
+                "transaction_count, transfer_fee_sum) VALUES (?, ?, ?, ?, ?)",
+                (path, first_id, last_id, len(rows), fees)
+            ).lastrowid
+        elif connection.execute(
+                "UPDATE TransactionPartitions SET max_id = ?, "
+                "transaction_count = transaction_count + ?, "
+                "transfer_fee_sum = transfer_fee_sum + ? "
+                "WHERE id = ? AND max_id < ?",
+                (last_id, len(rows), fees, partition_id, first_id)
+        ).rowcount == 0:
+            # Another archiver extended this partition first.
+            connection.execute("ROLLBACK")
+            return False
+        connection.execute(
+            "INSERT OR IGNORE INTO TransactionPartitionWallets "
+            "(wallet_id, partition_id) SELECT value, ? FROM json_each(?)",
+            (partition_id, json.dumps(wallet_ids))
+        )
+        connection.execute(
+            "DELETE FROM Transactions WHERE id >= ? AND id <= ?",
+            (first_id, last_id)
+        )
+        connection.execute("COMMIT")
+        return True
+    except Exception:
+        connection.execute("ROLLBACK")
+        raise
+
+
+def archive_transactions(db_path: str, archive_dir: str, keep_recent: int,
+                         partition_rows: int, batch_size: int,
+                         pause_seconds: float = 0.0) -> ArchiveStats:
+    """Moves every transfer except the newest ``keep_recent`` into partition
+    files of up to ``partition_rows`` rows.
+
+    Each batch holds the main database's write lock only for its delete
+    and catalog update, and ``pause_seconds`` between batches leaves the
+    lock to concurrent transfers.
+    """
+    if keep_recent < 1:
+        raise ValueError("keep_recent must leave at least the newest transfer")
+    os.makedirs(archive_dir, exist_ok=True)
+    stats = ArchiveStats()
+    started = time.perf_counter()
+    connection = sqlite3.connect(db_path, isolation_level=None,
+                                 timeout=settings.DB_BUSY_TIMEOUT_SECONDS)
+    with closing(connection):
+        boundary = connection.execute(
+            "SELECT COALESCE(MAX(id), 0) - ? FROM Transactions", (keep_recent,)
+        ).fetchone()[0]
+
+        while True:
+            open_partition = _open_partition(connection, partition_rows)
+            limit = min(batch_size,
+                        open_partition[1] if open_partition else partition_rows)
+            rows = connection.execute(
+                "SELECT id, sender_wallet_id, receiver_wallet_id, "
+                "transfer_amount, transfer_fee FROM Transactions "
+                "WHERE id <= ? ORDER BY id LIMIT ?", (boundary, limit)
+            ).fetchall()
+            if not rows:
+                break
+
+            if open_partition is None:
+                partition_id = None
+                path = os.path.abspath(
+                    os.path.join(archive_dir, f"transactions-{rows[0][0]:012d}.db")
+                )
+            else:
+                partition_id = open_partition[0]
+                path = connection.execute(
+                    "SELECT path FROM TransactionPartitions WHERE id = ?",
+                    (partition_id,)
+                ).fetchone()[0]
+
+            _write_partition(path, rows)
+            if not _catalog_batch(connection, partition_id, path, rows):
+                break
+            stats.moved += len(rows)
+            stats.batches += 1
+            stats.partitions_created += partition_id is None
+            if pause_seconds:
+                time.sleep(pause_seconds)
+
+    stats.seconds = time.perf_counter() - started
+    return stats
@@ -0,0 +1,95 @@
+import os
+import struct
+import time
+import zlib
+from collections.abc import Iterator
+
+from entity.transaction import Transaction
+
+# Every record is framed as <payload length><crc32 of payload><payload>.
+_FRAME_HEADER = struct.Struct("<II")
+_TRANSFER_PAYLOAD = struct.Struct("<qqqqq")
+
+
+def encode_record(transaction: Transaction) -> bytes:
+    assert transaction.id is not None
+    payload = _TRANSFER_PAYLOAD.pack(
+        transaction.id,
+        transaction.sender_wallet_id,
+        transaction.receiver_wallet_id,
+        transaction.transfer_amount,
+        transaction.transfer_fee
+    )
+    return _FRAME_HEADER.pack(len(payload), zlib.crc32(payload)) + payload
+
+
+def decode_payload(payload: bytes) -> Transaction:
+    (transaction_id, sender_wallet_id, receiver_wallet_id,
+     transfer_amount, transfer_fee) = _TRANSFER_PAYLOAD.unpack(payload)
+    return Transaction(
+        id=transaction_id, sender_wallet_id=sender_wallet_id,
+        receiver_wallet_id=receiver_wallet_id,
+        transfer_amount=transfer_amount, transfer_fee=transfer_fee
+    )
+
+
+class TransactionLog:
+    """Append-only, length-prefixed log of transfers.
+
+    Appends are flushed to the OS on every call but only fsync'd once
+    ``fsync_batch_size`` records are pending or ``fsync_interval_seconds``
+    have passed since the last fsync, so a crash can lose at most one batch.
+    """
+
+    def __init__(self, path: str, fsync_batch_size: int = 64,
+                 fsync_interval_seconds: float = 0.05) -> None:
+        self.path = path
+        self.fsync_batch_size = fsync_batch_size
+        self.fsync_interval_seconds = fsync_interval_seconds
+        self._file = open(path, "ab")  # noqa: SIM115
+        self._unsynced_records = 0
+        self._last_sync = time.monotonic()
+
+    def append(self, transaction: Transaction) -> None:
+        self._file.write(encode_record(transaction))
+        self._file.flush()
+        self._unsynced_records += 1
+
+        if (self._unsynced_records >= self.fsync_batch_size or
+                time.monotonic() - self._last_sync >= self.fsync_interval_seconds):
+            self.sync()
+
+    def sync(self) -> None:
+        if self._unsynced_records:
+            os.fsync(self._file.fileno())
+            self._unsynced_records = 0
+        self._last_sync = time.monotonic()
+
+    def replay(self) -> Iterator[Transaction]:
+        """Yields every intact record and cuts off a torn or corrupt tail."""
+        valid_length = 0
+        with open(self.path, "rb") as log_file:
+            while True:
+                header = log_file.read(_FRAME_HEADER.size)
+                if len(header) < _FRAME_HEADER.size:
+                    break
+                length, checksum = _FRAME_HEADER.unpack(header)
+                payload = log_file.read(length)
+                if len(payload) < length or zlib.crc32(payload) != checksum:
+                    break
+                valid_length = log_file.tell()
+                yield decode_payload(payload)
+
+        if valid_length < os.path.getsize(self.path):
+            os.truncate(self.path, valid_length)
+
+    def reset(self) -> None:
+        """Drops every record, once they are all persisted elsewhere."""
+        self._file.truncate(0)
+        os.fsync(self._file.fileno())
+        self._unsynced_records = 0
+        self._last_sync = time.monotonic()
+
+    def close(self) -> None:
+        self.sync()
+        self._file.close()
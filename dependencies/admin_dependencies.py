@@ -0,0 +1,9 @@
+from fastapi import Header
+
+from config import settings
+from exception.exceptions import UnauthorizedError
+
+
+def verify_admin_api_key(admin_api_key: str = Header(...)) -> None:
+    if admin_api_key != settings.ADMIN_API_KEY:
+        raise UnauthorizedError("Invalid admin API key")
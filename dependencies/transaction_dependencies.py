@@ -1,19 +1,88 @@
 import sqlite3
+from collections.abc import Callable, Generator
+from contextlib import AbstractContextManager, contextmanager
 from typing import Annotated
 
 from fastapi import Depends
 
-from database.session import get_db
+from cache.caches import get_user_cache
+from config import settings
+from database.log_structured_store import get_log_structured_store
+from database.session import get_database
+from database.shard_transfers import get_shard_transfer_coordinator
+from database.shards import ShardSession
+from repository.caching_user_repository import CachingUserRepository
+from repository.ledger_repository import LedgerRepository
+from repository.logged_ledger_repository import LoggedLedgerRepository
+from repository.logged_transaction_repository import LoggedTransactionRepository
+from repository.logged_wallet_repository import LoggedWalletRepository
+from repository.outbox_repository import OutboxRepository
+from repository.sharded_ledger_repository import ShardedLedgerRepository
+from repository.sharded_outbox_repository import ShardedOutboxRepository
+from repository.sharded_transaction_repository import ShardedTransactionRepository
+from repository.sharded_transfer_stats_repository import (
+    ShardedTransferStatsRepository,
+)
+from repository.sharded_user_repository import ShardedUserRepository
+from repository.sharded_wallet_repository import ShardedWalletRepository
 from repository.transaction_repository import TransactionRepository
-from repository.user_repository import UserRepository
 from repository.wallet_repository import WalletRepository
+from service.fee_schedule import get_fee_engine
 from service.transaction_service import TransactionService
+from service.transfer_events import get_transfer_event_broker
+from service.velocity_guard import get_velocity_guard
+
+TransactionServiceScope = Callable[[], AbstractContextManager[TransactionService]]
+
+
+def get_sharded_transaction_service(session: ShardSession) -> TransactionService:
+    outbox_repo = (ShardedOutboxRepository(session, settings.WEBHOOK_URLS)
+                   if settings.WEBHOOK_URLS else None)
+    return TransactionService(
+        ShardedUserRepository(session), ShardedWalletRepository(session),
+        ShardedTransactionRepository(session, get_shard_transfer_coordinator()),
+        get_fee_engine(), get_transfer_event_broker(), outbox_repo,
+        ledger_repo=ShardedLedgerRepository(session),
+        transfer_stats_repo=ShardedTransferStatsRepository(session)
+    )
 
 
 def get_transaction_service(
-        db_connection: Annotated[sqlite3.Connection, Depends(get_db)]
+        db_connection: Annotated[sqlite3.Connection | ShardSession,
+                                 Depends(get_database)]
 ) -> TransactionService:
-    transaction_repo = TransactionRepository(db_connection)
-    wallet_repo = WalletRepository(db_connection)
-    user_repo = UserRepository(db_connection)
-    return TransactionService(user_repo, wallet_repo, transaction_repo)
+    if isinstance(db_connection, ShardSession):
+        return get_sharded_transaction_service(db_connection)
+    transaction_repo: TransactionRepository
+    wallet_repo: WalletRepository
+    ledger_repo: LedgerRepository
+    if settings.DURABILITY_MODE == "log":
+        store = get_log_structured_store()
+        transaction_repo = LoggedTransactionRepository(db_connection, store)
+        wallet_repo = LoggedWalletRepository(db_connection, store)
+        ledger_repo = LoggedLedgerRepository(db_connection, store)
+    else:
+        transaction_repo = TransactionRepository(db_connection)
+        wallet_repo = WalletRepository(db_connection)
+        ledger_repo = LedgerRepository(db_connection)
+    user_repo = CachingUserRepository(db_connection, get_user_cache())
+    outbox_repo = (OutboxRepository(db_connection, settings.WEBHOOK_URLS)
+                   if settings.WEBHOOK_URLS else None)
+    return TransactionService(user_repo, wallet_repo, transaction_repo,
+                              get_fee_engine(), get_transfer_event_broker(),
+                              outbox_repo, ledger_repo=ledger_repo,
+                              transfer_rules=[get_velocity_guard()]
+                              if settings.VELOCITY_RULES else ())
+
+
+@contextmanager
+def transaction_service_scope() -> Generator[TransactionService]:
+    with contextmanager(get_database)() as db_connection:
+        yield get_transaction_service(db_connection)
+
+
+def get_transaction_service_scope() -> TransactionServiceScope:
+    """For event streams, which outlive any one request-scoped connection:
+    each use of the returned scope borrows a pooled connection only for as
+    long as it lasts."""
+    return transaction_service_scope
@@ -3,13 +3,16 @@ from typing import Annotated
 
 from fastapi import Depends
 
-from database.session import get_db
+from database.session import get_database
+from database.shards import ShardSession
+from repository.sharded_user_repository import ShardedUserRepository
 from repository.user_repository import UserRepository
 from service.user_service import UserService
 
 
 def get_user_service(
-    db: Annotated[sqlite3.Connection, Depends(get_db)]
+    db: Annotated[sqlite3.Connection | ShardSession, Depends(get_database)]
 ) -> UserService:
-    repo = UserRepository(db)
+    repo = (ShardedUserRepository(db) if isinstance(db, ShardSession)
+            else UserRepository(db))
     return UserService(repo)
@@ -1,19 +1,66 @@
 import sqlite3
+from functools import cache
 from typing import Annotated
 
 from fastapi import Depends
 
-from database.session import get_db
-from repository.user_repository import UserRepository
+from cache.caches import get_btc_rate_cache, get_user_cache, get_wallet_cache
+from config import settings
+from database.log_structured_store import get_log_structured_store
+from database.session import get_database
+from database.shards import ShardSession
+from repository.caching_user_repository import CachingUserRepository
+from repository.caching_wallet_repository import CachingWalletRepository
+from repository.ledger_repository import LedgerRepository
+from repository.logged_ledger_repository import LoggedLedgerRepository
+from repository.logged_wallet_repository import LoggedWalletRepository
+from repository.sharded_ledger_repository import ShardedLedgerRepository
+from repository.sharded_user_repository import ShardedUserRepository
+from repository.sharded_wallet_repository import ShardedWalletRepository
 from repository.wallet_repository import WalletRepository
-from service.btc_price_converter import CoinGeckoBtcPriceConverter
+from service.btc_price_converter import (
+    BtcPriceConverter,
+    BudgetedBtcPriceConverter,
+    CachingBtcPriceConverter,
+    create_price_source,
+)
+from service.price_refresher import SnapshotBtcPriceConverter, get_price_refresher
 from service.wallet_service import WalletService
 
 
+@cache
+def get_btc_price_converter() -> BtcPriceConverter:
+    converter: BtcPriceConverter
+    if settings.PRICE_REFRESH_ENABLED:
+        converter = SnapshotBtcPriceConverter(get_price_refresher())
+    else:
+        converter = CachingBtcPriceConverter(
+            create_price_source(), get_btc_rate_cache()
+        )
+    if settings.PRICE_LOOKUP_BUDGET_SECONDS > 0:
+        converter = BudgetedBtcPriceConverter(
+            converter, settings.PRICE_LOOKUP_BUDGET_SECONDS)
+    return converter
+
+
 def get_wallet_service(
-        db_connection: Annotated[sqlite3.Connection, Depends(get_db)]
+        db_connection: Annotated[sqlite3.Connection | ShardSession,
+                                 Depends(get_database)]
 ) -> WalletService:
-    user_repo = UserRepository(db_connection)
-    wallet_repo = WalletRepository(db_connection)
-    btc_price_converter = CoinGeckoBtcPriceConverter()
-    return WalletService(user_repo, wallet_repo, btc_price_converter)
+    if isinstance(db_connection, ShardSession):
+        return WalletService(ShardedUserRepository(db_connection),
+                             ShardedWalletRepository(db_connection),
+                             get_btc_price_converter(),
+                             ShardedLedgerRepository(db_connection))
+    user_repo = CachingUserRepository(db_connection, get_user_cache())
+    wallet_repo: WalletRepository
+    ledger_repo: LedgerRepository
+    if settings.DURABILITY_MODE == "log":
+        store = get_log_structured_store()
+        wallet_repo = LoggedWalletRepository(db_connection, store)
+        ledger_repo = LoggedLedgerRepository(db_connection, store)
+    else:
+        wallet_repo = CachingWalletRepository(db_connection, get_wallet_cache())
+        ledger_repo = LedgerRepository(db_connection)
+    return WalletService(user_repo, wallet_repo, get_btc_price_converter(),
+                         ledger_repo)
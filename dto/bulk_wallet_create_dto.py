@@ -0,0 +1,8 @@
+from pydantic import BaseModel, Field
+
+MAX_BULK_WALLETS = 10_000
+
+
+class BulkWalletCreateDto(BaseModel):
+    # One wallet per entry; a user listed twice gets two wallets.
+    user_ids: list[int] = Field(..., min_length=1, max_length=MAX_BULK_WALLETS)
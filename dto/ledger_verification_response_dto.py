@@ -0,0 +1,7 @@
+from pydantic import BaseModel
+
+
+class LedgerVerificationResponseDto(BaseModel):
+    checked_postings: int
+    verified_through: int
+    problems: list[str]
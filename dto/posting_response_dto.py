@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+
+class PostingResponseDto(BaseModel):
+    sequence: int
+    # None for the posting that opened the wallet.
+    transaction_id: int | None
+    amount: int
+    balance_after: int
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+
+
+class FunctionProfileDto(BaseModel):
+    function: str
+    self_samples: int
+    cumulative_samples: int
+    cumulative_seconds: float
+
+
+class ProfileResponseDto(BaseModel):
+    duration_seconds: float
+    interval_seconds: float
+    samples: int
+    idle_samples: int
+    functions: list[FunctionProfileDto]
+    collapsed_stacks: str
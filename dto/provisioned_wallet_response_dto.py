@@ -0,0 +1,5 @@
+from dto.wallet_response_dto import WalletResponseDto
+
+
+class ProvisionedWalletResponseDto(WalletResponseDto):
+    user_id: int
@@ -0,0 +1,5 @@
+from dto.transaction_response_dto import TransactionResponseDto
+
+
+class TransferEventDto(TransactionResponseDto):
+    transaction_id: int
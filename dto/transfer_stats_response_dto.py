@@ -0,0 +1,22 @@
+from pydantic import BaseModel
+
+
+class UserTransferStatsResponseDto(BaseModel):
+    user_id: int
+    name: str
+    transfers_sent: int
+    transfers_received: int
+    volume_sent: int
+    volume_received: int
+    # The platform's profit from this user's transfers.
+    fees_paid: int
+
+
+class WalletTransferStatsResponseDto(BaseModel):
+    wallet_address: str
+    user_id: int
+    transfers_sent: int
+    transfers_received: int
+    volume_sent: int
+    volume_received: int
+    fees_paid: int
@@ -4,4 +4,7 @@ from pydantic import BaseModel
 class WalletResponseDto(BaseModel):
     wallet_address: str
     balance_btc: float
-    balance_usd: float
+    # None when no BTC rate was available within the lookup budget.
+    balance_usd: float | None
+    price_age_seconds: float | None = None
+    price_stale: bool = False
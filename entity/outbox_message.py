@@ -0,0 +1,10 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class OutboxMessage:
+    id: int
+    transaction_id: int
+    endpoint: str
+    payload: str
+    attempts: int
@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class Posting:
+    id: int
+    entry_id: int
+    account_id: int
+    sequence: int
+    amount: int
+    balance_after: int
+    posted_at: float
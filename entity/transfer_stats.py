@@ -0,0 +1,24 @@
+from dataclasses import dataclass
+
+
+@dataclass
+class UserTransferStats:
+    user_id: int
+    name: str
+    transfers_sent: int
+    transfers_received: int
+    volume_sent: int
+    volume_received: int
+    fees_paid: int
+
+
+@dataclass
+class WalletTransferStats:
+    wallet_id: int
+    wallet_address: str
+    user_id: int
+    transfers_sent: int
+    transfers_received: int
+    volume_sent: int
+    volume_received: int
+    fees_paid: int
@@ -21,3 +21,31 @@ class WalletNotFoundError(Exception):
 class WalletLimitExceededError(Exception):
     def __init__(self, message: str):
         super().__init__(message)
+
+class ProfilerBusyError(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+
+class ConcurrentUpdateError(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+
+class PriceUnavailableError(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+
+class BalanceHistoryUnavailableError(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+
+class VelocityLimitExceededError(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+
+class CrossShardWriteError(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+
+class TransferOrderUnavailableError(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
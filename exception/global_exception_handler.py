@@ -2,10 +2,17 @@ from fastapi import FastAPI, Request
 from starlette.responses import JSONResponse
 
 from exception.exceptions import (
+    BalanceHistoryUnavailableError,
+    ConcurrentUpdateError,
+    CrossShardWriteError,
     NotEnoughBalanceError,
+    PriceUnavailableError,
+    ProfilerBusyError,
+    TransferOrderUnavailableError,
     UnauthorizedError,
     UnauthorizedWalletAccessError,
     UserNotFoundError,
+    VelocityLimitExceededError,
     WalletLimitExceededError,
     WalletNotFoundError,
 )
@@ -59,3 +66,59 @@ def register_exception_handlers(app: FastAPI) -> None:
             status_code=409,
             content={"error": str(exception)}
         )
+
+    @app.exception_handler(ProfilerBusyError)
+    def handle_profiler_busy(
+            _: Request, exception: ProfilerBusyError) -> JSONResponse:
+        return JSONResponse(
+            status_code=409,
+            content={"error": str(exception)}
+        )
+
+    @app.exception_handler(ConcurrentUpdateError)
+    def handle_concurrent_update(
+            _: Request, exception: ConcurrentUpdateError) -> JSONResponse:
+        return JSONResponse(
+            status_code=409,
+            content={"error": str(exception)}
+        )
+
+    @app.exception_handler(PriceUnavailableError)
+    def handle_price_unavailable(
+            _: Request, exception: PriceUnavailableError) -> JSONResponse:
+        return JSONResponse(
+            status_code=503,
+            content={"error": str(exception)}
+        )
+
+    @app.exception_handler(BalanceHistoryUnavailableError)
+    def handle_balance_history_unavailable(
+            _: Request, exception: BalanceHistoryUnavailableError) -> JSONResponse:
+        return JSONResponse(
+            status_code=404,
+            content={"error": str(exception)}
+        )
+
+    @app.exception_handler(VelocityLimitExceededError)
+    def handle_velocity_limit_exceeded(
+            _: Request, exception: VelocityLimitExceededError) -> JSONResponse:
+        return JSONResponse(
+            status_code=429,
+            content={"error": str(exception)}
+        )
+
+    @app.exception_handler(CrossShardWriteError)
+    def handle_cross_shard_write(
+            _: Request, exception: CrossShardWriteError) -> JSONResponse:
+        return JSONResponse(
+            status_code=400,
+            content={"error": str(exception)}
+        )
+
+    @app.exception_handler(TransferOrderUnavailableError)
+    def handle_transfer_order_unavailable(
+            _: Request, exception: TransferOrderUnavailableError) -> JSONResponse:
+        return JSONResponse(
+            status_code=501,
+            content={"error": str(exception)}
+        )
@@ -1,28 +1,111 @@
+import asyncio
 from collections.abc import AsyncGenerator
-from contextlib import asynccontextmanager
+from contextlib import asynccontextmanager, suppress
 
 from fastapi import FastAPI
 
+from api.admin_router import admin_router
+from api.metrics_router import metrics_router
 from api.statistics_router import statistics_router
 from api.transaction_router import transaction_router
 from api.user_router import user_router
 from api.wallet_router import wallet_router
 from api.wallet_transaction_router import wallet_transaction_router
+from config import settings
+from database.connection_pool import get_connection_pool, get_read_connection_pool
 from database.database_init import init_db
+from database.log_structured_store import LogStructuredStore, get_log_structured_store
+from database.shard_transfers import get_shard_transfer_coordinator
+from database.shards import get_shard_set, init_shards
 from exception.global_exception_handler import register_exception_handlers
+from middleware.rate_limiter import register_rate_limiter
+from middleware.trace_recorder import register_trace_recorder
+from service.ledger_verifier import create_ledger_verifier, get_ledger_verifier
+from service.price_refresher import get_price_refresher
+from service.velocity_guard import get_velocity_guard
+from service.webhook_dispatcher import (
+    create_webhook_dispatcher,
+    get_webhook_dispatcher,
+)
+
+
+async def sync_transaction_log(store: LogStructuredStore) -> None:
+    while True:
+        await asyncio.sleep(settings.TRANSACTION_LOG_FSYNC_INTERVAL_SECONDS)
+        await asyncio.to_thread(store.sync)
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncGenerator[None]:
-    init_db()
-    yield
+    background_tasks: list[asyncio.Task[None]] = []
+    shard_set = None
+    if settings.DB_SHARD_COUNT > 1:
+        shard_set = get_shard_set()
+        init_shards(settings.DB_PATH, settings.DB_SHARD_COUNT)
+        # Credits a crash left owing are applied before the first transfer.
+        coordinator = get_shard_transfer_coordinator()
+        await asyncio.to_thread(coordinator.recover)
+        if settings.SHARD_TRANSFER_RECOVERY_INTERVAL_SECONDS > 0:
+            background_tasks.append(asyncio.create_task(coordinator.run(
+                settings.SHARD_TRANSFER_RECOVERY_INTERVAL_SECONDS)))
+    else:
+        init_db(settings.DB_PATH)
+
+    store = None
+    if settings.DURABILITY_MODE == "log":
+        store = get_log_structured_store()
+        background_tasks.append(asyncio.create_task(sync_transaction_log(store)))
+    if settings.PRICE_REFRESH_ENABLED:
+        background_tasks.append(asyncio.create_task(get_price_refresher().run()))
+    if settings.WEBHOOK_URLS:
+        dispatchers = ([create_webhook_dispatcher(pool) for pool in shard_set.pools]
+                       if shard_set else [get_webhook_dispatcher()])
+        background_tasks += [
+            asyncio.create_task(dispatcher.run(settings.WEBHOOK_POLL_INTERVAL_SECONDS))
+            for dispatcher in dispatchers
+        ]
+    if settings.LEDGER_VERIFY_INTERVAL_SECONDS > 0:
+        verifiers = ([create_ledger_verifier(pool) for pool in shard_set.pools]
+                     if shard_set else [get_ledger_verifier()])
+        background_tasks += [
+            asyncio.create_task(verifier.run(settings.LEDGER_VERIFY_INTERVAL_SECONDS))
+            for verifier in verifiers
+        ]
+    if settings.VELOCITY_RULES:
+        # Counters start from recent history before the first transfer.
+        velocity_guard = get_velocity_guard()
+        await asyncio.to_thread(velocity_guard.sync)
+        if settings.VELOCITY_SYNC_INTERVAL_SECONDS > 0:
+            background_tasks.append(asyncio.create_task(
+                velocity_guard.run(settings.VELOCITY_SYNC_INTERVAL_SECONDS)))
+
+    try:
+        yield
+    finally:
+        for task in background_tasks:
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
+        if store is not None:
+            store.close()
+            get_log_structured_store.cache_clear()
+        if shard_set is not None:
+            shard_set.close()
+            get_shard_set.cache_clear()
+            get_shard_transfer_coordinator.cache_clear()
+        get_connection_pool().close()
+        get_read_connection_pool().close()
 
 
 app = FastAPI(lifespan=lifespan)
 
 register_exception_handlers(app)
+register_trace_recorder(app)
+register_rate_limiter(app)
 app.include_router(user_router)
 app.include_router(transaction_router)
 app.include_router(wallet_transaction_router)
 app.include_router(wallet_router)
 app.include_router(statistics_router)
+app.include_router(metrics_router)
+app.include_router(admin_router)
@@ -0,0 +1,226 @@
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import deque
+from collections.abc import Callable
+from functools import cache
+
+from fastapi import FastAPI, status
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+from starlette.websockets import WebSocketClose
+
+from config import settings
+from service.metrics import get_metrics_registry
+
+SLOTS = 8192
+# key hash, tokens left, monotonic time of the last refill
+_SLOT = struct.Struct("<Qdd")
+STORE_SIZE = SLOTS * _SLOT.size
+GLOBAL_KEY = b"\0global"
+# Operators must still be able to observe and profile an overloaded server.
+EXEMPT_PATH_PREFIXES = ("/metrics", "/admin")
+# Server-Sent Events streams and WebSockets stay open for as long as the
+# client listens, so they are admitted like any request but neither held as
+# in flight nor sampled for the p99; otherwise a few listeners would shed
+# everyone else.
+STREAMING_PATH_SUFFIXES = ("/transactions/stream",)
+
+
+def create_store_file(path: str) -> None:
+    with open(path, "wb") as store_file:
+        store_file.truncate(STORE_SIZE)
+
+
+class TokenBucketStore:
+    """Token buckets kept in a fixed table of slots in memory-mapped storage.
+
+    A key is hashed onto a slot that records the full 64-bit hash, so a key
+    that lands on a slot held by another key takes it over with a full
+    bucket instead of sharing its tokens. With a path every worker process
+    maps the same file and the buckets are global to the server; without one
+    they live in anonymous memory and only cover the current process.
+    """
+
+    def __init__(self, path: str | None = None,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.path = path
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._fd: int | None = None
+        if path is None:
+            self._map = mmap.mmap(-1, STORE_SIZE)
+        else:
+            self._fd = os.open(path, os.O_RDWR)
+            self._map = mmap.mmap(self._fd, STORE_SIZE)
+
+    def take(self, key: bytes, rate: float, burst: float) -> float:
+        """Takes one token from ``key``'s bucket, which refills at ``rate``
+        tokens per second up to ``burst``. Returns 0 when a token was taken,
+        otherwise the seconds until one will be available."""
+        key_hash = int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(),
+                                  "little") or 1
+        offset = (key_hash % SLOTS) * _SLOT.size
+        with self._lock:
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                now = self.clock()
+                stored_hash, tokens, updated = _SLOT.unpack_from(self._map, offset)
+                if stored_hash != key_hash:
+                    tokens = burst
+                else:
+                    tokens = min(burst, tokens + (now - updated) * rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / rate
+                _SLOT.pack_into(self._map, offset, key_hash, tokens, now)
+                return wait
+            finally:
+                if self._fd is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def close(self) -> None:
+        self._map.close()
+        if self._fd is not None:
+            os.close(self._fd)
+
+
+class AdmissionController:
+    """Sheds requests before they queue for the threadpool or the SQLite
+    write lock once this process has ``max_in_flight`` requests running, or
+    once the p99 latency of the requests completed within the last
+    ``window_seconds`` exceeds ``max_p99_ms``. A limit of 0 disables that
+    check. Old samples age out, so shedding stops once latency recovers.
+    """
+
+    def __init__(self, max_in_flight: int, max_p99_ms: float,
+                 window_seconds: float = 10.0, max_samples: int = 1024,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_in_flight = max_in_flight
+        self.max_p99_ms = max_p99_ms
+        self.window_seconds = window_seconds
+        self.clock = clock
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        self._samples: deque[tuple[float, float]] = deque(maxlen=max_samples)
+
+    def p99_ms(self) -> float:
+        with self._lock:
+            horizon = self.clock() - self.window_seconds
+            while self._samples and self._samples[0][0] < horizon:
+                self._samples.popleft()
+            durations = sorted(duration for _, duration in self._samples)
+        if not durations:
+            return 0.0
+        return durations[math.ceil(0.99 * len(durations)) - 1]
+
+    def should_shed(self) -> bool:
+        if self.max_in_flight and self.in_flight >= self.max_in_flight:
+            return True
+        return bool(self.max_p99_ms) and self.p99_ms() > self.max_p99_ms
+
+    def started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, duration_ms: float) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            self._samples.append((self.clock(), duration_ms))
+
+
+class RateLimitMiddleware:
+    """Rejects a request with 429 when its ``x-api-key`` bucket or the
+    global bucket is empty, and with 503 when the admission controller is
+    shedding load. Both carry a Retry-After header. Streaming responses and
+    WebSockets are checked when they open, a rejected WebSocket being closed
+    with 1013, but left out of the admission accounting."""
+
+    def __init__(self, app: ASGIApp, store: TokenBucketStore,
+                 admission: AdmissionController) -> None:
+        self.app = app
+        self.store = store
+        self.admission = admission
+        registry = get_metrics_registry()
+        self.rate_limited = registry.counter(
+            "wallet_rate_limited_requests_total",
+            "Requests rejected because a token bucket was empty")
+        self.shed = registry.counter(
+            "wallet_shed_requests_total",
+            "Requests rejected by load shedding")
+        registry.gauge(
+            "wallet_requests_in_flight", "Requests currently being handled"
+        ).set_function(lambda: admission.in_flight)
+
+    def _take_tokens(self, scope: Scope) -> float:
+        api_key = dict(scope["headers"]).get(b"x-api-key")
+        if api_key is not None:
+            wait = self.store.take(api_key, settings.RATE_LIMIT_PER_KEY_RATE,
+                                   settings.RATE_LIMIT_PER_KEY_BURST)
+            if wait:
+                return wait
+        return self.store.take(GLOBAL_KEY, settings.RATE_LIMIT_GLOBAL_RATE,
+                               settings.RATE_LIMIT_GLOBAL_BURST)
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send,
+                      status_code: int, error: str, retry_after: int) -> None:
+        if scope["type"] == "websocket":
+            await WebSocketClose(status.WS_1013_TRY_AGAIN_LATER, error)(
+                scope, receive, send)
+            return
+        response = JSONResponse(
+            status_code=status_code, content={"error": error},
+            headers={"Retry-After": str(retry_after)})
+        await response(scope, receive, send)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if (scope["type"] not in ("http", "websocket") or
+                scope["path"].startswith(EXEMPT_PATH_PREFIXES)):
+            await self.app(scope, receive, send)
+            return
+
+        if self.admission.should_shed():
+            self.shed.inc()
+            await self._reject(scope, receive, send, 503, "Server is overloaded", 1)
+            return
+
+        wait = self._take_tokens(scope)
+        if wait:
+            self.rate_limited.inc()
+            await self._reject(scope, receive, send, 429, "Rate limit exceeded",
+                               math.ceil(wait))
+            return
+
+        if (scope["type"] == "websocket" or
+                scope["path"].endswith(STREAMING_PATH_SUFFIXES)):
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        self.admission.started()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.admission.finished((time.perf_counter() - started) * 1000)
+
+
+@cache
+def get_token_bucket_store() -> TokenBucketStore:
+    return TokenBucketStore(settings.RATE_LIMIT_STORE_PATH)
+
+
+def register_rate_limiter(app: FastAPI) -> None:
+    if settings.RATE_LIMIT_ENABLED:
+        app.add_middleware(
+            RateLimitMiddleware, store=get_token_bucket_store(),
+            admission=AdmissionController(settings.LOAD_SHED_MAX_IN_FLIGHT,
+                                          settings.LOAD_SHED_MAX_P99_MS)
+        )
@@ -0,0 +1,119 @@
+import hashlib
+import json
+import threading
+import time
+from dataclasses import asdict, dataclass
+from functools import cache
+
+from fastapi import FastAPI
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from config import settings
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@dataclass(frozen=True)
+class TraceEvent:
+    """One recorded request. ``route`` is the route template, never the raw
+    path, and ``key`` a salted hash of the ``x-api-key`` header, so traces
+    carry no wallet addresses or credentials."""
+    at: float
+    method: str
+    route: str
+    key: str | None
+    request_bytes: int
+    response_bytes: int
+    status: int
+    duration_ms: float
+
+    def to_json(self) -> str:
+        return json.dumps(asdict(self), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, line: str) -> "TraceEvent":
+        return cls(**json.loads(line))
+
+
+class TraceRecorder:
+    """Appends ``TraceEvent`` JSON lines to ``path``; ``at`` is seconds
+    since the recorder was created."""
+
+    def __init__(self, path: str, key_salt: str) -> None:
+        self.key_salt = key_salt.encode()
+        self._started = time.monotonic()
+        self._lock = threading.Lock()
+        self._file = open(path, "a", buffering=1)  # noqa: SIM115
+
+    def anonymize(self, api_key: bytes) -> str:
+        return hashlib.sha256(self.key_salt + api_key).hexdigest()[:16]
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started
+
+    def record(self, event: TraceEvent) -> None:
+        with self._lock:
+            self._file.write(event.to_json() + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class TraceRecorderMiddleware:
+    def __init__(self, app: ASGIApp, recorder: TraceRecorder) -> None:
+        self.app = app
+        self.recorder = recorder
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        at = self.recorder.elapsed()
+        started = time.perf_counter()
+        request_bytes = response_bytes = 0
+        status = 500
+
+        async def counting_receive() -> Message:
+            nonlocal request_bytes
+            message = await receive()
+            if message["type"] == "http.request":
+                request_bytes += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message: Message) -> None:
+            nonlocal response_bytes, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            # The router stores the matched route in the shared scope.
+            route = scope.get("route")
+            api_key = dict(scope["headers"]).get(b"x-api-key")
+            self.recorder.record(TraceEvent(
+                at=round(at, 6),
+                method=scope["method"],
+                route=getattr(route, "path", UNMATCHED_ROUTE),
+                key=self.recorder.anonymize(api_key) if api_key else None,
+                request_bytes=request_bytes,
+                response_bytes=response_bytes,
+                status=status,
+                duration_ms=round((time.perf_counter() - started) * 1000, 3)
+            ))
+
+
+@cache
+def get_trace_recorder() -> TraceRecorder:
+    assert settings.TRACE_PATH is not None
+    return TraceRecorder(settings.TRACE_PATH, settings.TRACE_KEY_SALT)
+
+
+def register_trace_recorder(app: FastAPI) -> None:
+    if settings.TRACE_PATH:
+        app.add_middleware(TraceRecorderMiddleware, recorder=get_trace_recorder())
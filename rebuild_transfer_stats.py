@@ -0,0 +1,39 @@
+"""Recomputes the per-wallet and per-user transfer totals behind
+``/statistics/top-users`` and ``/statistics/top-wallets`` from the
+Transactions table and its archive partitions.
+
+    python rebuild_transfer_stats.py --db bitcoin_wallet.db
+
+Run it once after upgrading an existing database, or whenever the totals
+are suspected to be off. Transfers wait while it runs. It refuses to run
+with ``WALLET_DB_SHARD_COUNT`` above 1: a shard's Transactions table lacks
+the transfers its wallets received from other shards.
+"""
+import argparse
+import sqlite3
+import time
+from contextlib import closing
+
+from config import settings
+from database.database_init import init_db
+from repository.transfer_stats_repository import TransferStatsRepository
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--db", default=settings.DB_PATH)
+    args = parser.parse_args()
+    if settings.DB_SHARD_COUNT > 1:
+        parser.error("cannot rebuild the totals of a sharded database")
+
+    init_db(args.db)
+    started = time.perf_counter()
+    connection = sqlite3.connect(args.db, timeout=settings.DB_BUSY_TIMEOUT_SECONDS)
+    with closing(connection):
+        wallets = TransferStatsRepository(connection).rebuild()
+    print(f"Rebuilt transfer totals for {wallets} wallets in "
+          f"{time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import sqlite3
+from functools import partial
+
+from cache.invalidating_cache import InvalidatingCache
+from entity.user import User
+from repository.user_repository import UserRepository
+
+
+class CachingUserRepository(UserRepository):
+    """Serves api key lookups, done on every authenticated request, from a
+    process-wide cache kept coherent across workers."""
+
+    def __init__(self, db_connection: sqlite3.Connection,
+                 user_cache: InvalidatingCache[User]) -> None:
+        super().__init__(db_connection)
+        self.user_cache = user_cache
+
+    def find_user_by_api_key(self, api_key: str) -> User | None:
+        return self.user_cache.load(
+            api_key, partial(super().find_user_by_api_key, api_key)
+        )
@@ -0,0 +1,26 @@
+import sqlite3
+from functools import partial
+
+from cache.invalidating_cache import InvalidatingCache
+from entity.wallet import Wallet
+from repository.wallet_repository import WalletRepository
+
+
+class CachingWalletRepository(WalletRepository):
+    """Caches wallet lookups by address for read-only paths.
+
+    ``WalletRepository.update_balance`` invalidates the entry in every worker
+    once the balance change commits. The transfer path must keep using the
+    plain repository, since it needs the exact balance it is about to
+    overwrite.
+    """
+
+    def __init__(self, db_connection: sqlite3.Connection,
+                 wallet_cache: InvalidatingCache[Wallet]) -> None:
+        super().__init__(db_connection)
+        self.wallet_cache = wallet_cache
+
+    def get_wallet_by_address(self, wallet_address: str) -> Wallet | None:
+        return self.wallet_cache.load(
+            wallet_address, partial(super().get_wallet_by_address, wallet_address)
+        )
@@ -0,0 +1,53 @@
+"""How ``Users.api_key`` and ``Wallets.wallet_address`` are stored.
+
+Both are ``str(uuid.uuid4())`` values. With ``settings.COMPACT_KEYS`` they
+are written and looked up as their 16 raw bytes, which shortens the rows
+and the UNIQUE indexes on them by more than half. Keys that are not
+canonical UUIDs, such as those of imported users, stay TEXT either way, and
+reads decode both forms, so only writes and lookups depend on the setting.
+``convert_stored_keys`` rewrites the keys already stored when the setting
+changes.
+"""
+import re
+import sqlite3
+
+from config import settings
+from repository import sql_catalog
+
+# Only the form str(uuid.UUID) produces, so decoding gives back the same key.
+_CANONICAL_UUID = re.compile(
+    r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+
+
+def _compact(key: str) -> str | bytes:
+    if _CANONICAL_UUID.fullmatch(key) is None:
+        return key
+    return bytes.fromhex(key.replace("-", ""))
+
+
+def encode_key(key: str) -> str | bytes:
+    return _compact(key) if settings.COMPACT_KEYS else key
+
+
+def decode_key(stored: str | bytes) -> str:
+    if not isinstance(stored, bytes):
+        return stored
+    hexed = stored.hex()
+    return (f"{hexed[:8]}-{hexed[8:12]}-{hexed[12:16]}-{hexed[16:20]}-"
+            f"{hexed[20:]}")
+
+
+def convert_stored_keys(connection: sqlite3.Connection, compact: bool) -> int:
+    """Rewrites every stored API key and wallet address in the compact form,
+    or back to TEXT; returns how many changed. The caller commits."""
+    convert = _compact if compact else decode_key
+    converted = 0
+    for select_sql, update_sql in (
+            (sql_catalog.SELECT_USER_KEYS, sql_catalog.UPDATE_USER_KEY),
+            (sql_catalog.SELECT_WALLET_KEYS, sql_catalog.UPDATE_WALLET_KEY)):
+        changes = [(new_key, row_id)
+                   for row_id, key in connection.execute(select_sql)
+                   if (new_key := convert(decode_key(key))) != key]
+        connection.executemany(update_sql, changes)
+        converted += len(changes)
+    return converted
@@ -0,0 +1,151 @@
+import sqlite3
+import time
+from collections.abc import Iterable
+
+from config import settings
+from entity.posting import Posting
+from entity.transaction import Transaction
+from repository import sql_catalog
+
+# System accounts; wallets post under their own id.
+ISSUANCE_ACCOUNT_ID = -1
+PLATFORM_FEE_ACCOUNT_ID = -2
+# Holds a transfer between shards on each side, so both shards' entries
+# balance: the sending shard pays the credit into it, the receiving shard
+# pays it out.
+SHARD_CLEARING_ACCOUNT_ID = -3
+# Upper bound for sequence ranges that run to an account's last posting.
+_LAST_SEQUENCE = 2 ** 63 - 1
+
+
+def opening_postings(wallet_id: int, balance: int) -> list[tuple[int, int, int]]:
+    """(entry_id, account_id, amount) rows moving a new wallet's initial
+    balance out of the issuance account."""
+    return [(-wallet_id, wallet_id, balance),
+            (-wallet_id, ISSUANCE_ACCOUNT_ID, -balance)]
+
+
+def transfer_postings(transaction: Transaction) -> list[tuple[int, int, int]]:
+    """(entry_id, account_id, amount) rows for a transfer: the sender pays the
+    full amount, the receiver gets it less the fee and the fee goes to the
+    platform fee account."""
+    if transaction.id is None:
+        raise ValueError("Cannot post a transfer without a transaction id")
+    postings = [
+        (transaction.id, transaction.sender_wallet_id, -transaction.transfer_amount),
+        (transaction.id, transaction.receiver_wallet_id,
+         transaction.transfer_amount - transaction.transfer_fee),
+    ]
+    if transaction.transfer_fee:
+        postings.append((transaction.id, PLATFORM_FEE_ACCOUNT_ID,
+                         transaction.transfer_fee))
+    return postings
+
+
+def outgoing_transfer_postings(transaction: Transaction) -> list[tuple[int, int, int]]:
+    """The sending shard's half of a transfer to another shard: the credit
+    goes to the clearing account instead of the receiver."""
+    sender, receiver, *fee = transfer_postings(transaction)
+    return [sender, (receiver[0], SHARD_CLEARING_ACCOUNT_ID, receiver[2]), *fee]
+
+
+def incoming_transfer_postings(transaction: Transaction) -> list[tuple[int, int, int]]:
+    """The receiving shard's half of a transfer from another shard."""
+    _, receiver, *_ = transfer_postings(transaction)
+    return [(receiver[0], SHARD_CLEARING_ACCOUNT_ID, -receiver[2]), receiver]
+
+
+def rebuild_balance_checkpoints(connection: sqlite3.Connection) -> None:
+    """Checkpoints every ``LEDGER_CHECKPOINT_INTERVAL``-th posting of each
+    account that is not checkpointed yet."""
+    connection.execute(sql_catalog.REBUILD_BALANCE_CHECKPOINTS,
+                       (settings.LEDGER_CHECKPOINT_INTERVAL,))
+
+
+class LedgerRepository:
+    """Append-only double-entry postings. Each posting carries its account's
+    sequence number and running balance, so an account's balance is its last
+    posting and its history is a range scan of the (account_id, sequence)
+    index. Postings are written on the caller's connection and commit with
+    the balance changes they record.
+
+    Every ``checkpoint_interval``-th posting of an account is also recorded
+    in BalanceCheckpoints, which lets ``balance_as_of`` find the postings
+    around a point in time with two index seeks and then read at most
+    ``checkpoint_interval`` of them, however long the history is.
+    """
+
+    def __init__(self, db_connection: sqlite3.Connection,
+                 checkpoint_interval: int | None = None) -> None:
+        self.db_connection = db_connection
+        self.checkpoint_interval = (checkpoint_interval or
+                                    settings.LEDGER_CHECKPOINT_INTERVAL)
+
+    def _record(self, postings: list[tuple[int, int, int]]) -> None:
+        cursor = self.db_connection.cursor()
+        posted_at = time.time()
+        checkpoints = []
+        for entry_id, account_id, amount in postings:
+            # Indexed, as the log store's snapshot connection returns tuples.
+            sequence = cursor.execute(
+                sql_catalog.INSERT_POSTING, (entry_id, account_id, amount, posted_at)
+            ).fetchone()[0]
+            if sequence % self.checkpoint_interval == 0:
+                checkpoints.append((account_id, sequence, entry_id, posted_at))
+        if checkpoints:
+            cursor.executemany(sql_catalog.INSERT_BALANCE_CHECKPOINT, checkpoints)
+
+    def record_wallet_opening(self, wallet_id: int, balance: int) -> None:
+        self._record(opening_postings(wallet_id, balance))
+
+    def record_wallet_openings(self, openings: Iterable[tuple[int, int]]) -> None:
+        self._record([posting for wallet_id, balance in openings
+                      for posting in opening_postings(wallet_id, balance)])
+
+    def record_transfers(self, transactions: Iterable[Transaction]) -> None:
+        self._record([posting for transaction in transactions
+                      for posting in transfer_postings(transaction)])
+
+    def record_outgoing_transfer(self, transaction: Transaction) -> None:
+        self._record(outgoing_transfer_postings(transaction))
+
+    def record_incoming_transfer(self, transaction: Transaction) -> None:
+        self._record(incoming_transfer_postings(transaction))
+
+    def get_postings(self, account_id: int, after_sequence: int,
+                     limit: int) -> list[Posting]:
+        cursor = self.db_connection.cursor()
+        cursor.execute(sql_catalog.SELECT_POSTINGS_BY_ACCOUNT,
+                       (account_id, after_sequence, limit))
+        return [
+            Posting(
+                id=row["id"], entry_id=row["entry_id"],
+                account_id=row["account_id"], sequence=row["sequence"],
+                amount=row["amount"], balance_after=row["balance_after"],
+                posted_at=row["posted_at"]
+            )
+            for row in cursor.fetchall()
+        ]
+
+    def balance_as_of(self, wallet_id: int, transaction_id: int | None = None,
+                      posted_at: float | None = None) -> int | None:
+        """The wallet's balance right after ``transaction_id``, or at time
+        ``posted_at``; None when it had no postings yet."""
+        if transaction_id is not None:
+            window_sql = sql_catalog.SELECT_CHECKPOINT_WINDOW_BY_ENTRY
+            balance_sql = sql_catalog.SELECT_BALANCE_AS_OF_ENTRY
+            bound: float = transaction_id
+        elif posted_at is not None:
+            window_sql = sql_catalog.SELECT_CHECKPOINT_WINDOW_BY_TIME
+            balance_sql = sql_catalog.SELECT_BALANCE_AS_OF_TIME
+            bound = posted_at
+        else:
+            raise ValueError("Either transaction_id or posted_at is required")
+
+        cursor = self.db_connection.cursor()
+        window = cursor.execute(window_sql, (wallet_id, bound)).fetchone()
+        row = cursor.execute(balance_sql, (
+            wallet_id, window["first_sequence"] or 0,
+            window["end_sequence"] or _LAST_SEQUENCE, bound
+        )).fetchone()
+        return None if row is None else int(row["balance_after"])
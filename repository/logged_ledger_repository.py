@@ -0,0 +1,77 @@
+import sqlite3
+import time
+
+from database.log_structured_store import LogStructuredStore
+from entity.posting import Posting
+from exception.exceptions import BalanceHistoryUnavailableError
+from repository import sql_catalog
+from repository.ledger_repository import LedgerRepository, transfer_postings
+
+
+class LoggedLedgerRepository(LedgerRepository):
+    """Ledger repository for the "log" durability mode, where transfers
+    are posted when ``LogStructuredStore`` snapshots them.
+
+    Until then reads add the postings of the pending transfers after the
+    account's last stored posting, numbered and balanced as the snapshot
+    will store them. When they were made is not recorded, so a balance as
+    of a time after the last snapshot is refused for an account that has
+    pending transfers.
+    """
+
+    def __init__(self, db_connection: sqlite3.Connection,
+                 store: LogStructuredStore) -> None:
+        super().__init__(db_connection)
+        self.store = store
+
+    def _pending_postings(self, account_id: int) -> tuple[list[Posting], float]:
+        pending, snapshotted_at = self.store.pending_transfers()
+        amounts = [(entry_id, amount) for transaction in pending
+                   for entry_id, posting_account_id, amount
+                   in transfer_postings(transaction)
+                   if posting_account_id == account_id]
+        if not amounts:
+            return [], snapshotted_at
+
+        row = self.db_connection.cursor().execute(
+            sql_catalog.SELECT_LAST_POSTING_BY_ACCOUNT, (account_id,)).fetchone()
+        last_entry_id, sequence, balance = (0, 0, 0) if row is None else row
+        posted_at = time.time()
+        postings = []
+        for entry_id, amount in amounts:
+            # Already stored by a snapshot that ran after `pending` was copied.
+            if entry_id <= last_entry_id:
+                continue
+            sequence += 1
+            balance += amount
+            postings.append(Posting(
+                id=0, entry_id=entry_id, account_id=account_id,
+                sequence=sequence, amount=amount, balance_after=balance,
+                posted_at=posted_at
+            ))
+        return postings, snapshotted_at
+
+    def get_postings(self, account_id: int, after_sequence: int,
+                     limit: int) -> list[Posting]:
+        postings = super().get_postings(account_id, after_sequence, limit)
+        if len(postings) < limit:
+            last_sequence = postings[-1].sequence if postings else after_sequence
+            pending, _ = self._pending_postings(account_id)
+            postings += [posting for posting in pending
+                         if posting.sequence > last_sequence][:limit - len(postings)]
+        return postings
+
+    def balance_as_of(self, wallet_id: int, transaction_id: int | None = None,
+                      posted_at: float | None = None) -> int | None:
+        pending, snapshotted_at = self._pending_postings(wallet_id)
+        if pending and transaction_id is not None:
+            earlier = [posting for posting in pending
+                       if posting.entry_id <= transaction_id]
+            if earlier:
+                return earlier[-1].balance_after
+        elif pending and posted_at is not None and posted_at >= snapshotted_at:
+            raise BalanceHistoryUnavailableError(
+                f"Balance history of wallet {wallet_id} is only known up to "
+                f"the last snapshot of the transaction log"
+            )
+        return super().balance_as_of(wallet_id, transaction_id, posted_at)
@@ -0,0 +1,77 @@
+import sqlite3
+
+from database.log_structured_store import LogStructuredStore
+from entity.transaction import Transaction
+from repository import sql_catalog
+from repository.transaction_repository import TransactionRepository
+
+
+def merge_pending(persisted: list[Transaction], pending: list[Transaction],
+                  persisted_through: int) -> list[Transaction]:
+    # Rows above persisted_through may have been written by a snapshot that
+    # ran after the pending list was copied; they are already in `pending`.
+    return [
+        tr for tr in persisted
+        if tr.id is not None and tr.id <= persisted_through
+    ] + pending
+
+
+class LoggedTransactionRepository(TransactionRepository):
+    """Transaction repository for the "log" durability mode: transfers go to
+    ``LogStructuredStore`` and reads merge in the ones not yet snapshotted."""
+
+    def __init__(self, db_connection: sqlite3.Connection,
+                 store: LogStructuredStore) -> None:
+        super().__init__(db_connection)
+        self.store = store
+
+    def insert_transaction(self, transaction: Transaction) -> Transaction:
+        return self.store.apply_transfer(transaction)
+
+    def get_transactions_by_wallet_ids(self, wallet_ids:
+        list[int]) -> list[Transaction]:
+
+        pending, persisted_through = self.store.pending_transactions()
+        wallet_id_set = set(wallet_ids)
+        return merge_pending(
+            super().get_transactions_by_wallet_ids(wallet_ids),
+            [tr for tr in pending
+             if tr.sender_wallet_id in wallet_id_set
+             or tr.receiver_wallet_id in wallet_id_set],
+            persisted_through
+        )
+
+    def get_related_transactions_by_wallet_id(self,
+               wallet_id: int) -> list[Transaction]:
+
+        pending, persisted_through = self.store.pending_transactions()
+        return merge_pending(
+            super().get_related_transactions_by_wallet_id(wallet_id),
+            [tr for tr in pending
+             if wallet_id in (tr.sender_wallet_id, tr.receiver_wallet_id)],
+            persisted_through
+        )
+
+    def get_related_transactions_after(self, wallet_id: int,
+                                       after_id: int) -> list[Transaction]:
+
+        pending, persisted_through = self.store.pending_transactions()
+        return merge_pending(
+            super().get_related_transactions_after(wallet_id, after_id),
+            [tr for tr in pending
+             if tr.id is not None and tr.id > after_id
+             and wallet_id in (tr.sender_wallet_id, tr.receiver_wallet_id)],
+            persisted_through
+        )
+
+    def get_transaction_count_and_profit(self) -> tuple[int, int]:
+        pending, persisted_through = self.store.pending_transactions()
+        cursor = self.db_connection.cursor()
+        cursor.execute(
+            sql_catalog.SELECT_TRANSACTION_COUNT_AND_PROFIT_UP_TO_ID,
+            (persisted_through,)
+        )
+        row = cursor.fetchone()
+
+        return (row["total_transactions"] + len(pending),
+                row["platform_profit"] + sum(tr.transfer_fee for tr in pending))
@@ -0,0 +1,61 @@
+import sqlite3
+from dataclasses import replace
+from functools import partial
+
+from database.connection import run_after_commit
+from database.log_structured_store import LogStructuredStore
+from entity.wallet import Wallet
+from repository.wallet_repository import WalletRepository
+
+
+class LoggedWalletRepository(WalletRepository):
+    """Wallet repository for the "log" durability mode, where the live
+    balances are held by ``LogStructuredStore`` instead of SQLite."""
+
+    def __init__(self, db_connection: sqlite3.Connection,
+                 store: LogStructuredStore) -> None:
+        super().__init__(db_connection)
+        self.store = store
+
+    def _with_live_balance(self, wallet: Wallet) -> Wallet:
+        return replace(
+            wallet, balance=self.store.balance_of(wallet.id, wallet.balance)
+        )
+
+    def _register_after_commit(self, wallets: list[Wallet]) -> None:
+        # A rolled-back id may be handed out again, so the store only learns
+        # of wallets that exist.
+        for wallet in wallets:
+            run_after_commit(self.db_connection, partial(
+                self.store.register_wallet, wallet.id, wallet.balance))
+
+    def insert_wallet(self, user_id: int, balance: int, wallet_address: str) -> Wallet:
+        wallet = super().insert_wallet(user_id, balance, wallet_address)
+        self._register_after_commit([wallet])
+        return wallet
+
+    def insert_wallets(self, new_wallets: list[tuple[int, int, str]]) -> list[Wallet]:
+        wallets = super().insert_wallets(new_wallets)
+        self._register_after_commit(wallets)
+        return wallets
+
+    def get_wallet_by_address(self, wallet_address: str) -> Wallet | None:
+        wallet = super().get_wallet_by_address(wallet_address)
+        return self._with_live_balance(wallet) if wallet else None
+
+    def update_balance(self, wallet_address: str, new_balance: int) -> None:
+        # Balances move when LoggedTransactionRepository.insert_transaction
+        # appends the transfer to the log, so there is nothing to write here.
+        pass
+
+    def get_wallets_by_user_id(self, user_id: int) -> list[Wallet]:
+        return [self._with_live_balance(wallet)
+                for wallet in super().get_wallets_by_user_id(user_id)]
+
+    def get_wallets_by_ids(self, wallet_ids: list[int]) -> list[Wallet]:
+        return [self._with_live_balance(wallet)
+                for wallet in super().get_wallets_by_ids(wallet_ids)]
+
+    def get_all_wallets(self) -> list[Wallet]:
+        return [self._with_live_balance(wallet)
+                for wallet in super().get_all_wallets()]
@@ -0,0 +1,71 @@
+import json
+import sqlite3
+
+from entity.outbox_message import OutboxMessage
+from repository import sql_catalog
+
+
+class OutboxRepository:
+    """Transfer notifications waiting to be delivered to ``endpoints``.
+
+    Rows are added on the request's connection, so they commit or roll back
+    together with the transfer itself; ``WebhookDispatcher`` delivers them
+    later.
+    """
+
+    def __init__(self, db_connection: sqlite3.Connection,
+                 endpoints: list[str]) -> None:
+        self.db_connection = db_connection
+        self.endpoints = endpoints
+
+    def add_transfer_notification(self, transaction_id: int, payload: str,
+                                  now: float) -> None:
+        if not self.endpoints:
+            return
+
+        cursor = self.db_connection.cursor()
+
+        cursor.execute(
+            sql_catalog.INSERT_OUTBOX_MESSAGES,
+            (transaction_id, payload, now, json.dumps(self.endpoints))
+        )
+
+    def claim_due(self, now: float, lease_until: float,
+                  limit: int) -> list[OutboxMessage]:
+        cursor = self.db_connection.cursor()
+
+        cursor.execute(
+            sql_catalog.CLAIM_DUE_OUTBOX_MESSAGES, (now, lease_until, limit)
+        )
+
+        return [
+            OutboxMessage(
+                id=row["id"], transaction_id=row["transaction_id"],
+                endpoint=row["endpoint"], payload=row["payload"],
+                attempts=row["attempts"]
+            )
+            for row in cursor.fetchall()
+        ]
+
+    def delete(self, message_ids: list[int]) -> None:
+        cursor = self.db_connection.cursor()
+
+        cursor.execute(sql_catalog.DELETE_OUTBOX_MESSAGES, (json.dumps(message_ids),))
+
+    def reschedule(self, message_ids: list[int], next_attempt_at: float,
+                   error: str) -> None:
+        cursor = self.db_connection.cursor()
+
+        cursor.execute(
+            sql_catalog.RESCHEDULE_OUTBOX_MESSAGES,
+            (next_attempt_at, error, json.dumps(message_ids))
+        )
+
+    def dead_letter(self, message_ids: list[int], error: str, now: float) -> None:
+        cursor = self.db_connection.cursor()
+
+        cursor.execute(
+            sql_catalog.DEAD_LETTER_OUTBOX_MESSAGES,
+            (error, now, json.dumps(message_ids))
+        )
+        self.delete(message_ids)
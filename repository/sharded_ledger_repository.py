@@ -0,0 +1,34 @@
+from database.shards import ShardSession
+from entity.posting import Posting
+from exception.exceptions import TransferOrderUnavailableError
+from repository.ledger_repository import LedgerRepository
+
+
+class ShardedLedgerRepository(LedgerRepository):
+    """Reads a wallet's postings from the wallet's shard. Transaction ids
+    are allocated per shard and do not follow commit order across shards,
+    so a balance as of a transaction id is refused; one as of a time is
+    answered."""
+
+    def __init__(self, session: ShardSession) -> None:
+        self.session = session
+
+    def _on(self, shard: int) -> LedgerRepository:
+        return LedgerRepository(self.session.connection(shard))
+
+    def get_postings(self, account_id: int, after_sequence: int,
+                     limit: int) -> list[Posting]:
+        shard = self.session.shard_set.shard_of_id(account_id)
+        return [] if shard is None else self._on(shard).get_postings(
+            account_id, after_sequence, limit)
+
+    def balance_as_of(self, wallet_id: int, transaction_id: int | None = None,
+                      posted_at: float | None = None) -> int | None:
+        if transaction_id is not None:
+            raise TransferOrderUnavailableError(
+                "A balance as of a transaction id is not available on a "
+                "sharded database; ask for one as of a time instead"
+            )
+        shard = self.session.shard_set.shard_of_id(wallet_id)
+        return None if shard is None else self._on(shard).balance_as_of(
+            wallet_id, transaction_id, posted_at)
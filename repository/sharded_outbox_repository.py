@@ -0,0 +1,20 @@
+from database.shards import ShardSession
+from repository.outbox_repository import OutboxRepository
+
+
+class ShardedOutboxRepository(OutboxRepository):
+    """Queues a transfer's notifications on the shard the transfer is kept
+    on, in the same transaction; each shard has its own dispatcher."""
+
+    def __init__(self, session: ShardSession, endpoints: list[str]) -> None:
+        self.session = session
+        self.endpoints = endpoints
+
+    def add_transfer_notification(self, transaction_id: int, payload: str,
+                                  now: float) -> None:
+        shard = self.session.shard_set.shard_of_id(transaction_id)
+        if shard is None:
+            raise ValueError(f"Transaction id {transaction_id} belongs to no shard")
+        OutboxRepository(
+            self.session.write_connection(shard), self.endpoints
+        ).add_transfer_notification(transaction_id, payload, now)
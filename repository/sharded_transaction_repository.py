@@ -0,0 +1,93 @@
+import time
+from functools import partial
+from itertools import chain
+
+from database.connection import run_after_commit
+from database.shard_transfers import ShardTransferCoordinator
+from database.shards import ShardSession
+from entity.transaction import Transaction
+from exception.exceptions import CrossShardWriteError, TransferOrderUnavailableError
+from repository import sql_catalog
+from repository.ledger_repository import LedgerRepository
+from repository.transaction_repository import TransactionRepository
+from repository.transfer_stats_repository import TransferStatsRepository
+
+
+def merge_shards(transactions: list[list[Transaction]]) -> list[Transaction]:
+    return sorted(chain.from_iterable(transactions), key=lambda tr: tr.id or 0)
+
+
+class ShardedTransactionRepository(TransactionRepository):
+    """Keeps each transfer on its sender's shard.
+
+    A transfer to a wallet on another shard commits its debit with an
+    intent for the credit the session owes, and ``coordinator`` applies
+    the credit once that commit is done. A wallet's transfers may sit on
+    any sender's shard, so reading them, like the global totals, fans out
+    to every shard. Ids come from each shard's own range, so they do not
+    follow commit order across shards and cannot resume a transfer stream.
+    """
+
+    def __init__(self, session: ShardSession,
+                 coordinator: ShardTransferCoordinator) -> None:
+        self.session = session
+        self.coordinator = coordinator
+
+    def _shard(self, wallet_id: int) -> int:
+        shard = self.session.shard_set.shard_of_id(wallet_id)
+        if shard is None:
+            raise ValueError(f"Wallet id {wallet_id} belongs to no shard")
+        return shard
+
+    def insert_transaction(self, transaction: Transaction) -> Transaction:
+        sender_shard = self._shard(transaction.sender_wallet_id)
+        # The connection the transfer commits on, for after-commit callbacks.
+        self.db_connection = self.session.write_connection(sender_shard)
+        if self._shard(transaction.receiver_wallet_id) == sender_shard:
+            return super().insert_transaction(transaction)
+
+        credit = self.session.take_credit(transaction.receiver_wallet_id)
+        if credit != transaction.transfer_amount - transaction.transfer_fee:
+            raise CrossShardWriteError(
+                f"Wallet {transaction.receiver_wallet_id} is owed {credit} "
+                f"but the transfer credits "
+                f"{transaction.transfer_amount - transaction.transfer_fee}"
+            )
+        inserted = self.insert_transaction_row(transaction)
+        LedgerRepository(self.db_connection).record_outgoing_transfer(inserted)
+        TransferStatsRepository(self.db_connection).record_transfers([inserted])
+        self.db_connection.cursor().execute(
+            sql_catalog.INSERT_SHARD_TRANSFER_INTENT,
+            (inserted.id, inserted.sender_wallet_id, inserted.receiver_wallet_id,
+             inserted.transfer_amount, inserted.transfer_fee, time.time())
+        )
+        run_after_commit(self.db_connection,
+                         partial(self.coordinator.complete, inserted))
+        return inserted
+
+    def get_transactions_by_wallet_ids(self, wallet_ids:
+        list[int]) -> list[Transaction]:
+        if not wallet_ids:
+            return []
+        return merge_shards(self.session.shard_set.fan_out(
+            lambda connection: TransactionRepository(
+                connection).get_transactions_by_wallet_ids(wallet_ids)))
+
+    def get_related_transactions_by_wallet_id(self,
+               wallet_id: int) -> list[Transaction]:
+        return merge_shards(self.session.shard_set.fan_out(
+            lambda connection: TransactionRepository(
+                connection).get_related_transactions_by_wallet_id(wallet_id)))
+
+    def get_related_transactions_after(self, wallet_id: int,  # noqa: ARG002
+                                       after_id: int) -> list[Transaction]:  # noqa: ARG002
+        raise TransferOrderUnavailableError(
+            "Transfer streams are not available on a sharded database"
+        )
+
+    def get_transaction_count_and_profit(self) -> tuple[int, int]:
+        totals = self.session.shard_set.fan_out(
+            lambda connection: TransactionRepository(
+                connection).get_transaction_count_and_profit())
+        return (sum(count for count, _ in totals),
+                sum(profit for _, profit in totals))
@@ -0,0 +1,35 @@
+from itertools import chain
+
+from database.shards import ShardSession
+from entity.transfer_stats import UserTransferStats, WalletTransferStats
+from repository.transfer_stats_repository import (
+    TransferStatsMetric,
+    TransferStatsRepository,
+)
+
+
+class ShardedTransferStatsRepository(TransferStatsRepository):
+    """Merges the rankings of every shard. A user's totals, and those of
+    their wallets, are all kept on the user's shard, so the global top N is
+    among the shards' top Ns."""
+
+    def __init__(self, session: ShardSession) -> None:
+        self.session = session
+
+    def get_top_users(self, metric: TransferStatsMetric,
+                      limit: int) -> list[UserTransferStats]:
+        rankings = self.session.shard_set.fan_out(
+            lambda connection: TransferStatsRepository(
+                connection).get_top_users(metric, limit))
+        return sorted(chain.from_iterable(rankings),
+                      key=lambda stats: getattr(stats, metric),
+                      reverse=True)[:limit]
+
+    def get_top_wallets(self, metric: TransferStatsMetric,
+                        limit: int) -> list[WalletTransferStats]:
+        rankings = self.session.shard_set.fan_out(
+            lambda connection: TransferStatsRepository(
+                connection).get_top_wallets(metric, limit))
+        return sorted(chain.from_iterable(rankings),
+                      key=lambda stats: getattr(stats, metric),
+                      reverse=True)[:limit]
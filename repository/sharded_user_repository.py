@@ -0,0 +1,48 @@
+import uuid
+from collections import defaultdict
+from itertools import chain
+
+from database.shards import ShardSession
+from entity.user import User
+from repository.user_repository import UserRepository
+
+
+class ShardedUserRepository(UserRepository):
+    """Finds a user on the shard their API key hashes to, or on the one
+    their id names; the list of all users is read from every shard."""
+
+    def __init__(self, session: ShardSession) -> None:
+        self.session = session
+
+    def _on(self, shard: int) -> UserRepository:
+        return UserRepository(self.session.connection(shard))
+
+    def find_user_by_api_key(self, api_key: str) -> User | None:
+        return self._on(
+            self.session.shard_set.shard_of_key(api_key)
+        ).find_user_by_api_key(api_key)
+
+    def create_user(self, name: str, api_key: str | None = None) -> User:
+        api_key = api_key or str(uuid.uuid4())
+        shard = self.session.shard_set.shard_of_key(api_key)
+        return UserRepository(
+            self.session.write_connection(shard)
+        ).create_user(name, api_key)
+
+    def get_user_by_id(self, user_id: int) -> User | None:
+        shard = self.session.shard_set.shard_of_id(user_id)
+        return None if shard is None else self._on(shard).get_user_by_id(user_id)
+
+    def get_users_by_ids(self, user_ids: list[int]) -> list[User]:
+        by_shard: dict[int, list[int]] = defaultdict(list)
+        for user_id in user_ids:
+            shard = self.session.shard_set.shard_of_id(user_id)
+            if shard is not None:
+                by_shard[shard].append(user_id)
+        return [user for shard, ids in by_shard.items()
+                for user in self._on(shard).get_users_by_ids(ids)]
+
+    def get_all_users(self) -> list[User]:
+        users = self.session.shard_set.fan_out(
+            lambda connection: UserRepository(connection).get_all_users())
+        return sorted(chain.from_iterable(users), key=lambda user: user.id)
@@ -0,0 +1,105 @@
+import uuid
+from collections import defaultdict
+from itertools import chain
+
+from database.connection import identity_map_of
+from database.shards import ShardSession
+from entity.wallet import Wallet
+from repository.wallet_repository import WalletRepository
+
+
+class ShardedWalletRepository(WalletRepository):
+    """Keeps a user's wallets on the user's shard, under addresses that hash
+    to it, so lookups by address or by id go to one shard.
+
+    A balance change on a wallet outside the shard the request writes to
+    is the credit of a transfer between shards: it is not written here but
+    owed on the session, for the transfer's repository to carry over.
+    """
+
+    def __init__(self, session: ShardSession) -> None:
+        self.session = session
+
+    def _on(self, shard: int) -> WalletRepository:
+        return WalletRepository(self.session.connection(shard))
+
+    def _shard_of_user(self, user_id: int) -> int:
+        shard = self.session.shard_set.shard_of_id(user_id)
+        if shard is None:
+            raise ValueError(f"User id {user_id} belongs to no shard")
+        return shard
+
+    def _by_shard(self, entity_ids: list[int]) -> dict[int, list[int]]:
+        by_shard: dict[int, list[int]] = defaultdict(list)
+        for entity_id in entity_ids:
+            shard = self.session.shard_set.shard_of_id(entity_id)
+            if shard is not None:
+                by_shard[shard].append(entity_id)
+        return by_shard
+
+    def new_wallet_address(self, user_id: int) -> str:
+        shard = self._shard_of_user(user_id)
+        while True:
+            wallet_address = str(uuid.uuid4())
+            if self.session.shard_set.shard_of_key(wallet_address) == shard:
+                return wallet_address
+
+    def insert_wallet(self, user_id: int, balance: int, wallet_address: str) -> Wallet:
+        return WalletRepository(
+            self.session.write_connection(self._shard_of_user(user_id))
+        ).insert_wallet(user_id, balance, wallet_address)
+
+    def insert_wallets(self, new_wallets: list[tuple[int, int, str]]) -> list[Wallet]:
+        by_shard: dict[int, list[tuple[int, int, str]]] = defaultdict(list)
+        for new_wallet in new_wallets:
+            by_shard[self._shard_of_user(new_wallet[0])].append(new_wallet)
+        return [wallet for shard, rows in by_shard.items()
+                for wallet in WalletRepository(
+                    self.session.write_connection(shard)).insert_wallets(rows)]
+
+    def count_wallets_by_user_id(self, user_id: int) -> int:
+        shard = self.session.shard_set.shard_of_id(user_id)
+        return 0 if shard is None else self._on(shard).count_wallets_by_user_id(
+            user_id)
+
+    def get_wallet_by_address(self, wallet_address: str) -> Wallet | None:
+        return self._on(
+            self.session.shard_set.shard_of_key(wallet_address)
+        ).get_wallet_by_address(wallet_address)
+
+    def update_balance(self, wallet_address: str, new_balance: int) -> None:
+        shard = self.session.shard_set.shard_of_key(wallet_address)
+        if self.session.write_shard in (None, shard):
+            WalletRepository(
+                self.session.write_connection(shard)
+            ).update_balance(wallet_address, new_balance)
+            return
+
+        identity_map = identity_map_of(self.session.connection(shard))
+        loaded_balance = (identity_map.loaded_balance(wallet_address)
+                          if identity_map else None)
+        if identity_map is None or loaded_balance is None:
+            raise ValueError(f"Wallet {wallet_address} must be loaded before "
+                             f"its balance changes from another shard")
+        wallet = identity_map.wallets_by_address[wallet_address]
+        self.session.owe_credit(wallet.id, new_balance - loaded_balance)
+
+    def count_wallets_by_user_ids(self, user_ids: list[int]) -> dict[int, int]:
+        counts: dict[int, int] = {}
+        for shard, ids in self._by_shard(user_ids).items():
+            counts.update(self._on(shard).count_wallets_by_user_ids(ids))
+        return counts
+
+    def get_wallets_by_user_id(self, user_id: int) -> list[Wallet]:
+        shard = self.session.shard_set.shard_of_id(user_id)
+        return [] if shard is None else self._on(shard).get_wallets_by_user_id(
+            user_id)
+
+    def get_wallets_by_ids(self, wallet_ids: list[int]) -> list[Wallet]:
+        return [wallet for shard, ids in self._by_shard(wallet_ids).items()
+                for wallet in self._on(shard).get_wallets_by_ids(ids)]
+
+    def get_all_wallets(self) -> list[Wallet]:
+        wallets = self.session.shard_set.fan_out(
+            lambda connection: WalletRepository(connection).get_all_wallets())
+        return sorted(chain.from_iterable(wallets), key=lambda wallet: wallet.id)
@@ -0,0 +1,353 @@
+"""Every statement the repositories run, as fixed SQL text.
+
+sqlite3 caches prepared statements per connection keyed on the exact SQL
+string, so each statement here is parsed once per pooled connection and then
+reused. Id lists are bound as one JSON array and expanded with ``json_each``
+instead of being rendered as ``IN (?, ?, ...)``, which would produce a new
+statement for every list length.
+"""
+
+# Users
+SELECT_USER_BY_API_KEY = "SELECT id, name, api_key FROM Users WHERE api_key = ?"
+SELECT_USER_BY_ID = "SELECT id, name, api_key FROM Users WHERE id = ?"
+SELECT_USERS_BY_IDS = (
+    "SELECT id, name, api_key FROM Users"
+    " WHERE id IN (SELECT value FROM json_each(?))"
+)
+SELECT_ALL_USERS = "SELECT id, name, api_key FROM Users"
+INSERT_USER = "INSERT INTO Users (name, api_key) VALUES (?, ?)"
+SELECT_USER_KEYS = "SELECT id, api_key FROM Users"
+UPDATE_USER_KEY = "UPDATE Users SET api_key = ? WHERE id = ?"
+
+# Wallets
+INSERT_WALLET = (
+    "INSERT INTO Wallets (user_id, balance, wallet_address) VALUES (?, ?, ?)"
+)
+# After an executemany of INSERT_WALLET: the id of its last row.
+SELECT_LAST_INSERT_ID = "SELECT last_insert_rowid()"
+COUNT_WALLETS_BY_USER_ID = "SELECT COUNT(*) AS cnt FROM Wallets WHERE user_id = ?"
+COUNT_WALLETS_BY_USER_IDS = (
+    "SELECT user_id, COUNT(*) AS cnt FROM Wallets"
+    " WHERE user_id IN (SELECT value FROM json_each(?)) GROUP BY user_id"
+)
+SELECT_WALLET_BY_ADDRESS = (
+    "SELECT id, user_id, balance, wallet_address FROM Wallets"
+    " WHERE wallet_address = ?"
+)
+UPDATE_WALLET_BALANCE = "UPDATE Wallets SET balance = ? WHERE wallet_address = ?"
+# Applies a request's net change to the balance it loaded, so concurrent
+# transfers on one wallet add up instead of overwriting each other.
+ADD_TO_WALLET_BALANCE = (
+    "UPDATE Wallets SET balance = balance + ?1"
+    " WHERE wallet_address = ?2 AND balance + ?1 >= 0"
+)
+ADD_TO_WALLET_BALANCE_BY_ID = "UPDATE Wallets SET balance = balance + ? WHERE id = ?"
+SELECT_WALLETS_BY_USER_ID = (
+    "SELECT id, user_id, balance, wallet_address FROM Wallets WHERE user_id = ?"
+)
+SELECT_WALLETS_BY_IDS = (
+    "SELECT id, user_id, balance, wallet_address FROM Wallets"
+    " WHERE id IN (SELECT value FROM json_each(?))"
+)
+SELECT_ALL_WALLETS = "SELECT id, user_id, balance, wallet_address FROM Wallets"
+SELECT_WALLET_KEYS = "SELECT id, wallet_address FROM Wallets"
+UPDATE_WALLET_KEY = "UPDATE Wallets SET wallet_address = ? WHERE id = ?"
+
+# Transactions
+INSERT_TRANSACTION = """
+    INSERT INTO Transactions (
+        sender_wallet_id, receiver_wallet_id, transfer_amount, transfer_fee)
+    VALUES (?, ?, ?, ?)
+"""
+SELECT_TRANSACTIONS_BY_WALLET_IDS = """
+    SELECT id, sender_wallet_id, receiver_wallet_id, transfer_amount,
+    transfer_fee FROM Transactions
+    WHERE sender_wallet_id IN (SELECT value FROM json_each(?1))
+    OR receiver_wallet_id IN (SELECT value FROM json_each(?1))
+"""
+SELECT_TRANSACTIONS_BY_WALLET_ID = """
+    SELECT id, sender_wallet_id, receiver_wallet_id, transfer_amount,
+    transfer_fee FROM Transactions WHERE sender_wallet_id = ?
+    OR receiver_wallet_id = ?
+"""
+SELECT_TRANSACTIONS_BY_WALLET_ID_AFTER = """
+    SELECT id, sender_wallet_id, receiver_wallet_id, transfer_amount,
+    transfer_fee FROM Transactions WHERE id > ?2
+    AND (sender_wallet_id = ?1 OR receiver_wallet_id = ?1) ORDER BY id
+"""
+# Hot rows and archived partition aggregates are read in one statement, so
+# a concurrent archival batch is counted exactly once.
+SELECT_TRANSACTION_COUNT_AND_PROFIT = """
+    SELECT
+    (SELECT COUNT(*) FROM Transactions) + (SELECT
+        COALESCE(SUM(transaction_count), 0) FROM TransactionPartitions)
+    AS total_transactions,
+    (SELECT COALESCE(SUM(transfer_fee), 0) FROM Transactions) + (SELECT
+        COALESCE(SUM(transfer_fee_sum), 0) FROM TransactionPartitions)
+    AS platform_profit
+"""
+SELECT_TRANSACTION_COUNT_AND_PROFIT_UP_TO_ID = """
+    SELECT
+    (SELECT COUNT(*) FROM Transactions WHERE id <= ?1) + (SELECT
+        COALESCE(SUM(transaction_count), 0) FROM TransactionPartitions)
+    AS total_transactions,
+    (SELECT COALESCE(SUM(transfer_fee), 0) FROM Transactions WHERE id <= ?1)
+    + (SELECT COALESCE(SUM(transfer_fee_sum), 0) FROM TransactionPartitions)
+    AS platform_profit
+"""
+
+# Archive partitions (see database.transaction_archive)
+SELECT_ALL_PARTITIONS = "SELECT path, min_id, max_id FROM TransactionPartitions"
+SELECT_PARTITIONS_BY_WALLET_IDS = """
+    SELECT id, path, min_id, max_id FROM TransactionPartitions
+    WHERE id IN (SELECT partition_id FROM TransactionPartitionWallets
+                 WHERE wallet_id IN (SELECT value FROM json_each(?1)))
+    AND max_id > ?2
+    ORDER BY min_id
+"""
+SELECT_ARCHIVED_TRANSACTIONS_BY_WALLET_IDS = """
+    SELECT id, sender_wallet_id, receiver_wallet_id, transfer_amount,
+    transfer_fee FROM Transactions
+    WHERE (sender_wallet_id IN (SELECT value FROM json_each(?1))
+           OR receiver_wallet_id IN (SELECT value FROM json_each(?1)))
+    AND id BETWEEN ?2 AND ?3
+"""
+
+# Transfer notification outbox (see service.webhook_dispatcher)
+INSERT_OUTBOX_MESSAGES = """
+    INSERT INTO Outbox (transaction_id, endpoint, payload, next_attempt_at)
+    SELECT ?1, value, ?2, ?3 FROM json_each(?4)
+"""
+# Claiming pushes next_attempt_at past the lease, so a dispatcher in another
+# worker skips the rows until this delivery has had time to finish.
+CLAIM_DUE_OUTBOX_MESSAGES = """
+    UPDATE Outbox SET next_attempt_at = ?2
+    WHERE id IN (SELECT id FROM Outbox WHERE next_attempt_at <= ?1
+                 ORDER BY next_attempt_at, id LIMIT ?3)
+    RETURNING id, transaction_id, endpoint, payload, attempts
+"""
+DELETE_OUTBOX_MESSAGES = """
+    DELETE FROM Outbox WHERE id IN (SELECT value FROM json_each(?))
+"""
+RESCHEDULE_OUTBOX_MESSAGES = """
+    UPDATE Outbox SET attempts = attempts + 1, next_attempt_at = ?1,
+    last_error = ?2 WHERE id IN (SELECT value FROM json_each(?3))
+"""
+DEAD_LETTER_OUTBOX_MESSAGES = """
+    INSERT INTO OutboxDeadLetters (id, transaction_id, endpoint, payload,
+        attempts, last_error, failed_at)
+    SELECT id, transaction_id, endpoint, payload, attempts + 1, ?1, ?2
+    FROM Outbox WHERE id IN (SELECT value FROM json_each(?3))
+"""
+
+# Double-entry ledger (see repository.ledger_repository)
+# MAX() makes SQLite take balance_after from the account's last posting; on an
+# account without postings both are NULL. The UNIQUE (account_id, sequence)
+# index answers it with a single seek.
+INSERT_POSTING = """
+    INSERT INTO Postings (
+        entry_id, account_id, sequence, amount, balance_after, posted_at)
+    SELECT ?1, ?2, COALESCE(MAX(sequence), 0) + 1, ?3,
+           COALESCE(balance_after, 0) + ?3, ?4
+    FROM Postings WHERE account_id = ?2
+    RETURNING sequence
+"""
+INSERT_BALANCE_CHECKPOINT = """
+    INSERT INTO BalanceCheckpoints (account_id, sequence, entry_id, posted_at)
+    VALUES (?, ?, ?, ?)
+"""
+REBUILD_BALANCE_CHECKPOINTS = """
+    INSERT OR IGNORE INTO BalanceCheckpoints
+    SELECT account_id, sequence, entry_id, posted_at FROM Postings
+    WHERE sequence % ? = 0
+"""
+SELECT_LAST_POSTING_BY_ACCOUNT = """
+    SELECT entry_id, sequence, balance_after FROM Postings
+    WHERE account_id = ?1 ORDER BY sequence DESC LIMIT 1
+"""
+SELECT_POSTINGS_BY_ACCOUNT = """
+    SELECT id, entry_id, account_id, sequence, amount, balance_after, posted_at
+    FROM Postings WHERE account_id = ?1 AND sequence > ?2
+    ORDER BY sequence LIMIT ?3
+"""
+# A point-in-time balance is the running balance of the account's last
+# posting at or before the bound. The checkpoints on either side of the
+# bound narrow the search to the postings between them; without an earlier
+# checkpoint it starts at the first posting, without a later one it runs to
+# the last.
+SELECT_CHECKPOINT_WINDOW_BY_ENTRY = """
+    SELECT
+        (SELECT sequence FROM BalanceCheckpoints WHERE account_id = ?1
+         AND entry_id <= ?2 ORDER BY entry_id DESC LIMIT 1) AS first_sequence,
+        (SELECT sequence FROM BalanceCheckpoints WHERE account_id = ?1
+         AND entry_id > ?2 ORDER BY entry_id LIMIT 1) AS end_sequence
+"""
+SELECT_BALANCE_AS_OF_ENTRY = """
+    SELECT balance_after FROM Postings
+    WHERE account_id = ?1 AND sequence >= ?2 AND sequence < ?3 AND entry_id <= ?4
+    ORDER BY sequence DESC LIMIT 1
+"""
+SELECT_CHECKPOINT_WINDOW_BY_TIME = """
+    SELECT
+        (SELECT sequence FROM BalanceCheckpoints WHERE account_id = ?1
+         AND posted_at <= ?2 ORDER BY posted_at DESC LIMIT 1) AS first_sequence,
+        (SELECT sequence FROM BalanceCheckpoints WHERE account_id = ?1
+         AND posted_at > ?2 ORDER BY posted_at LIMIT 1) AS end_sequence
+"""
+SELECT_BALANCE_AS_OF_TIME = """
+    SELECT balance_after FROM Postings
+    WHERE account_id = ?1 AND sequence >= ?2 AND sequence < ?3 AND posted_at <= ?4
+    ORDER BY sequence DESC LIMIT 1
+"""
+SELECT_LEDGER_CHECKPOINT = (
+    "SELECT last_posting_id FROM LedgerCheckpoint WHERE id = 1"
+)
+SELECT_LEDGER_BATCH_END = """
+    SELECT MAX(id) AS batch_end FROM (
+        SELECT id FROM Postings WHERE id > ?1 ORDER BY id LIMIT ?2)
+"""
+COUNT_POSTINGS_IN_RANGE = (
+    "SELECT COUNT(*) AS cnt FROM Postings WHERE id > ?1 AND id <= ?2"
+)
+# Postings whose sequence has a gap or whose running balance does not follow
+# from the account's previous posting.
+SELECT_BROKEN_RUNNING_BALANCES = """
+    SELECT p.id, p.account_id, p.sequence
+    FROM Postings p
+    LEFT JOIN Postings prev
+        ON prev.account_id = p.account_id AND prev.sequence = p.sequence - 1
+    WHERE p.id > ?1 AND p.id <= ?2
+      AND ((p.sequence > 1 AND prev.id IS NULL)
+           OR p.balance_after != COALESCE(prev.balance_after, 0) + p.amount)
+"""
+SELECT_UNBALANCED_ENTRIES = """
+    SELECT entry_id, SUM(amount) AS total FROM Postings
+    WHERE entry_id IN (SELECT entry_id FROM Postings WHERE id > ?1 AND id <= ?2)
+    GROUP BY entry_id HAVING SUM(amount) != 0
+"""
+# Wallets.balance must equal the running balance of the wallet's last posting.
+SELECT_WALLETS_OFF_LEDGER = """
+    SELECT w.id, w.balance, MAX(p.sequence) AS sequence, p.balance_after
+    FROM Wallets w JOIN Postings p ON p.account_id = w.id
+    WHERE w.id IN (SELECT account_id FROM Postings WHERE id > ?1 AND id <= ?2)
+    GROUP BY w.id HAVING w.balance != p.balance_after
+"""
+UPDATE_LEDGER_CHECKPOINT = """
+    UPDATE LedgerCheckpoint SET last_posting_id = ?2
+    WHERE id = 1 AND last_posting_id = ?1
+"""
+
+# Transfer totals per wallet and user (see repository.transfer_stats_repository)
+# Both take (wallet_id, transfers_sent, transfers_received, volume_sent,
+# volume_received, fees_paid) and add them to the wallet's or its owner's row.
+ADD_WALLET_TRANSFER_STATS = """
+    INSERT INTO WalletStats (wallet_id, user_id, transfers_sent,
+        transfers_received, volume_sent, volume_received, fees_paid)
+    SELECT id, user_id, ?2, ?3, ?4, ?5, ?6 FROM Wallets WHERE id = ?1
+    ON CONFLICT (wallet_id) DO UPDATE SET
+        transfers_sent = transfers_sent + excluded.transfers_sent,
+        transfers_received = transfers_received + excluded.transfers_received,
+        volume_sent = volume_sent + excluded.volume_sent,
+        volume_received = volume_received + excluded.volume_received,
+        fees_paid = fees_paid + excluded.fees_paid
+"""
+ADD_USER_TRANSFER_STATS = """
+    INSERT INTO UserStats (user_id, transfers_sent, transfers_received,
+        volume_sent, volume_received, fees_paid)
+    SELECT user_id, ?2, ?3, ?4, ?5, ?6 FROM Wallets WHERE id = ?1
+    ON CONFLICT (user_id) DO UPDATE SET
+        transfers_sent = transfers_sent + excluded.transfers_sent,
+        transfers_received = transfers_received + excluded.transfers_received,
+        volume_sent = volume_sent + excluded.volume_sent,
+        volume_received = volume_received + excluded.volume_received,
+        fees_paid = fees_paid + excluded.fees_paid
+"""
+# Runs against the main database and against each archive partition.
+SELECT_TRANSFER_STATS_BY_WALLET = """
+    SELECT wallet_id, SUM(sent), SUM(received), SUM(volume_sent),
+           SUM(volume_received), SUM(fees_paid)
+    FROM (
+        SELECT sender_wallet_id AS wallet_id, 1 AS sent, 0 AS received,
+               transfer_amount AS volume_sent, 0 AS volume_received,
+               transfer_fee AS fees_paid
+        FROM Transactions WHERE id >= ?1 AND id <= ?2
+        UNION ALL
+        SELECT receiver_wallet_id, 0, 1, 0, transfer_amount - transfer_fee, 0
+        FROM Transactions WHERE id >= ?1 AND id <= ?2
+    )
+    GROUP BY wallet_id
+"""
+DELETE_WALLET_STATS = "DELETE FROM WalletStats"
+DELETE_USER_STATS = "DELETE FROM UserStats"
+COUNT_WALLET_STATS = "SELECT COUNT(*) FROM WalletStats"
+REBUILD_USER_STATS = """
+    INSERT INTO UserStats (user_id, transfers_sent, transfers_received,
+        volume_sent, volume_received, fees_paid)
+    SELECT user_id, SUM(transfers_sent), SUM(transfers_received),
+           SUM(volume_sent), SUM(volume_received), SUM(fees_paid)
+    FROM WalletStats GROUP BY user_id
+"""
+# One statement per ranking, each walking its column's index from the top.
+TRANSFER_STATS_METRICS = ("fees_paid", "volume_sent", "volume_received")
+SELECT_TOP_USER_STATS = {
+    metric: f"""
+        SELECT s.user_id, u.name, s.transfers_sent, s.transfers_received,
+               s.volume_sent, s.volume_received, s.fees_paid
+        FROM UserStats s JOIN Users u ON u.id = s.user_id
+        ORDER BY s.{metric} DESC LIMIT ?
+    """
+    for metric in TRANSFER_STATS_METRICS
+}
+SELECT_TOP_WALLET_STATS = {
+    metric: f"""
+        SELECT s.wallet_id, w.wallet_address, s.user_id, s.transfers_sent,
+               s.transfers_received, s.volume_sent, s.volume_received,
+               s.fees_paid
+        FROM WalletStats s JOIN Wallets w ON w.id = s.wallet_id
+        ORDER BY s.{metric} DESC LIMIT ?
+    """
+    for metric in TRANSFER_STATS_METRICS
+}
+
+# Velocity counters (see service.velocity_guard). Postings ids grow with
+# posted_at, so the scan for the start of the window stops at its first row.
+SELECT_LAST_POSTING_ID_BEFORE = """
+    SELECT COALESCE((SELECT id FROM Postings WHERE posted_at < ?1
+                     ORDER BY id DESC LIMIT 1), 0)
+"""
+SELECT_LAST_POSTING_ID = "SELECT COALESCE(MAX(id), 0) FROM Postings"
+SELECT_TRANSFERS_POSTED_BETWEEN = """
+    SELECT t.id AS transaction_id, t.sender_wallet_id, w.user_id,
+           t.transfer_amount, p.posted_at
+    FROM Postings p
+    JOIN Transactions t ON t.id = p.entry_id AND t.sender_wallet_id = p.account_id
+    JOIN Wallets w ON w.id = t.sender_wallet_id
+    WHERE p.id > ?1 AND p.id <= ?2
+    ORDER BY p.id
+"""
+
+# Shards (see database.shards and database.shard_transfers). sqlite_sequence
+# has no unique key on name, so a shard's first id is set in two steps.
+INSERT_SHARD_SEQUENCE = """
+    INSERT INTO sqlite_sequence (name, seq) SELECT ?1, ?2
+    WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = ?1)
+"""
+RAISE_SHARD_SEQUENCE = (
+    "UPDATE sqlite_sequence SET seq = ?2 WHERE name = ?1 AND seq < ?2"
+)
+INSERT_SHARD_TRANSFER_INTENT = """
+    INSERT INTO ShardTransferIntents (transaction_id, sender_wallet_id,
+        receiver_wallet_id, transfer_amount, transfer_fee, created_at)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+SELECT_SHARD_TRANSFER_INTENTS = """
+    SELECT transaction_id, sender_wallet_id, receiver_wallet_id, transfer_amount,
+    transfer_fee FROM ShardTransferIntents WHERE created_at <= ?
+    ORDER BY transaction_id
+"""
+DELETE_SHARD_TRANSFER_INTENT = (
+    "DELETE FROM ShardTransferIntents WHERE transaction_id = ?"
+)
+INSERT_SHARD_TRANSFER_CREDIT = (
+    "INSERT OR IGNORE INTO ShardTransferCredits (transaction_id) VALUES (?)"
+)
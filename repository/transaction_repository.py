@@ -1,7 +1,13 @@
+import json
 import sqlite3
+from dataclasses import replace
 from sqlite3 import Row
 
+from database.transaction_archive import read_archive
 from entity.transaction import Transaction
+from repository import sql_catalog
+from repository.ledger_repository import LedgerRepository
+from repository.transfer_stats_repository import TransferStatsRepository
 
 
 def construct_transactions(rows: list[Row]) -> list[Transaction]:
@@ -15,20 +21,34 @@ def construct_transactions(rows: list[Row]) -> list[Transaction]:
         for row in rows
     ]
 
+
+def merge_archived(hot: list[Transaction],
+                   archived: list[Transaction]) -> list[Transaction]:
+    if not archived:
+        return hot
+    # A batch archived between the two reads shows up in both lists.
+    by_id = {tr.id: tr for tr in archived}
+    by_id.update((tr.id, tr) for tr in hot)
+    return sorted(by_id.values(), key=lambda tr: tr.id or 0)
+
 class TransactionRepository:
 
     def __init__(self, db_connection: sqlite3.Connection) -> None:
         self.db_connection = db_connection
 
-    def insert_transaction(self, transaction: Transaction) -> None:
+    def insert_transaction(self, transaction: Transaction) -> Transaction:
+        inserted = self.insert_transaction_row(transaction)
+        LedgerRepository(self.db_connection).record_transfers([inserted])
+        TransferStatsRepository(self.db_connection).record_transfers([inserted])
+        return inserted
+
+    def insert_transaction_row(self, transaction: Transaction) -> Transaction:
+        """Adds the Transactions row alone, without its ledger entry and
+        transfer totals."""
         cursor = self.db_connection.cursor()
 
         cursor.execute(
-            """
-            INSERT INTO transactions (
-                sender_wallet_id, receiver_wallet_id, transfer_amount, transfer_fee)
-            VALUES (?, ?, ?, ?)
-            """,
+            sql_catalog.INSERT_TRANSACTION,
             (
                 transaction.sender_wallet_id,
                 transaction.receiver_wallet_id,
@@ -36,6 +56,7 @@ class TransactionRepository:
                 transaction.transfer_fee
             )
         )
+        return replace(transaction, id=cursor.lastrowid)
 
     def get_transactions_by_wallet_ids(self, wallet_ids:
         list[int]) -> list[Transaction]:
@@ -45,21 +66,15 @@ class TransactionRepository:
 
         cursor = self.db_connection.cursor()
 
-        wallet_ids_placeholder = ",".join(
-            "?" for _ in wallet_ids
-        )
-
+        encoded_wallet_ids = json.dumps(wallet_ids)
         cursor.execute(
-            f"""
-            SELECT id, sender_wallet_id, receiver_wallet_id, transfer_amount,
-            transfer_fee FROM Transactions WHERE sender_wallet_id in
-            ({wallet_ids_placeholder}) OR receiver_wallet_id in
-            ({wallet_ids_placeholder})""", tuple(wallet_ids) + tuple(wallet_ids)
+            sql_catalog.SELECT_TRANSACTIONS_BY_WALLET_IDS, (encoded_wallet_ids,)
         )
 
         rows = cursor.fetchall()
 
-        return construct_transactions(rows)
+        return merge_archived(construct_transactions(rows),
+                              self.get_archived_transactions(encoded_wallet_ids))
 
 
     def get_related_transactions_by_wallet_id(self,
@@ -68,26 +83,54 @@ class TransactionRepository:
         cursor = self.db_connection.cursor()
 
         cursor.execute(
-            """
-            SELECT id, sender_wallet_id, receiver_wallet_id, transfer_amount,
-            transfer_fee FROM Transactions WHERE sender_wallet_id = ?
-            OR receiver_wallet_id = ? """, (wallet_id, wallet_id)
+            sql_catalog.SELECT_TRANSACTIONS_BY_WALLET_ID, (wallet_id, wallet_id)
         )
 
         rows = cursor.fetchall()
 
-        return construct_transactions(rows)
+        return merge_archived(construct_transactions(rows),
+                              self.get_archived_transactions(json.dumps([wallet_id])))
 
+    def get_related_transactions_after(self, wallet_id: int,
+                                       after_id: int) -> list[Transaction]:
+        """The wallet's transfers with an id above ``after_id``, oldest first."""
+        cursor = self.db_connection.cursor()
 
-    def get_transaction_count_and_profit(self) -> tuple[int, int]:
+        cursor.execute(
+            sql_catalog.SELECT_TRANSACTIONS_BY_WALLET_ID_AFTER, (wallet_id, after_id)
+        )
+
+        rows = cursor.fetchall()
+
+        return merge_archived(construct_transactions(rows),
+                              self.get_archived_transactions(json.dumps([wallet_id]),
+                                                             after_id))
+
+    def get_archived_transactions(self, encoded_wallet_ids: str,
+                                  after_id: int = 0) -> list[Transaction]:
+        """Reads the archive partitions that hold any of the wallets. The
+        catalog is read after the hot table, so no archived row is missed."""
         cursor = self.db_connection.cursor()
         cursor.execute(
-           """
-           SELECT COUNT(*) AS total_transactions,
-           COALESCE(SUM(transfer_fee), 0) AS platform_profit
-           FROM Transactions
-           """
+            sql_catalog.SELECT_PARTITIONS_BY_WALLET_IDS,
+            (encoded_wallet_ids, after_id)
         )
+
+        transactions = []
+        for partition in cursor.fetchall():
+            transactions += construct_transactions(read_archive(
+                partition["path"],
+                sql_catalog.SELECT_ARCHIVED_TRANSACTIONS_BY_WALLET_IDS,
+                (encoded_wallet_ids, max(partition["min_id"], after_id + 1),
+                 partition["max_id"])
+            ))
+
+        return transactions
+
+
+    def get_transaction_count_and_profit(self) -> tuple[int, int]:
+        cursor = self.db_connection.cursor()
+        cursor.execute(sql_catalog.SELECT_TRANSACTION_COUNT_AND_PROFIT)
         row = cursor.fetchone()
 
         return row["total_transactions"], row["platform_profit"]
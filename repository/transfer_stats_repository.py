@@ -0,0 +1,97 @@
+import sqlite3
+from collections.abc import Iterable
+from typing import Literal
+
+from database.transaction_archive import read_archive
+from entity.transaction import Transaction
+from entity.transfer_stats import UserTransferStats, WalletTransferStats
+from repository import sql_catalog
+from repository.key_codec import decode_key
+
+type TransferStatsMetric = Literal["fees_paid", "volume_sent", "volume_received"]
+
+# Upper bound for id ranges that run to the last hot transfer.
+_LAST_ID = 2 ** 63 - 1
+
+
+def transfer_stats_deltas(
+        transaction: Transaction) -> list[tuple[int, int, int, int, int, int]]:
+    """(wallet_id, transfers_sent, transfers_received, volume_sent,
+    volume_received, fees_paid) increments for a transfer. The sender pays
+    the amount and the fee inside it; the receiver gets the rest."""
+    return [
+        (transaction.sender_wallet_id, 1, 0, transaction.transfer_amount, 0,
+         transaction.transfer_fee),
+        (transaction.receiver_wallet_id, 0, 1, 0,
+         transaction.transfer_amount - transaction.transfer_fee, 0),
+    ]
+
+
+class TransferStatsRepository:
+    """Running transfer totals per wallet (WalletStats) and per user
+    (UserStats). They are bumped on the caller's connection, so they commit
+    with the transfers they count, and each ranking metric is indexed so a
+    top-N query reads N index entries instead of aggregating Transactions
+    and its archive partitions.
+    """
+
+    def __init__(self, db_connection: sqlite3.Connection) -> None:
+        self.db_connection = db_connection
+
+    def _add(self, deltas: list[tuple[int, int, int, int, int, int]]) -> None:
+        cursor = self.db_connection.cursor()
+        cursor.executemany(sql_catalog.ADD_WALLET_TRANSFER_STATS, deltas)
+        cursor.executemany(sql_catalog.ADD_USER_TRANSFER_STATS, deltas)
+
+    def record_transfers(self, transactions: Iterable[Transaction]) -> None:
+        self._add([delta for transaction in transactions
+                   for delta in transfer_stats_deltas(transaction)])
+
+    def get_top_users(self, metric: TransferStatsMetric,
+                      limit: int) -> list[UserTransferStats]:
+        cursor = self.db_connection.cursor()
+        cursor.execute(sql_catalog.SELECT_TOP_USER_STATS[metric], (limit,))
+        return [UserTransferStats(*row) for row in cursor.fetchall()]
+
+    def get_top_wallets(self, metric: TransferStatsMetric,
+                        limit: int) -> list[WalletTransferStats]:
+        cursor = self.db_connection.cursor()
+        cursor.execute(sql_catalog.SELECT_TOP_WALLET_STATS[metric], (limit,))
+        return [WalletTransferStats(row[0], decode_key(row[1]), *row[2:])
+                for row in cursor.fetchall()]
+
+    def recompute(self) -> int:
+        """Replaces both tables with totals computed from the hot
+        Transactions table and every archive partition, inside the caller's
+        transaction; returns how many wallets have totals."""
+        connection = self.db_connection
+        connection.execute(sql_catalog.DELETE_WALLET_STATS)
+        connection.execute(sql_catalog.DELETE_USER_STATS)
+        wallet_totals = connection.execute(
+            sql_catalog.SELECT_TRANSFER_STATS_BY_WALLET, (0, _LAST_ID)
+        ).fetchall()
+        # Partition files may hold rows past their cataloged range.
+        for path, min_id, max_id in connection.execute(
+                sql_catalog.SELECT_ALL_PARTITIONS).fetchall():
+            wallet_totals += read_archive(
+                path, sql_catalog.SELECT_TRANSFER_STATS_BY_WALLET, (min_id, max_id))
+        connection.executemany(sql_catalog.ADD_WALLET_TRANSFER_STATS,
+                               [tuple(row) for row in wallet_totals])
+        connection.execute(sql_catalog.REBUILD_USER_STATS)
+        wallets: int = connection.execute(
+            sql_catalog.COUNT_WALLET_STATS).fetchone()[0]
+        return wallets
+
+    def rebuild(self) -> int:
+        """Runs ``recompute`` in its own write transaction, so transfers wait
+        for it rather than being counted twice or not at all, and archival
+        cannot move rows between the partitions already read and the hot
+        table."""
+        self.db_connection.execute("BEGIN IMMEDIATE")
+        try:
+            wallets = self.recompute()
+            self.db_connection.commit()
+            return wallets
+        except Exception:
+            self.db_connection.rollback()
+            raise
@@ -1,60 +1,77 @@
+import json
 import sqlite3
 import uuid
 
+from database.connection import identity_map_of
 from entity.user import User
+from repository import sql_catalog
+from repository.key_codec import decode_key, encode_key
 
 
 class UserRepository:
     def __init__(self, db_connection: sqlite3.Connection) -> None:
         self.db_connection = db_connection
+        self.identity_map = identity_map_of(db_connection)
+
+    def _track(self, user: User) -> User:
+        return self.identity_map.add_user(user) if self.identity_map else user
 
     def find_user_by_api_key(self, api_key: str) -> User | None:
+        if self.identity_map and api_key in self.identity_map.users_by_api_key:
+            return self.identity_map.users_by_api_key[api_key]
+
         cursor = self.db_connection.cursor()
 
-        cursor.execute(
-            "SELECT id, name, api_key from Users WHERE api_key = ?",
-            (api_key, )
-        )
+        cursor.execute(sql_catalog.SELECT_USER_BY_API_KEY, (encode_key(api_key), ))
 
         row = cursor.fetchone()
 
         if row:
-            return User(id=row["id"], name=row["name"], api_key=row["api_key"])
+            return self._track(
+                User(id=row["id"], name=row["name"], api_key=decode_key(row["api_key"]))
+            )
         return None
 
-    def create_user(self, name: str) -> User:
-        api_key = str(uuid.uuid4())
+    def create_user(self, name: str, api_key: str | None = None) -> User:
+        api_key = api_key or str(uuid.uuid4())
 
         cursor = self.db_connection.cursor()
-        cursor.execute(
-            "INSERT INTO Users (name, api_key) VALUES (?, ?)",
-            (name, api_key),
-        )
+        cursor.execute(sql_catalog.INSERT_USER, (name, encode_key(api_key)))
         new_id = cursor.lastrowid
         assert new_id is not None
-        return User(
+        return self._track(User(
             id=int(new_id),
             name=name,
             api_key=api_key
-        )
+        ))
 
     def get_user_by_id(self, user_id: int) -> User | None:
+        if self.identity_map and user_id in self.identity_map.users_by_id:
+            return self.identity_map.users_by_id[user_id]
+
         cursor = self.db_connection.cursor()
-        cursor.execute(
-            "SELECT id, name, api_key FROM Users WHERE id = ?", (user_id,)
-        )
+        cursor.execute(sql_catalog.SELECT_USER_BY_ID, (user_id,))
         row = cursor.fetchone()
         if row:
-            return User(id=row["id"], name=row["name"], api_key=row["api_key"])
+            return self._track(
+                User(id=row["id"], name=row["name"], api_key=decode_key(row["api_key"]))
+            )
         return None
 
+    def get_users_by_ids(self, user_ids: list[int]) -> list[User]:
+        cursor = self.db_connection.cursor()
+        cursor.execute(sql_catalog.SELECT_USERS_BY_IDS, (json.dumps(user_ids),))
+        return [
+            self._track(User(id=row["id"], name=row["name"],
+                             api_key=decode_key(row["api_key"])))
+            for row in cursor.fetchall()
+        ]
+
     def get_all_users(self) -> list[User]:
         cursor = self.db_connection.cursor()
-        cursor.execute(
-            "SELECT id, name, api_key FROM Users"
-        )
+        cursor.execute(sql_catalog.SELECT_ALL_USERS)
         rows = cursor.fetchall()
         return [
-            User(id=row["id"], name=row["name"], api_key=row["api_key"])
+            User(id=row["id"], name=row["name"], api_key=decode_key(row["api_key"]))
             for row in rows
         ]
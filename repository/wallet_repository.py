@@ -1,102 +1,158 @@
+import json
 import sqlite3
+import uuid
+from functools import partial
 
+from cache.caches import get_wallet_cache
+from database.connection import identity_map_of, run_after_commit
 from entity.wallet import Wallet
+from repository import sql_catalog
+from repository.key_codec import decode_key, encode_key
+from repository.ledger_repository import LedgerRepository
 
 
 class WalletRepository:
 
     def __init__(self, db_connection: sqlite3.Connection) -> None:
         self.db_connection = db_connection
+        self.identity_map = identity_map_of(db_connection)
+
+    def _track(self, wallet: Wallet) -> Wallet:
+        return self.identity_map.add_wallet(wallet) if self.identity_map else wallet
+
+    def new_wallet_address(self, user_id: int) -> str:  # noqa: ARG002
+        return str(uuid.uuid4())
 
     def insert_wallet(self, user_id: int, balance: int, wallet_address: str) -> Wallet:
         cursor = self.db_connection.cursor()
         cursor.execute(
-            "INSERT INTO Wallets (user_id, balance, wallet_address) VALUES (?, ?, ?)",
-            (user_id, balance, wallet_address)
+            sql_catalog.INSERT_WALLET,
+            (user_id, balance, encode_key(wallet_address))
         )
         wallet_id = cursor.lastrowid
         if wallet_id is None:
             raise ValueError("Failed to insert wallet, no ID returned")
-        return Wallet(id=wallet_id, user_id=user_id,
-                      balance=balance, wallet_address=wallet_address)
+        LedgerRepository(self.db_connection).record_wallet_opening(wallet_id, balance)
+        return self._track(Wallet(id=wallet_id, user_id=user_id,
+                                  balance=balance, wallet_address=wallet_address))
 
-    def count_wallets_by_user_id(self, user_id: int) -> int:
+    def insert_wallets(self, new_wallets: list[tuple[int, int, str]]) -> list[Wallet]:
+        """Inserts (user_id, balance, wallet_address) rows with one
+        ``executemany``. The connection holds the write lock from the first
+        row to the last, so AUTOINCREMENT hands them consecutive ids."""
+        if not new_wallets:
+            return []
         cursor = self.db_connection.cursor()
-        cursor.execute(
-            "SELECT COUNT(*) AS cnt FROM Wallets WHERE user_id = ?",
-            (user_id,)
+        cursor.executemany(
+            sql_catalog.INSERT_WALLET,
+            [(user_id, balance, encode_key(wallet_address))
+             for user_id, balance, wallet_address in new_wallets]
         )
+        last_id = cursor.execute(sql_catalog.SELECT_LAST_INSERT_ID).fetchone()[0]
+        first_id = last_id - len(new_wallets) + 1
+        wallets = [
+            Wallet(id=wallet_id, user_id=user_id, balance=balance,
+                   wallet_address=wallet_address)
+            for wallet_id, (user_id, balance, wallet_address)
+            in enumerate(new_wallets, start=first_id)
+        ]
+        LedgerRepository(self.db_connection).record_wallet_openings(
+            (wallet.id, wallet.balance) for wallet in wallets)
+        return [self._track(wallet) for wallet in wallets]
+
+    def count_wallets_by_user_id(self, user_id: int) -> int:
+        cursor = self.db_connection.cursor()
+        cursor.execute(sql_catalog.COUNT_WALLETS_BY_USER_ID, (user_id,))
         row = cursor.fetchone()
         return int(row["cnt"])
 
+    def count_wallets_by_user_ids(self, user_ids: list[int]) -> dict[int, int]:
+        """Wallet counts of the given users; users without wallets are left
+        out."""
+        cursor = self.db_connection.cursor()
+        cursor.execute(sql_catalog.COUNT_WALLETS_BY_USER_IDS, (json.dumps(user_ids),))
+        return {row["user_id"]: row["cnt"] for row in cursor.fetchall()}
+
     def get_wallet_by_address(self, wallet_address: str) -> Wallet | None:
+        if self.identity_map and wallet_address in self.identity_map.wallets_by_address:
+            return self.identity_map.wallets_by_address[wallet_address]
+
         cursor = self.db_connection.cursor()
-        cursor.execute(
-            "SELECT id, user_id, balance, wallet_address FROM Wallets"
-            " WHERE wallet_address = ?", (wallet_address,)
-        )
+        cursor.execute(sql_catalog.SELECT_WALLET_BY_ADDRESS,
+                       (encode_key(wallet_address),))
         row = cursor.fetchone()
         if row:
-            return Wallet(
+            return self._track(Wallet(
                 id=row["id"], user_id=row["user_id"],
-                balance=row["balance"],wallet_address=row["wallet_address"]
-            )
+                balance=row["balance"],
+                wallet_address=decode_key(row["wallet_address"])
+            ))
         return None
 
     def update_balance(self, wallet_address: str, new_balance: int) -> None:
-        cursor = self.db_connection.cursor()
-        cursor.execute(
-            "UPDATE Wallets SET balance = ? WHERE wallet_address = ?",
-            (new_balance, wallet_address)
+        loaded_balance = (self.identity_map.loaded_balance(wallet_address)
+                          if self.identity_map else None)
+        if self.identity_map and loaded_balance is not None:
+            # Written as a delta with the request's other deferred writes.
+            self.identity_map.set_wallet_balance(wallet_address, new_balance)
+            self.identity_map.defer_write(
+                ("Wallets", wallet_address), sql_catalog.ADD_TO_WALLET_BALANCE,
+                (new_balance - loaded_balance, encode_key(wallet_address))
+            )
+        else:
+            cursor = self.db_connection.cursor()
+            cursor.execute(
+                sql_catalog.UPDATE_WALLET_BALANCE,
+                (new_balance, encode_key(wallet_address))
+            )
+        run_after_commit(
+            self.db_connection, partial(get_wallet_cache().invalidate, wallet_address)
         )
 
     def get_wallets_by_user_id(self, user_id: int) -> list[Wallet]:
         cursor = self.db_connection.cursor()
-        cursor.execute(
-            "SELECT id, user_id, balance, wallet_address FROM Wallets "
-            "WHERE user_id = ?", (user_id,)
-        )
+        cursor.execute(sql_catalog.SELECT_WALLETS_BY_USER_ID, (user_id,))
         rows = cursor.fetchall()
         return [
-            Wallet(
+            self._track(Wallet(
                 id=row["id"], user_id=row["user_id"],
-                balance=row["balance"], wallet_address=row["wallet_address"]
-            )
+                balance=row["balance"],
+                wallet_address=decode_key(row["wallet_address"])
+            ))
             for row in rows]
 
     def get_wallets_by_ids(self, wallet_ids: list[int]) -> list[Wallet]:
+        known: list[Wallet] = []
+        if self.identity_map:
+            known = [self.identity_map.wallets_by_id[wallet_id]
+                     for wallet_id in wallet_ids
+                     if wallet_id in self.identity_map.wallets_by_id]
+            wallet_ids = [wallet_id for wallet_id in wallet_ids
+                          if wallet_id not in self.identity_map.wallets_by_id]
         if not wallet_ids:
-            return []
+            return known
         cursor = self.db_connection.cursor()
-        wallet_ids_placeholder = ",".join(
-            "?" for _ in wallet_ids
-        )
-        cursor.execute(
-            f"""SELECT id, user_id, balance, wallet_address FROM Wallets
-            WHERE id IN ({wallet_ids_placeholder})
-            """, tuple(wallet_ids)
-        )
+        cursor.execute(sql_catalog.SELECT_WALLETS_BY_IDS, (json.dumps(wallet_ids),))
         rows = cursor.fetchall()
-        return [
-            Wallet(
+        return known + [
+            self._track(Wallet(
                 id=row["id"], user_id=row["user_id"],
-                balance=row["balance"], wallet_address=row["wallet_address"]
-            )
+                balance=row["balance"],
+                wallet_address=decode_key(row["wallet_address"])
+            ))
             for row in rows
         ]
 
     def get_all_wallets(self) -> list[Wallet]:
         cursor = self.db_connection.cursor()
-        cursor.execute(
-            "SELECT id, user_id, balance, wallet_address FROM Wallets"
-        )
+        cursor.execute(sql_catalog.SELECT_ALL_WALLETS)
         rows = cursor.fetchall()
         return [
             Wallet(
                 id=row["id"],
                 user_id=row["user_id"],
                 balance=row["balance"],
-                wallet_address=row["wallet_address"]
+                wallet_address=decode_key(row["wallet_address"])
             )
             for row in rows
         ]
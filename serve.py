@@ -0,0 +1,46 @@
+"""Runs the API with several uvicorn worker processes.
+
+    python serve.py --workers 4 --port 8000
+
+Workers share nothing but the database file and two memory-mapped files:
+invalidation counters, which keep their user, wallet and BTC price caches
+coherent, and the rate limiter's token buckets.
+"""
+import argparse
+import os
+import tempfile
+
+import uvicorn
+
+from cache.invalidation_channel import create_channel_file
+from config import settings
+from database.database_init import init_db
+from middleware.rate_limiter import create_store_file
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--workers", type=int, default=settings.WORKERS)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.workers > 1 and settings.DURABILITY_MODE == "log":
+        parser.error("the log durability mode keeps balances in memory "
+                     "and only supports a single worker")
+
+    init_db(settings.DB_PATH)
+    with tempfile.TemporaryDirectory(prefix="wallet-") as runtime_dir:
+        channel_path = os.path.join(runtime_dir, "invalidation.channel")
+        create_channel_file(channel_path)
+        # Read by config.settings in every worker process uvicorn spawns.
+        os.environ["WALLET_INVALIDATION_CHANNEL_PATH"] = channel_path
+        bucket_path = os.path.join(runtime_dir, "rate_limit.buckets")
+        create_store_file(bucket_path)
+        os.environ["WALLET_RATE_LIMIT_STORE_PATH"] = bucket_path
+        uvicorn.run("main:app", host=args.host, port=args.port,
+                    workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,19 @@
+import logging
+import random
+import statistics
+import threading
+import time
 from abc import ABC, abstractmethod
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
 from typing import Any
 
-import requests
+from cache.invalidating_cache import InvalidatingCache
+from config import settings
+from exception.exceptions import PriceUnavailableError
+from service.circuit_breaker import CircuitBreaker
+
+logger = logging.getLogger(__name__)
 
 
 class BtcPriceConverter(ABC):
@@ -9,6 +21,14 @@ class BtcPriceConverter(ABC):
     def get_btc_to_usd_rate(self) -> float:
         pass
 
+    def rate_age_seconds(self) -> float | None:
+        """Age of the rate being served, or None when it is fetched live."""
+        return None
+
+    def cached_rate(self) -> float | None:
+        """The rate this converter can return without fetching, if any."""
+        return None
+
     def satoshi_to_btc(self, satoshis: int) -> float:
         return satoshis / 100_000_000
 
@@ -17,15 +37,306 @@ class BtcPriceConverter(ABC):
         return round(btc * self.get_btc_to_usd_rate(), 2)
 
 
-class CoinGeckoBtcPriceConverter(BtcPriceConverter):
-    API_URL = "https://api.coingecko.com/api/v3/simple/price"
+class HttpBtcPriceConverter(BtcPriceConverter):
+    """Fetches the rate from ``API_URL`` over one keep-alive
+    ``requests.Session``; subclasses say where the rate is in the answer.
 
-    def get_btc_to_usd_rate(self) -> float:
-        response = requests.get(
-            self.API_URL,
-            params={"ids": "bitcoin", "vs_currencies": "usd"},
-            timeout=10
+    Connection errors, timeouts, 429 and 5xx answers are retried up to
+    ``max_attempts`` times with full-jitter exponential backoff. Each call
+    that still fails counts against ``breaker``; while it is open no request
+    is sent at all. With ``serve_last_known`` a failed or refused call
+    returns the last rate fetched successfully instead of raising, and
+    ``rate_age_seconds`` reports its age.
+    """
+
+    API_URL: str
+    PARAMS: dict[str, str] = {}
+    RETRYABLE_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+    def __init__(self, api_url: str | None = None,
+                 timeout_seconds: float = settings.PRICE_HTTP_TIMEOUT_SECONDS,
+                 max_attempts: int = settings.PRICE_HTTP_MAX_ATTEMPTS,
+                 backoff_seconds: float = settings.PRICE_HTTP_BACKOFF_SECONDS,
+                 breaker: CircuitBreaker | None = None,
+                 serve_last_known: bool = True) -> None:
+        self.api_url = api_url or self.API_URL
+        self.timeout_seconds = timeout_seconds
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.breaker = breaker or CircuitBreaker(
+            settings.PRICE_CIRCUIT_FAILURE_THRESHOLD,
+            settings.PRICE_CIRCUIT_RESET_SECONDS
         )
+        self.serve_last_known = serve_last_known
+        self._session: Any = None
+        self._session_lock = threading.Lock()
+        self._last_known: tuple[float, float] | None = None
+        self._serving_last_known = False
+
+    def _get_session(self) -> Any:
+        # requests takes a sizeable share of the app's import time and is
+        # only needed once a price is actually fetched.
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                session.mount("https://", HTTPAdapter(
+                    pool_maxsize=settings.PRICE_HTTP_POOL_SIZE))
+                session.mount("http://", HTTPAdapter(
+                    pool_maxsize=settings.PRICE_HTTP_POOL_SIZE))
+                self._session = session
+            return self._session
+
+    def _request(self, session: Any) -> Any:
+        return session.get(
+            self.api_url,
+            params=self.PARAMS,
+            timeout=self.timeout_seconds
+        )
+
+    def _fetch(self) -> float:
+        import requests
+
+        session = self._get_session()
+        for attempt in range(self.max_attempts - 1):
+            try:
+                response = self._request(session)
+                if response.status_code not in self.RETRYABLE_STATUSES:
+                    break
+            except (requests.ConnectionError, requests.Timeout):
+                pass
+            time.sleep(random.uniform(0, self.backoff_seconds * 2 ** attempt))
+        else:
+            response = self._request(session)
         response.raise_for_status()
-        data: Any = response.json()
+        return self.parse_rate(response.json())
+
+    @abstractmethod
+    def parse_rate(self, data: Any) -> float:
+        pass
+
+    def get_btc_to_usd_rate(self) -> float:
+        if self.breaker.allow():
+            try:
+                rate = self._fetch()
+            except Exception:
+                self.breaker.record_failure()
+                if not (self.serve_last_known and self._last_known):
+                    raise
+                logger.warning("Fetching the BTC rate from %s failed",
+                               self.api_url, exc_info=True)
+            else:
+                self.breaker.record_success()
+                self._last_known = (rate, time.time())
+                self._serving_last_known = False
+                return rate
+
+        last_known = self._last_known
+        if not (self.serve_last_known and last_known):
+            raise PriceUnavailableError(
+                "The BTC price source is unavailable, try again later")
+        self._serving_last_known = True
+        return last_known[0]
+
+    def rate_age_seconds(self) -> float | None:
+        last_known = self._last_known
+        if not (self._serving_last_known and last_known):
+            return None
+        return max(0.0, time.time() - last_known[1])
+
+
+class CoinGeckoBtcPriceConverter(HttpBtcPriceConverter):
+    API_URL = "https://api.coingecko.com/api/v3/simple/price"
+    PARAMS = {"ids": "bitcoin", "vs_currencies": "usd"}
+
+    def parse_rate(self, data: Any) -> float:
         return float(data["bitcoin"]["usd"])
+
+
+class CoinbaseBtcPriceConverter(HttpBtcPriceConverter):
+    API_URL = "https://api.coinbase.com/v2/prices/BTC-USD/spot"
+
+    def parse_rate(self, data: Any) -> float:
+        return float(data["data"]["amount"])
+
+
+class KrakenBtcPriceConverter(HttpBtcPriceConverter):
+    API_URL = "https://api.kraken.com/0/public/Ticker"
+    PARAMS = {"pair": "XBTUSD"}
+
+    def parse_rate(self, data: Any) -> float:
+        if data["error"]:
+            raise ValueError(f"Kraken returned errors: {data['error']}")
+        [ticker] = data["result"].values()
+        return float(ticker["c"][0])
+
+
+class BitstampBtcPriceConverter(HttpBtcPriceConverter):
+    API_URL = "https://www.bitstamp.net/api/v2/ticker/btcusd/"
+
+    def parse_rate(self, data: Any) -> float:
+        return float(data["last"])
+
+
+HTTP_SOURCES: dict[str, type[HttpBtcPriceConverter]] = {
+    "coingecko": CoinGeckoBtcPriceConverter,
+    "coinbase": CoinbaseBtcPriceConverter,
+    "kraken": KrakenBtcPriceConverter,
+    "bitstamp": BitstampBtcPriceConverter,
+}
+
+
+@dataclass(frozen=True)
+class PriceSource:
+    name: str
+    converter: BtcPriceConverter
+    deadline_seconds: float
+
+
+class MedianBtcPriceConverter(BtcPriceConverter):
+    """Asks every source at once and returns the median of the rates that
+    arrive within each source's own deadline.
+
+    A slow source only costs its deadline, never the full time to its answer,
+    and one wrong source cannot move the median of three or more. Fewer than
+    ``min_sources`` rates in time raise ``PriceUnavailableError``. A source
+    that misses its deadline keeps running on the pool, and its late answer
+    is dropped.
+    """
+
+    def __init__(self, sources: list[PriceSource], min_sources: int = 1) -> None:
+        if not 1 <= min_sources <= len(sources):
+            raise ValueError("min_sources must be between 1 and the source count")
+        self.sources = sorted(sources, key=lambda source: source.deadline_seconds)
+        self.min_sources = min_sources
+        self._executor = ThreadPoolExecutor(
+            max_workers=2 * len(sources), thread_name_prefix="price-source")
+
+    def get_btc_to_usd_rate(self) -> float:
+        started = time.monotonic()
+        futures = [self._executor.submit(source.converter.get_btc_to_usd_rate)
+                   for source in self.sources]
+        rates = []
+        for source, future in zip(self.sources, futures, strict=True):
+            remaining = source.deadline_seconds - (time.monotonic() - started)
+            try:
+                rates.append(future.result(timeout=max(0.0, remaining)))
+            except TimeoutError:
+                logger.warning("BTC price source %s missed its %.2fs deadline",
+                               source.name, source.deadline_seconds)
+            except Exception:
+                logger.warning("BTC price source %s failed", source.name,
+                               exc_info=True)
+        if len(rates) < self.min_sources:
+            raise PriceUnavailableError(
+                f"Only {len(rates)} of {len(self.sources)} BTC price sources "
+                "answered in time, try again later")
+        return statistics.median(rates)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+
+def parse_price_sources(spec: str, default_deadline_seconds: float,
+                        serve_last_known: bool) -> list[PriceSource]:
+    """Parses ``"coingecko,kraken:0.8"``: source names from ``HTTP_SOURCES``,
+    each with an optional deadline in seconds."""
+    sources = []
+    for entry in spec.split(","):
+        name, _, deadline = entry.strip().partition(":")
+        if name not in HTTP_SOURCES:
+            raise ValueError(f"Unknown BTC price source {name!r}")
+        sources.append(PriceSource(
+            name, HTTP_SOURCES[name](serve_last_known=serve_last_known),
+            float(deadline) if deadline else default_deadline_seconds
+        ))
+    return sources
+
+
+def create_price_source(serve_last_known: bool = True) -> BtcPriceConverter:
+    """The converter configured by ``PRICE_SOURCES``. A single source serves
+    its last known rate as configured; with several the median converter
+    decides, so each of them reports its own failures."""
+    sources = parse_price_sources(
+        settings.PRICE_SOURCES, settings.PRICE_SOURCE_DEADLINE_SECONDS,
+        serve_last_known=serve_last_known and "," not in settings.PRICE_SOURCES
+    )
+    if len(sources) == 1:
+        return sources[0].converter
+    return MedianBtcPriceConverter(sources, settings.PRICE_SOURCES_MIN_ANSWERS)
+
+
+class CachingBtcPriceConverter(BtcPriceConverter):
+    """Reuses the rate fetched by ``source`` until the cache entry expires or
+    is invalidated by any worker."""
+
+    CACHE_KEY = "btc_usd"
+
+    def __init__(self, source: BtcPriceConverter,
+                 rate_cache: InvalidatingCache[float]) -> None:
+        self.source = source
+        self.rate_cache = rate_cache
+
+    def get_btc_to_usd_rate(self) -> float:
+        rate = self.rate_cache.load(self.CACHE_KEY, self.source.get_btc_to_usd_rate)
+        assert rate is not None
+        return rate
+
+    def rate_age_seconds(self) -> float | None:
+        return self.source.rate_age_seconds()
+
+    def cached_rate(self) -> float | None:
+        return self.rate_cache.get(self.CACHE_KEY)
+
+
+class BudgetedBtcPriceConverter(BtcPriceConverter):
+    """Waits at most ``budget_seconds`` for a rate from ``source``.
+
+    A rate ``source`` already holds is returned at once. Otherwise one
+    lookup runs on a background thread and every caller arriving while it is
+    in flight waits on that same lookup. A caller whose budget runs out, or
+    whose lookup fails, gets ``PriceUnavailableError``; the lookup itself
+    carries on and warms ``source`` for the requests that follow.
+    """
+
+    def __init__(self, source: BtcPriceConverter, budget_seconds: float) -> None:
+        self.source = source
+        self.budget_seconds = budget_seconds
+        self._executor = ThreadPoolExecutor(max_workers=1,
+                                            thread_name_prefix="price-lookup")
+        self._lock = threading.Lock()
+        self._in_flight: Future[float] | None = None
+
+    def _lookup(self) -> Future[float]:
+        with self._lock:
+            if self._in_flight is None or self._in_flight.done():
+                self._in_flight = self._executor.submit(
+                    self.source.get_btc_to_usd_rate)
+            return self._in_flight
+
+    def get_btc_to_usd_rate(self) -> float:
+        rate = self.source.cached_rate()
+        if rate is not None:
+            return rate
+        try:
+            return self._lookup().result(timeout=self.budget_seconds)
+        except TimeoutError:
+            raise PriceUnavailableError(
+                f"The BTC rate did not arrive within {self.budget_seconds:g}s"
+            ) from None
+        except PriceUnavailableError:
+            raise
+        except Exception as exception:
+            raise PriceUnavailableError(
+                f"Fetching the BTC rate failed: {exception}") from exception
+
+    def cached_rate(self) -> float | None:
+        return self.source.cached_rate()
+
+    def rate_age_seconds(self) -> float | None:
+        return self.source.rate_age_seconds()
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
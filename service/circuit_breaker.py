@@ -0,0 +1,50 @@
+import threading
+import time
+from collections.abc import Callable
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    """Stops calling a failing dependency for a while.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and
+    ``allow`` refuses every call for ``reset_seconds``. Then a single trial
+    call is let through: its success closes the circuit, its failure opens
+    it for another ``reset_seconds``.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float,
+                 clock: Callable[[], float] = time.monotonic) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if (self.state == OPEN and
+                    self.clock() - self._opened_at >= self.reset_seconds):
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.state = CLOSED
+            self._failures = 0
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if (self.state == HALF_OPEN or
+                    self._failures >= self.failure_threshold):
+                self.state = OPEN
+                self._opened_at = self.clock()
@@ -0,0 +1,158 @@
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+from functools import cache
+from typing import Any
+
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+BASIS_POINTS_PER_UNIT = 10_000
+DEFAULT_FEE_BASIS_POINTS = 150
+
+
+@dataclass(frozen=True)
+class FeeTier:
+    """Fee charged on the whole transfer once it reaches ``min_amount``."""
+    min_amount: int
+    basis_points: int
+
+
+class FeeSchedule:
+    """Amount-tiered fees with the tier boundaries precomputed for bisection.
+    Transfers below the lowest boundary are free."""
+
+    def __init__(self, tiers: list[FeeTier]) -> None:
+        ordered = sorted(tiers, key=lambda tier: tier.min_amount)
+        for tier in ordered:
+            if tier.min_amount < 0:
+                raise ValueError("Fee tier min_amount must not be negative")
+            if not 0 <= tier.basis_points <= BASIS_POINTS_PER_UNIT:
+                raise ValueError("Fee tier basis_points must be within 0-10000")
+        self._boundaries = [tier.min_amount for tier in ordered]
+        if len(set(self._boundaries)) != len(self._boundaries):
+            raise ValueError("Fee tiers must have distinct min_amount values")
+        self._basis_points = [tier.basis_points for tier in ordered]
+
+    def fee_for(self, amount: int) -> int:
+        index = bisect_right(self._boundaries, amount) - 1
+        if index < 0:
+            return 0
+        return amount * self._basis_points[index] // BASIS_POINTS_PER_UNIT
+
+
+class FeeTimeline:
+    """Fee schedules ordered by the timestamp they take effect at."""
+
+    def __init__(self, schedules: list[tuple[float, FeeSchedule]]) -> None:
+        ordered = sorted(schedules, key=lambda entry: entry[0])
+        self._effective_from = [effective_from for effective_from, _ in ordered]
+        self._schedules = [schedule for _, schedule in ordered]
+
+    def schedule_at(self, timestamp: float) -> FeeSchedule | None:
+        index = bisect_right(self._effective_from, timestamp) - 1
+        return self._schedules[index] if index >= 0 else None
+
+
+class FeeRules:
+    """The default fee timeline plus per-user overrides."""
+
+    def __init__(self, default: FeeTimeline,
+                 per_user: dict[int, FeeTimeline] | None = None) -> None:
+        self.default = default
+        self.per_user = per_user or {}
+
+    @classmethod
+    def flat(cls, basis_points: int = DEFAULT_FEE_BASIS_POINTS) -> "FeeRules":
+        return cls(FeeTimeline(
+            [(float("-inf"), FeeSchedule([FeeTier(0, basis_points)]))]
+        ))
+
+    def transfer_fee(self, user_id: int, amount: int, at: float) -> int:
+        schedule = self.per_user.get(user_id, self.default).schedule_at(at)
+        if schedule is None:
+            schedule = self.default.schedule_at(at)
+        return schedule.fee_for(amount) if schedule else 0
+
+
+def parse_timeline(entries: list[dict[str, Any]]) -> FeeTimeline:
+    schedules = []
+    for entry in entries:
+        effective_from = entry.get("effective_from")
+        schedules.append((
+            datetime.fromisoformat(effective_from).timestamp()
+            if effective_from else float("-inf"),
+            FeeSchedule([FeeTier(int(tier["min_amount"]), int(tier["basis_points"]))
+                         for tier in entry["tiers"]])
+        ))
+    return FeeTimeline(schedules)
+
+
+def parse_fee_rules(config: dict[str, Any]) -> FeeRules:
+    """Builds rules from a config such as::
+
+        {"default": [{"tiers": [{"min_amount": 0, "basis_points": 150}]}],
+         "users": {"42": [{"effective_from": "2026-01-01T00:00:00+00:00",
+                           "tiers": [{"min_amount": 0, "basis_points": 50}]}]}}
+    """
+    return FeeRules(
+        parse_timeline(config["default"]),
+        {int(user_id): parse_timeline(entries)
+         for user_id, entries in config.get("users", {}).items()}
+    )
+
+
+class FeeEngine:
+    """Computes transfer fees from the rules in ``config_path``, or from the
+    flat 1.5% schedule without one.
+
+    The file's modification time is checked at most every
+    ``reload_interval_seconds`` and a changed file is parsed and swapped in
+    without a restart. A file that fails to parse keeps the previous rules.
+    """
+
+    def __init__(self, config_path: str | None = None,
+                 reload_interval_seconds: float = 5.0) -> None:
+        self.config_path = config_path
+        self.reload_interval_seconds = reload_interval_seconds
+        self._reload_lock = threading.Lock()
+        self._loaded_mtime_ns: int | None = None
+        self._next_check = 0.0
+        self._rules = FeeRules.flat()
+        if config_path is not None:
+            self._rules = self._load(config_path)
+
+    def _load(self, config_path: str) -> FeeRules:
+        self._loaded_mtime_ns = os.stat(config_path).st_mtime_ns
+        with open(config_path) as config_file:
+            return parse_fee_rules(json.load(config_file))
+
+    def _reload_if_changed(self) -> None:
+        if (self.config_path is None or time.monotonic() < self._next_check or
+                not self._reload_lock.acquire(blocking=False)):
+            return
+        try:
+            self._next_check = time.monotonic() + self.reload_interval_seconds
+            if os.stat(self.config_path).st_mtime_ns != self._loaded_mtime_ns:
+                self._rules = self._load(self.config_path)
+        except (OSError, ValueError, KeyError, TypeError):
+            logger.warning("Keeping the previous fee schedule, reloading %s "
+                           "failed", self.config_path, exc_info=True)
+        finally:
+            self._reload_lock.release()
+
+    def transfer_fee(self, user_id: int, amount: int) -> int:
+        self._reload_if_changed()
+        return self._rules.transfer_fee(user_id, amount, time.time())
+
+
+@cache
+def get_fee_engine() -> FeeEngine:
+    return FeeEngine(settings.FEE_SCHEDULE_PATH,
+                     settings.FEE_SCHEDULE_RELOAD_INTERVAL_SECONDS)
@@ -0,0 +1,113 @@
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from functools import cache
+
+from config import settings
+from database.connection_pool import ConnectionPool, get_connection_pool
+from repository import sql_catalog
+from service.metrics import MetricsRegistry, get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LedgerVerification:
+    checked_postings: int
+    verified_through: int
+    problems: list[str] = field(default_factory=list)
+
+
+class LedgerVerifier:
+    """Checks the postings added since the last run.
+
+    Every run reads at most ``batch_size`` postings past the checkpoint in
+    LedgerCheckpoint, all from one read snapshot, and checks that each
+    continues its account's sequence and running balance, that every entry
+    they belong to sums to zero, and that each wallet they touch has
+    ``Wallets.balance`` equal to its last running balance. The checkpoint
+    then moves past the batch, so a run costs the same however long the
+    ledger grows. Problems are logged and counted, not repaired.
+    """
+
+    def __init__(self, pool: ConnectionPool, batch_size: int,
+                 metrics: MetricsRegistry) -> None:
+        self.pool = pool
+        self.batch_size = batch_size
+        self._verified = metrics.counter(
+            "ledger_postings_verified_total",
+            "Ledger postings checked by the verification job."
+        )
+        self._inconsistencies = metrics.counter(
+            "ledger_inconsistencies_total",
+            "Ledger problems found by the verification job."
+        )
+
+    def verify_once(self) -> LedgerVerification:
+        connection = self.pool.acquire()
+        try:
+            connection.execute("BEGIN")
+            checkpoint = connection.execute(
+                sql_catalog.SELECT_LEDGER_CHECKPOINT).fetchone()["last_posting_id"]
+            batch_end = connection.execute(
+                sql_catalog.SELECT_LEDGER_BATCH_END, (checkpoint, self.batch_size)
+            ).fetchone()["batch_end"]
+            if batch_end is None:
+                return LedgerVerification(0, checkpoint)
+
+            bounds = (checkpoint, batch_end)
+            problems = [
+                f"Posting {row['id']} (account {row['account_id']}, sequence "
+                f"{row['sequence']}) does not follow the account's previous posting"
+                for row in connection.execute(
+                    sql_catalog.SELECT_BROKEN_RUNNING_BALANCES, bounds)
+            ]
+            problems += [
+                f"Entry {row['entry_id']} is off balance by {row['total']}"
+                for row in connection.execute(
+                    sql_catalog.SELECT_UNBALANCED_ENTRIES, bounds)
+            ]
+            problems += [
+                f"Wallet {row['id']} has balance {row['balance']} but its last "
+                f"posting says {row['balance_after']}"
+                for row in connection.execute(
+                    sql_catalog.SELECT_WALLETS_OFF_LEDGER, bounds)
+            ]
+            checked = connection.execute(
+                sql_catalog.COUNT_POSTINGS_IN_RANGE, bounds).fetchone()["cnt"]
+            connection.commit()
+
+            # Another worker's verifier may have covered the batch meanwhile.
+            connection.execute(sql_catalog.UPDATE_LEDGER_CHECKPOINT, bounds)
+            connection.commit()
+        finally:
+            self.pool.release(connection)
+
+        self._verified.inc(checked)
+        if problems:
+            self._inconsistencies.inc(len(problems))
+            for problem in problems:
+                logger.error("Ledger verification: %s", problem)
+        return LedgerVerification(checked, batch_end, problems)
+
+    async def run(self, interval_seconds: float) -> None:
+        while True:
+            try:
+                verification = await asyncio.to_thread(self.verify_once)
+            except Exception:
+                logger.warning("Ledger verification failed", exc_info=True)
+                verification = None
+            # A full batch means there is a backlog to catch up on.
+            if (verification is None or
+                    verification.checked_postings < self.batch_size):
+                await asyncio.sleep(interval_seconds)
+
+
+def create_ledger_verifier(pool: ConnectionPool) -> LedgerVerifier:
+    return LedgerVerifier(pool, settings.LEDGER_VERIFY_BATCH_SIZE,
+                          get_metrics_registry())
+
+
+@cache
+def get_ledger_verifier() -> LedgerVerifier:
+    return create_ledger_verifier(get_connection_pool())
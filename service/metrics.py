@@ -0,0 +1,73 @@
+import threading
+from collections.abc import Callable
+from functools import cache
+
+
+class Counter:
+    def __init__(self, name: str, documentation: str) -> None:
+        self.name = name
+        self.documentation = documentation
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Gauge:
+    def __init__(self, name: str, documentation: str) -> None:
+        self.name = name
+        self.documentation = documentation
+        self._value = 0.0
+        self._function: Callable[[], float] | None = None
+
+    def set(self, value: float) -> None:
+        self._value = value
+
+    def set_function(self, function: Callable[[], float]) -> None:
+        """Computes the value when it is read instead of storing it."""
+        self._function = function
+
+    @property
+    def value(self) -> float:
+        return self._function() if self._function else self._value
+
+
+class MetricsRegistry:
+    """Process-local counters and gauges rendered in the Prometheus text
+    format. With several workers every process reports its own values."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Counter | Gauge] = {}
+
+    def counter(self, name: str, documentation: str) -> Counter:
+        with self._lock:
+            metric = self._metrics.setdefault(name, Counter(name, documentation))
+        assert isinstance(metric, Counter)
+        return metric
+
+    def gauge(self, name: str, documentation: str) -> Gauge:
+        with self._lock:
+            metric = self._metrics.setdefault(name, Gauge(name, documentation))
+        assert isinstance(metric, Gauge)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            kind = "counter" if isinstance(metric, Counter) else "gauge"
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {kind}")
+            lines.append(f"{metric.name} {metric.value}")
+        return "\n".join(lines) + "\n"
+
+
+@cache
+def get_metrics_registry() -> MetricsRegistry:
+    return MetricsRegistry()
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from functools import cache
+
+from config import settings
+from service.btc_price_converter import BtcPriceConverter, create_price_source
+from service.metrics import MetricsRegistry, get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RateSnapshot:
+    rate: float
+    fetched_at: float
+
+    def age_seconds(self) -> float:
+        return max(0.0, time.time() - self.fetched_at)
+
+
+class PriceRefresher:
+    """Polls ``source`` in the background and publishes the result as an
+    immutable ``RateSnapshot``.
+
+    Publishing is a single reference assignment, so request handlers read
+    ``snapshot`` without any locking. Failed polls are retried with jittered
+    exponential backoff, and the stale alert fires once the published rate
+    gets older than ``staleness_threshold_seconds``.
+    """
+
+    def __init__(self, source: BtcPriceConverter, interval_seconds: float,
+                 max_backoff_seconds: float, staleness_threshold_seconds: float,
+                 metrics: MetricsRegistry) -> None:
+        self.source = source
+        self.interval_seconds = interval_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.staleness_threshold_seconds = staleness_threshold_seconds
+        self.snapshot: RateSnapshot | None = None
+        self._consecutive_failures = 0
+        self._alerting = False
+
+        self._fetch_failures = metrics.counter(
+            "btc_price_fetch_failures_total",
+            "Failed polls of the BTC price source."
+        )
+        self._staleness_alerts = metrics.counter(
+            "btc_price_staleness_alerts_total",
+            "Times the published BTC rate went past the staleness threshold."
+        )
+        metrics.gauge(
+            "btc_price_snapshot_age_seconds",
+            "Age of the published BTC rate, -1 before the first fetch."
+        ).set_function(
+            lambda: self.snapshot.age_seconds() if self.snapshot else -1.0
+        )
+        metrics.gauge(
+            "btc_price_snapshot_stale",
+            "1 while the published BTC rate is older than the threshold."
+        ).set_function(lambda: float(self.is_stale()))
+
+    def refresh(self) -> RateSnapshot:
+        snapshot = RateSnapshot(self.source.get_btc_to_usd_rate(), time.time())
+        self.snapshot = snapshot
+        return snapshot
+
+    def is_stale(self) -> bool:
+        snapshot = self.snapshot
+        return (snapshot is None or
+                snapshot.age_seconds() > self.staleness_threshold_seconds)
+
+    def check_staleness(self) -> None:
+        stale = self.is_stale()
+        if stale and not self._alerting:
+            self._staleness_alerts.inc()
+            logger.warning(
+                "BTC rate is older than %.0f seconds",
+                self.staleness_threshold_seconds
+            )
+        self._alerting = stale
+
+    def next_delay(self) -> float:
+        if self._consecutive_failures == 0:
+            return self.interval_seconds * random.uniform(0.9, 1.1)
+        backoff = min(
+            self.max_backoff_seconds,
+            self.interval_seconds * 2 ** min(self._consecutive_failures, 16)
+        )
+        return random.uniform(backoff / 2, backoff)
+
+    async def poll_once(self) -> None:
+        try:
+            await asyncio.to_thread(self.refresh)
+            self._consecutive_failures = 0
+        except Exception:
+            self._consecutive_failures += 1
+            self._fetch_failures.inc()
+            logger.warning("Fetching the BTC rate failed", exc_info=True)
+        self.check_staleness()
+
+    async def run(self) -> None:
+        while True:
+            await self.poll_once()
+            await asyncio.sleep(self.next_delay())
+
+
+class SnapshotBtcPriceConverter(BtcPriceConverter):
+    """Serves the rate last published by a ``PriceRefresher``; only a request
+    arriving before the first successful poll fetches the rate itself."""
+
+    def __init__(self, refresher: PriceRefresher) -> None:
+        self.refresher = refresher
+
+    def get_btc_to_usd_rate(self) -> float:
+        snapshot = self.refresher.snapshot
+        if snapshot is None:
+            snapshot = self.refresher.refresh()
+        return snapshot.rate
+
+    def cached_rate(self) -> float | None:
+        snapshot = self.refresher.snapshot
+        return snapshot.rate if snapshot else None
+
+    def rate_age_seconds(self) -> float | None:
+        snapshot = self.refresher.snapshot
+        return snapshot.age_seconds() if snapshot else None
+
+
+@cache
+def get_price_refresher() -> PriceRefresher:
+    return PriceRefresher(
+        # The published snapshot already is the last known rate, and its age
+        # drives the staleness alert.
+        create_price_source(serve_last_known=False),
+        settings.PRICE_REFRESH_INTERVAL_SECONDS,
+        settings.PRICE_REFRESH_MAX_BACKOFF_SECONDS,
+        settings.PRICE_STALENESS_THRESHOLD_SECONDS,
+        get_metrics_registry()
+    )
@@ -0,0 +1,126 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from functools import cache
+from types import FrameType
+
+from exception.exceptions import ProfilerBusyError
+
+# Stacks without a frame from this directory (idle worker threads, the event
+# loop waiting on sockets) are counted as idle and left out of the profile.
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+@dataclass(frozen=True)
+class FunctionProfile:
+    function: str
+    self_samples: int
+    cumulative_samples: int
+    cumulative_seconds: float
+
+
+@dataclass(frozen=True)
+class Profile:
+    duration_seconds: float
+    interval_seconds: float
+    samples: int
+    idle_samples: int
+    stacks: Counter[tuple[str, ...]]
+    functions: list[FunctionProfile]
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed stack format, root frame first, as read
+        by flamegraph.pl and speedscope."""
+        return "".join(f"{';'.join(stack)} {count}\n"
+                       for stack, count in self.stacks.most_common())
+
+
+def frame_label(frame: FrameType) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}"
+
+
+def walk_stack(frame: FrameType | None) -> tuple[tuple[str, ...], bool]:
+    """Returns the stack root first and whether it runs project code."""
+    labels = []
+    in_project = False
+    while frame is not None:
+        labels.append(frame_label(frame))
+        in_project = in_project or frame.f_code.co_filename.startswith(PROJECT_ROOT)
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels), in_project
+
+
+class SamplingProfiler:
+    """Samples the stacks of every other thread through
+    ``sys._current_frames()``.
+
+    Nothing is hooked into the interpreter, so the application runs at full
+    speed unless a profile is being taken, and only one can run at a time.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+    def profile(self, duration_seconds: float,
+                interval_seconds: float) -> Profile:
+        if not self._lock.acquire(blocking=False):
+            raise ProfilerBusyError("A profile is already being taken")
+        try:
+            return self._sample(duration_seconds, interval_seconds)
+        finally:
+            self._lock.release()
+
+    def _sample(self, duration_seconds: float,
+                interval_seconds: float) -> Profile:
+        caller = threading.get_ident()
+        stacks: Counter[tuple[str, ...]] = Counter()
+        idle_samples = rounds = 0
+        started = time.perf_counter()
+        deadline = started + duration_seconds
+        while (now := time.perf_counter()) < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == caller:
+                    continue
+                stack, in_project = walk_stack(frame)
+                if in_project:
+                    stacks[stack] += 1
+                else:
+                    idle_samples += 1
+            rounds += 1
+            time.sleep(max(0.0, interval_seconds - (time.perf_counter() - now)))
+
+        elapsed = time.perf_counter() - started
+        return Profile(
+            duration_seconds=elapsed,
+            interval_seconds=interval_seconds,
+            samples=stacks.total(),
+            idle_samples=idle_samples,
+            stacks=stacks,
+            functions=summarize(stacks, elapsed / rounds if rounds else 0.0)
+        )
+
+
+def summarize(stacks: Counter[tuple[str, ...]],
+              seconds_per_sample: float) -> list[FunctionProfile]:
+    """Self and cumulative samples per function; a recursive function is
+    counted once per stack for its cumulative time."""
+    self_samples: Counter[str] = Counter()
+    cumulative_samples: Counter[str] = Counter()
+    for stack, count in stacks.items():
+        self_samples[stack[-1]] += count
+        for function in set(stack):
+            cumulative_samples[function] += count
+    return [
+        FunctionProfile(function, self_samples[function], samples,
+                        round(samples * seconds_per_sample, 6))
+        for function, samples in cumulative_samples.most_common()
+    ]
+
+
+@cache
+def get_sampling_profiler() -> SamplingProfiler:
+    return SamplingProfiler()
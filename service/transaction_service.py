@@ -1,6 +1,17 @@
+import time
+from collections.abc import Sequence
+from functools import partial
+
+from database.connection import read_only, run_after_commit, run_after_rollback
+from dto.posting_response_dto import PostingResponseDto
 from dto.statistics_response_dto import StatisticsResponseDto
 from dto.transaction_create_dto import TransactionCreateDto
 from dto.transaction_response_dto import TransactionResponseDto
+from dto.transfer_event_dto import TransferEventDto
+from dto.transfer_stats_response_dto import (
+    UserTransferStatsResponseDto,
+    WalletTransferStatsResponseDto,
+)
 from entity.transaction import Transaction
 from entity.user import User
 from entity.wallet import Wallet
@@ -10,9 +21,18 @@ from exception.exceptions import (
     UserNotFoundError,
     WalletNotFoundError,
 )
+from repository.ledger_repository import LedgerRepository
+from repository.outbox_repository import OutboxRepository
 from repository.transaction_repository import TransactionRepository
+from repository.transfer_stats_repository import (
+    TransferStatsMetric,
+    TransferStatsRepository,
+)
 from repository.user_repository import UserRepository
 from repository.wallet_repository import WalletRepository
+from service.fee_schedule import FeeEngine
+from service.transfer_events import TransferEventBroker
+from service.velocity_guard import TransferAttempt, TransferRule
 
 
 def construct_transaction_response_dtos_from_map(wallet_map: dict[int, str],
@@ -32,10 +52,24 @@ def construct_transaction_response_dtos_from_map(wallet_map: dict[int, str],
 class TransactionService:
     def __init__(self, user_repo: UserRepository,
                  wallet_repo: WalletRepository,
-                 transaction_repo: TransactionRepository) -> None:
+                 transaction_repo: TransactionRepository,
+                 fee_engine: FeeEngine | None = None,
+                 event_broker: TransferEventBroker | None = None,
+                 outbox_repo: OutboxRepository | None = None,
+                 ledger_repo: LedgerRepository | None = None,
+                 transfer_stats_repo: TransferStatsRepository | None = None,
+                 transfer_rules: Sequence[TransferRule] = ()) -> None:
         self.user_repo = user_repo
         self.wallet_repo = wallet_repo
         self.transaction_repo = transaction_repo
+        self.fee_engine = fee_engine or FeeEngine()
+        self.event_broker = event_broker
+        self.outbox_repo = outbox_repo
+        self.ledger_repo = ledger_repo or LedgerRepository(
+            transaction_repo.db_connection)
+        self.transfer_stats_repo = transfer_stats_repo or TransferStatsRepository(
+            transaction_repo.db_connection)
+        self.transfer_rules = transfer_rules
 
     def check_user_existence(self, api_key: str) -> User:
         user = self.user_repo.find_user_by_api_key(api_key)
@@ -58,7 +92,9 @@ class TransactionService:
         transferred_amount = transfer_amount
 
         if sender_wallet.user_id != receiver_wallet.user_id:
-            transfer_fee = int(transfer_amount * 0.015)
+            transfer_fee = self.fee_engine.transfer_fee(
+                sender_wallet.user_id, transfer_amount
+            )
             transferred_amount = transfer_amount - transfer_fee
 
         self.wallet_repo.update_balance(
@@ -99,9 +135,8 @@ class TransactionService:
 
 
     #-------------------------------------------------------------------------------------------------------------------
-    def get_wallet_related_transactions(self, wallet_address: str,
-           api_key: str) -> list[TransactionResponseDto]:
-
+    @read_only
+    def get_owned_wallet(self, wallet_address: str, api_key: str) -> Wallet:
         user = self.check_user_existence(api_key)
         wallet = self.wallet_repo.get_wallet_by_address(wallet_address)
 
@@ -116,6 +151,14 @@ class TransactionService:
                 f"to the user with the name of {user.name}"
             )
 
+        return wallet
+
+    @read_only
+    def get_wallet_related_transactions(self, wallet_address: str,
+           api_key: str) -> list[TransactionResponseDto]:
+
+        wallet = self.get_owned_wallet(wallet_address, api_key)
+
         transactions = (self.
             transaction_repo.get_related_transactions_by_wallet_id(wallet.id))
 
@@ -128,6 +171,43 @@ class TransactionService:
             wallet_map, transactions
         )
 
+    @read_only
+    def get_wallet_postings(self, wallet_address: str, api_key: str,
+            after_sequence: int, limit: int) -> list[PostingResponseDto]:
+        wallet = self.get_owned_wallet(wallet_address, api_key)
+
+        postings = self.ledger_repo.get_postings(wallet.id, after_sequence, limit)
+
+        return [
+            PostingResponseDto(
+                sequence=posting.sequence,
+                transaction_id=posting.entry_id if posting.entry_id > 0 else None,
+                amount=posting.amount,
+                balance_after=posting.balance_after
+            )
+            for posting in postings
+        ]
+
+    @read_only
+    def get_transfer_events_after(self, wallet: Wallet,
+                                  after_id: int) -> list[TransferEventDto]:
+        transactions = self.transaction_repo.get_related_transactions_after(
+            wallet.id, after_id
+        )
+
+        if not transactions:
+            return []
+
+        wallet_map = self.construct_wallet_map(transactions)
+        dtos = construct_transaction_response_dtos_from_map(wallet_map, transactions)
+
+        return [
+            TransferEventDto(transaction_id=tr.id, **dto.model_dump())
+            for tr, dto in zip(transactions, dtos, strict=True)
+            if tr.id is not None
+        ]
+
+    @read_only
     def get_transactions(self, api_key: str) -> list[TransactionResponseDto]:
         user = self.check_user_existence(api_key)
         user_wallets = self.wallet_repo.get_wallets_by_user_id(user.id)
@@ -172,19 +252,43 @@ class TransactionService:
         if sender_wallet.id == receiver_wallet.id:
             raise WalletNotFoundError("Cannot transfer to the same wallet")
 
-        transfer_fee, transferred_amount = self.update_balances(
-            sender_wallet, receiver_wallet,
-            transaction_create_dto.transfer_amount
-        )
-
-        self.transaction_repo.insert_transaction(Transaction(
+        attempt = TransferAttempt(
             sender_wallet_id=sender_wallet.id,
-            receiver_wallet_id=receiver_wallet.id,
-            transfer_amount=transaction_create_dto.transfer_amount,
-            transfer_fee=transfer_fee
-        ))
+            sender_user_id=sender_wallet.user_id,
+            amount=transaction_create_dto.transfer_amount,
+            at=time.time()
+        )
+        admitted: list[TransferRule] = []
+        transaction_id: int | None = None
+        try:
+            for rule in self.transfer_rules:
+                rule.admit(attempt)
+                admitted.append(rule)
+
+            transfer_fee, transferred_amount = self.update_balances(
+                sender_wallet, receiver_wallet,
+                transaction_create_dto.transfer_amount
+            )
 
-        return TransactionResponseDto(
+            transaction = self.transaction_repo.insert_transaction(Transaction(
+                sender_wallet_id=sender_wallet.id,
+                receiver_wallet_id=receiver_wallet.id,
+                transfer_amount=transaction_create_dto.transfer_amount,
+                transfer_fee=transfer_fee
+            ))
+            transaction_id = transaction.id
+            if transaction_id is not None:
+                for rule in admitted:
+                    rule.record(attempt, transaction_id)
+        except Exception:
+            for rule in admitted:
+                rule.cancel(attempt, transaction_id)
+            raise
+        for rule in admitted:
+            run_after_rollback(self.transaction_repo.db_connection,
+                               partial(rule.cancel, attempt, transaction_id))
+
+        response = TransactionResponseDto(
             sender_wallet_address=sender_wallet.wallet_address,
             receiver_wallet_address=receiver_wallet.wallet_address,
             transfer_amount=transaction_create_dto.transfer_amount,
@@ -192,6 +296,20 @@ class TransactionService:
             transfer_fee=transfer_fee
         )
 
+        if transaction.id is not None:
+            event = TransferEventDto(transaction_id=transaction.id,
+                                     **response.model_dump())
+            if self.outbox_repo is not None:
+                # Same transaction as the transfer; delivered in the background.
+                self.outbox_repo.add_transfer_notification(
+                    transaction.id, event.model_dump_json(), time.time())
+            if self.event_broker is not None:
+                run_after_commit(self.transaction_repo.db_connection,
+                                 partial(self.event_broker.publish, event))
+
+        return response
+
+    @read_only
     def get_statistics(self) -> StatisticsResponseDto:
         total_transactions, platform_profit = (
             self.transaction_repo.get_transaction_count_and_profit())
@@ -201,5 +319,34 @@ class TransactionService:
             platform_profit=platform_profit
         )
 
-
-
+    @read_only
+    def get_top_users(self, metric: TransferStatsMetric,
+                      limit: int) -> list[UserTransferStatsResponseDto]:
+        return [
+            UserTransferStatsResponseDto(
+                user_id=stats.user_id,
+                name=stats.name,
+                transfers_sent=stats.transfers_sent,
+                transfers_received=stats.transfers_received,
+                volume_sent=stats.volume_sent,
+                volume_received=stats.volume_received,
+                fees_paid=stats.fees_paid
+            )
+            for stats in self.transfer_stats_repo.get_top_users(metric, limit)
+        ]
+
+    @read_only
+    def get_top_wallets(self, metric: TransferStatsMetric,
+                        limit: int) -> list[WalletTransferStatsResponseDto]:
+        return [
+            WalletTransferStatsResponseDto(
+                wallet_address=stats.wallet_address,
+                user_id=stats.user_id,
+                transfers_sent=stats.transfers_sent,
+                transfers_received=stats.transfers_received,
+                volume_sent=stats.volume_sent,
+                volume_received=stats.volume_received,
+                fees_paid=stats.fees_paid
+            )
+            for stats in self.transfer_stats_repo.get_top_wallets(metric, limit)
+        ]
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+from collections import deque
+from collections.abc import AsyncGenerator, Callable
+from contextlib import suppress
+from functools import cache
+
+from config import settings
+from dto.transfer_event_dto import TransferEventDto
+
+
+class Subscription:
+    """Transfer events for one wallet, delivered to the event loop that
+    subscribed. When ``max_pending`` events pile up unread the backlog is
+    dropped and ``get`` returns None, telling the reader to catch up from
+    the database instead."""
+
+    def __init__(self, broker: "TransferEventBroker", wallet_address: str,
+                 max_pending: int) -> None:
+        self.broker = broker
+        self.wallet_address = wallet_address
+        self.loop = asyncio.get_running_loop()
+        self._queue: asyncio.Queue[TransferEventDto | None] = asyncio.Queue(
+            max_pending)
+
+    def offer(self, event: TransferEventDto) -> None:
+        """Runs on the subscriber's loop."""
+        if self._queue.full():
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(None)
+        else:
+            self._queue.put_nowait(event)
+
+    async def get(self) -> TransferEventDto | None:
+        return await self._queue.get()
+
+    def close(self) -> None:
+        self.broker.unsubscribe(self)
+
+
+class TransferEventBroker:
+    """In-process publish/subscribe of committed transfers by wallet address.
+
+    ``publish`` is called from request threads once a transfer has been
+    committed and hands the event to each subscriber's event loop. Only
+    transfers made by this process are published; streams pick up the rest
+    through their periodic catch-up query.
+    """
+
+    def __init__(self, max_pending: int = 256) -> None:
+        self.max_pending = max_pending
+        self._lock = threading.Lock()
+        self._subscriptions: dict[str, set[Subscription]] = {}
+
+    def subscribe(self, wallet_address: str) -> Subscription:
+        subscription = Subscription(self, wallet_address, self.max_pending)
+        with self._lock:
+            self._subscriptions.setdefault(wallet_address, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        with self._lock:
+            subscriptions = self._subscriptions.get(subscription.wallet_address)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._subscriptions[subscription.wallet_address]
+
+    def publish(self, event: TransferEventDto) -> None:
+        with self._lock:
+            subscriptions = [
+                *self._subscriptions.get(event.sender_wallet_address, ()),
+                *self._subscriptions.get(event.receiver_wallet_address, ()),
+            ]
+        for subscription in subscriptions:
+            # The subscriber's loop may be shutting down.
+            with suppress(RuntimeError):
+                subscription.loop.call_soon_threadsafe(subscription.offer, event)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return sum(len(subscriptions)
+                       for subscriptions in self._subscriptions.values())
+
+
+async def stream_transfer_events(
+        broker: TransferEventBroker, wallet_address: str, after_id: int,
+        catch_up: Callable[[int], list[TransferEventDto]],
+        heartbeat_seconds: float
+) -> AsyncGenerator[TransferEventDto | None]:
+    """Yields the wallet's transfers with an id above ``after_id``: first
+    those already committed, then each one as it is published. None is
+    yielded after ``heartbeat_seconds`` without events, so the caller can
+    keep the connection alive.
+
+    ``catch_up(after_id)`` runs in a worker thread and reads committed
+    transfers. It also runs on every heartbeat and after an overflow, which
+    covers transfers made by other worker processes. Events are
+    deduplicated by transaction id.
+    """
+    subscription = broker.subscribe(wallet_address)
+    last_id = after_id
+    delivered: deque[int] = deque(maxlen=4 * broker.max_pending)
+
+    def is_new(event: TransferEventDto) -> bool:
+        nonlocal last_id
+        if event.transaction_id <= after_id or event.transaction_id in delivered:
+            return False
+        delivered.append(event.transaction_id)
+        last_id = max(last_id, event.transaction_id)
+        return True
+
+    try:
+        # Subscribed first, so a transfer committed during the catch-up
+        # query is either in its result or queued for us.
+        pending = await asyncio.to_thread(catch_up, last_id)
+        idle = False
+        while True:
+            fresh = [event for event in pending if is_new(event)]
+            for event in fresh:
+                yield event
+            if idle and not fresh:
+                yield None
+            try:
+                published = await asyncio.wait_for(subscription.get(),
+                                                   heartbeat_seconds)
+            except TimeoutError:
+                published, idle = None, True
+            else:
+                idle = False
+            if published is None:
+                pending = await asyncio.to_thread(catch_up, last_id)
+            else:
+                pending = [published]
+    finally:
+        subscription.close()
+
+
+def format_server_sent_event(event: TransferEventDto | None) -> str:
+    if event is None:
+        return ": heartbeat\n\n"
+    return (f"id: {event.transaction_id}\nevent: transfer\n"
+            f"data: {event.model_dump_json()}\n\n")
+
+
+@cache
+def get_transfer_event_broker() -> TransferEventBroker:
+    return TransferEventBroker(settings.TRANSFER_STREAM_MAX_PENDING)
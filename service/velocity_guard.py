@@ -0,0 +1,256 @@
+import asyncio
+import logging
+import threading
+import time
+from collections.abc import Callable, Iterator
+from dataclasses import dataclass
+from functools import cache
+from typing import Literal, Protocol, cast
+
+from config import settings
+from database.connection_pool import ConnectionPool, get_connection_pool
+from exception.exceptions import VelocityLimitExceededError
+from repository import sql_catalog
+from service.metrics import MetricsRegistry, get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+type VelocityScope = Literal["wallet", "user"]
+type VelocityMetric = Literal["count", "volume"]
+
+
+@dataclass(frozen=True)
+class TransferAttempt:
+    sender_wallet_id: int
+    sender_user_id: int
+    amount: int
+    at: float
+
+
+class TransferRule(Protocol):
+    """A check run on every transfer before balances change.
+
+    ``admit`` raises to reject the transfer. An admitted transfer is then
+    either ``record``-ed with its transaction id, inside its database
+    transaction, or ``cancel``-led because it failed; a recorded transfer
+    whose database transaction rolls back is cancelled with its id.
+    """
+
+    def admit(self, attempt: TransferAttempt) -> None: ...
+
+    def record(self, attempt: TransferAttempt,  # noqa: ARG002
+               transaction_id: int) -> None: ...
+
+    def cancel(self, attempt: TransferAttempt,
+               transaction_id: int | None = None) -> None: ...
+
+
+@dataclass(frozen=True)
+class VelocityRule:
+    scope: VelocityScope
+    metric: VelocityMetric
+    limit: int
+    window_seconds: float
+
+    def __str__(self) -> str:
+        return (f"{self.scope}:{self.metric}:{self.limit}/"
+                f"{self.window_seconds:g}")
+
+
+def parse_velocity_rules(spec: str) -> list[VelocityRule]:
+    """Parses comma-separated ``<wallet|user>:<count|volume>:<limit>/<window
+    seconds>`` rules, for example ``wallet:count:10/60``."""
+    rules = []
+    for entry in filter(None, (part.strip() for part in spec.split(","))):
+        try:
+            scope, metric, bound = entry.split(":")
+            limit, window = bound.split("/")
+            if scope not in ("wallet", "user") or metric not in ("count", "volume"):
+                raise ValueError
+            rule = VelocityRule(cast(VelocityScope, scope),
+                                cast(VelocityMetric, metric), int(limit),
+                                float(window))
+        except ValueError:
+            raise ValueError(f"Invalid velocity rule {entry!r}") from None
+        if rule.limit < 0 or rule.window_seconds <= 0:
+            raise ValueError(f"Invalid velocity rule {entry!r}")
+        rules.append(rule)
+    return rules
+
+
+class SlidingWindow:
+    """Transfer count and volume over the last ``buckets`` buckets of
+    ``width`` seconds, kept in a ring buffer with running totals. Moving
+    the window forward clears only the buckets it passes, so adding and
+    reading are O(1) amortized."""
+
+    __slots__ = ("counts", "volumes", "width", "head", "count", "volume")
+
+    def __init__(self, buckets: int, width: float) -> None:
+        self.counts = [0] * buckets
+        self.volumes = [0] * buckets
+        self.width = width
+        self.head = -1
+        self.count = 0
+        self.volume = 0
+
+    def _advance(self, epoch: int) -> None:
+        if epoch <= self.head:
+            return
+        size = len(self.counts)
+        for expired in range(max(self.head + 1, epoch - size + 1), epoch + 1):
+            slot = expired % size
+            self.count -= self.counts[slot]
+            self.volume -= self.volumes[slot]
+            self.counts[slot] = self.volumes[slot] = 0
+        self.head = epoch
+
+    def add(self, at: float, count: int, volume: int) -> None:
+        epoch = int(at // self.width)
+        self._advance(epoch)
+        if epoch <= self.head - len(self.counts):
+            return
+        slot = epoch % len(self.counts)
+        self.counts[slot] += count
+        self.volumes[slot] += volume
+        self.count += count
+        self.volume += volume
+
+    def totals(self, at: float) -> tuple[int, int]:
+        self._advance(int(at // self.width))
+        return self.count, self.volume
+
+
+class VelocityGuard:
+    """Rejects a transfer when it would take its sender wallet or user past
+    a velocity rule.
+
+    Counters are per process, in a ``SlidingWindow`` per rule and wallet or
+    user, so a check never queries the database. Admission and counting
+    happen under one lock, so concurrent transfers cannot both slip under a
+    limit; a transfer that then fails or rolls back is taken back out, so
+    sync is never left waiting for a transaction that was not committed.
+    ``sync`` adds the transfers found in Postings since its last run,
+    skipping those this process counted itself. The first run rehydrates
+    the counters from the longest window of history, and later runs pick up
+    transfers made by other workers.
+    """
+
+    def __init__(self, rules: list[VelocityRule], pool: ConnectionPool,
+                 buckets: int, metrics: MetricsRegistry,
+                 track_own_transfers: bool = False,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.rules = rules
+        self.pool = pool
+        self.buckets = buckets
+        self.clock = clock
+        self._widths = [rule.window_seconds / buckets for rule in rules]
+        self._windows: dict[tuple[int, int], SlidingWindow] = {}
+        self._lock = threading.Lock()
+        self._last_posting_id: int | None = None
+        # Transactions counted at admission, until sync reaches them. Only
+        # kept when sync runs repeatedly, as nothing else would drain it.
+        self.track_own_transfers = track_own_transfers
+        self._own_transaction_ids: set[int] = set()
+        self._rejections = metrics.counter(
+            "transfer_velocity_rejections_total",
+            "Transfers rejected by a velocity rule."
+        )
+
+    def _windows_of(self, sender_wallet_id: int, sender_user_id: int
+                    ) -> Iterator[tuple[VelocityRule, SlidingWindow]]:
+        for index, rule in enumerate(self.rules):
+            key = (index, sender_wallet_id if rule.scope == "wallet"
+                   else sender_user_id)
+            window = self._windows.get(key)
+            if window is None:
+                window = self._windows[key] = SlidingWindow(self.buckets,
+                                                            self._widths[index])
+            yield rule, window
+
+    def _add(self, sender_wallet_id: int, sender_user_id: int, amount: int,
+             at: float, count: int) -> None:
+        for _, window in self._windows_of(sender_wallet_id, sender_user_id):
+            window.add(at, count, count * amount)
+
+    def admit(self, attempt: TransferAttempt) -> None:
+        with self._lock:
+            windows = list(self._windows_of(attempt.sender_wallet_id,
+                                            attempt.sender_user_id))
+            for rule, window in windows:
+                count, volume = window.totals(attempt.at)
+                used = count + 1 if rule.metric == "count" else volume + attempt.amount
+                if used > rule.limit:
+                    self._rejections.inc()
+                    raise VelocityLimitExceededError(
+                        f"Transfer exceeds the velocity limit {rule}: "
+                        f"{count} transfers of {volume} in the last "
+                        f"{rule.window_seconds:g} seconds"
+                    )
+            for _, window in windows:
+                window.add(attempt.at, 1, attempt.amount)
+
+    def record(self, attempt: TransferAttempt,  # noqa: ARG002
+               transaction_id: int) -> None:
+        if self.track_own_transfers:
+            with self._lock:
+                self._own_transaction_ids.add(transaction_id)
+
+    def cancel(self, attempt: TransferAttempt,
+               transaction_id: int | None = None) -> None:
+        with self._lock:
+            self._add(attempt.sender_wallet_id, attempt.sender_user_id,
+                      attempt.amount, attempt.at, -1)
+            if transaction_id is not None:
+                self._own_transaction_ids.discard(transaction_id)
+
+    def sync(self) -> int:
+        """Counts the transfers posted since the last run; returns how many."""
+        now = self.clock()
+        connection = self.pool.acquire()
+        try:
+            connection.execute("BEGIN")
+            after_id = self._last_posting_id
+            if after_id is None:
+                horizon = now - max(rule.window_seconds for rule in self.rules)
+                after_id = connection.execute(
+                    sql_catalog.SELECT_LAST_POSTING_ID_BEFORE, (horizon,)
+                ).fetchone()[0]
+            through_id = connection.execute(
+                sql_catalog.SELECT_LAST_POSTING_ID).fetchone()[0]
+            transfers = connection.execute(
+                sql_catalog.SELECT_TRANSFERS_POSTED_BETWEEN, (after_id, through_id)
+            ).fetchall()
+            connection.commit()
+        finally:
+            self.pool.release(connection)
+
+        added = 0
+        with self._lock:
+            for row in transfers:
+                if row["transaction_id"] in self._own_transaction_ids:
+                    self._own_transaction_ids.discard(row["transaction_id"])
+                    continue
+                self._add(row["sender_wallet_id"], row["user_id"],
+                          row["transfer_amount"], row["posted_at"], 1)
+                added += 1
+            self._windows = {key: window for key, window in self._windows.items()
+                             if window.totals(now) != (0, 0)}
+            self._last_posting_id = through_id
+        return added
+
+    async def run(self, interval_seconds: float) -> None:
+        while True:
+            await asyncio.sleep(interval_seconds)
+            try:
+                await asyncio.to_thread(self.sync)
+            except Exception:
+                logger.warning("Syncing velocity counters failed", exc_info=True)
+
+
+@cache
+def get_velocity_guard() -> VelocityGuard:
+    return VelocityGuard(parse_velocity_rules(settings.VELOCITY_RULES),
+                         get_connection_pool(), settings.VELOCITY_WINDOW_BUCKETS,
+                         get_metrics_registry(),
+                         settings.VELOCITY_SYNC_INTERVAL_SECONDS > 0)
@@ -1,16 +1,26 @@
-import uuid
+import logging
+from collections import Counter
+from datetime import UTC, datetime
 
+from database.connection import read_only
 from dto.basic_wallet_response_dto import BasicWalletResponseDto
+from dto.provisioned_wallet_response_dto import ProvisionedWalletResponseDto
 from dto.wallet_response_dto import WalletResponseDto
 from exception.exceptions import (
+    BalanceHistoryUnavailableError,
+    PriceUnavailableError,
     UnauthorizedWalletAccessError,
     UserNotFoundError,
     WalletLimitExceededError,
     WalletNotFoundError,
 )
+from repository.ledger_repository import LedgerRepository
 from repository.user_repository import UserRepository
 from repository.wallet_repository import WalletRepository
 from service.btc_price_converter import BtcPriceConverter
+from service.metrics import MetricsRegistry, get_metrics_registry
+
+logger = logging.getLogger(__name__)
 
 INITIAL_BALANCE_SATOSHIS = 100_000_000
 MAX_WALLETS_PER_USER = 3
@@ -19,10 +29,18 @@ MAX_WALLETS_PER_USER = 3
 class WalletService:
     def __init__(self, user_repo: UserRepository,
                  wallet_repo: WalletRepository,
-                 btc_price_converter: BtcPriceConverter) -> None:
+                 btc_price_converter: BtcPriceConverter,
+                 ledger_repo: LedgerRepository | None = None,
+                 metrics: MetricsRegistry | None = None) -> None:
         self.user_repo = user_repo
         self.wallet_repo = wallet_repo
         self.btc_price_converter = btc_price_converter
+        self.ledger_repo = ledger_repo or LedgerRepository(wallet_repo.db_connection)
+        self._degraded = (metrics or get_metrics_registry()).counter(
+            "wallet_responses_degraded_total",
+            "Wallet responses sent without balance_usd because no BTC rate "
+            "was available in time."
+        )
 
     def create_wallet(self, api_key: str) -> WalletResponseDto:
         user = self.user_repo.find_user_by_api_key(api_key)
@@ -37,7 +55,7 @@ class WalletService:
                 f"User {user.name} already has {MAX_WALLETS_PER_USER} wallets"
             )
 
-        wallet_address = str(uuid.uuid4())
+        wallet_address = self.wallet_repo.new_wallet_address(user.id)
         wallet = self.wallet_repo.insert_wallet(
             user.id, INITIAL_BALANCE_SATOSHIS, wallet_address
         )
@@ -45,8 +63,59 @@ class WalletService:
         return self._build_wallet_response(wallet.wallet_address,
                                            wallet.balance)
 
-    def get_wallet(self, wallet_address: str,
-                   api_key: str) -> WalletResponseDto:
+    def create_wallets(self,
+                       user_ids: list[int]) -> list[ProvisionedWalletResponseDto]:
+        """Creates a wallet for every entry of ``user_ids`` with one query
+        per step rather than per wallet: the users are read together, their
+        wallets counted with one grouped COUNT, the new ones inserted with
+        one executemany and priced against a single BTC rate. Nothing is
+        created if a user is missing or would pass MAX_WALLETS_PER_USER."""
+        requested = Counter(user_ids)
+        found = {user.id for user in self.user_repo.get_users_by_ids(list(requested))}
+        missing = sorted(requested.keys() - found)
+        if missing:
+            raise UserNotFoundError(f"Users with ids {missing} not found")
+
+        counts = self.wallet_repo.count_wallets_by_user_ids(list(requested))
+        over_limit = sorted(
+            user_id for user_id, wanted in requested.items()
+            if counts.get(user_id, 0) + wanted > MAX_WALLETS_PER_USER
+        )
+        if over_limit:
+            raise WalletLimitExceededError(
+                f"Users with ids {over_limit} would have more than "
+                f"{MAX_WALLETS_PER_USER} wallets"
+            )
+
+        wallets = self.wallet_repo.insert_wallets([
+            (user_id, INITIAL_BALANCE_SATOSHIS,
+             self.wallet_repo.new_wallet_address(user_id))
+            for user_id in user_ids
+        ])
+
+        try:
+            rate: float | None = self.btc_price_converter.get_btc_to_usd_rate()
+        except PriceUnavailableError as exception:
+            logger.warning("Answering without balance_usd: %s", exception)
+            self._degraded.inc()
+            rate = None
+        price_age_seconds = self.btc_price_converter.rate_age_seconds()
+        responses = []
+        for wallet in wallets:
+            balance_btc = self.btc_price_converter.satoshi_to_btc(wallet.balance)
+            responses.append(ProvisionedWalletResponseDto(
+                user_id=wallet.user_id,
+                wallet_address=wallet.wallet_address,
+                balance_btc=balance_btc,
+                balance_usd=None if rate is None else round(balance_btc * rate, 2),
+                price_age_seconds=price_age_seconds,
+                price_stale=rate is None
+            ))
+        return responses
+
+    @read_only
+    def get_wallet(self, wallet_address: str, api_key: str,
+                   as_of: int | datetime | None = None) -> WalletResponseDto:
         user = self.user_repo.find_user_by_api_key(api_key)
         if user is None:
             raise UserNotFoundError(
@@ -65,23 +134,57 @@ class WalletService:
                 f"to the user with the name of {user.name}"
             )
 
-        return self._build_wallet_response(wallet.wallet_address,
-                                           wallet.balance)
+        balance = wallet.balance
+        if as_of is not None:
+            balance = self._balance_as_of(wallet.id, wallet_address, as_of)
+
+        return self._build_wallet_response(wallet.wallet_address, balance)
+
+    def _balance_as_of(self, wallet_id: int, wallet_address: str,
+                       as_of: int | datetime) -> int:
+        if isinstance(as_of, datetime):
+            if as_of.tzinfo is None:
+                as_of = as_of.replace(tzinfo=UTC)
+            balance = self.ledger_repo.balance_as_of(
+                wallet_id, posted_at=as_of.timestamp())
+        else:
+            balance = self.ledger_repo.balance_as_of(wallet_id,
+                                                     transaction_id=as_of)
+        if balance is None:
+            raise BalanceHistoryUnavailableError(
+                f"Wallet with address {wallet_address} has no recorded "
+                f"balance as of {as_of}"
+            )
+        return balance
 
     def _build_wallet_response(self, wallet_address: str,
                                balance_satoshis: int) -> WalletResponseDto:
         balance_btc = self.btc_price_converter.satoshi_to_btc(
             balance_satoshis
         )
-        balance_usd = self.btc_price_converter.satoshi_to_usd(
-            balance_satoshis
-        )
+        try:
+            balance_usd = self.btc_price_converter.satoshi_to_usd(
+                balance_satoshis
+            )
+        except PriceUnavailableError as exception:
+            # The balance itself is known; only its USD value has to wait.
+            logger.warning("Answering without balance_usd: %s", exception)
+            self._degraded.inc()
+            return WalletResponseDto(
+                wallet_address=wallet_address,
+                balance_btc=balance_btc,
+                balance_usd=None,
+                price_age_seconds=self.btc_price_converter.rate_age_seconds(),
+                price_stale=True
+            )
         return WalletResponseDto(
             wallet_address=wallet_address,
             balance_btc=balance_btc,
-            balance_usd=balance_usd
+            balance_usd=balance_usd,
+            price_age_seconds=self.btc_price_converter.rate_age_seconds()
         )
 
+    @read_only
     def get_all_wallets(self) -> list[BasicWalletResponseDto]:
         wallets = self.wallet_repo.get_all_wallets()
         return [
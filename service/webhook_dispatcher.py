@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable
+from functools import cache
+from typing import Any
+
+from config import settings
+from database.connection_pool import ConnectionPool, get_connection_pool
+from entity.outbox_message import OutboxMessage
+from repository.outbox_repository import OutboxRepository
+from service.metrics import MetricsRegistry, get_metrics_registry
+
+logger = logging.getLogger(__name__)
+
+
+class WebhookDispatcher:
+    """Delivers the transfer notifications queued in the Outbox table.
+
+    Each round claims up to ``batch_size`` due rows and sends every endpoint
+    its share in one POST of ``{"events": [...]}``. At most
+    ``max_concurrency`` POSTs run at once, each in a worker thread over a
+    pooled keep-alive session. A failed POST is retried with jittered
+    exponential backoff, and after ``max_attempts`` its rows move to
+    OutboxDeadLetters. Delivery is at least once, so receivers should
+    deduplicate by ``transaction_id``.
+    """
+
+    def __init__(self, pool: ConnectionPool, batch_size: int,
+                 max_concurrency: int, max_attempts: int,
+                 backoff_seconds: float, max_backoff_seconds: float,
+                 timeout_seconds: float, metrics: MetricsRegistry,
+                 clock: Callable[[], float] = time.time) -> None:
+        self.pool = pool
+        self.batch_size = batch_size
+        self.max_concurrency = max_concurrency
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.max_backoff_seconds = max_backoff_seconds
+        self.timeout_seconds = timeout_seconds
+        # Claimed rows stay invisible to other dispatchers for longer than
+        # their POST can take, connect and read timeouts included.
+        self.lease_seconds = 2 * timeout_seconds + 1
+        self.clock = clock
+        self._session: Any = None
+        self._session_lock = threading.Lock()
+
+        self._delivered = metrics.counter(
+            "webhook_events_delivered_total",
+            "Transfer notifications accepted by a webhook endpoint."
+        )
+        self._failures = metrics.counter(
+            "webhook_delivery_failures_total",
+            "Webhook POSTs that failed and were rescheduled or dead-lettered."
+        )
+        self._dead_letters = metrics.counter(
+            "webhook_events_dead_lettered_total",
+            "Transfer notifications moved to OutboxDeadLetters."
+        )
+
+    def _get_session(self) -> Any:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        with self._session_lock:
+            if self._session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_maxsize=self.max_concurrency)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._session = session
+            return self._session
+
+    def _with_outbox[R](self, work: Callable[[OutboxRepository], R]) -> R:
+        connection = self.pool.acquire()
+        try:
+            result = work(OutboxRepository(connection, []))
+            connection.commit()
+            return result
+        finally:
+            self.pool.release(connection)
+
+    def claim(self) -> list[OutboxMessage]:
+        now = self.clock()
+        return self._with_outbox(lambda outbox: outbox.claim_due(
+            now, now + self.lease_seconds, self.batch_size))
+
+    def post(self, endpoint: str, messages: list[OutboxMessage]) -> str | None:
+        """Sends the messages to ``endpoint``; returns the error, if any."""
+        body = '{"events":[' + ",".join(m.payload for m in messages) + "]}"
+        try:
+            response = self._get_session().post(
+                endpoint, data=body, timeout=self.timeout_seconds,
+                headers={"Content-Type": "application/json"}
+            )
+        except Exception as exception:
+            return f"{type(exception).__name__}: {exception}"
+        if not 200 <= response.status_code < 300:
+            return f"HTTP {response.status_code}"
+        return None
+
+    def next_attempt_at(self, attempts: int) -> float:
+        backoff = min(self.max_backoff_seconds,
+                      self.backoff_seconds * 2 ** min(attempts, 32))
+        return self.clock() + random.uniform(backoff / 2, backoff)
+
+    def record(self, messages: list[OutboxMessage], error: str | None) -> None:
+        ids = [message.id for message in messages]
+        if error is None:
+            self._with_outbox(lambda outbox: outbox.delete(ids))
+            self._delivered.inc(len(ids))
+            return
+
+        self._failures.inc()
+        # Messages batched together have usually been tried equally often.
+        attempts = max(message.attempts for message in messages) + 1
+        if attempts >= self.max_attempts:
+            logger.warning("Dead-lettering %d webhook events for %s: %s",
+                           len(ids), messages[0].endpoint, error)
+            self._with_outbox(lambda outbox: outbox.dead_letter(
+                ids, error, self.clock()))
+            self._dead_letters.inc(len(ids))
+        else:
+            next_attempt_at = self.next_attempt_at(attempts)
+            self._with_outbox(lambda outbox: outbox.reschedule(
+                ids, next_attempt_at, error))
+
+    async def dispatch_once(self) -> int:
+        """Runs one round; returns how many messages it claimed."""
+        messages = await asyncio.to_thread(self.claim)
+        by_endpoint: dict[str, list[OutboxMessage]] = defaultdict(list)
+        for message in messages:
+            by_endpoint[message.endpoint].append(message)
+
+        slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def deliver(endpoint: str, batch: list[OutboxMessage]) -> None:
+            async with slots:
+                error = await asyncio.to_thread(self.post, endpoint, batch)
+            await asyncio.to_thread(self.record, batch, error)
+
+        await asyncio.gather(*(deliver(endpoint, batch)
+                               for endpoint, batch in by_endpoint.items()))
+        return len(messages)
+
+    async def run(self, poll_interval_seconds: float) -> None:
+        while True:
+            try:
+                claimed = await self.dispatch_once()
+            except Exception:
+                logger.warning("Dispatching webhooks failed", exc_info=True)
+                claimed = 0
+            if claimed < self.batch_size:
+                await asyncio.sleep(poll_interval_seconds)
+
+
+def create_webhook_dispatcher(pool: ConnectionPool) -> WebhookDispatcher:
+    return WebhookDispatcher(
+        pool,
+        settings.WEBHOOK_BATCH_SIZE,
+        settings.WEBHOOK_MAX_CONCURRENCY,
+        settings.WEBHOOK_MAX_ATTEMPTS,
+        settings.WEBHOOK_BACKOFF_SECONDS,
+        settings.WEBHOOK_MAX_BACKOFF_SECONDS,
+        settings.WEBHOOK_TIMEOUT_SECONDS,
+        get_metrics_registry()
+    )
+
+
+@cache
+def get_webhook_dispatcher() -> WebhookDispatcher:
+    return create_webhook_dispatcher(get_connection_pool())
@@ -0,0 +1,76 @@
+from collections.abc import Generator
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from dependencies.wallet_dependencies import get_wallet_service
+from dto.provisioned_wallet_response_dto import ProvisionedWalletResponseDto
+from main import app
+
+ADMIN_HEADERS = {"admin-api-key": "secret_admin_api_key"}
+
+
+@pytest.fixture
+def wallet_service() -> Generator[MagicMock]:
+    service = MagicMock()
+    app.dependency_overrides[get_wallet_service] = lambda: service
+    yield service
+    app.dependency_overrides.clear()
+
+
+class TestAdminAPI:
+
+    def test_profile_requires_admin_api_key(self, client: TestClient) -> None:
+        response = client.get("/admin/profile",
+                              headers={"admin-api-key": "wrong_key"})
+
+        assert response.status_code == 401
+
+    def test_get_profile(self, client: TestClient) -> None:
+        response = client.get("/admin/profile?seconds=0.05&interval_ms=5",
+                              headers=ADMIN_HEADERS)
+
+        assert response.status_code == 200
+        body = response.json()
+        assert body["duration_seconds"] >= 0.05
+        assert body["interval_seconds"] == 0.005
+        assert isinstance(body["functions"], list)
+
+    def test_get_collapsed_profile(self, client: TestClient) -> None:
+        response = client.get("/admin/profile/collapsed?seconds=0.05",
+                              headers=ADMIN_HEADERS)
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+
+    def test_profile_duration_is_bounded(self, client: TestClient) -> None:
+        response = client.get("/admin/profile?seconds=600", headers=ADMIN_HEADERS)
+
+        assert response.status_code == 422
+
+    def test_verify_ledger(self, client: TestClient) -> None:
+        response = client.post("/admin/ledger/verify", headers=ADMIN_HEADERS)
+
+        assert response.status_code == 200
+        assert set(response.json()) == {"checked_postings", "verified_through",
+                                        "problems"}
+
+    def test_create_wallets(self, client: TestClient,
+                            wallet_service: MagicMock) -> None:
+        wallet_service.create_wallets.return_value = [ProvisionedWalletResponseDto(
+            user_id=1, wallet_address="addr1", balance_btc=1.0,
+            balance_usd=100000.0)]
+
+        response = client.post("/admin/wallets", headers=ADMIN_HEADERS,
+                               json={"user_ids": [1]})
+
+        assert response.status_code == 200
+        assert response.json()[0]["user_id"] == 1
+        wallet_service.create_wallets.assert_called_once_with([1])
+
+    def test_create_wallets_needs_users(self, client: TestClient) -> None:
+        response = client.post("/admin/wallets", headers=ADMIN_HEADERS,
+                               json={"user_ids": []})
+
+        assert response.status_code == 422
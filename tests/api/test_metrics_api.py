@@ -0,0 +1,15 @@
+from fastapi.testclient import TestClient
+
+from service.metrics import get_metrics_registry
+
+
+class TestMetricsAPI:
+
+    def test_get_metrics_renders_prometheus_text(self, client: TestClient) -> None:
+        get_metrics_registry().counter("test_requests_total", "Test counter.").inc()
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "# TYPE test_requests_total counter" in response.text
@@ -0,0 +1,117 @@
+import time
+from collections.abc import Iterator
+
+import pytest
+from fastapi import FastAPI, WebSocket
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from fastapi.websockets import WebSocketDisconnect
+
+from config import settings
+from middleware.rate_limiter import (
+    AdmissionController,
+    RateLimitMiddleware,
+    TokenBucketStore,
+)
+
+
+@pytest.fixture(autouse=True)
+def limits(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_KEY_RATE", 0.01)
+    monkeypatch.setattr(settings, "RATE_LIMIT_PER_KEY_BURST", 2)
+    monkeypatch.setattr(settings, "RATE_LIMIT_GLOBAL_RATE", 0.01)
+    monkeypatch.setattr(settings, "RATE_LIMIT_GLOBAL_BURST", 5)
+
+
+def make_client(admission: AdmissionController | None = None) -> TestClient:
+    app = FastAPI()
+
+    @app.get("/transactions")
+    def transactions() -> list[str]:
+        return []
+
+    @app.get("/wallets/W1/transactions/stream")
+    def stream() -> StreamingResponse:
+        def body() -> Iterator[str]:
+            yield f"in flight {admission.in_flight if admission else 0}\n"
+            time.sleep(0.1)
+
+        return StreamingResponse(body(), media_type="text/event-stream")
+
+    @app.websocket("/wallets/W1/transactions/ws")
+    async def socket(websocket: WebSocket) -> None:
+        await websocket.accept()
+        await websocket.close()
+
+    @app.get("/metrics")
+    def metrics() -> str:
+        return ""
+
+    app.add_middleware(
+        RateLimitMiddleware, store=TokenBucketStore(),
+        admission=admission or AdmissionController(0, 0))
+    return TestClient(app)
+
+
+def test_api_key_over_its_burst_gets_429_with_retry_after() -> None:
+    client = make_client()
+
+    statuses = [client.get("/transactions", headers={"x-api-key": "key1"})
+                for _ in range(3)]
+
+    assert [response.status_code for response in statuses] == [200, 200, 429]
+    assert statuses[2].json() == {"error": "Rate limit exceeded"}
+    assert int(statuses[2].headers["Retry-After"]) >= 1
+    assert client.get("/transactions",
+                      headers={"x-api-key": "key2"}).status_code == 200
+
+
+def test_global_bucket_limits_all_keys() -> None:
+    client = make_client()
+
+    statuses = [client.get("/transactions", headers={"x-api-key": f"key{i}"})
+                .status_code for i in range(6)]
+
+    assert statuses == [200] * 5 + [429]
+
+
+def test_shedding_rejects_with_503_but_not_metrics() -> None:
+    admission = AdmissionController(max_in_flight=1, max_p99_ms=0)
+    admission.started()
+    client = make_client(admission)
+
+    response = client.get("/transactions", headers={"x-api-key": "key1"})
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+    assert client.get("/metrics").status_code == 200
+
+
+def test_streams_are_left_out_of_shedding_accounting() -> None:
+    admission = AdmissionController(max_in_flight=1, max_p99_ms=50)
+    client = make_client(admission)
+
+    stream = client.get("/wallets/W1/transactions/stream",
+                        headers={"x-api-key": "key1"})
+
+    assert stream.status_code == 200
+    assert stream.text == "in flight 0\n"
+    assert admission.in_flight == 0
+    assert admission.p99_ms() == 0
+    assert client.get("/transactions",
+                      headers={"x-api-key": "key2"}).status_code == 200
+
+
+def test_websocket_over_its_burst_is_closed_with_1013() -> None:
+    client = make_client()
+
+    for _ in range(2):
+        with client.websocket_connect("/wallets/W1/transactions/ws",
+                                      headers={"x-api-key": "key1"}):
+            pass
+    with pytest.raises(WebSocketDisconnect) as closed, client.websocket_connect(
+            "/wallets/W1/transactions/ws", headers={"x-api-key": "key1"}):
+        pass
+
+    assert closed.value.code == 1013
+    assert closed.value.reason == "Rate limit exceeded"
@@ -0,0 +1,73 @@
+from collections.abc import Generator
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+
+from config import settings
+from database.shards import shard_of_key
+from main import app
+
+ADMIN_HEADERS = {"admin-api-key": "secret_admin_api_key"}
+
+
+@pytest.fixture
+def sharded_client(monkeypatch: pytest.MonkeyPatch,
+                   tmp_path: Path) -> Generator[TestClient]:
+    monkeypatch.setattr(settings, "DB_PATH", str(tmp_path / "wallet.db"))
+    monkeypatch.setattr(settings, "DB_SHARD_COUNT", 2)
+    monkeypatch.setattr(settings, "PRICE_REFRESH_ENABLED", False)
+    monkeypatch.setattr(settings, "LEDGER_VERIFY_INTERVAL_SECONDS", 0)
+    converter = MagicMock()
+    converter.satoshi_to_btc.side_effect = lambda satoshis: satoshis / 100_000_000
+    converter.satoshi_to_usd.return_value = 0.0
+    converter.rate_age_seconds.return_value = 0.0
+    monkeypatch.setattr("dependencies.wallet_dependencies.get_btc_price_converter",
+                        lambda: converter)
+    with TestClient(app) as client:
+        yield client
+
+
+def test_transfer_between_users_on_different_shards(
+        sharded_client: TestClient) -> None:
+    keys: dict[int, str] = {}
+    while len(keys) < 2:
+        api_key = sharded_client.post("/users", json={"name": "n"}).json()["api_key"]
+        keys.setdefault(shard_of_key(api_key, 2), api_key)
+    sender, receiver = (
+        sharded_client.post("/wallets", headers={"x-api-key": keys[shard]}).json()
+        for shard in (0, 1)
+    )
+
+    response = sharded_client.post(
+        "/transactions", headers={"x-api-key": keys[0]},
+        json={"sender_wallet_address": sender["wallet_address"],
+              "receiver_wallet_address": receiver["wallet_address"],
+              "transfer_amount": 100_000})
+
+    assert response.status_code == 200
+    received = sharded_client.get(f"/wallets/{receiver['wallet_address']}",
+                                  headers={"x-api-key": keys[1]}).json()
+    assert received["balance_btc"] == pytest.approx(1.00098500)
+    statistics = sharded_client.get("/statistics", headers=ADMIN_HEADERS).json()
+    assert statistics == {"total_transactions": 1, "platform_profit": 1500}
+    assert len(sharded_client.get("/wallets").json()) == 2
+
+
+def test_reads_ordered_by_transaction_id_are_refused(
+        sharded_client: TestClient) -> None:
+    api_key = sharded_client.post("/users", json={"name": "n"}).json()["api_key"]
+    headers = {"x-api-key": api_key}
+    address = sharded_client.post("/wallets", headers=headers).json()["wallet_address"]
+
+    stream = sharded_client.get(f"/wallets/{address}/transactions/stream",
+                                headers=headers)
+    by_id = sharded_client.get(f"/wallets/{address}?as_of=1", headers=headers)
+    by_time = sharded_client.get(f"/wallets/{address}?as_of=2100-01-01T00:00:00",
+                                 headers=headers)
+
+    assert (stream.status_code, by_id.status_code) == (501, 501)
+    assert stream.json() == {
+        "error": "Transfer streams are not available on a sharded database"}
+    assert by_time.status_code == 200
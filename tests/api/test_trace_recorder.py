@@ -0,0 +1,71 @@
+from pathlib import Path
+
+from fastapi import FastAPI, Header
+from fastapi.testclient import TestClient
+
+from middleware.trace_recorder import (
+    UNMATCHED_ROUTE,
+    TraceEvent,
+    TraceRecorder,
+    TraceRecorderMiddleware,
+)
+
+
+def make_client(trace_path: Path) -> tuple[TestClient, TraceRecorder]:
+    app = FastAPI()
+
+    @app.post("/wallets/{address}")
+    def echo(address: str, body: dict[str, str],
+             x_api_key: str = Header(...)) -> dict[str, str]:
+        return {"address": address, "key_length": str(len(x_api_key)), **body}
+
+    recorder = TraceRecorder(str(trace_path), key_salt="salt")
+    app.add_middleware(TraceRecorderMiddleware, recorder=recorder)
+    return TestClient(app), recorder
+
+
+def read_events(trace_path: Path) -> list[TraceEvent]:
+    return [TraceEvent.from_json(line)
+            for line in trace_path.read_text().splitlines()]
+
+
+def test_records_route_template_and_sizes(tmp_path: Path) -> None:
+    trace_path = tmp_path / "trace.jsonl"
+    client, _ = make_client(trace_path)
+
+    response = client.post("/wallets/secret-address", json={"a": "b"},
+                           headers={"x-api-key": "key1"})
+
+    [event] = read_events(trace_path)
+    assert event.method == "POST"
+    assert event.route == "/wallets/{address}"
+    assert event.status == 200
+    assert event.request_bytes == len(b'{"a":"b"}')
+    assert event.response_bytes == len(response.content)
+    assert event.duration_ms >= 0
+
+
+def test_api_key_is_anonymized(tmp_path: Path) -> None:
+    trace_path = tmp_path / "trace.jsonl"
+    client, recorder = make_client(trace_path)
+
+    client.post("/wallets/w", json={}, headers={"x-api-key": "key1"})
+    client.post("/wallets/w", json={}, headers={"x-api-key": "key1"})
+    client.post("/wallets/w", json={}, headers={"x-api-key": "key2"})
+
+    keys = [event.key for event in read_events(trace_path)]
+    assert "key1" not in trace_path.read_text()
+    assert keys[0] == keys[1] == recorder.anonymize(b"key1")
+    assert keys[2] != keys[0]
+
+
+def test_unmatched_paths_are_not_recorded_verbatim(tmp_path: Path) -> None:
+    trace_path = tmp_path / "trace.jsonl"
+    client, _ = make_client(trace_path)
+
+    client.get("/secret-address", headers={})
+
+    [event] = read_events(trace_path)
+    assert event.route == UNMATCHED_ROUTE
+    assert event.status == 404
+    assert event.key is None
@@ -6,8 +6,13 @@ import pytest
 from fastapi.testclient import TestClient
 
 from dependencies.transaction_dependencies import get_transaction_service
+from dto.posting_response_dto import PostingResponseDto
 from dto.statistics_response_dto import StatisticsResponseDto
 from dto.transaction_response_dto import TransactionResponseDto
+from dto.transfer_stats_response_dto import (
+    UserTransferStatsResponseDto,
+    WalletTransferStatsResponseDto,
+)
 from main import app
 
 
@@ -37,6 +42,46 @@ class TestTransactionAPI:
 
         assert response.status_code == 401
 
+    def test_get_top_users(self, client: TestClient) -> None:
+        self.mock_service.get_top_users.return_value = [
+            UserTransferStatsResponseDto(
+                user_id=1, name="Naruto", transfers_sent=2, transfers_received=1,
+                volume_sent=600, volume_received=40, fees_paid=12
+            )
+        ]
+
+        headers = {"admin-api-key": "secret_admin_api_key"}
+        response = client.get("/statistics/top-users?by=volume_sent&limit=5",
+                              headers=headers)
+
+        assert response.status_code == 200
+        assert response.json()[0]["name"] == "Naruto"
+        self.mock_service.get_top_users.assert_called_once_with("volume_sent", 5)
+
+    def test_get_top_wallets_defaults_to_fees(self, client: TestClient) -> None:
+        self.mock_service.get_top_wallets.return_value = [
+            WalletTransferStatsResponseDto(
+                wallet_address="W1", user_id=1, transfers_sent=1,
+                transfers_received=0, volume_sent=100, volume_received=0,
+                fees_paid=2
+            )
+        ]
+
+        headers = {"admin-api-key": "secret_admin_api_key"}
+        response = client.get("/statistics/top-wallets", headers=headers)
+
+        assert response.status_code == 200
+        assert response.json()[0]["wallet_address"] == "W1"
+        self.mock_service.get_top_wallets.assert_called_once_with("fees_paid", 10)
+
+    @pytest.mark.parametrize("query", ["by=balance", "limit=0", "limit=1001"])
+    def test_get_top_wallets_rejects_bad_queries(
+            self, client: TestClient, query: str) -> None:
+        headers = {"admin-api-key": "secret_admin_api_key"}
+        response = client.get(f"/statistics/top-wallets?{query}", headers=headers)
+
+        assert response.status_code == 422
+
     def test_get_transactions_success(self, client: TestClient) -> None:
         self.mock_service.get_transactions.return_value = [
             TransactionResponseDto(
@@ -82,3 +127,19 @@ class TestTransactionAPI:
         assert response.status_code == 200
         (self.mock_service.get_wallet_related_transactions.
          assert_called_once_with("W1", "key1"))
+
+    def test_get_wallet_postings_success(self, client: TestClient) -> None:
+        self.mock_service.get_wallet_postings.return_value = [
+            PostingResponseDto(sequence=2, transaction_id=7, amount=-100,
+                               balance_after=900)
+        ]
+
+        headers = {"x-api-key": "key1"}
+        response = client.get("/wallets/W1/postings?after_sequence=1&limit=10",
+                              headers=headers)
+
+        assert response.status_code == 200
+        assert response.json() == [{"sequence": 2, "transaction_id": 7,
+                                    "amount": -100, "balance_after": 900}]
+        self.mock_service.get_wallet_postings.assert_called_once_with(
+            "W1", "key1", 1, 10)
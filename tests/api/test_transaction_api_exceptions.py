@@ -10,6 +10,7 @@ from exception.exceptions import (
     UnauthorizedError,
     UnauthorizedWalletAccessError,
     UserNotFoundError,
+    VelocityLimitExceededError,
     WalletNotFoundError,
 )
 from main import app
@@ -54,6 +55,22 @@ class TestTransactionAPIExceptions:
         assert response.status_code == 409
         assert response.json() == {"error": "Insufficient balance"}
 
+    def test_handler_velocity_limit_exceeded_returns_429(
+            self, client: TestClient) -> None:
+        self.mock_service.make_transaction.side_effect = (
+            VelocityLimitExceededError("Transfer exceeds the velocity limit"))
+
+        payload = {
+            "sender_wallet_address": "1",
+            "receiver_wallet_address": "2",
+            "transfer_amount": 100
+        }
+        response = client.post("/transactions",
+                               json=payload, headers={"x-api-key": "key1"})
+
+        assert response.status_code == 429
+        assert response.json() == {"error": "Transfer exceeds the velocity limit"}
+
     def test_handler_user_not_found_returns_404(self, client: TestClient) -> None:
         self.mock_service.get_transactions.side_effect = (
             UserNotFoundError("User not found"))
@@ -0,0 +1,77 @@
+from collections.abc import Generator
+from contextlib import nullcontext
+from typing import Any
+from unittest.mock import MagicMock
+
+import pytest
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+
+from config import settings
+from dependencies.transaction_dependencies import get_transaction_service_scope
+from dto.transfer_event_dto import TransferEventDto
+from entity.wallet import Wallet
+from exception.exceptions import UnauthorizedWalletAccessError, UserNotFoundError
+from main import app
+from service.transfer_events import get_transfer_event_broker
+
+
+def event(transaction_id: int) -> TransferEventDto:
+    return TransferEventDto(
+        transaction_id=transaction_id, sender_wallet_address="W2",
+        receiver_wallet_address="W1", transfer_amount=100,
+        transferred_amount=99, transfer_fee=1
+    )
+
+
+class TestTransferStreamAPI:
+
+    @pytest.fixture(autouse=True)
+    def setup_mocks(self, monkeypatch: pytest.MonkeyPatch) -> Generator[None, Any]:
+        monkeypatch.setattr(settings, "TRANSFER_STREAM_HEARTBEAT_SECONDS", 0.05)
+        self.mock_service = MagicMock()
+        self.mock_service.get_owned_wallet.return_value = Wallet(
+            id=1, user_id=1, balance=0, wallet_address="W1")
+        self.mock_service.get_transfer_events_after.return_value = []
+        app.dependency_overrides[get_transaction_service_scope] = (
+            lambda: lambda: nullcontext(self.mock_service))
+        yield
+        app.dependency_overrides.clear()
+
+    def test_websocket_sends_missed_then_live_transfers(
+            self, client: TestClient) -> None:
+        self.mock_service.get_transfer_events_after.return_value = [event(5)]
+
+        with client.websocket_connect("/wallets/W1/transactions/ws?after=4",
+                                      headers={"x-api-key": "key1"}) as websocket:
+            assert websocket.receive_json()["transaction_id"] == 5
+            get_transfer_event_broker().publish(event(6))
+            messages = [websocket.receive_json() for _ in range(2)]
+
+        transfers = [m for m in messages if m["type"] == "transfer"]
+        assert transfers == [{"type": "transfer", **event(6).model_dump()}]
+        self.mock_service.get_owned_wallet.assert_called_once_with("W1", "key1")
+        self.mock_service.get_transfer_events_after.assert_any_call(
+            self.mock_service.get_owned_wallet.return_value, 4)
+
+    def test_websocket_rejects_foreign_wallet(self, client: TestClient) -> None:
+        self.mock_service.get_owned_wallet.side_effect = (
+            UnauthorizedWalletAccessError("not yours"))
+
+        with (pytest.raises(WebSocketDisconnect) as disconnect,
+              client.websocket_connect("/wallets/W1/transactions/ws",
+                                       headers={"x-api-key": "key2"})):
+            pass
+
+        assert disconnect.value.code == 1008
+
+    def test_event_stream_checks_api_key_before_streaming(
+            self, client: TestClient) -> None:
+        self.mock_service.get_owned_wallet.side_effect = (
+            UserNotFoundError("User with api_key nope not found"))
+
+        response = client.get("/wallets/W1/transactions/stream",
+                              headers={"x-api-key": "nope"})
+
+        assert response.status_code == 404
+        assert response.json() == {"error": "User with api_key nope not found"}
@@ -1,4 +1,5 @@
 from collections.abc import Generator
+from datetime import UTC, datetime
 from typing import Any
 from unittest.mock import MagicMock
 
@@ -52,7 +53,45 @@ class TestWalletAPI:
         data = response.json()
         assert data["wallet_address"] == "addr1"
         assert data["balance_btc"] == 0.5
-        self.mock_service.get_wallet.assert_called_once_with("addr1", "key1")
+        self.mock_service.get_wallet.assert_called_once_with("addr1", "key1", None)
+
+    def test_get_wallet_without_a_price(self, client: TestClient) -> None:
+        self.mock_service.get_wallet.return_value = WalletResponseDto(
+            wallet_address="addr1", balance_btc=0.5, balance_usd=None,
+            price_stale=True
+        )
+
+        response = client.get("/wallets/addr1", headers={"x-api-key": "key1"})
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "wallet_address": "addr1", "balance_btc": 0.5, "balance_usd": None,
+            "price_age_seconds": None, "price_stale": True,
+        }
+
+    @pytest.mark.parametrize(("as_of", "expected"), [
+        ("42", 42),
+        ("2026-01-02T03:04:05Z", datetime(2026, 1, 2, 3, 4, 5, tzinfo=UTC)),
+    ])
+    def test_get_wallet_as_of(self, client: TestClient, as_of: str,
+                              expected: object) -> None:
+        self.mock_service.get_wallet.return_value = WalletResponseDto(
+            wallet_address="addr1", balance_btc=0.5, balance_usd=50000.0
+        )
+
+        response = client.get(f"/wallets/addr1?as_of={as_of}",
+                              headers={"x-api-key": "key1"})
+
+        assert response.status_code == 200
+        self.mock_service.get_wallet.assert_called_once_with(
+            "addr1", "key1", expected)
+
+    def test_get_wallet_as_of_must_be_id_or_time(
+            self, client: TestClient) -> None:
+        response = client.get("/wallets/addr1?as_of=yesterday",
+                              headers={"x-api-key": "key1"})
+
+        assert response.status_code == 422
 
     def test_get_wallet_missing_api_key(self, client: TestClient) -> None:
         response = client.get("/wallets/addr1")
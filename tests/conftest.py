@@ -4,6 +4,8 @@ from collections.abc import Generator
 import pytest
 from fastapi.testclient import TestClient
 
+from config import settings
+from database.database_init import MIGRATIONS, run_migration
 from main import app
 from repository.transaction_repository import TransactionRepository
 from repository.user_repository import UserRepository
@@ -11,7 +13,9 @@ from repository.wallet_repository import WalletRepository
 
 
 @pytest.fixture
-def client() -> Generator[TestClient]:
+def client(monkeypatch: pytest.MonkeyPatch) -> Generator[TestClient]:
+    monkeypatch.setattr(settings, "PRICE_REFRESH_ENABLED", False)
+    monkeypatch.setattr(settings, "LEDGER_VERIFY_INTERVAL_SECONDS", 0)
     with TestClient(app) as conn:
         yield conn
 
@@ -49,6 +53,10 @@ def db_connection() -> Generator[sqlite3.Connection]:
     );
     """)
 
+    # Later migrations add the tables the repositories read alongside these.
+    for statements in MIGRATIONS[1:]:
+        run_migration(conn, statements)
+
     conn.commit()
     yield conn
     conn.close()
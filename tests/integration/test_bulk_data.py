@@ -0,0 +1,134 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from database.bulk_data import export_data, import_data
+from database.database_init import init_db
+from database.transaction_archive import archive_transactions
+
+
+def seed(db_path: str) -> None:
+    init_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.executemany("INSERT INTO Users (name, api_key) VALUES (?, ?)",
+                         [(f"user {i}", f"key-{i}") for i in range(5)])
+        conn.executemany(
+            "INSERT INTO Wallets (user_id, balance, wallet_address) VALUES (?, ?, ?)",
+            [(i % 5 + 1, i * 1000, f"address-{i}") for i in range(10)])
+        conn.executemany(
+            "INSERT INTO Transactions (sender_wallet_id, receiver_wallet_id, "
+            "transfer_amount, transfer_fee) VALUES (?, ?, ?, ?)",
+            [(i % 10 + 1, (i + 3) % 10 + 1, 100 + i, i) for i in range(25)])
+
+
+def dump(db_path: str) -> dict[str, list[tuple[object, ...]]]:
+    with sqlite3.connect(db_path) as conn:
+        return {table: conn.execute(f"SELECT * FROM {table} ORDER BY id").fetchall()
+                for table in ("Users", "Wallets", "Transactions", "Postings")}
+
+
+def index_names(db_path: str) -> set[str]:
+    with sqlite3.connect(db_path) as conn:
+        return {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' "
+            "AND sql IS NOT NULL")}
+
+
+@pytest.fixture
+def source_db(tmp_path: Path) -> str:
+    db_path = str(tmp_path / "source.db")
+    seed(db_path)
+    return db_path
+
+
+class TestBulkData:
+
+    def test_round_trip_preserves_every_row(
+            self, source_db: str, tmp_path: Path) -> None:
+        bulk_path = str(tmp_path / "wallet.bulk")
+        target_db = str(tmp_path / "target.db")
+
+        exported = export_data(source_db, bulk_path, chunk_rows=4)
+        imported = import_data(target_db, bulk_path)
+
+        assert exported.rows == imported.rows == 40
+        assert imported.chunks == exported.chunks == 2 + 3 + 7
+        assert dump(target_db) == dump(source_db)
+
+    def test_archived_transfers_are_exported(
+            self, source_db: str, tmp_path: Path) -> None:
+        transactions = dump(source_db)["Transactions"]
+        archived = archive_transactions(
+            source_db, str(tmp_path / "archive"), keep_recent=2,
+            partition_rows=10, batch_size=4)
+        bulk_path = str(tmp_path / "wallet.bulk")
+        target_db = str(tmp_path / "target.db")
+
+        export_data(source_db, bulk_path, chunk_rows=4)
+        import_data(target_db, bulk_path)
+
+        assert archived.moved == 23
+        imported = dump(target_db)
+        assert imported["Transactions"] == transactions
+        assert imported["Wallets"] == dump(source_db)["Wallets"]
+        with sqlite3.connect(target_db) as conn:
+            assert conn.execute(
+                "SELECT SUM(transfers_sent) FROM WalletStats").fetchone() == (25,)
+
+    def test_secondary_indexes_are_rebuilt(
+            self, source_db: str, tmp_path: Path) -> None:
+        bulk_path = str(tmp_path / "wallet.bulk")
+        target_db = str(tmp_path / "target.db")
+        export_data(source_db, bulk_path)
+        init_db(target_db)
+        schema_indexes = index_names(target_db)
+        with sqlite3.connect(target_db) as conn:
+            conn.execute("CREATE INDEX idx_wallets_user ON Wallets (user_id)")
+
+        import_data(target_db, bulk_path)
+
+        assert index_names(target_db) == schema_indexes | {"idx_wallets_user"}
+
+    def test_transfer_totals_are_rebuilt(
+            self, source_db: str, tmp_path: Path) -> None:
+        bulk_path = str(tmp_path / "wallet.bulk")
+        target_db = str(tmp_path / "target.db")
+        export_data(source_db, bulk_path)
+
+        import_data(target_db, bulk_path)
+
+        with sqlite3.connect(target_db) as conn:
+            totals = [conn.execute(
+                f"SELECT SUM(transfers_sent), SUM(transfers_received), "
+                f"SUM(fees_paid) FROM {table}").fetchone()
+                for table in ("WalletStats", "UserStats")]
+        assert totals == [(25, 25, sum(range(25)))] * 2
+
+    def test_failed_import_resumes_after_last_committed_chunk(
+            self, source_db: str, tmp_path: Path) -> None:
+        bulk_path = tmp_path / "wallet.bulk"
+        export_data(source_db, str(bulk_path), chunk_rows=4)
+        corrupt_path = tmp_path / "corrupt.bulk"
+        data = bytearray(bulk_path.read_bytes())
+        data[-1] ^= 0xFF
+        corrupt_path.write_bytes(bytes(data))
+        target_db = str(tmp_path / "target.db")
+
+        with pytest.raises(ValueError, match="Corrupt"):
+            import_data(target_db, str(corrupt_path))
+        resumed = import_data(target_db, str(bulk_path))
+
+        assert resumed.skipped_chunks == 11
+        assert resumed.chunks == 1
+        assert dump(target_db) == dump(source_db)
+
+    def test_completed_import_is_not_repeated(
+            self, source_db: str, tmp_path: Path) -> None:
+        bulk_path = str(tmp_path / "wallet.bulk")
+        target_db = str(tmp_path / "target.db")
+        export_data(source_db, bulk_path)
+        import_data(target_db, bulk_path)
+
+        assert import_data(target_db, bulk_path).rows == 0
+        assert dump(target_db) == dump(source_db)
@@ -0,0 +1,75 @@
+import sqlite3
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+
+from cache.invalidating_cache import InvalidatingCache
+from cache.invalidation_channel import InvalidationChannel
+from database.connection import WalletConnection
+from database.database_init import init_db
+from entity.user import User
+from entity.wallet import Wallet
+from repository.caching_user_repository import CachingUserRepository
+from repository.caching_wallet_repository import CachingWalletRepository
+from repository.wallet_repository import WalletRepository
+
+
+@pytest.fixture
+def connection(tmp_path: Path) -> Generator[sqlite3.Connection]:
+    path = str(tmp_path / "wallet.db")
+    init_db(path)
+    conn = sqlite3.connect(path, factory=WalletConnection)
+    conn.row_factory = sqlite3.Row
+    conn.executescript("""
+    INSERT INTO Users (id, name, api_key) VALUES (1, 'Naruto', 'key1');
+    INSERT INTO Wallets (id, user_id, balance, wallet_address)
+        VALUES (1, 1, 10000, 'W1');
+    """)
+    yield conn
+    conn.close()
+
+
+class TestCachingRepositories:
+
+    def test_user_lookup_is_served_from_cache(
+            self, connection: sqlite3.Connection) -> None:
+        cache = InvalidatingCache[User](InvalidationChannel(), "user", 10)
+        repo = CachingUserRepository(connection, cache)
+        repo.find_user_by_api_key("key1")
+        connection.execute("UPDATE Users SET name = 'Changed' WHERE id = 1")
+
+        user = repo.find_user_by_api_key("key1")
+
+        assert user is not None
+        assert user.name == "Naruto"
+
+    def test_balance_update_invalidates_wallet_after_commit(
+            self, connection: sqlite3.Connection,
+            monkeypatch: pytest.MonkeyPatch) -> None:
+        cache = InvalidatingCache[Wallet](InvalidationChannel(), "wallet", 10)
+        monkeypatch.setattr("repository.wallet_repository.get_wallet_cache",
+                            lambda: cache)
+        caching_repo = CachingWalletRepository(connection, cache)
+        caching_repo.get_wallet_by_address("W1")
+
+        WalletRepository(connection).update_balance("W1", 500)
+        wallet_before_commit = caching_repo.get_wallet_by_address("W1")
+        connection.commit()
+        wallet_after_commit = caching_repo.get_wallet_by_address("W1")
+
+        assert wallet_before_commit is not None
+        assert wallet_before_commit.balance == 10000
+        assert wallet_after_commit is not None
+        assert wallet_after_commit.balance == 500
+
+    def test_rollback_discards_pending_invalidations(
+            self, connection: sqlite3.Connection) -> None:
+        assert isinstance(connection, WalletConnection)
+        calls: list[str] = []
+        connection.after_commit(lambda: calls.append("committed"))
+
+        connection.rollback()
+        connection.commit()
+
+        assert calls == []
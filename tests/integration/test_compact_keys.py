@@ -0,0 +1,103 @@
+import sqlite3
+import uuid
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+
+from config import settings
+from database.bulk_data import export_data, import_data
+from database.database_init import init_db
+from entity.wallet import Wallet
+from repository.key_codec import convert_stored_keys, decode_key, encode_key
+from repository.user_repository import UserRepository
+from repository.wallet_repository import WalletRepository
+
+ADDRESS = "0c7d9a52-3b5e-4f0e-9d8a-6f1b2c3d4e5f"
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> str:
+    path = str(tmp_path / "wallet.db")
+    init_db(path)
+    return path
+
+
+@pytest.fixture
+def connection(db_path: str) -> Generator[sqlite3.Connection]:
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def compact(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, "COMPACT_KEYS", True)
+
+
+def stored_types(connection: sqlite3.Connection) -> list[str]:
+    return sorted(row[0] for row in connection.execute(
+        "SELECT typeof(api_key) FROM Users UNION ALL "
+        "SELECT typeof(wallet_address) FROM Wallets"))
+
+
+class TestCompactKeys:
+
+    @pytest.mark.usefixtures("compact")
+    def test_keys_round_trip_through_the_codec(self) -> None:
+        assert encode_key(ADDRESS) == uuid.UUID(ADDRESS).bytes
+        assert decode_key(encode_key(ADDRESS)) == ADDRESS
+        assert encode_key(ADDRESS.upper()) == ADDRESS.upper()
+        assert encode_key("W1") == "W1"
+
+    @pytest.mark.usefixtures("compact")
+    def test_repositories_store_blobs_and_return_strings(
+            self, connection: sqlite3.Connection) -> None:
+        user = UserRepository(connection).create_user("Naruto")
+        wallets = WalletRepository(connection)
+        wallet = wallets.insert_wallet(user.id, 100, ADDRESS)
+        wallets.update_balance(ADDRESS, 250)
+
+        assert stored_types(connection) == ["blob", "blob"]
+        assert UserRepository(connection).find_user_by_api_key(user.api_key) == user
+        assert wallets.get_wallet_by_address(ADDRESS) == Wallet(
+            id=wallet.id, user_id=user.id, balance=250, wallet_address=ADDRESS)
+        assert [w.wallet_address for w in wallets.get_all_wallets()] == [ADDRESS]
+
+    def test_stored_keys_convert_both_ways(
+            self, connection: sqlite3.Connection,
+            monkeypatch: pytest.MonkeyPatch) -> None:
+        user = UserRepository(connection).create_user("Naruto")
+        WalletRepository(connection).insert_wallet(user.id, 100, ADDRESS)
+        WalletRepository(connection).insert_wallet(user.id, 100, "W1")
+
+        assert convert_stored_keys(connection, compact=True) == 2
+        assert stored_types(connection) == ["blob", "blob", "text"]
+        assert convert_stored_keys(connection, compact=True) == 0
+        monkeypatch.setattr(settings, "COMPACT_KEYS", True)
+        assert WalletRepository(connection).get_wallet_by_address(ADDRESS)
+
+        assert convert_stored_keys(connection, compact=False) == 2
+        assert stored_types(connection) == ["text", "text", "text"]
+        monkeypatch.setattr(settings, "COMPACT_KEYS", False)
+        assert UserRepository(connection).find_user_by_api_key(user.api_key) == user
+
+    @pytest.mark.usefixtures("compact")
+    def test_bulk_files_carry_keys_as_strings(
+            self, db_path: str, connection: sqlite3.Connection, tmp_path: Path,
+            monkeypatch: pytest.MonkeyPatch) -> None:
+        user = UserRepository(connection).create_user("Naruto")
+        WalletRepository(connection).insert_wallet(user.id, 100, ADDRESS)
+        connection.commit()
+        bulk_path = str(tmp_path / "wallets.bulk")
+        export_data(db_path, bulk_path)
+
+        monkeypatch.setattr(settings, "COMPACT_KEYS", False)
+        target = str(tmp_path / "imported.db")
+        import_data(target, bulk_path)
+
+        with sqlite3.connect(target) as imported:
+            imported.row_factory = sqlite3.Row
+            assert stored_types(imported) == ["text", "text"]
+            assert WalletRepository(imported).get_wallet_by_address(ADDRESS)
@@ -0,0 +1,48 @@
+from pathlib import Path
+
+import pytest
+
+from database.connection import WalletConnection
+from database.connection_pool import ConnectionPool
+from database.database_init import init_db
+
+
+@pytest.fixture
+def pool(tmp_path: Path) -> ConnectionPool:
+    db_path = str(tmp_path / "wallet.db")
+    init_db(db_path)
+    return ConnectionPool(db_path, max_idle=1, statement_cache_size=32,
+                          busy_timeout_seconds=1)
+
+
+class TestConnectionPool:
+
+    def test_released_connection_is_reused(self, pool: ConnectionPool) -> None:
+        connection = pool.acquire()
+        pool.release(connection)
+
+        assert pool.acquire() is connection
+
+    def test_connections_are_wallet_connections(self, pool: ConnectionPool) -> None:
+        connection = pool.acquire()
+
+        assert isinstance(connection, WalletConnection)
+        assert connection.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+
+    def test_release_rolls_back_uncommitted_work(self, pool: ConnectionPool) -> None:
+        connection = pool.acquire()
+        connection.execute("INSERT INTO Users (name, api_key) VALUES ('a', 'k')")
+        pool.release(connection)
+
+        reused = pool.acquire()
+
+        assert reused.execute("SELECT COUNT(*) FROM Users").fetchone()[0] == 0
+
+    def test_connections_beyond_max_idle_are_closed(
+            self, pool: ConnectionPool) -> None:
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)
+
+        assert pool.acquire() is first
+        assert pool.acquire() is not second
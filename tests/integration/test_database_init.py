@@ -0,0 +1,48 @@
+import sqlite3
+from pathlib import Path
+
+from database.database_init import SCHEMA_VERSION, get_schema_version, init_db
+
+
+def table_names(db_path: str) -> set[str]:
+    with sqlite3.connect(db_path) as conn:
+        return {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+
+class TestInitDb:
+
+    def test_fresh_database_is_migrated_to_current_version(
+            self, tmp_path: Path) -> None:
+        db_path = str(tmp_path / "wallet.db")
+
+        init_db(db_path)
+
+        with sqlite3.connect(db_path) as conn:
+            assert get_schema_version(conn) == SCHEMA_VERSION
+        assert {"Users", "Wallets", "Transactions"} <= table_names(db_path)
+
+    def test_current_schema_skips_ddl(self, tmp_path: Path) -> None:
+        db_path = str(tmp_path / "wallet.db")
+        init_db(db_path)
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("DROP TABLE TransactionLogSnapshot")
+
+        init_db(db_path)
+
+        assert "TransactionLogSnapshot" not in table_names(db_path)
+
+    def test_unversioned_database_keeps_its_data(self, tmp_path: Path) -> None:
+        db_path = str(tmp_path / "wallet.db")
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("CREATE TABLE Users (id INTEGER PRIMARY KEY "
+                         "AUTOINCREMENT, name TEXT NOT NULL, "
+                         "api_key TEXT NOT NULL UNIQUE)")
+            conn.execute("INSERT INTO Users (name, api_key) "
+                         "VALUES ('Naruto', 'key1')")
+
+        init_db(db_path)
+
+        with sqlite3.connect(db_path) as conn:
+            assert get_schema_version(conn) == SCHEMA_VERSION
+            assert conn.execute("SELECT COUNT(*) FROM Users").fetchone()[0] == 1
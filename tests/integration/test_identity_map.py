@@ -0,0 +1,160 @@
+import sqlite3
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+
+from database.connection import WalletConnection
+from database.connection_pool import ConnectionPool
+from database.database_init import init_db
+from database.identity_map import IdentityMap
+from entity.transaction import Transaction
+from exception.exceptions import ConcurrentUpdateError
+from repository.transaction_repository import TransactionRepository
+from repository.user_repository import UserRepository
+from repository.wallet_repository import WalletRepository
+from service.transaction_service import TransactionService
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> str:
+    return str(tmp_path / "wallet.db")
+
+
+@pytest.fixture
+def connection(db_path: str) -> Generator[WalletConnection]:
+    init_db(db_path)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("INSERT INTO Users (name, api_key) VALUES ('Naruto', 'key1')")
+        conn.executemany(
+            "INSERT INTO Wallets (user_id, balance, wallet_address) VALUES (1, ?, ?)",
+            [(10_000, "W1"), (5_000, "W2")])
+    pool = ConnectionPool(db_path, max_idle=1, statement_cache_size=32,
+                          busy_timeout_seconds=1)
+    conn = pool.acquire()
+    assert isinstance(conn, WalletConnection)
+    yield conn
+    pool.close()
+
+
+@pytest.fixture
+def statements(connection: WalletConnection) -> list[str]:
+    executed: list[str] = []
+    connection.set_trace_callback(executed.append)
+    return executed
+
+
+def balances(connection: WalletConnection) -> dict[str, int]:
+    cursor = connection.cursor()
+    cursor.execute("SELECT wallet_address, balance FROM Wallets")
+    return dict(cursor.fetchall())
+
+
+class TestIdentityMap:
+
+    def test_repeated_lookups_hit_the_database_once(
+            self, connection: WalletConnection, statements: list[str]) -> None:
+        users, wallets = UserRepository(connection), WalletRepository(connection)
+
+        user = users.find_user_by_api_key("key1")
+        wallet = wallets.get_wallet_by_address("W1")
+
+        assert users.find_user_by_api_key("key1") is user
+        assert users.get_user_by_id(1) is user
+        assert wallets.get_wallet_by_address("W1") is wallet
+        assert wallet is not None
+        assert wallets.get_wallets_by_ids([wallet.id]) == [wallet]
+        assert len(statements) == 2
+
+    def test_balance_updates_are_deferred_until_commit(
+            self, connection: WalletConnection, statements: list[str]) -> None:
+        wallets = WalletRepository(connection)
+        wallets.get_wallets_by_ids([1, 2])
+        statements.clear()
+
+        wallets.update_balance("W1", 9_000)
+        wallets.update_balance("W1", 8_000)
+        wallets.update_balance("W2", 6_000)
+
+        assert not any("UPDATE" in statement for statement in statements)
+        wallet = wallets.get_wallet_by_address("W1")
+        assert wallet is not None
+        assert wallet.balance == 8_000
+        connection.commit()
+        assert sum("UPDATE" in statement for statement in statements) == 2
+        assert balances(connection) == {"W1": 8_000, "W2": 6_000}
+
+    def test_deferred_writes_are_flushed_before_other_sql(
+            self, connection: WalletConnection) -> None:
+        wallets = WalletRepository(connection)
+
+        wallets.update_balance("W2", 1)
+
+        assert [w.balance for w in wallets.get_wallets_by_user_id(1)] == [10_000, 1]
+
+    def test_rollback_discards_deferred_writes(
+            self, connection: WalletConnection) -> None:
+        wallets = WalletRepository(connection)
+        wallets.get_wallet_by_address("W1")
+
+        wallets.update_balance("W1", 1)
+        connection.rollback()
+        connection.commit()
+
+        assert balances(connection) == {"W1": 10_000, "W2": 5_000}
+        wallet = wallets.get_wallet_by_address("W1")
+        assert wallet is not None
+        assert wallet.balance == 10_000
+
+    def test_deferred_balances_add_to_concurrent_changes(
+            self, connection: WalletConnection, db_path: str) -> None:
+        wallets = WalletRepository(connection)
+        wallets.get_wallet_by_address("W1")
+        with sqlite3.connect(db_path) as other:
+            other.execute("UPDATE Wallets SET balance = 12000 WHERE id = 1")
+
+        wallets.update_balance("W1", 9_000)
+        connection.commit()
+
+        assert balances(connection)["W1"] == 11_000
+
+    def test_overdraft_after_concurrent_change_is_rejected(
+            self, connection: WalletConnection, db_path: str) -> None:
+        wallets = WalletRepository(connection)
+        wallets.get_wallet_by_address("W1")
+        with sqlite3.connect(db_path) as other:
+            other.execute("UPDATE Wallets SET balance = 500 WHERE id = 1")
+
+        wallets.update_balance("W1", 9_000)
+
+        with pytest.raises(ConcurrentUpdateError):
+            connection.commit()
+        connection.rollback()
+        assert balances(connection)["W1"] == 500
+
+    def test_history_reuses_wallets_loaded_by_the_request(
+            self, connection: WalletConnection, statements: list[str]) -> None:
+        transactions = TransactionRepository(connection)
+        transactions.insert_transaction(Transaction(1, 2, 100, 0))
+        connection.commit()
+        service = TransactionService(UserRepository(connection),
+                                     WalletRepository(connection), transactions)
+        statements.clear()
+
+        history = service.get_transactions("key1")
+
+        assert [tr.receiver_wallet_address for tr in history] == ["W2"]
+        assert not any("FROM Wallets WHERE id IN" in statement
+                       for statement in statements)
+
+
+def test_later_deferred_write_replaces_earlier_one() -> None:
+    identity_map = IdentityMap()
+
+    identity_map.defer_write(("Wallets", "W1"), "UPDATE a", (1, "W1"))
+    identity_map.defer_write(("Wallets", "W2"), "UPDATE a", (2, "W2"))
+    identity_map.defer_write(("Wallets", "W1"), "UPDATE a", (3, "W1"))
+
+    assert identity_map.take_deferred_writes() == {
+        "UPDATE a": [(2, "W2"), (3, "W1")]}
+    assert identity_map.take_deferred_writes() == {}
@@ -0,0 +1,239 @@
+import itertools
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+
+from config import settings
+from database.connection_pool import ConnectionPool
+from database.database_init import (
+    MIGRATIONS,
+    SCHEMA_VERSION,
+    init_db,
+    run_migration,
+)
+from entity.transaction import Transaction
+from repository.ledger_repository import (
+    ISSUANCE_ACCOUNT_ID,
+    PLATFORM_FEE_ACCOUNT_ID,
+    LedgerRepository,
+)
+from repository.transaction_repository import TransactionRepository
+from repository.wallet_repository import WalletRepository
+from service.ledger_verifier import LedgerVerifier
+from service.metrics import MetricsRegistry
+
+
+@pytest.fixture
+def pool(tmp_path: Path) -> ConnectionPool:
+    db_path = str(tmp_path / "wallet.db")
+    init_db(db_path)
+    pool = ConnectionPool(db_path, max_idle=2, statement_cache_size=32,
+                          busy_timeout_seconds=1)
+    connection = pool.acquire()
+    connection.execute("INSERT INTO Users (name, api_key) VALUES ('Naruto', 'k')")
+    wallets = WalletRepository(connection)
+    wallets.insert_wallet(1, 1000, "a")
+    wallets.insert_wallet(1, 500, "b")
+    connection.commit()
+    pool.release(connection)
+    return pool
+
+
+def transfer(pool: ConnectionPool, sender_id: int, receiver_id: int,
+             amount: int, fee: int) -> None:
+    connection = pool.acquire()
+    for wallet_id, delta in ((sender_id, -amount), (receiver_id, amount - fee)):
+        connection.execute("UPDATE Wallets SET balance = balance + ? WHERE id = ?",
+                           (delta, wallet_id))
+    TransactionRepository(connection).insert_transaction(
+        Transaction(sender_wallet_id=sender_id, receiver_wallet_id=receiver_id,
+                    transfer_amount=amount, transfer_fee=fee))
+    connection.commit()
+    pool.release(connection)
+
+
+def postings(pool: ConnectionPool, account_id: int) -> list[tuple[int, int, int]]:
+    connection = pool.acquire()
+    try:
+        return [(posting.sequence, posting.amount, posting.balance_after)
+                for posting in LedgerRepository(connection).get_postings(
+                    account_id, 0, 100)]
+    finally:
+        pool.release(connection)
+
+
+def execute(pool: ConnectionPool, sql: str) -> None:
+    connection = pool.acquire()
+    connection.execute(sql)
+    connection.commit()
+    pool.release(connection)
+
+
+class TestLedger:
+
+    def test_wallet_opening_is_drawn_from_issuance(
+            self, pool: ConnectionPool) -> None:
+        assert postings(pool, 1) == [(1, 1000, 1000)]
+        assert postings(pool, ISSUANCE_ACCOUNT_ID) == [(1, -1000, -1000),
+                                                       (2, -500, -1500)]
+
+    def test_transfers_keep_running_balances(self, pool: ConnectionPool) -> None:
+        transfer(pool, 1, 2, 100, 2)
+        transfer(pool, 2, 1, 50, 0)
+
+        assert postings(pool, 1) == [(1, 1000, 1000), (2, -100, 900),
+                                     (3, 50, 950)]
+        assert postings(pool, 2) == [(1, 500, 500), (2, 98, 598),
+                                     (3, -50, 548)]
+        assert postings(pool, PLATFORM_FEE_ACCOUNT_ID) == [(1, 2, 2)]
+
+    def test_history_is_read_after_a_sequence(self, pool: ConnectionPool) -> None:
+        for _ in range(3):
+            transfer(pool, 1, 2, 10, 0)
+        connection = pool.acquire()
+
+        page = LedgerRepository(connection).get_postings(1, 2, 1)
+
+        pool.release(connection)
+        assert [posting.sequence for posting in page] == [3]
+        assert page[0].balance_after == 980
+
+    def test_migration_opens_existing_wallets(self, tmp_path: Path) -> None:
+        db_path = str(tmp_path / "old.db")
+        with sqlite3.connect(db_path) as conn:
+            for statements in MIGRATIONS[:4]:
+                run_migration(conn, statements)
+            conn.execute("PRAGMA user_version = 4")
+            conn.execute("INSERT INTO Users (name, api_key) VALUES ('n', 'k')")
+            conn.executemany("INSERT INTO Wallets (user_id, balance, "
+                             "wallet_address) VALUES (1, ?, ?)",
+                             [(300, "a"), (700, "b")])
+
+        init_db(db_path)
+
+        with sqlite3.connect(db_path) as conn:
+            assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+            rows = conn.execute("SELECT entry_id, account_id, sequence, amount, "
+                                "balance_after FROM Postings ORDER BY id").fetchall()
+        assert rows == [(-1, 1, 1, 300, 300), (-2, 2, 1, 700, 700),
+                        (-1, -1, 1, -300, -300), (-2, -1, 2, -700, -1000)]
+
+
+class TestBalanceAsOf:
+
+    @pytest.fixture(autouse=True)
+    def short_interval(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(settings, "LEDGER_CHECKPOINT_INTERVAL", 3)
+
+    def test_every_interval_th_posting_is_checkpointed(
+            self, pool: ConnectionPool) -> None:
+        for _ in range(7):
+            transfer(pool, 1, 2, 10, 0)
+        connection = pool.acquire()
+
+        rows = connection.execute(
+            "SELECT sequence FROM BalanceCheckpoints WHERE account_id = 1 "
+            "ORDER BY sequence").fetchall()
+
+        pool.release(connection)
+        assert [row["sequence"] for row in rows] == [3, 6]
+
+    def test_migration_checkpoints_at_the_configured_interval(
+            self, tmp_path: Path) -> None:
+        db_path = str(tmp_path / "old.db")
+        with sqlite3.connect(db_path) as conn:
+            for statements in MIGRATIONS[:5]:
+                run_migration(conn, statements)
+            conn.execute("PRAGMA user_version = 5")
+            conn.executemany(
+                "INSERT INTO Postings (entry_id, account_id, sequence, amount, "
+                "balance_after) VALUES (?, 1, ?, -1, ?)",
+                [(sequence, sequence, -sequence) for sequence in range(1, 8)])
+
+        init_db(db_path)
+
+        with sqlite3.connect(db_path) as conn:
+            rows = conn.execute("SELECT sequence FROM BalanceCheckpoints "
+                                "ORDER BY sequence").fetchall()
+        assert rows == [(3,), (6,)]
+
+    def test_balance_after_each_transaction(self, pool: ConnectionPool) -> None:
+        for amount in range(1, 11):
+            transfer(pool, 1, 2, amount, 0)
+        connection = pool.acquire()
+        ledger = LedgerRepository(connection)
+
+        balances = [ledger.balance_as_of(1, transaction_id=transaction_id)
+                    for transaction_id in range(0, 12)]
+
+        pool.release(connection)
+        expected = [1000 - sum(range(1, n + 1)) for n in range(0, 11)]
+        assert balances == [*expected, expected[-1]]
+
+    def test_balance_at_a_time(self, pool: ConnectionPool,
+                               monkeypatch: pytest.MonkeyPatch) -> None:
+        monkeypatch.setattr(time, "time",
+                            itertools.count(time.time() + 1).__next__)
+        for _ in range(5):
+            transfer(pool, 1, 2, 10, 0)
+        connection = pool.acquire()
+        ledger = LedgerRepository(connection)
+        history = ledger.get_postings(1, 0, 100)
+
+        balances = [ledger.balance_as_of(1, posted_at=posting.posted_at)
+                    for posting in history]
+        before = ledger.balance_as_of(1, posted_at=history[0].posted_at - 1)
+
+        pool.release(connection)
+        assert balances == [posting.balance_after for posting in history]
+        assert before is None
+
+
+class TestLedgerVerifier:
+
+    def test_consistent_ledger_has_no_problems(self, pool: ConnectionPool) -> None:
+        transfer(pool, 1, 2, 100, 2)
+        verifier = LedgerVerifier(pool, batch_size=100, metrics=MetricsRegistry())
+
+        verification = verifier.verify_once()
+
+        assert verification.problems == []
+        assert verification.checked_postings == 7
+        assert verifier.verify_once().checked_postings == 0
+
+    def test_runs_resume_from_the_checkpoint(self, pool: ConnectionPool) -> None:
+        transfer(pool, 1, 2, 100, 2)
+        verifier = LedgerVerifier(pool, batch_size=4, metrics=MetricsRegistry())
+
+        first, second = verifier.verify_once(), verifier.verify_once()
+
+        assert (first.checked_postings, first.verified_through) == (4, 4)
+        assert (second.checked_postings, second.verified_through) == (3, 7)
+        assert second.problems == []
+
+    def test_balance_drift_is_reported(self, pool: ConnectionPool) -> None:
+        transfer(pool, 1, 2, 100, 0)
+        execute(pool, "UPDATE Wallets SET balance = balance + 1 WHERE id = 2")
+        verifier = LedgerVerifier(pool, batch_size=100, metrics=MetricsRegistry())
+
+        [problem] = verifier.verify_once().problems
+
+        assert problem == "Wallet 2 has balance 601 but its last posting says 600"
+        assert verifier._inconsistencies.value == 1
+
+    def test_tampered_posting_is_reported(self, pool: ConnectionPool) -> None:
+        verifier = LedgerVerifier(pool, batch_size=100, metrics=MetricsRegistry())
+        verifier.verify_once()
+        transfer(pool, 1, 2, 100, 0)
+        execute(pool, "UPDATE Postings SET amount = -90 "
+                      "WHERE entry_id = 1 AND account_id = 1")
+
+        problems = verifier.verify_once().problems
+
+        assert problems == [
+            "Posting 5 (account 1, sequence 2) does not follow the account's "
+            "previous posting",
+            "Entry 1 is off balance by 10",
+        ]
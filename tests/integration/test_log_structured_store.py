@@ -0,0 +1,208 @@
+import sqlite3
+import time
+from collections.abc import Generator
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from database.connection_pool import ConnectionPool
+from database.database_init import init_db
+from database.log_structured_store import LogStructuredStore
+from database.transaction_log import TransactionLog
+from dto.transaction_create_dto import TransactionCreateDto
+from entity.transaction import Transaction
+from exception.exceptions import BalanceHistoryUnavailableError, NotEnoughBalanceError
+from repository.ledger_repository import LedgerRepository
+from repository.logged_ledger_repository import LoggedLedgerRepository
+from repository.logged_transaction_repository import LoggedTransactionRepository
+from repository.logged_wallet_repository import LoggedWalletRepository
+from repository.user_repository import UserRepository
+from service.transaction_service import TransactionService
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> str:
+    path = str(tmp_path / "wallet.db")
+    init_db(path)
+    with sqlite3.connect(path) as connection:
+        connection.executescript("""
+        INSERT INTO Users (id, name, api_key) VALUES (1, 'Naruto', 'key1');
+        INSERT INTO Users (id, name, api_key) VALUES (2, 'Hinata', 'key2');
+        INSERT INTO Wallets (id, user_id, balance, wallet_address)
+            VALUES (1, 1, 10000, 'W1');
+        INSERT INTO Wallets (id, user_id, balance, wallet_address)
+            VALUES (2, 2, 5000, 'W2');
+        """)
+    return path
+
+
+def open_store(db_path: str, tmp_path: Path,
+               snapshot_interval: int = 100) -> LogStructuredStore:
+    store = LogStructuredStore(
+        db_path, TransactionLog(str(tmp_path / "wallet.log")), snapshot_interval
+    )
+    store.recover()
+    return store
+
+
+@pytest.fixture
+def connection(db_path: str) -> Generator[sqlite3.Connection]:
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    yield conn
+    conn.close()
+
+
+def make_service(connection: sqlite3.Connection,
+                 store: LogStructuredStore) -> TransactionService:
+    return TransactionService(
+        UserRepository(connection),
+        LoggedWalletRepository(connection, store),
+        LoggedTransactionRepository(connection, store)
+    )
+
+
+def transfer(amount: int) -> TransactionCreateDto:
+    return TransactionCreateDto(sender_wallet_address="W1",
+                                receiver_wallet_address="W2",
+                                transfer_amount=amount)
+
+
+class TestLogStructuredStore:
+
+    def test_transfers_stay_in_memory_until_snapshot(
+            self, db_path: str, tmp_path: Path, connection: sqlite3.Connection
+    ) -> None:
+        store = open_store(db_path, tmp_path)
+        service = make_service(connection, store)
+
+        service.make_transaction(transfer(1000), "key1")
+
+        row = connection.execute(
+            "SELECT balance FROM Wallets WHERE id = 1").fetchone()
+        assert row["balance"] == 10000
+        sender_wallet = service.wallet_repo.get_wallet_by_address("W1")
+        assert sender_wallet is not None
+        assert sender_wallet.balance == 9000
+        assert service.get_statistics().total_transactions == 1
+        assert len(service.get_transactions("key2")) == 1
+
+    def test_recover_replays_log_tail(
+            self, db_path: str, tmp_path: Path, connection: sqlite3.Connection
+    ) -> None:
+        store = open_store(db_path, tmp_path)
+        service = make_service(connection, store)
+        service.make_transaction(transfer(1000), "key1")
+        service.make_transaction(transfer(2000), "key1")
+        store.log.close()
+
+        recovered = LogStructuredStore(
+            db_path, TransactionLog(str(tmp_path / "wallet.log")), 100
+        )
+
+        assert recovered.recover() == 2
+        assert recovered.balance_of(1, 0) == 7000
+        assert recovered.balance_of(2, 0) == 5000 + 985 + 1970
+
+    def test_snapshot_compacts_into_sqlite_and_resets_log(
+            self, db_path: str, tmp_path: Path, connection: sqlite3.Connection
+    ) -> None:
+        store = open_store(db_path, tmp_path, snapshot_interval=2)
+        service = make_service(connection, store)
+        service.make_transaction(transfer(1000), "key1")
+        service.make_transaction(transfer(1000), "key1")
+        service.make_transaction(transfer(1000), "key1")
+        store.log.close()
+
+        balances = dict(connection.execute(
+            "SELECT id, balance FROM Wallets").fetchall())
+        assert balances == {1: 8000, 2: 5000 + 2 * 985}
+        assert service.get_statistics().total_transactions == 3
+
+        recovered = open_store(db_path, tmp_path)
+        assert recovered.balance_of(1, 0) == 7000
+        assert len(recovered.pending_transactions()[0]) == 1
+
+    def test_failed_snapshot_keeps_the_transfer_and_retries(
+            self, db_path: str, tmp_path: Path, connection: sqlite3.Connection,
+            monkeypatch: pytest.MonkeyPatch) -> None:
+        store = open_store(db_path, tmp_path, snapshot_interval=2)
+        service = make_service(connection, store)
+        with monkeypatch.context() as patch:
+            patch.setattr(LedgerRepository, "record_transfers",
+                          MagicMock(side_effect=sqlite3.OperationalError(
+                              "database is locked")))
+            service.make_transaction(transfer(1000), "key1")
+            service.make_transaction(transfer(1000), "key1")
+
+        assert store.balance_of(1, 0) == 8000
+        assert len(store.pending_transactions()[0]) == 2
+        assert connection.execute(
+            "SELECT COUNT(*) FROM Transactions").fetchone()[0] == 0
+
+        service.make_transaction(transfer(1000), "key1")
+        assert len(store.pending_transactions()[0]) == 3
+        service.make_transaction(transfer(1000), "key1")
+        assert store.pending_transactions() == ([], 4)
+        assert connection.execute(
+            "SELECT balance FROM Wallets WHERE id = 1").fetchone()[0] == 6000
+
+    def test_ledger_reads_include_pending_transfers(
+            self, db_path: str, tmp_path: Path, connection: sqlite3.Connection
+    ) -> None:
+        LedgerRepository(connection).record_wallet_openings([(1, 10000), (2, 5000)])
+        connection.commit()
+        store = open_store(db_path, tmp_path, snapshot_interval=3)
+        service = make_service(connection, store)
+        ledger = LoggedLedgerRepository(connection, store)
+        service.make_transaction(transfer(1000), "key1")
+        service.make_transaction(transfer(2000), "key1")
+
+        history = [(posting.sequence, posting.entry_id, posting.balance_after)
+                   for posting in ledger.get_postings(1, 0, 10)]
+        assert history == [(1, -1, 10000), (2, 1, 9000), (3, 2, 7000)]
+        assert [posting.sequence for posting in ledger.get_postings(1, 1, 1)] == [2]
+        assert ledger.balance_as_of(1, transaction_id=1) == 9000
+        assert ledger.balance_as_of(2, transaction_id=2) == 5000 + 985 + 1970
+        with pytest.raises(BalanceHistoryUnavailableError):
+            ledger.balance_as_of(1, posted_at=time.time())
+
+        service.make_transaction(transfer(1000), "key1")
+
+        assert store.pending_transactions() == ([], 3)
+        assert [(posting.sequence, posting.entry_id, posting.balance_after)
+                for posting in ledger.get_postings(1, 0, 10)] == [
+            *history, (4, 3, 6000)]
+        assert ledger.balance_as_of(1, posted_at=time.time()) == 6000
+
+    def test_wallets_register_only_once_committed(
+            self, db_path: str, tmp_path: Path) -> None:
+        store = open_store(db_path, tmp_path)
+        pool = ConnectionPool(db_path, max_idle=1, statement_cache_size=32,
+                              busy_timeout_seconds=1)
+        connection = pool.acquire()
+        wallets = LoggedWalletRepository(connection, store)
+
+        wallet, = wallets.insert_wallets([(1, 700, "W3")])
+        assert store.balance_of(wallet.id, -1) == -1
+        connection.rollback()
+        assert store.balance_of(wallet.id, -1) == -1
+
+        wallets.insert_wallet(1, 800, "W3")
+        connection.commit()
+        assert store.balance_of(wallet.id, -1) == 800
+        pool.close()
+
+    def test_apply_transfer_rechecks_balance(
+            self, db_path: str, tmp_path: Path, connection: sqlite3.Connection
+    ) -> None:
+        store = open_store(db_path, tmp_path)
+        make_service(connection, store).make_transaction(transfer(6000), "key1")
+
+        with pytest.raises(NotEnoughBalanceError):
+            store.apply_transfer(Transaction(
+                sender_wallet_id=1, receiver_wallet_id=2,
+                transfer_amount=6000, transfer_fee=90
+            ))
+        assert store.balance_of(1, 0) == 4000
@@ -0,0 +1,83 @@
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from database.connection import WalletConnection, read_only
+from database.connection_pool import ConnectionPool
+from database.database_init import init_db
+
+
+@pytest.fixture
+def pools(tmp_path: Path) -> tuple[ConnectionPool, ConnectionPool]:
+    db_path = str(tmp_path / "wallet.db")
+    init_db(db_path)
+    writers = ConnectionPool(db_path, max_idle=2, statement_cache_size=32,
+                             busy_timeout_seconds=1)
+    readers = ConnectionPool(db_path, max_idle=2, statement_cache_size=32,
+                             busy_timeout_seconds=1, read_only=True)
+    return writers, readers
+
+
+@pytest.fixture
+def writer(pools: tuple[ConnectionPool, ConnectionPool]) -> WalletConnection:
+    writers, readers = pools
+    connection = writers.acquire()
+    assert isinstance(connection, WalletConnection)
+    connection.route_reads_to(readers)
+    return connection
+
+
+@read_only
+def cursor_connection(connection: sqlite3.Connection) -> sqlite3.Connection:
+    return connection.cursor().connection
+
+
+@read_only
+def count_users(connection: sqlite3.Connection) -> int:
+    cursor = connection.cursor()
+    cursor.execute("SELECT COUNT(*) FROM Users")
+    count: int = cursor.fetchone()[0]
+    return count
+
+
+class TestReadRouting:
+
+    def test_read_only_methods_use_a_read_connection(
+            self, writer: WalletConnection) -> None:
+        reader = cursor_connection(writer)
+
+        assert reader is not writer
+        assert writer.cursor().connection is writer
+        assert cursor_connection(writer) is reader
+
+    def test_read_connections_reject_writes(
+            self, writer: WalletConnection) -> None:
+        with pytest.raises(sqlite3.OperationalError, match="readonly"):
+            cursor_connection(writer).execute(
+                "INSERT INTO Users (name, api_key) VALUES ('a', 'k')")
+
+    def test_reads_see_committed_writes(self, writer: WalletConnection) -> None:
+        writer.cursor().execute("INSERT INTO Users (name, api_key) VALUES ('a', 'k')")
+        writer.commit()
+
+        assert cursor_connection(writer) is not writer
+        assert count_users(writer) == 1
+
+    def test_reads_stay_on_writer_with_uncommitted_writes(
+            self, writer: WalletConnection) -> None:
+        writer.cursor().execute("INSERT INTO Users (name, api_key) VALUES ('a', 'k')")
+
+        assert cursor_connection(writer) is writer
+        assert count_users(writer) == 1
+
+    def test_release_returns_the_read_connection(
+            self, pools: tuple[ConnectionPool, ConnectionPool],
+            writer: WalletConnection) -> None:
+        writers, readers = pools
+        reader = cursor_connection(writer)
+
+        writers.release(writer)
+
+        assert readers.acquire() is reader
+        assert cursor_connection(writers.acquire()) is not reader
@@ -0,0 +1,216 @@
+from collections.abc import Generator
+from contextlib import contextmanager
+from pathlib import Path
+from unittest.mock import MagicMock
+
+import pytest
+
+from database.connection_pool import ConnectionPool
+from database.shard_transfers import ShardTransferCoordinator
+from database.shards import ShardSession, ShardSet, init_shards, shard_paths
+from dto.transaction_create_dto import TransactionCreateDto
+from entity.user import User
+from entity.wallet import Wallet
+from exception.exceptions import CrossShardWriteError
+from repository.sharded_ledger_repository import ShardedLedgerRepository
+from repository.sharded_transaction_repository import ShardedTransactionRepository
+from repository.sharded_transfer_stats_repository import (
+    ShardedTransferStatsRepository,
+)
+from repository.sharded_user_repository import ShardedUserRepository
+from repository.sharded_wallet_repository import ShardedWalletRepository
+from service.ledger_verifier import LedgerVerifier
+from service.metrics import MetricsRegistry
+from service.transaction_service import TransactionService
+
+
+@pytest.fixture
+def shard_set(tmp_path: Path) -> Generator[ShardSet]:
+    db_path = str(tmp_path / "wallet.db")
+    init_shards(db_path, 2)
+    shard_set = ShardSet(
+        [ConnectionPool(path, max_idle=2, statement_cache_size=32,
+                        busy_timeout_seconds=1, foreign_keys=False)
+         for path in shard_paths(db_path, 2)],
+        fan_out_workers=2
+    )
+    yield shard_set
+    shard_set.close()
+
+
+@pytest.fixture
+def coordinator(shard_set: ShardSet) -> ShardTransferCoordinator:
+    return ShardTransferCoordinator(shard_set, MetricsRegistry())
+
+
+@contextmanager
+def session(shard_set: ShardSet) -> Generator[ShardSession]:
+    shard_session = ShardSession(shard_set)
+    try:
+        yield shard_session
+        shard_session.commit()
+    except Exception:
+        shard_session.rollback()
+        raise
+    finally:
+        shard_session.close()
+
+
+def transaction_service(shard_session: ShardSession,
+                        coordinator: ShardTransferCoordinator) -> TransactionService:
+    return TransactionService(
+        ShardedUserRepository(shard_session), ShardedWalletRepository(shard_session),
+        ShardedTransactionRepository(shard_session, coordinator),
+        ledger_repo=ShardedLedgerRepository(shard_session),
+        transfer_stats_repo=ShardedTransferStatsRepository(shard_session)
+    )
+
+
+def users_on_each_shard(shard_set: ShardSet) -> list[User]:
+    users: dict[int | None, User] = {}
+    while len(users) < shard_set.count:
+        with session(shard_set) as shard_session:
+            user = ShardedUserRepository(shard_session).create_user(
+                f"user{len(users)}")
+        users.setdefault(shard_set.shard_of_id(user.id), user)
+    return [users[shard] for shard in range(shard_set.count)]
+
+
+def open_wallet(shard_set: ShardSet, user: User, balance: int = 1000) -> Wallet:
+    with session(shard_set) as shard_session:
+        wallets = ShardedWalletRepository(shard_session)
+        return wallets.insert_wallet(user.id, balance,
+                                     wallets.new_wallet_address(user.id))
+
+
+def balance_of(shard_set: ShardSet, wallet: Wallet) -> int:
+    with session(shard_set) as shard_session:
+        found = ShardedWalletRepository(shard_session).get_wallet_by_address(
+            wallet.wallet_address)
+    assert found is not None
+    return found.balance
+
+
+def transfer(shard_set: ShardSet, coordinator: ShardTransferCoordinator,
+             user: User, sender: Wallet, receiver: Wallet, amount: int) -> None:
+    with session(shard_set) as shard_session:
+        transaction_service(shard_session, coordinator).make_transaction(
+            TransactionCreateDto(sender_wallet_address=sender.wallet_address,
+                                 receiver_wallet_address=receiver.wallet_address,
+                                 transfer_amount=amount),
+            user.api_key)
+
+
+def open_intents(shard_set: ShardSet) -> int:
+    return sum(shard_set.fan_out(lambda connection: connection.execute(
+        "SELECT COUNT(*) FROM ShardTransferIntents").fetchone()[0]))
+
+
+class TestShards:
+
+    def test_ids_keys_and_addresses_name_the_users_shard(
+            self, shard_set: ShardSet) -> None:
+        for shard, user in enumerate(users_on_each_shard(shard_set)):
+            wallet = open_wallet(shard_set, user)
+
+            assert shard_set.shard_of_id(user.id) == shard
+            assert shard_set.shard_of_id(wallet.id) == shard
+            assert shard_set.shard_of_key(user.api_key) == shard
+            assert shard_set.shard_of_key(wallet.wallet_address) == shard
+            with session(shard_set) as shard_session:
+                assert ShardedUserRepository(shard_session).find_user_by_api_key(
+                    user.api_key) == user
+                assert ShardedWalletRepository(
+                    shard_session).get_wallets_by_ids([wallet.id]) == [wallet]
+
+    def test_a_request_writes_to_one_shard(self, shard_set: ShardSet) -> None:
+        shard_session = ShardSession(shard_set)
+        shard_session.write_connection(0)
+
+        with pytest.raises(CrossShardWriteError):
+            shard_session.write_connection(1)
+        shard_session.close()
+
+    def test_transfer_within_a_shard_commits_locally(
+            self, shard_set: ShardSet,
+            coordinator: ShardTransferCoordinator) -> None:
+        user, _ = users_on_each_shard(shard_set)
+        sender, receiver = open_wallet(shard_set, user), open_wallet(shard_set, user)
+
+        transfer(shard_set, coordinator, user, sender, receiver, 300)
+
+        assert (balance_of(shard_set, sender), balance_of(shard_set, receiver)) == (
+            700, 1300)
+        assert open_intents(shard_set) == 0
+
+    def test_transfer_between_shards_credits_the_receiver(
+            self, shard_set: ShardSet,
+            coordinator: ShardTransferCoordinator) -> None:
+        sender_user, receiver_user = users_on_each_shard(shard_set)
+        sender = open_wallet(shard_set, sender_user)
+        receiver = open_wallet(shard_set, receiver_user)
+
+        transfer(shard_set, coordinator, sender_user, sender, receiver, 1000)
+
+        assert (balance_of(shard_set, sender), balance_of(shard_set, receiver)) == (
+            0, 1985)
+        assert open_intents(shard_set) == 0
+        for pool in shard_set.pools:
+            verifier = LedgerVerifier(pool, batch_size=100, metrics=MetricsRegistry())
+            assert verifier.verify_once().problems == []
+        with session(shard_set) as shard_session:
+            service = transaction_service(shard_session, coordinator)
+            [received] = service.get_transactions(receiver_user.api_key)
+            statistics = service.get_statistics()
+            [top] = service.get_top_users("volume_received", 1)
+        assert received.transferred_amount == 985
+        assert (statistics.total_transactions, statistics.platform_profit) == (1, 15)
+        assert (top.user_id, top.volume_received) == (receiver_user.id, 985)
+
+    def test_interrupted_credit_is_recovered_once(
+            self, shard_set: ShardSet, coordinator: ShardTransferCoordinator,
+            monkeypatch: pytest.MonkeyPatch) -> None:
+        sender_user, receiver_user = users_on_each_shard(shard_set)
+        sender = open_wallet(shard_set, sender_user)
+        receiver = open_wallet(shard_set, receiver_user)
+        with monkeypatch.context() as patch:
+            # As if the process died right after the debit committed.
+            patch.setattr(coordinator, "complete", MagicMock())
+            transfer(shard_set, coordinator, sender_user, sender, receiver, 200)
+
+        assert (balance_of(shard_set, sender), balance_of(shard_set, receiver)) == (
+            800, 1000)
+        assert open_intents(shard_set) == 1
+
+        assert coordinator.recover() == 1
+        assert coordinator.recover() == 0
+        assert balance_of(shard_set, receiver) == 1197
+        assert coordinator._recovered.value == 1
+
+    def test_credit_is_applied_once(
+            self, shard_set: ShardSet,
+            coordinator: ShardTransferCoordinator) -> None:
+        sender_user, receiver_user = users_on_each_shard(shard_set)
+        sender = open_wallet(shard_set, sender_user)
+        receiver = open_wallet(shard_set, receiver_user)
+        transfer(shard_set, coordinator, sender_user, sender, receiver, 200)
+        with session(shard_set) as shard_session:
+            [transaction] = ShardedTransactionRepository(
+                shard_session, coordinator).get_related_transactions_by_wallet_id(
+                receiver.id)
+
+        coordinator.complete(transaction)
+
+        assert balance_of(shard_set, receiver) == 1197
+
+    def test_global_reads_merge_every_shard(self, shard_set: ShardSet) -> None:
+        users = users_on_each_shard(shard_set)
+        wallets = [open_wallet(shard_set, user, balance=100 * (index + 1))
+                   for index, user in enumerate(users)]
+
+        with session(shard_set) as shard_session:
+            all_wallets = ShardedWalletRepository(shard_session).get_all_wallets()
+            all_users = ShardedUserRepository(shard_session).get_all_users()
+
+        assert all_wallets == wallets
+        assert {user.id for user in users} <= {user.id for user in all_users}
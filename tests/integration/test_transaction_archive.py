@@ -0,0 +1,111 @@
+import sqlite3
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+
+from database import transaction_archive
+from database.database_init import init_db
+from database.transaction_archive import archive_transactions
+from repository import sql_catalog
+from repository.transaction_repository import TransactionRepository
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> str:
+    path = str(tmp_path / "wallet.db")
+    init_db(path)
+    with sqlite3.connect(path) as conn:
+        conn.execute("INSERT INTO Users (name, api_key) VALUES ('u', 'k')")
+        conn.executemany(
+            "INSERT INTO Wallets (user_id, balance, wallet_address) VALUES (1, 0, ?)",
+            [(f"W{i}",) for i in range(1, 6)])
+        # Wallet 5 only takes part in the newest transfers.
+        conn.executemany(
+            "INSERT INTO Transactions (sender_wallet_id, receiver_wallet_id, "
+            "transfer_amount, transfer_fee) VALUES (?, ?, ?, ?)",
+            [(i % 4 + 1, (i + 1) % 4 + 1, 100 + i, i % 7) for i in range(90)]
+            + [(5, 1, 500, 5) for _ in range(10)])
+    return path
+
+
+@pytest.fixture
+def repo(db_path: str) -> Generator[TransactionRepository]:
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    yield TransactionRepository(conn)
+    conn.close()
+
+
+def snapshot(repo: TransactionRepository) -> tuple[object, ...]:
+    return (repo.get_transactions_by_wallet_ids([1, 2, 3, 4, 5]),
+            repo.get_transactions_by_wallet_ids([2]),
+            repo.get_related_transactions_by_wallet_id(3),
+            repo.get_transaction_count_and_profit())
+
+
+def hot_count(db_path: str) -> int:
+    with sqlite3.connect(db_path) as conn:
+        count: int = conn.execute("SELECT COUNT(*) FROM Transactions").fetchone()[0]
+        return count
+
+
+class TestTransactionArchive:
+
+    def test_archiving_keeps_query_results(
+            self, db_path: str, tmp_path: Path, repo: TransactionRepository) -> None:
+        before = snapshot(repo)
+
+        stats = archive_transactions(db_path, str(tmp_path / "archive"),
+                                     keep_recent=10, partition_rows=40,
+                                     batch_size=15)
+
+        assert stats.moved == 90
+        assert stats.partitions_created == 3
+        assert hot_count(db_path) == 10
+        assert snapshot(repo) == before
+
+    def test_queries_skip_partitions_without_the_wallet(
+            self, db_path: str, tmp_path: Path, repo: TransactionRepository) -> None:
+        archive_transactions(db_path, str(tmp_path / "archive"), keep_recent=10,
+                             partition_rows=40, batch_size=15)
+        cursor = repo.db_connection.cursor()
+
+        cursor.execute(sql_catalog.SELECT_PARTITIONS_BY_WALLET_IDS, ("[5]", 0))
+
+        assert cursor.fetchall() == []
+        assert len(repo.get_related_transactions_by_wallet_id(5)) == 10
+
+    def test_rerun_after_failed_batch_does_not_duplicate_rows(
+            self, db_path: str, tmp_path: Path, repo: TransactionRepository,
+            monkeypatch: pytest.MonkeyPatch) -> None:
+        before = snapshot(repo)
+        archive_dir = str(tmp_path / "archive")
+        catalog_batch = transaction_archive._catalog_batch
+        calls = 0
+
+        def fail_second_batch(*args: object) -> bool:
+            nonlocal calls
+            calls += 1
+            if calls == 2:
+                raise sqlite3.OperationalError("disk I/O error")
+            return catalog_batch(*args)  # type: ignore[arg-type]
+
+        monkeypatch.setattr(transaction_archive, "_catalog_batch", fail_second_batch)
+        with pytest.raises(sqlite3.OperationalError):
+            archive_transactions(db_path, archive_dir, keep_recent=10,
+                                 partition_rows=100, batch_size=30)
+        assert snapshot(repo) == before
+
+        monkeypatch.setattr(transaction_archive, "_catalog_batch", catalog_batch)
+        stats = archive_transactions(db_path, archive_dir, keep_recent=10,
+                                     partition_rows=100, batch_size=30)
+
+        assert stats.moved == 60
+        assert snapshot(repo) == before
+
+    def test_newest_transfer_is_always_kept(self, db_path: str,
+                                            tmp_path: Path) -> None:
+        with pytest.raises(ValueError, match="keep_recent"):
+            archive_transactions(db_path, str(tmp_path / "archive"), keep_recent=0,
+                                 partition_rows=10, batch_size=10)
@@ -17,7 +17,7 @@ class TestTransactionRepositoryIntegration:
             transfer_amount=1000, transfer_fee=15
         )
 
-        transaction_repo.insert_transaction(transaction)
+        inserted = transaction_repo.insert_transaction(transaction)
 
         cursor = db_connection.cursor()
         cursor.execute("SELECT * FROM Transactions WHERE sender_wallet_id = 1 "
@@ -28,6 +28,7 @@ class TestTransactionRepositoryIntegration:
         assert row["sender_wallet_id"] == 1
         assert row["transfer_amount"] == 1000
         assert row["transfer_fee"] == 15
+        assert inserted.id == row["id"]
 
     @pytest.mark.usefixtures("setup_test_data")
     def test_insert_multiple_transactions(
@@ -97,3 +98,14 @@ class TestTransactionRepositoryIntegration:
 
         assert count == 2
         assert profit == 45
+
+    @pytest.mark.usefixtures("setup_test_data")
+    def test_get_related_transactions_after(self, transaction_repo: Any) -> None:
+        for sender, receiver in [(1, 2), (2, 3), (3, 1), (2, 1)]:
+            transaction_repo.insert_transaction(Transaction(
+                sender_wallet_id=sender, receiver_wallet_id=receiver,
+                transfer_amount=100, transfer_fee=0))
+
+        transactions = transaction_repo.get_related_transactions_after(1, 1)
+
+        assert [tr.id for tr in transactions] == [3, 4]
@@ -0,0 +1,121 @@
+import sqlite3
+from collections.abc import Generator
+from pathlib import Path
+
+import pytest
+
+from database.database_init import init_db
+from database.transaction_archive import archive_transactions
+from entity.transaction import Transaction
+from repository.transaction_repository import TransactionRepository
+from repository.transfer_stats_repository import (
+    TransferStatsMetric,
+    TransferStatsRepository,
+)
+
+# Wallets 1 and 2 belong to Naruto, wallet 3 to Sasuke.
+TRANSFERS = [(1, 3, 100, 2), (3, 2, 40, 0), (2, 3, 500, 10), (3, 1, 7, 1)]
+
+
+@pytest.fixture
+def db_path(tmp_path: Path) -> str:
+    path = str(tmp_path / "wallet.db")
+    init_db(path)
+    with sqlite3.connect(path) as conn:
+        conn.executemany("INSERT INTO Users (name, api_key) VALUES (?, ?)",
+                         [("Naruto", "k1"), ("Sasuke", "k2")])
+        conn.executemany("INSERT INTO Wallets (user_id, balance, wallet_address) "
+                         "VALUES (?, 0, ?)", [(1, "W1"), (1, "W2"), (2, "W3")])
+    return path
+
+
+@pytest.fixture
+def connection(db_path: str) -> Generator[sqlite3.Connection]:
+    conn = sqlite3.connect(db_path)
+    conn.row_factory = sqlite3.Row
+    transactions = TransactionRepository(conn)
+    for sender_id, receiver_id, amount, fee in TRANSFERS:
+        transactions.insert_transaction(Transaction(
+            sender_wallet_id=sender_id, receiver_wallet_id=receiver_id,
+            transfer_amount=amount, transfer_fee=fee))
+    conn.commit()
+    yield conn
+    conn.close()
+
+
+def totals(connection: sqlite3.Connection) -> tuple[list[tuple[int, ...]], ...]:
+    return tuple(
+        [tuple(row) for row in connection.execute(
+            f"SELECT * FROM {table} ORDER BY 1").fetchall()]
+        for table in ("WalletStats", "UserStats"))
+
+
+class TestTransferStats:
+
+    def test_transfers_update_wallet_totals(
+            self, connection: sqlite3.Connection) -> None:
+        wallet_stats, _ = totals(connection)
+
+        # (wallet_id, user_id, sent, received, volume_sent, volume_received, fees)
+        assert wallet_stats == [(1, 1, 1, 1, 100, 6, 2),
+                                (2, 1, 1, 1, 500, 40, 10),
+                                (3, 2, 2, 2, 47, 588, 1)]
+
+    def test_user_totals_cover_all_their_wallets(
+            self, connection: sqlite3.Connection) -> None:
+        _, user_stats = totals(connection)
+
+        assert user_stats == [(1, 2, 2, 600, 46, 12), (2, 2, 2, 47, 588, 1)]
+
+    def test_rolled_back_transfer_is_not_counted(
+            self, connection: sqlite3.Connection) -> None:
+        before = totals(connection)
+        TransactionRepository(connection).insert_transaction(Transaction(
+            sender_wallet_id=1, receiver_wallet_id=2, transfer_amount=5,
+            transfer_fee=1))
+        connection.rollback()
+
+        assert totals(connection) == before
+
+    @pytest.mark.parametrize(("metric", "expected"), [
+        ("fees_paid", ["W2", "W1"]),
+        ("volume_sent", ["W2", "W1"]),
+        ("volume_received", ["W3", "W2"]),
+    ])
+    def test_top_wallets(self, connection: sqlite3.Connection,
+                         metric: TransferStatsMetric, expected: list[str]) -> None:
+        top = TransferStatsRepository(connection).get_top_wallets(metric, 2)
+
+        assert [stats.wallet_address for stats in top] == expected
+
+    def test_top_users(self, connection: sqlite3.Connection) -> None:
+        top = TransferStatsRepository(connection).get_top_users("volume_received", 5)
+
+        assert [(stats.name, stats.volume_received) for stats in top] == [
+            ("Sasuke", 588), ("Naruto", 46)]
+
+    def test_top_n_reads_the_metric_index(
+            self, connection: sqlite3.Connection) -> None:
+        plan = " ".join(row["detail"] for row in connection.execute(
+            "EXPLAIN QUERY PLAN SELECT wallet_id FROM WalletStats "
+            "ORDER BY fees_paid DESC LIMIT 5"))
+
+        assert "idx_wallet_stats_fees_paid" in plan
+        assert "TEMP B-TREE" not in plan
+
+    def test_rebuild_counts_archived_and_hot_transfers(
+            self, db_path: str, tmp_path: Path,
+            connection: sqlite3.Connection) -> None:
+        archive_transactions(db_path, str(tmp_path / "archive"), keep_recent=1,
+                             partition_rows=2, batch_size=1)
+        expected = totals(connection)
+        assert connection.execute(
+            "SELECT COUNT(*) FROM Transactions").fetchone()[0] == 1
+        connection.execute("UPDATE WalletStats SET fees_paid = 0")
+        connection.execute("DELETE FROM UserStats")
+        connection.commit()
+
+        wallets = TransferStatsRepository(connection).rebuild()
+
+        assert wallets == 3
+        assert totals(connection) == expected
@@ -0,0 +1,116 @@
+import time
+from pathlib import Path
+
+import pytest
+
+from database.connection_pool import ConnectionPool
+from database.database_init import init_db
+from dto.transaction_create_dto import TransactionCreateDto
+from entity.transaction import Transaction
+from exception.exceptions import VelocityLimitExceededError
+from repository.transaction_repository import TransactionRepository
+from repository.user_repository import UserRepository
+from repository.wallet_repository import WalletRepository
+from service.metrics import MetricsRegistry
+from service.transaction_service import TransactionService
+from service.velocity_guard import (
+    TransferAttempt,
+    VelocityGuard,
+    parse_velocity_rules,
+)
+
+
+@pytest.fixture
+def pool(tmp_path: Path) -> ConnectionPool:
+    db_path = str(tmp_path / "wallet.db")
+    init_db(db_path)
+    pool = ConnectionPool(db_path, max_idle=2, statement_cache_size=32,
+                          busy_timeout_seconds=1)
+    connection = pool.acquire()
+    connection.execute("INSERT INTO Users (name, api_key) VALUES ('Naruto', 'k')")
+    wallets = WalletRepository(connection)
+    wallets.insert_wallet(1, 1000, "a")
+    wallets.insert_wallet(1, 1000, "b")
+    connection.commit()
+    pool.release(connection)
+    return pool
+
+
+def transfer(pool: ConnectionPool, sender_id: int, amount: int) -> int:
+    connection = pool.acquire()
+    transaction = TransactionRepository(connection).insert_transaction(
+        Transaction(sender_wallet_id=sender_id, receiver_wallet_id=3 - sender_id,
+                    transfer_amount=amount, transfer_fee=0))
+    connection.commit()
+    pool.release(connection)
+    assert transaction.id is not None
+    return transaction.id
+
+
+def make_guard(pool: ConnectionPool, spec: str) -> VelocityGuard:
+    return VelocityGuard(parse_velocity_rules(spec), pool, buckets=60,
+                         metrics=MetricsRegistry(), track_own_transfers=True)
+
+
+def attempt(wallet_id: int, amount: int) -> TransferAttempt:
+    return TransferAttempt(sender_wallet_id=wallet_id, sender_user_id=1,
+                           amount=amount, at=time.time())
+
+
+class TestVelocityGuardSync:
+
+    def test_first_sync_rehydrates_recent_transfers(
+            self, pool: ConnectionPool) -> None:
+        transfer(pool, 1, 10)
+        connection = pool.acquire()
+        connection.execute("UPDATE Postings SET posted_at = posted_at - 7200")
+        connection.commit()
+        pool.release(connection)
+        transfer(pool, 1, 20)
+        transfer(pool, 2, 30)
+        guard = make_guard(pool, "wallet:count:2/3600,user:volume:60/3600")
+
+        assert guard.sync() == 2
+
+        guard.admit(attempt(1, 10))
+        with pytest.raises(VelocityLimitExceededError, match="wallet:count"):
+            guard.admit(attempt(1, 1))
+        with pytest.raises(VelocityLimitExceededError, match="user:volume"):
+            guard.admit(attempt(2, 1))
+
+    def test_sync_takes_in_other_workers_but_not_own_transfers(
+            self, pool: ConnectionPool) -> None:
+        guard = make_guard(pool, "wallet:count:3/60")
+        guard.sync()
+        own = attempt(1, 10)
+        guard.admit(own)
+        guard.record(own, transfer(pool, 1, 10))
+        transfer(pool, 1, 10)
+
+        assert guard.sync() == 1
+
+        guard.admit(attempt(1, 10))
+        with pytest.raises(VelocityLimitExceededError):
+            guard.admit(attempt(1, 10))
+        assert guard.sync() == 0
+
+    def test_rolled_back_transfer_leaves_the_counters(
+            self, pool: ConnectionPool) -> None:
+        guard = make_guard(pool, "wallet:count:1/60")
+        guard.sync()
+        connection = pool.acquire()
+        service = TransactionService(
+            UserRepository(connection), WalletRepository(connection),
+            TransactionRepository(connection), transfer_rules=[guard])
+        service.make_transaction(TransactionCreateDto(
+            sender_wallet_address="a", receiver_wallet_address="b",
+            transfer_amount=10), "k")
+        connection.rollback()
+        pool.release(connection)
+        # Another worker's transfer takes the transaction id rolled back here.
+        transfer(pool, 1, 10)
+
+        assert guard.sync() == 1
+
+        with pytest.raises(VelocityLimitExceededError):
+            guard.admit(attempt(1, 10))
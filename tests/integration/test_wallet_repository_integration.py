@@ -135,3 +135,23 @@ class TestWalletRepositoryIntegration:
 
         assert len(wallets) == 1
         assert wallets[0].id == 1
+
+    @pytest.mark.usefixtures("setup_test_data")
+    def test_insert_wallets_assigns_consecutive_ids_and_opens_them(
+        self,
+        wallet_repo: WalletRepository,
+        db_connection: sqlite3.Connection,
+    ) -> None:
+        wallets = wallet_repo.insert_wallets([(1, 100, "N1"), (2, 200, "N2")])
+
+        assert [(w.id, w.user_id, w.wallet_address) for w in wallets] == [
+            (4, 1, "N1"), (5, 2, "N2")]
+        assert wallet_repo.get_wallets_by_ids([4, 5]) == wallets
+        openings = db_connection.execute(
+            "SELECT account_id, amount FROM Postings WHERE entry_id IN (-4, -5) "
+            "AND account_id > 0 ORDER BY account_id").fetchall()
+        assert [tuple(row) for row in openings] == [(4, 100), (5, 200)]
+
+    @pytest.mark.usefixtures("setup_test_data")
+    def test_count_wallets_by_user_ids(self, wallet_repo: WalletRepository) -> None:
+        assert wallet_repo.count_wallets_by_user_ids([1, 2, 999]) == {1: 2, 2: 1}
@@ -0,0 +1,208 @@
+import asyncio
+import json
+import threading
+import time
+from collections.abc import Generator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from database.connection_pool import ConnectionPool
+from database.database_init import init_db
+from repository.outbox_repository import OutboxRepository
+from service.metrics import MetricsRegistry
+from service.webhook_dispatcher import WebhookDispatcher
+
+
+class WebhookSink(ThreadingHTTPServer):
+    """Records the events POSTed to each path and answers with ``status``
+    after ``delay`` seconds, tracking how many requests overlapped."""
+
+    daemon_threads = True
+    block_on_close = False
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), WebhookSinkHandler)
+        self.status = 200
+        self.delay = 0.0
+        self.received: dict[str, list[list[dict[str, Any]]]] = {}
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+
+    def url(self, path: str) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}{path}"
+
+
+class WebhookSinkHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: WebhookSink
+
+    def do_POST(self) -> None:
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        with self.server.lock:
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight,
+                                            self.server.in_flight)
+            self.server.received.setdefault(self.path, []).append(
+                json.loads(body)["events"])
+        time.sleep(self.server.delay)
+        with self.server.lock:
+            self.server.in_flight -= 1
+        self.send_response(self.server.status)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, message: str, *args: Any) -> None:
+        pass
+
+
+@pytest.fixture
+def sink() -> Generator[WebhookSink]:
+    server = WebhookSink()
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,),
+                              daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pool(tmp_path: Path) -> ConnectionPool:
+    db_path = str(tmp_path / "wallet.db")
+    init_db(db_path)
+    return ConnectionPool(db_path, max_idle=4, statement_cache_size=32,
+                          busy_timeout_seconds=1)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def queue_transfers(pool: ConnectionPool, endpoints: list[str],
+                    transaction_ids: list[int], now: float) -> None:
+    connection = pool.acquire()
+    outbox = OutboxRepository(connection, endpoints)
+    for transaction_id in transaction_ids:
+        outbox.add_transfer_notification(
+            transaction_id, json.dumps({"transaction_id": transaction_id}), now)
+    connection.commit()
+    pool.release(connection)
+
+
+def count_rows(pool: ConnectionPool, table: str) -> int:
+    connection = pool.acquire()
+    try:
+        count: int = connection.execute(
+            f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+        return count
+    finally:
+        pool.release(connection)
+
+
+def make_dispatcher(pool: ConnectionPool, clock: FakeClock,
+                    **kwargs: Any) -> WebhookDispatcher:
+    options: dict[str, Any] = {
+        "batch_size": 100, "max_concurrency": 4, "max_attempts": 3,
+        "backoff_seconds": 10, "max_backoff_seconds": 60,
+        "timeout_seconds": 1,
+    }
+    options.update(kwargs)
+    return WebhookDispatcher(pool, metrics=MetricsRegistry(), clock=clock,
+                             **options)
+
+
+class TestWebhookDispatcher:
+
+    def test_rolled_back_transfer_queues_nothing(
+            self, pool: ConnectionPool) -> None:
+        connection = pool.acquire()
+        OutboxRepository(connection, ["http://hook"]).add_transfer_notification(
+            1, "{}", time.time())
+        connection.rollback()
+        pool.release(connection)
+
+        assert count_rows(pool, "Outbox") == 0
+
+    def test_events_are_batched_per_endpoint(
+            self, pool: ConnectionPool, sink: WebhookSink) -> None:
+        clock = FakeClock()
+        queue_transfers(pool, [sink.url("/a"), sink.url("/b")], [1, 2, 3],
+                        clock.now)
+        dispatcher = make_dispatcher(pool, clock)
+
+        claimed = asyncio.run(dispatcher.dispatch_once())
+
+        assert claimed == 6
+        for path in ("/a", "/b"):
+            [batch] = sink.received[path]
+            assert [event["transaction_id"] for event in batch] == [1, 2, 3]
+        assert count_rows(pool, "Outbox") == 0
+        assert dispatcher._delivered.value == 6
+
+    def test_concurrent_posts_are_limited(
+            self, pool: ConnectionPool, sink: WebhookSink) -> None:
+        clock = FakeClock()
+        sink.delay = 0.1
+        queue_transfers(pool, [sink.url(f"/{n}") for n in range(6)], [1],
+                        clock.now)
+        dispatcher = make_dispatcher(pool, clock, max_concurrency=2)
+
+        asyncio.run(dispatcher.dispatch_once())
+
+        assert len(sink.received) == 6
+        assert sink.max_in_flight <= 2
+
+    def test_claimed_events_are_leased(self, pool: ConnectionPool) -> None:
+        clock = FakeClock()
+        queue_transfers(pool, ["http://hook"], [1], clock.now)
+        dispatcher = make_dispatcher(pool, clock)
+
+        assert len(dispatcher.claim()) == 1
+        assert dispatcher.claim() == []
+        clock.now += dispatcher.lease_seconds
+        assert len(dispatcher.claim()) == 1
+
+    def test_failed_delivery_is_retried_after_backoff(
+            self, pool: ConnectionPool, sink: WebhookSink) -> None:
+        clock = FakeClock()
+        sink.status = 500
+        queue_transfers(pool, [sink.url("/a")], [1], clock.now)
+        dispatcher = make_dispatcher(pool, clock)
+
+        asyncio.run(dispatcher.dispatch_once())
+        assert asyncio.run(dispatcher.dispatch_once()) == 0
+
+        sink.status = 200
+        clock.now += 20
+        assert asyncio.run(dispatcher.dispatch_once()) == 1
+        assert len(sink.received["/a"]) == 2
+        assert count_rows(pool, "Outbox") == 0
+
+    def test_exhausted_events_are_dead_lettered(
+            self, pool: ConnectionPool, sink: WebhookSink) -> None:
+        clock = FakeClock()
+        sink.status = 503
+        queue_transfers(pool, [sink.url("/a")], [1, 2], clock.now)
+        dispatcher = make_dispatcher(pool, clock, max_attempts=2)
+
+        asyncio.run(dispatcher.dispatch_once())
+        clock.now += 60
+        asyncio.run(dispatcher.dispatch_once())
+
+        assert count_rows(pool, "Outbox") == 0
+        connection = pool.acquire()
+        rows = connection.execute(
+            "SELECT transaction_id, attempts, last_error "
+            "FROM OutboxDeadLetters ORDER BY transaction_id").fetchall()
+        pool.release(connection)
+        assert [tuple(row) for row in rows] == [(1, 2, "HTTP 503"),
+                                                (2, 2, "HTTP 503")]
+        assert dispatcher._dead_letters.value == 2
@@ -1,6 +1,28 @@
-from unittest.mock import MagicMock, patch
+import threading
+import time
+from collections.abc import Generator
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from unittest.mock import MagicMock
 
-from service.btc_price_converter import BtcPriceConverter, CoinGeckoBtcPriceConverter
+import pytest
+import requests
+
+from cache.invalidating_cache import InvalidatingCache
+from cache.invalidation_channel import InvalidationChannel
+from exception.exceptions import PriceUnavailableError
+from service.btc_price_converter import (
+    BtcPriceConverter,
+    BudgetedBtcPriceConverter,
+    CachingBtcPriceConverter,
+    CoinGeckoBtcPriceConverter,
+    KrakenBtcPriceConverter,
+    MedianBtcPriceConverter,
+    PriceSource,
+    parse_price_sources,
+)
+from service.circuit_breaker import OPEN, CircuitBreaker
 
 
 class FakeConverter(BtcPriceConverter):
@@ -21,17 +43,251 @@ class TestBtcPriceConverter:
         assert converter.satoshi_to_usd(50_000_000) == 50000.0
 
 
+class FakeCoinGecko(ThreadingHTTPServer):
+    """Answers with the queued (status, body) pairs, repeating the last one,
+    and counts requests and TCP connections."""
+
+    daemon_threads = True
+    block_on_close = False
+
+    def __init__(self) -> None:
+        super().__init__(("127.0.0.1", 0), FakeCoinGeckoHandler)
+        self.responses: list[tuple[int, str]] = [(200, RATE_BODY)]
+        self.requests = 0
+        self.connections = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/simple/price"
+
+    def next_response(self) -> tuple[int, str]:
+        self.requests += 1
+        if len(self.responses) > 1:
+            return self.responses.pop(0)
+        return self.responses[0]
+
+
+class FakeCoinGeckoHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server: FakeCoinGecko
+
+    def setup(self) -> None:
+        super().setup()
+        self.server.connections += 1
+
+    def do_GET(self) -> None:
+        status, body = self.server.next_response()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, message: str, *args: Any) -> None:
+        pass
+
+
+RATE_BODY = '{"bitcoin": {"usd": 97000.0}}'
+
+
+@pytest.fixture
+def coingecko() -> Generator[FakeCoinGecko]:
+    server = FakeCoinGecko()
+    thread = threading.Thread(target=server.serve_forever, args=(0.01,),
+                              daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_converter(server: FakeCoinGecko,
+                   **kwargs: Any) -> CoinGeckoBtcPriceConverter:
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=60)
+    return CoinGeckoBtcPriceConverter(server.url, timeout_seconds=1,
+                                      max_attempts=3, backoff_seconds=0.001,
+                                      breaker=breaker, **kwargs)
+
+
 class TestCoinGeckoBtcPriceConverter:
 
-    @patch("service.btc_price_converter.requests.get")
-    def test_get_btc_to_usd_rate(self, mock_get: MagicMock) -> None:
-        mock_response = MagicMock()
-        mock_response.json.return_value = {"bitcoin": {"usd": 97000.0}}
-        mock_response.raise_for_status.return_value = None
-        mock_get.return_value = mock_response
+    def test_reuses_one_connection(self, coingecko: FakeCoinGecko) -> None:
+        converter = make_converter(coingecko)
+
+        rates = [converter.get_btc_to_usd_rate() for _ in range(3)]
+
+        assert rates == [97000.0] * 3
+        assert coingecko.connections == 1
+
+    def test_retries_server_errors(self, coingecko: FakeCoinGecko) -> None:
+        coingecko.responses = [(503, "{}"), (500, "{}"), (200, RATE_BODY)]
+        converter = make_converter(coingecko)
+
+        assert converter.get_btc_to_usd_rate() == 97000.0
+        assert coingecko.requests == 3
+        assert converter.rate_age_seconds() is None
+
+    def test_open_circuit_serves_last_known_rate_without_calling(
+            self, coingecko: FakeCoinGecko) -> None:
+        converter = make_converter(coingecko)
+        converter.get_btc_to_usd_rate()
+        coingecko.responses = [(503, "{}")]
+
+        assert converter.get_btc_to_usd_rate() == 97000.0
+        assert converter.get_btc_to_usd_rate() == 97000.0
+        requests_when_opened = coingecko.requests
+        assert converter.breaker.state == OPEN
+
+        assert converter.get_btc_to_usd_rate() == 97000.0
+        assert coingecko.requests == requests_when_opened
+        assert converter.rate_age_seconds() is not None
+
+    def test_raises_without_a_rate_to_fall_back_to(
+            self, coingecko: FakeCoinGecko) -> None:
+        coingecko.responses = [(404, "{}")]
+        converter = make_converter(coingecko)
+
+        with pytest.raises(requests.HTTPError):
+            converter.get_btc_to_usd_rate()
+        assert coingecko.requests == 1
+        with pytest.raises(requests.HTTPError):
+            converter.get_btc_to_usd_rate()
+        with pytest.raises(PriceUnavailableError):
+            converter.get_btc_to_usd_rate()
+
+    def test_failure_is_raised_when_not_serving_last_known(
+            self, coingecko: FakeCoinGecko) -> None:
+        converter = make_converter(coingecko, serve_last_known=False)
+        converter.get_btc_to_usd_rate()
+        coingecko.responses = [(500, "{}")]
+
+        with pytest.raises(requests.HTTPError):
+            converter.get_btc_to_usd_rate()
+
+
+class StubSource(BtcPriceConverter):
+    def __init__(self, rate: float, delay_seconds: float = 0.0,
+                 error: Exception | None = None) -> None:
+        self.rate = rate
+        self.delay_seconds = delay_seconds
+        self.error = error
+
+    def get_btc_to_usd_rate(self) -> float:
+        time.sleep(self.delay_seconds)
+        if self.error:
+            raise self.error
+        return self.rate
+
+
+@contextmanager
+def median_of(*sources: PriceSource,
+              min_sources: int = 1) -> Generator[MedianBtcPriceConverter]:
+    converter = MedianBtcPriceConverter(list(sources), min_sources)
+    try:
+        yield converter
+    finally:
+        converter.close()
+
+
+def stub(rate: float, delay_seconds: float = 0.0, error: Exception | None = None,
+         deadline_seconds: float = 0.5) -> PriceSource:
+    return PriceSource("stub", StubSource(rate, delay_seconds, error),
+                       deadline_seconds)
+
+
+class TestMedianBtcPriceConverter:
+
+    def test_median_ignores_one_wrong_source(self) -> None:
+        with median_of(stub(97000.0), stub(97100.0), stub(1.0)) as converter:
+            assert converter.get_btc_to_usd_rate() == 97000.0
+
+    def test_does_not_wait_past_a_slow_sources_deadline(self) -> None:
+        with median_of(stub(97000.0),
+                       stub(1.0, delay_seconds=0.5, deadline_seconds=0.05)
+                       ) as converter:
+            started = time.monotonic()
+            assert converter.get_btc_to_usd_rate() == 97000.0
+            assert time.monotonic() - started < 0.4
+
+    def test_sources_are_queried_concurrently(self) -> None:
+        with median_of(*(stub(97000.0, delay_seconds=0.2)
+                         for _ in range(3))) as converter:
+            started = time.monotonic()
+            assert converter.get_btc_to_usd_rate() == 97000.0
+            assert time.monotonic() - started < 0.5
+
+    def test_too_few_answers_raise(self) -> None:
+        with (median_of(stub(97000.0), stub(0.0, error=ValueError("down")),
+                        min_sources=2) as converter,
+              pytest.raises(PriceUnavailableError)):
+            converter.get_btc_to_usd_rate()
+
+
+def test_parse_price_sources() -> None:
+    sources = parse_price_sources("coingecko, kraken:0.8", 1.5,
+                                  serve_last_known=False)
+
+    assert [(source.name, source.deadline_seconds) for source in sources] == [
+        ("coingecko", 1.5), ("kraken", 0.8)]
+    assert isinstance(sources[1].converter, KrakenBtcPriceConverter)
+    with pytest.raises(ValueError, match="Unknown BTC price source"):
+        parse_price_sources("nope", 1.5, serve_last_known=False)
+
+
+class TestCachingBtcPriceConverter:
+
+    def test_reuses_rate_until_invalidated(self) -> None:
+        source = MagicMock()
+        source.get_btc_to_usd_rate.side_effect = [97000.0, 98000.0]
+        rate_cache = InvalidatingCache[float](InvalidationChannel(), "btc_rate", 1)
+        converter = CachingBtcPriceConverter(source, rate_cache)
+
+        assert converter.get_btc_to_usd_rate() == 97000.0
+        assert converter.get_btc_to_usd_rate() == 97000.0
+        rate_cache.invalidate(CachingBtcPriceConverter.CACHE_KEY)
+        assert converter.get_btc_to_usd_rate() == 98000.0
+
+
+@contextmanager
+def budgeted(source: BtcPriceConverter,
+             budget_seconds: float) -> Generator[BudgetedBtcPriceConverter]:
+    converter = BudgetedBtcPriceConverter(source, budget_seconds)
+    try:
+        yield converter
+    finally:
+        converter.close()
+
+
+class TestBudgetedBtcPriceConverter:
+
+    def test_slow_lookup_is_abandoned_but_warms_the_cache(self) -> None:
+        rate_cache = InvalidatingCache[float](InvalidationChannel(), "btc_rate", 1)
+        source = CachingBtcPriceConverter(StubSource(97000.0, delay_seconds=0.2),
+                                          rate_cache)
+        with budgeted(source, 0.05) as converter:
+            started = time.monotonic()
+            with pytest.raises(PriceUnavailableError, match="within 0.05s"):
+                converter.get_btc_to_usd_rate()
+            assert time.monotonic() - started < 0.15
+
+            time.sleep(0.3)
+            assert converter.cached_rate() == 97000.0
+            assert converter.get_btc_to_usd_rate() == 97000.0
+
+    def test_waiting_callers_share_one_lookup(self) -> None:
+        source = MagicMock(wraps=StubSource(97000.0, delay_seconds=0.1))
+        with budgeted(source, 1.0) as converter:
+            threads = [threading.Thread(target=converter.get_btc_to_usd_rate)
+                       for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
 
-        converter = CoinGeckoBtcPriceConverter()
-        rate = converter.get_btc_to_usd_rate()
+        assert source.get_btc_to_usd_rate.call_count == 1
 
-        assert rate == 97000.0
-        mock_get.assert_called_once()
+    def test_failed_lookup_is_reported_as_unavailable(self) -> None:
+        with (budgeted(StubSource(0.0, error=ValueError("bad JSON")), 1.0)
+              as converter,
+              pytest.raises(PriceUnavailableError, match="bad JSON")):
+            converter.get_btc_to_usd_rate()
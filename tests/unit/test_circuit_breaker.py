@@ -0,0 +1,53 @@
+from service.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestCircuitBreaker:
+
+    def test_opens_after_consecutive_failures(self) -> None:
+        breaker = CircuitBreaker(failure_threshold=2, reset_seconds=10,
+                                 clock=FakeClock())
+
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        assert breaker.allow()
+        breaker.record_failure()
+
+        assert breaker.state == OPEN
+        assert not breaker.allow()
+
+    def test_lets_one_trial_through_after_reset_timeout(self) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=1, reset_seconds=10, clock=clock)
+        breaker.record_failure()
+
+        clock.now = 10
+        assert breaker.allow()
+        assert breaker.state == HALF_OPEN
+        assert not breaker.allow()
+        breaker.record_success()
+
+        assert breaker.state == CLOSED
+        assert breaker.allow()
+
+    def test_failed_trial_reopens(self) -> None:
+        clock = FakeClock()
+        breaker = CircuitBreaker(failure_threshold=3, reset_seconds=10, clock=clock)
+        for _ in range(3):
+            breaker.record_failure()
+
+        clock.now = 10
+        assert breaker.allow()
+        breaker.record_failure()
+
+        assert breaker.state == OPEN
+        clock.now = 19
+        assert not breaker.allow()
@@ -0,0 +1,121 @@
+import json
+import os
+import random
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from service.fee_schedule import (
+    FeeEngine,
+    FeeRules,
+    FeeSchedule,
+    FeeTier,
+    parse_fee_rules,
+)
+
+# Every satoshi that can ever exist: 21 million BTC.
+MAX_SATOSHIS = 21_000_000 * 100_000_000
+
+
+def legacy_fee(amount: int) -> int:
+    return int(amount * 0.015)
+
+
+def write_config(path: Path, config: dict[str, Any], mtime_ns: int) -> None:
+    path.write_text(json.dumps(config))
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+class TestDefaultScheduleMatchesLegacyFee:
+
+    def test_small_amounts_exhaustively(self) -> None:
+        rules = FeeRules.flat()
+
+        for amount in range(100_000):
+            assert rules.transfer_fee(1, amount, 0) == legacy_fee(amount)
+
+    def test_random_amounts_up_to_total_supply(self) -> None:
+        rules = FeeRules.flat()
+        rng = random.Random(20261019)
+        amounts = [rng.randrange(MAX_SATOSHIS + 1) for _ in range(200_000)]
+        amounts += [rng.randrange(min(10 ** digits, MAX_SATOSHIS + 1))
+                    for digits in range(1, 17) for _ in range(1_000)]
+        amounts += [MAX_SATOSHIS, MAX_SATOSHIS - 1, 2 ** 52, 2 ** 53 - 1]
+
+        for amount in amounts:
+            assert rules.transfer_fee(1, amount, 0) == legacy_fee(amount), amount
+
+
+class TestFeeSchedule:
+
+    def test_tier_is_selected_by_amount(self) -> None:
+        schedule = FeeSchedule([
+            FeeTier(100_000_000, 100), FeeTier(0, 150), FeeTier(1_000, 200)
+        ])
+
+        assert schedule.fee_for(999) == 14
+        assert schedule.fee_for(1_000) == 20
+        assert schedule.fee_for(100_000_000) == 1_000_000
+
+    def test_amount_below_lowest_tier_is_free(self) -> None:
+        assert FeeSchedule([FeeTier(1_000, 150)]).fee_for(999) == 0
+
+    def test_rejects_invalid_tiers(self) -> None:
+        with pytest.raises(ValueError, match="basis_points"):
+            FeeSchedule([FeeTier(0, 10_001)])
+        with pytest.raises(ValueError, match="distinct"):
+            FeeSchedule([FeeTier(0, 100), FeeTier(0, 150)])
+
+
+class TestFeeRules:
+
+    def test_user_override_and_effective_dates(self) -> None:
+        switch = "2026-06-01T00:00:00+00:00"
+        rules = parse_fee_rules({
+            "default": [
+                {"tiers": [{"min_amount": 0, "basis_points": 150}]},
+                {"effective_from": switch,
+                 "tiers": [{"min_amount": 0, "basis_points": 100}]},
+            ],
+            "users": {"7": [{"effective_from": switch,
+                             "tiers": [{"min_amount": 0, "basis_points": 0}]}]},
+        })
+        before = datetime.fromisoformat("2026-05-31T23:59:59+00:00").timestamp()
+        after = datetime.fromisoformat(switch).timestamp()
+
+        assert rules.transfer_fee(1, 10_000, before) == 150
+        assert rules.transfer_fee(1, 10_000, after) == 100
+        assert rules.transfer_fee(7, 10_000, before) == 150
+        assert rules.transfer_fee(7, 10_000, after) == 0
+
+
+class TestFeeEngine:
+
+    def test_defaults_to_flat_fee(self) -> None:
+        assert FeeEngine().transfer_fee(1, 1000) == 15
+
+    def test_hot_reloads_changed_config(self, tmp_path: Path) -> None:
+        path = tmp_path / "fees.json"
+        write_config(path, {"default": [{"tiers": [
+            {"min_amount": 0, "basis_points": 150}]}]}, 1_000_000_000)
+        engine = FeeEngine(str(path), reload_interval_seconds=0)
+        assert engine.transfer_fee(1, 1000) == 15
+
+        write_config(path, {"default": [{"tiers": [
+            {"min_amount": 0, "basis_points": 50}]}]}, 2_000_000_000)
+
+        assert engine.transfer_fee(1, 1000) == 5
+
+    def test_keeps_previous_rules_when_config_is_broken(
+            self, tmp_path: Path) -> None:
+        path = tmp_path / "fees.json"
+        write_config(path, {"default": [{"tiers": [
+            {"min_amount": 0, "basis_points": 50}]}]}, 1_000_000_000)
+        engine = FeeEngine(str(path), reload_interval_seconds=0)
+
+        path.write_text("{not json")
+        os.utime(path, ns=(2_000_000_000, 2_000_000_000))
+
+        assert engine.transfer_fee(1, 1000) == 5
@@ -0,0 +1,92 @@
+import multiprocessing
+from pathlib import Path
+
+from cache.invalidating_cache import InvalidatingCache
+from cache.invalidation_channel import InvalidationChannel, create_channel_file
+
+
+def bump_in_child(path: str, key: str, times: int) -> None:
+    channel = InvalidationChannel(path)
+    for _ in range(times):
+        channel.bump(key)
+    channel.close()
+
+
+class TestInvalidationChannel:
+
+    def test_bump_advances_generation(self) -> None:
+        channel = InvalidationChannel()
+        before = channel.generation("user:key1")
+
+        channel.bump("user:key1")
+
+        assert channel.generation("user:key1") == before + 1
+
+    def test_bumps_are_visible_across_processes(self, tmp_path: Path) -> None:
+        path = str(tmp_path / "invalidation.channel")
+        create_channel_file(path)
+        channel = InvalidationChannel(path)
+
+        workers = [
+            multiprocessing.Process(target=bump_in_child,
+                                    args=(path, "wallet:W1", 50))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert channel.generation("wallet:W1") == 200
+
+
+class TestInvalidatingCache:
+
+    def test_load_caches_value(self) -> None:
+        cache = InvalidatingCache[str](InvalidationChannel(), "user", 10)
+        calls: list[str] = []
+
+        def loader() -> str:
+            calls.append("load")
+            return "Naruto"
+
+        assert cache.load("key1", loader) == "Naruto"
+        assert cache.load("key1", loader) == "Naruto"
+        assert calls == ["load"]
+
+    def test_invalidate_from_another_worker_forces_reload(
+            self, tmp_path: Path) -> None:
+        path = str(tmp_path / "invalidation.channel")
+        create_channel_file(path)
+        cache = InvalidatingCache[str](InvalidationChannel(path), "wallet", 10)
+        other_worker = InvalidatingCache[str](InvalidationChannel(path), "wallet", 10)
+        cache.load("W1", lambda: "old")
+
+        other_worker.invalidate("W1")
+
+        assert cache.get("W1") is None
+        assert cache.load("W1", lambda: "new") == "new"
+
+    def test_missing_values_are_not_cached(self) -> None:
+        cache = InvalidatingCache[str](InvalidationChannel(), "user", 10)
+
+        assert cache.load("missing", lambda: None) is None
+        assert cache.load("missing", lambda: "created") == "created"
+
+    def test_ttl_expires_entries(self) -> None:
+        cache = InvalidatingCache[float](InvalidationChannel(), "btc_rate", 1,
+                                         ttl_seconds=0)
+        cache.load("btc_usd", lambda: 97000.0)
+
+        assert cache.get("btc_usd") is None
+
+    def test_evicts_least_recently_used(self) -> None:
+        cache = InvalidatingCache[int](InvalidationChannel(), "user", 2)
+        cache.load("a", lambda: 1)
+        cache.load("b", lambda: 2)
+        cache.get("a")
+        cache.load("c", lambda: 3)
+
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
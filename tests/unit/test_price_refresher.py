@@ -0,0 +1,88 @@
+import asyncio
+import time
+from unittest.mock import MagicMock
+
+import pytest
+
+from service.metrics import MetricsRegistry
+from service.price_refresher import (
+    PriceRefresher,
+    RateSnapshot,
+    SnapshotBtcPriceConverter,
+)
+
+
+class TestPriceRefresher:
+
+    @pytest.fixture
+    def source(self) -> MagicMock:
+        source = MagicMock()
+        source.get_btc_to_usd_rate.return_value = 97000.0
+        return source
+
+    @pytest.fixture
+    def metrics(self) -> MetricsRegistry:
+        return MetricsRegistry()
+
+    @pytest.fixture
+    def refresher(self, source: MagicMock,
+                  metrics: MetricsRegistry) -> PriceRefresher:
+        return PriceRefresher(source, interval_seconds=10,
+                              max_backoff_seconds=60,
+                              staleness_threshold_seconds=30, metrics=metrics)
+
+    def test_poll_publishes_snapshot(self, refresher: PriceRefresher) -> None:
+        asyncio.run(refresher.poll_once())
+
+        assert refresher.snapshot is not None
+        assert refresher.snapshot.rate == 97000.0
+        assert not refresher.is_stale()
+
+    def test_converter_reads_published_snapshot(
+            self, refresher: PriceRefresher, source: MagicMock) -> None:
+        refresher.snapshot = RateSnapshot(95000.0, time.time() - 5)
+        converter = SnapshotBtcPriceConverter(refresher)
+
+        assert converter.get_btc_to_usd_rate() == 95000.0
+        assert converter.satoshi_to_usd(50_000_000) == 47500.0
+        age = converter.rate_age_seconds()
+        assert age is not None
+        assert 5 <= age < 6
+        source.get_btc_to_usd_rate.assert_not_called()
+
+    def test_converter_fetches_before_first_poll(
+            self, refresher: PriceRefresher) -> None:
+        converter = SnapshotBtcPriceConverter(refresher)
+
+        assert converter.get_btc_to_usd_rate() == 97000.0
+        assert refresher.snapshot is not None
+
+    def test_failed_poll_keeps_last_snapshot_and_backs_off(
+            self, refresher: PriceRefresher, source: MagicMock,
+            metrics: MetricsRegistry) -> None:
+        asyncio.run(refresher.poll_once())
+        published = refresher.snapshot
+        source.get_btc_to_usd_rate.side_effect = ConnectionError("down")
+
+        delays = []
+        for _ in range(4):
+            asyncio.run(refresher.poll_once())
+            delays.append(refresher.next_delay())
+
+        assert refresher.snapshot is published
+        assert metrics.counter("btc_price_fetch_failures_total", "").value == 4
+        assert 10 <= delays[0] <= 20
+        assert all(30 <= delay <= 60 for delay in delays[2:])
+
+    def test_staleness_alert_fires_once_per_episode(
+            self, refresher: PriceRefresher, source: MagicMock,
+            metrics: MetricsRegistry) -> None:
+        refresher.snapshot = RateSnapshot(97000.0, time.time() - 120)
+        source.get_btc_to_usd_rate.side_effect = ConnectionError("down")
+
+        asyncio.run(refresher.poll_once())
+        asyncio.run(refresher.poll_once())
+
+        alerts = metrics.counter("btc_price_staleness_alerts_total", "")
+        assert alerts.value == 1
+        assert "btc_price_snapshot_stale 1.0" in metrics.render()
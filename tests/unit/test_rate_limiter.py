@@ -0,0 +1,87 @@
+import multiprocessing
+from pathlib import Path
+
+import pytest
+
+from middleware.rate_limiter import (
+    AdmissionController,
+    TokenBucketStore,
+    create_store_file,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 100.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def take_in_child(path: str, times: int,
+                  admitted: "multiprocessing.Queue[int]") -> None:
+    store = TokenBucketStore(path)
+    admitted.put(sum(store.take(b"key1", 0.001, 100) == 0 for _ in range(times)))
+    store.close()
+
+
+class TestTokenBucketStore:
+
+    def test_burst_then_refill(self) -> None:
+        clock = FakeClock()
+        store = TokenBucketStore(clock=clock)
+
+        assert [store.take(b"key1", 2, 3) for _ in range(3)] == [0, 0, 0]
+        assert store.take(b"key1", 2, 3) == pytest.approx(0.5)
+        clock.now += 0.5
+        assert store.take(b"key1", 2, 3) == 0
+
+    def test_keys_have_separate_buckets(self) -> None:
+        store = TokenBucketStore(clock=FakeClock())
+
+        store.take(b"key1", 1, 1)
+
+        assert store.take(b"key1", 1, 1) > 0
+        assert store.take(b"key2", 1, 1) == 0
+
+    def test_buckets_are_shared_across_processes(self, tmp_path: Path) -> None:
+        path = str(tmp_path / "rate_limit.buckets")
+        create_store_file(path)
+        admitted: multiprocessing.Queue[int] = multiprocessing.Queue()
+
+        workers = [
+            multiprocessing.Process(target=take_in_child, args=(path, 50, admitted))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        assert sum(admitted.get() for _ in workers) == 100
+
+
+class TestAdmissionController:
+
+    def test_sheds_at_in_flight_limit(self) -> None:
+        admission = AdmissionController(max_in_flight=2, max_p99_ms=0)
+
+        admission.started()
+        assert not admission.should_shed()
+        admission.started()
+        assert admission.should_shed()
+        admission.finished(1.0)
+        assert not admission.should_shed()
+
+    def test_sheds_while_recent_p99_is_high(self) -> None:
+        clock = FakeClock()
+        admission = AdmissionController(max_in_flight=0, max_p99_ms=100,
+                                        window_seconds=10, clock=clock)
+        for duration in [5.0] * 98 + [500.0] * 2:
+            admission.started()
+            admission.finished(duration)
+
+        assert admission.p99_ms() == 500
+        assert admission.should_shed()
+        clock.now += 11
+        assert not admission.should_shed()
@@ -0,0 +1,69 @@
+import threading
+import time
+from collections import Counter
+from collections.abc import Generator
+
+import pytest
+
+from exception.exceptions import ProfilerBusyError
+from service.sampling_profiler import SamplingProfiler, summarize
+
+
+def spin(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+@pytest.fixture
+def busy_thread() -> Generator[None]:
+    stop = threading.Event()
+    thread = threading.Thread(target=spin, args=(stop,))
+    thread.start()
+    yield
+    stop.set()
+    thread.join()
+
+
+class TestSamplingProfiler:
+
+    @pytest.mark.usefixtures("busy_thread")
+    def test_samples_project_code_running_on_other_threads(self) -> None:
+        profile = SamplingProfiler().profile(0.2, 0.002)
+
+        spin_label = f"{__name__}:spin"
+        assert profile.samples > 0
+        assert any(stack[-1] == spin_label for stack in profile.stacks)
+        functions = {function.function: function for function in profile.functions}
+        assert functions[spin_label].cumulative_samples > 0
+        assert functions[spin_label].cumulative_seconds > 0
+
+    @pytest.mark.usefixtures("busy_thread")
+    def test_collapsed_output_is_one_stack_per_line(self) -> None:
+        collapsed = SamplingProfiler().profile(0.1, 0.002).collapsed()
+
+        for line in collapsed.splitlines():
+            stack, count = line.rsplit(" ", 1)
+            assert ";" in stack
+            assert int(count) > 0
+
+    def test_only_one_profile_runs_at_a_time(self) -> None:
+        profiler = SamplingProfiler()
+        thread = threading.Thread(target=profiler.profile, args=(0.3, 0.01))
+        thread.start()
+        time.sleep(0.05)
+
+        with pytest.raises(ProfilerBusyError):
+            profiler.profile(0.1, 0.01)
+        thread.join()
+
+
+def test_summarize_counts_recursion_once_per_stack() -> None:
+    stacks = Counter({("main", "walk", "walk"): 3, ("main", "save"): 1})
+
+    functions = {f.function: f for f in summarize(stacks, 0.01)}
+
+    assert functions["walk"].cumulative_samples == 3
+    assert functions["walk"].self_samples == 3
+    assert functions["main"].cumulative_samples == 4
+    assert functions["main"].self_samples == 0
+    assert functions["main"].cumulative_seconds == pytest.approx(0.04)
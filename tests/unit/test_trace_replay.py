@@ -0,0 +1,86 @@
+import random
+import sqlite3
+from pathlib import Path
+
+from benchmarks.trace_replay import (
+    REQUEST_KINDS,
+    SEED_BALANCE,
+    RequestPlanner,
+    api_key,
+    percentile,
+    seed,
+    synthesize,
+)
+from middleware.trace_recorder import TraceEvent
+
+
+def event(method: str, route: str, key: str | None, at: float = 1.0) -> TraceEvent:
+    return TraceEvent(at=at, method=method, route=route, key=key, request_bytes=0,
+                      response_bytes=0, status=200, duration_ms=1.0)
+
+
+class TestRequestPlanner:
+
+    def test_same_key_maps_to_same_user(self) -> None:
+        planner = RequestPlanner(users=50, wallets_per_user=3, rng=random.Random(1))
+
+        first = planner.plan(event("GET", "/transactions", "ab12"), scale=1)
+        second = planner.plan(event("GET", "/transactions", "ab12"), scale=1)
+
+        assert first is not None
+        assert second is not None
+        assert first.headers == second.headers == {"x-api-key": api_key(0xAB12 % 50)}
+
+    def test_transfer_is_sent_from_own_wallet(self) -> None:
+        planner = RequestPlanner(users=10, wallets_per_user=3, rng=random.Random(1))
+
+        request = planner.plan(event("POST", "/transactions", "3"), scale=1)
+
+        assert request is not None
+        assert request.body is not None
+        assert request.body["sender_wallet_address"].startswith("replay-wallet-3-")
+
+    def test_scale_compresses_arrival_times(self) -> None:
+        planner = RequestPlanner(users=10, wallets_per_user=3, rng=random.Random(1))
+
+        request = planner.plan(event("GET", "/wallets", "1", at=3.0), scale=2)
+
+        assert request is not None
+        assert request.at == 1.5
+
+    def test_unknown_routes_are_skipped(self) -> None:
+        planner = RequestPlanner(users=10, wallets_per_user=3, rng=random.Random(1))
+
+        assert planner.plan(event("GET", "<unmatched>", None), scale=1) is None
+
+
+def test_synthesize_follows_rate_and_mix() -> None:
+    events = synthesize(rate=200, duration=10, mix={"make_transaction": 3,
+                                                    "get_wallet": 1},
+                        users=10, rng=random.Random(7))
+
+    transfers = sum(e.route == REQUEST_KINDS["make_transaction"][1] for e in events)
+    assert 1800 < len(events) < 2200
+    assert 0.7 < transfers / len(events) < 0.8
+    assert all(a.at <= b.at for a, b in zip(events, events[1:], strict=False))
+
+
+def test_percentile_uses_nearest_rank() -> None:
+    values = [float(v) for v in range(1, 101)]
+
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([5.0], 0.99) == 5.0
+    assert percentile([], 0.5) == 0.0
+
+
+def test_seeded_wallets_open_in_the_ledger(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "replay.db")
+
+    seed(db_path, users=3, wallets_per_user=2)
+
+    with sqlite3.connect(db_path) as connection:
+        openings = connection.execute(
+            "SELECT w.balance, p.balance_after FROM Wallets w"
+            " JOIN Postings p ON p.account_id = w.id").fetchall()
+    assert openings == [(SEED_BALANCE, SEED_BALANCE)] * 6
@@ -0,0 +1,64 @@
+from pathlib import Path
+
+from database.transaction_log import TransactionLog
+from entity.transaction import Transaction
+
+
+def make_transaction(transaction_id: int) -> Transaction:
+    return Transaction(
+        id=transaction_id, sender_wallet_id=1, receiver_wallet_id=2,
+        transfer_amount=1000 * transaction_id, transfer_fee=15 * transaction_id
+    )
+
+
+class TestTransactionLog:
+
+    def test_replay_returns_appended_records_in_order(self, tmp_path: Path) -> None:
+        log = TransactionLog(str(tmp_path / "wallet.log"))
+        for transaction_id in range(1, 4):
+            log.append(make_transaction(transaction_id))
+        log.close()
+
+        replayed = list(TransactionLog(str(tmp_path / "wallet.log")).replay())
+
+        assert replayed == [make_transaction(i) for i in range(1, 4)]
+
+    def test_replay_truncates_torn_tail(self, tmp_path: Path) -> None:
+        path = tmp_path / "wallet.log"
+        log = TransactionLog(str(path))
+        log.append(make_transaction(1))
+        log.append(make_transaction(2))
+        log.close()
+        intact_size = path.stat().st_size
+        with open(path, "ab") as log_file:
+            log_file.write(b"\x28\x00\x00\x00\x01")
+
+        replayed = list(TransactionLog(str(path)).replay())
+
+        assert [tr.id for tr in replayed] == [1, 2]
+        assert path.stat().st_size == intact_size
+
+    def test_replay_stops_at_corrupt_record(self, tmp_path: Path) -> None:
+        path = tmp_path / "wallet.log"
+        log = TransactionLog(str(path))
+        log.append(make_transaction(1))
+        log.append(make_transaction(2))
+        log.close()
+        data = bytearray(path.read_bytes())
+        data[-1] ^= 0xFF
+        path.write_bytes(bytes(data))
+
+        replayed = list(TransactionLog(str(path)).replay())
+
+        assert [tr.id for tr in replayed] == [1]
+
+    def test_reset_empties_log(self, tmp_path: Path) -> None:
+        log = TransactionLog(str(tmp_path / "wallet.log"))
+        log.append(make_transaction(1))
+        log.reset()
+        log.append(make_transaction(2))
+        log.close()
+
+        replayed = list(TransactionLog(str(tmp_path / "wallet.log")).replay())
+
+        assert [tr.id for tr in replayed] == [2]
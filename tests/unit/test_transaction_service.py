@@ -1,13 +1,17 @@
+from dataclasses import replace
 from typing import Any
 from unittest.mock import MagicMock
 
 import pytest
 
 from dto.transaction_create_dto import TransactionCreateDto
+from entity.transaction import Transaction
+from entity.transfer_stats import WalletTransferStats
 from exception.exceptions import (
     NotEnoughBalanceError,
     UnauthorizedWalletAccessError,
     UserNotFoundError,
+    VelocityLimitExceededError,
     WalletNotFoundError,
 )
 from service.transaction_service import TransactionService
@@ -64,6 +68,96 @@ class TestTransactionService:
         mock_repos["wallet"].update_balance.assert_any_call("1", 9000)
         mock_repos["wallet"].update_balance.assert_any_call("2", 5985)
 
+    def test_make_transaction_publishes_event(
+            self, mock_repos: dict[str, Any]) -> None:
+        broker = MagicMock()
+        service = TransactionService(mock_repos["user"], mock_repos["wallet"],
+                                     mock_repos["transaction"], event_broker=broker)
+        mock_repos["user"].find_user_by_api_key.return_value = MagicMock(id=1)
+        sender = MagicMock(id=10, user_id=1, balance=100, wallet_address="1")
+        receiver = MagicMock(id=20, user_id=1, balance=100, wallet_address="2")
+        mock_repos["wallet"].get_wallet_by_address.side_effect = [sender, receiver]
+        mock_repos["transaction"].insert_transaction.side_effect = (
+            lambda transaction: replace(transaction, id=7))
+
+        dto = TransactionCreateDto(sender_wallet_address="1",
+                                   receiver_wallet_address="2", transfer_amount=50)
+        service.make_transaction(dto, "key")
+
+        [published], _ = broker.publish.call_args
+        assert published.transaction_id == 7
+        assert published.receiver_wallet_address == "2"
+
+    def test_make_transaction_runs_transfer_rules_first(
+            self, mock_repos: dict[str, Any]) -> None:
+        rule = MagicMock()
+        rule.admit.side_effect = VelocityLimitExceededError("Too fast")
+        service = TransactionService(mock_repos["user"], mock_repos["wallet"],
+                                     mock_repos["transaction"], transfer_rules=[rule])
+        mock_repos["user"].find_user_by_api_key.return_value = MagicMock(id=1)
+        sender = MagicMock(id=10, user_id=1, balance=100, wallet_address="1")
+        receiver = MagicMock(id=20, user_id=2, balance=100, wallet_address="2")
+        mock_repos["wallet"].get_wallet_by_address.side_effect = [sender, receiver]
+
+        dto = TransactionCreateDto(sender_wallet_address="1",
+                                   receiver_wallet_address="2", transfer_amount=50)
+        with pytest.raises(VelocityLimitExceededError):
+            service.make_transaction(dto, "key")
+
+        [attempt], _ = rule.admit.call_args
+        assert (attempt.sender_wallet_id, attempt.sender_user_id,
+                attempt.amount) == (10, 1, 50)
+        mock_repos["wallet"].update_balance.assert_not_called()
+        rule.cancel.assert_not_called()
+
+    def test_make_transaction_records_or_cancels_admitted_transfers(
+            self, mock_repos: dict[str, Any]) -> None:
+        rule = MagicMock()
+        service = TransactionService(mock_repos["user"], mock_repos["wallet"],
+                                     mock_repos["transaction"], transfer_rules=[rule])
+        mock_repos["user"].find_user_by_api_key.return_value = MagicMock(id=1)
+        sender = MagicMock(id=10, user_id=1, balance=100, wallet_address="1")
+        receiver = MagicMock(id=20, user_id=1, balance=100, wallet_address="2")
+        mock_repos["wallet"].get_wallet_by_address.side_effect = [
+            sender, receiver, sender, receiver]
+        mock_repos["transaction"].insert_transaction.side_effect = [
+            replace(Transaction(sender_wallet_id=10, receiver_wallet_id=20,
+                                transfer_amount=50, transfer_fee=0), id=7),
+            RuntimeError("disk I/O error"),
+        ]
+        dto = TransactionCreateDto(sender_wallet_address="1",
+                                   receiver_wallet_address="2", transfer_amount=50)
+
+        service.make_transaction(dto, "key")
+        with pytest.raises(RuntimeError):
+            service.make_transaction(dto, "key")
+
+        [attempt, transaction_id], _ = rule.record.call_args
+        assert transaction_id == 7
+        rule.cancel.assert_called_once()
+        assert rule.admit.call_count == 2
+
+    def test_make_transaction_queues_webhook_notification(
+            self, mock_repos: dict[str, Any]) -> None:
+        outbox = MagicMock()
+        service = TransactionService(mock_repos["user"], mock_repos["wallet"],
+                                     mock_repos["transaction"], outbox_repo=outbox)
+        mock_repos["user"].find_user_by_api_key.return_value = MagicMock(id=1)
+        sender = MagicMock(id=10, user_id=1, balance=100, wallet_address="1")
+        receiver = MagicMock(id=20, user_id=1, balance=100, wallet_address="2")
+        mock_repos["wallet"].get_wallet_by_address.side_effect = [sender, receiver]
+        mock_repos["transaction"].insert_transaction.side_effect = (
+            lambda transaction: replace(transaction, id=7))
+
+        dto = TransactionCreateDto(sender_wallet_address="1",
+                                   receiver_wallet_address="2", transfer_amount=50)
+        service.make_transaction(dto, "key")
+
+        [transaction_id, payload, _], _ = (
+            outbox.add_transfer_notification.call_args)
+        assert transaction_id == 7
+        assert '"transaction_id":7' in payload
+
     def test_make_transaction_success_no_fee(
             self, mock_service: TransactionService, mock_repos: dict[str, Any]
     ) -> None:
@@ -238,3 +332,19 @@ class TestTransactionService:
 
         assert result.total_transactions == 150
         assert result.platform_profit == 225
+
+    def test_get_top_wallets(self, mock_repos: dict[str, Any]) -> None:
+        stats_repo = MagicMock()
+        stats_repo.get_top_wallets.return_value = [
+            WalletTransferStats(wallet_id=3, wallet_address="W3", user_id=2,
+                                transfers_sent=1, transfers_received=4,
+                                volume_sent=10, volume_received=900, fees_paid=1)
+        ]
+        service = TransactionService(mock_repos["user"], mock_repos["wallet"],
+                                     mock_repos["transaction"],
+                                     transfer_stats_repo=stats_repo)
+
+        [result] = service.get_top_wallets("volume_received", 3)
+
+        stats_repo.get_top_wallets.assert_called_once_with("volume_received", 3)
+        assert (result.wallet_address, result.volume_received) == ("W3", 900)
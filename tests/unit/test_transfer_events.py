@@ -0,0 +1,112 @@
+import asyncio
+import threading
+
+from dto.transfer_event_dto import TransferEventDto
+from service.transfer_events import (
+    TransferEventBroker,
+    format_server_sent_event,
+    stream_transfer_events,
+)
+
+
+def event(transaction_id: int, sender: str = "W1",
+          receiver: str = "W2") -> TransferEventDto:
+    return TransferEventDto(
+        transaction_id=transaction_id, sender_wallet_address=sender,
+        receiver_wallet_address=receiver, transfer_amount=100,
+        transferred_amount=99, transfer_fee=1
+    )
+
+
+def ids(events: list[TransferEventDto | None]) -> list[int | None]:
+    return [e.transaction_id if e else None for e in events]
+
+
+class TestStreamTransferEvents:
+
+    def test_catches_up_then_delivers_published_events_once(self) -> None:
+        broker = TransferEventBroker()
+        caught_up: list[int] = []
+
+        def catch_up(after_id: int) -> list[TransferEventDto]:
+            caught_up.append(after_id)
+            return [event(2), event(3)]
+
+        async def collect() -> list[TransferEventDto | None]:
+            received = []
+            stream = stream_transfer_events(broker, "W2", 1, catch_up, 5)
+            async for item in stream:
+                received.append(item)
+                if len(received) == 2:
+                    # Published from a request thread, once already read.
+                    threading.Thread(target=broker.publish, args=(event(3),)).start()
+                    threading.Thread(target=broker.publish, args=(event(4),)).start()
+                if len(received) == 3:
+                    break
+            await stream.aclose()
+            return received
+
+        assert ids(asyncio.run(collect())) == [2, 3, 4]
+        assert caught_up == [1]
+        assert broker.subscriber_count() == 0
+
+    def test_only_the_wallets_events_are_delivered(self) -> None:
+        broker = TransferEventBroker()
+
+        async def first() -> TransferEventDto | None:
+            stream = stream_transfer_events(broker, "W3", 0, lambda _: [], 5)
+            task = asyncio.ensure_future(anext(stream))
+            await asyncio.sleep(0.05)
+            broker.publish(event(1))
+            broker.publish(event(2, sender="W3"))
+            received = await task
+            await stream.aclose()
+            return received
+
+        assert ids([asyncio.run(first())]) == [2]
+
+    def test_heartbeat_rereads_committed_transfers(self) -> None:
+        broker = TransferEventBroker()
+        committed = [event(1)]
+
+        def catch_up(after_id: int) -> list[TransferEventDto]:
+            return [e for e in committed if e.transaction_id > after_id]
+
+        async def collect() -> list[TransferEventDto | None]:
+            stream = stream_transfer_events(broker, "W1", 0, catch_up, 0.01)
+            received = [await anext(stream), await anext(stream)]
+            # Committed by another worker process, so never published here.
+            committed.append(event(2))
+            received.append(await anext(stream))
+            await stream.aclose()
+            return received
+
+        assert ids(asyncio.run(collect())) == [1, None, 2]
+
+    def test_overflow_falls_back_to_catch_up(self) -> None:
+        broker = TransferEventBroker(max_pending=2)
+        committed = [event(1)]
+
+        def catch_up(after_id: int) -> list[TransferEventDto]:
+            return [e for e in committed if e.transaction_id > after_id]
+
+        async def collect() -> list[TransferEventDto | None]:
+            stream = stream_transfer_events(broker, "W1", 0, catch_up, 5)
+            received = [await anext(stream)]
+            for transaction_id in range(2, 6):
+                committed.append(event(transaction_id))
+                broker.publish(committed[-1])
+            await asyncio.sleep(0.05)
+            received += [await anext(stream) for _ in range(4)]
+            await stream.aclose()
+            return received
+
+        assert ids(asyncio.run(collect())) == [1, 2, 3, 4, 5]
+
+
+def test_format_server_sent_event() -> None:
+    formatted = format_server_sent_event(event(7))
+
+    assert formatted.startswith("id: 7\nevent: transfer\ndata: {")
+    assert formatted.endswith("}\n\n")
+    assert format_server_sent_event(None) == ": heartbeat\n\n"
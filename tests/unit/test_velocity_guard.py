@@ -0,0 +1,114 @@
+from unittest.mock import MagicMock
+
+import pytest
+
+from exception.exceptions import VelocityLimitExceededError
+from service.metrics import MetricsRegistry
+from service.velocity_guard import (
+    SlidingWindow,
+    TransferAttempt,
+    VelocityGuard,
+    VelocityRule,
+    parse_velocity_rules,
+)
+
+
+def make_guard(spec: str) -> VelocityGuard:
+    return VelocityGuard(parse_velocity_rules(spec), MagicMock(), buckets=10,
+                         metrics=MetricsRegistry())
+
+
+def attempt(at: float, amount: int = 100, wallet_id: int = 1,
+            user_id: int = 1) -> TransferAttempt:
+    return TransferAttempt(sender_wallet_id=wallet_id, sender_user_id=user_id,
+                           amount=amount, at=at)
+
+
+class TestSlidingWindow:
+
+    def test_buckets_expire_as_the_window_moves(self) -> None:
+        window = SlidingWindow(buckets=4, width=10)
+        window.add(1000, 1, 5)
+        window.add(1015, 2, 7)
+
+        assert window.totals(1039) == (3, 12)
+        assert window.totals(1040) == (2, 7)
+        assert window.totals(1050) == (0, 0)
+
+    def test_long_idle_gap_clears_every_bucket(self) -> None:
+        window = SlidingWindow(buckets=4, width=10)
+        window.add(1000, 1, 5)
+
+        window.add(10_000, 1, 3)
+
+        assert window.totals(10_000) == (1, 3)
+
+    def test_expired_additions_are_ignored(self) -> None:
+        window = SlidingWindow(buckets=4, width=10)
+        window.add(1100, 1, 5)
+
+        window.add(1000, 1, 5)
+
+        assert window.totals(1100) == (1, 5)
+
+
+class TestParseVelocityRules:
+
+    def test_parses_rules(self) -> None:
+        assert parse_velocity_rules(" wallet:count:10/60, user:volume:5000/3600") == [
+            VelocityRule("wallet", "count", 10, 60.0),
+            VelocityRule("user", "volume", 5000, 3600.0),
+        ]
+
+    @pytest.mark.parametrize("spec", ["wallet:count:10", "account:count:1/60",
+                                      "wallet:amount:1/60", "wallet:count:x/60",
+                                      "wallet:count:1/0"])
+    def test_rejects_invalid_rules(self, spec: str) -> None:
+        with pytest.raises(ValueError, match="Invalid velocity rule"):
+            parse_velocity_rules(spec)
+
+
+class TestVelocityGuard:
+
+    def test_count_limit_per_wallet(self) -> None:
+        guard = make_guard("wallet:count:2/60")
+        guard.admit(attempt(1000))
+        guard.admit(attempt(1001))
+
+        with pytest.raises(VelocityLimitExceededError, match="wallet:count:2/60"):
+            guard.admit(attempt(1002))
+        guard.admit(attempt(1002, wallet_id=2))
+        guard.admit(attempt(1060))
+        assert guard._rejections.value == 1
+
+    def test_volume_limit_counts_the_attempted_amount(self) -> None:
+        guard = make_guard("wallet:volume:250/60")
+        guard.admit(attempt(1000, amount=200))
+
+        with pytest.raises(VelocityLimitExceededError):
+            guard.admit(attempt(1001, amount=51))
+        guard.admit(attempt(1001, amount=50))
+
+    def test_user_limit_spans_their_wallets(self) -> None:
+        guard = make_guard("user:count:1/60")
+        guard.admit(attempt(1000, wallet_id=1))
+
+        with pytest.raises(VelocityLimitExceededError):
+            guard.admit(attempt(1001, wallet_id=2))
+
+    def test_rejected_transfer_is_not_counted(self) -> None:
+        guard = make_guard("wallet:count:1/60,wallet:volume:100/60")
+        guard.admit(attempt(1000, amount=100))
+
+        with pytest.raises(VelocityLimitExceededError):
+            guard.admit(attempt(1001, amount=1))
+        assert guard._windows[(0, 1)].totals(1001) == (1, 100)
+
+    def test_cancelled_transfer_frees_its_place(self) -> None:
+        guard = make_guard("wallet:count:1/60")
+        failed = attempt(1000)
+        guard.admit(failed)
+
+        guard.cancel(failed)
+
+        guard.admit(attempt(1001))
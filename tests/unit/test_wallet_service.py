@@ -1,14 +1,18 @@
+from datetime import datetime
 from typing import Any
 from unittest.mock import MagicMock
 
 import pytest
 
 from exception.exceptions import (
+    BalanceHistoryUnavailableError,
+    PriceUnavailableError,
     UnauthorizedWalletAccessError,
     UserNotFoundError,
     WalletLimitExceededError,
     WalletNotFoundError,
 )
+from service.metrics import MetricsRegistry
 from service.wallet_service import WalletService
 
 
@@ -19,6 +23,7 @@ class TestWalletService:
         converter = MagicMock()
         converter.satoshi_to_btc.return_value = 1.0
         converter.satoshi_to_usd.return_value = 100000.0
+        converter.rate_age_seconds.return_value = 3.0
         return {
             "user": MagicMock(),
             "wallet": MagicMock(),
@@ -49,6 +54,23 @@ class TestWalletService:
         assert result.balance_btc == 1.0
         mock_deps["wallet"].insert_wallet.assert_called_once()
 
+    def test_wallet_is_served_without_usd_when_no_rate_arrives(
+            self, mock_deps: dict[str, Any]) -> None:
+        metrics = MetricsRegistry()
+        service = WalletService(mock_deps["user"], mock_deps["wallet"],
+                                mock_deps["converter"], metrics=metrics)
+        mock_deps["converter"].satoshi_to_usd.side_effect = (
+            PriceUnavailableError("The BTC rate did not arrive within 0.5s"))
+        mock_deps["user"].find_user_by_api_key.return_value = MagicMock(id=1)
+        mock_deps["wallet"].get_wallet_by_address.return_value = MagicMock(
+            user_id=1, balance=50_000_000, wallet_address="addr1")
+
+        result = service.get_wallet("addr1", "key1")
+
+        assert (result.balance_btc, result.balance_usd, result.price_stale) == (
+            1.0, None, True)
+        assert metrics.counter("wallet_responses_degraded_total", "").value == 1
+
     def test_create_wallet_user_not_found(
             self, service: WalletService, mock_deps: dict[str, Any]
     ) -> None:
@@ -57,6 +79,59 @@ class TestWalletService:
         with pytest.raises(UserNotFoundError):
             service.create_wallet("bad_key")
 
+    def test_create_wallets_reads_the_rate_once(
+            self, service: WalletService, mock_deps: dict[str, Any]
+    ) -> None:
+        mock_deps["user"].get_users_by_ids.return_value = [
+            MagicMock(id=1), MagicMock(id=2)]
+        mock_deps["wallet"].count_wallets_by_user_ids.return_value = {1: 1}
+        mock_deps["wallet"].new_wallet_address.side_effect = ["a1", "a2", "a3"]
+        mock_deps["wallet"].insert_wallets.side_effect = lambda rows: [
+            MagicMock(user_id=user_id, balance=balance, wallet_address=address)
+            for user_id, balance, address in rows]
+        mock_deps["converter"].get_btc_to_usd_rate.return_value = 50_000.0
+
+        result = service.create_wallets([1, 2, 1])
+
+        assert [(w.user_id, w.wallet_address, w.balance_usd) for w in result] == [
+            (1, "a1", 50_000.0), (2, "a2", 50_000.0), (1, "a3", 50_000.0)]
+        mock_deps["wallet"].count_wallets_by_user_ids.assert_called_once_with([1, 2])
+        mock_deps["converter"].get_btc_to_usd_rate.assert_called_once()
+
+    def test_create_wallets_without_rate_leaves_usd_empty(
+            self, service: WalletService, mock_deps: dict[str, Any]
+    ) -> None:
+        mock_deps["user"].get_users_by_ids.return_value = [MagicMock(id=1)]
+        mock_deps["wallet"].count_wallets_by_user_ids.return_value = {}
+        mock_deps["wallet"].insert_wallets.return_value = [
+            MagicMock(user_id=1, balance=100_000_000, wallet_address="a1")]
+        mock_deps["converter"].get_btc_to_usd_rate.side_effect = (
+            PriceUnavailableError("The BTC rate did not arrive within 0.5s"))
+
+        [result] = service.create_wallets([1])
+
+        assert (result.balance_usd, result.price_stale) == (None, True)
+
+    def test_create_wallets_user_not_found(
+            self, service: WalletService, mock_deps: dict[str, Any]
+    ) -> None:
+        mock_deps["user"].get_users_by_ids.return_value = [MagicMock(id=1)]
+
+        with pytest.raises(UserNotFoundError, match=r"\[2\]"):
+            service.create_wallets([1, 2])
+        mock_deps["wallet"].insert_wallets.assert_not_called()
+
+    def test_create_wallets_limit_exceeded(
+            self, service: WalletService, mock_deps: dict[str, Any]
+    ) -> None:
+        mock_deps["user"].get_users_by_ids.return_value = [
+            MagicMock(id=1), MagicMock(id=2)]
+        mock_deps["wallet"].count_wallets_by_user_ids.return_value = {1: 2, 2: 2}
+
+        with pytest.raises(WalletLimitExceededError, match=r"\[1\]"):
+            service.create_wallets([1, 1, 2])
+        mock_deps["wallet"].insert_wallets.assert_not_called()
+
     def test_create_wallet_limit_exceeded(
             self, service: WalletService, mock_deps: dict[str, Any]
     ) -> None:
@@ -91,6 +166,38 @@ class TestWalletService:
 
         result = service.get_wallet("addr1", "key1")
         assert result.wallet_address == "addr1"
+        assert result.price_age_seconds == 3.0
+
+    def test_get_wallet_as_of_reads_the_ledger(
+            self, mock_deps: dict[str, Any]) -> None:
+        ledger = MagicMock()
+        ledger.balance_as_of.return_value = 25_000_000
+        service = WalletService(mock_deps["user"], mock_deps["wallet"],
+                                mock_deps["converter"], ledger)
+        mock_deps["user"].find_user_by_api_key.return_value = MagicMock(id=1)
+        mock_deps["wallet"].get_wallet_by_address.return_value = MagicMock(
+            id=7, user_id=1, wallet_address="addr1", balance=50_000_000
+        )
+
+        service.get_wallet("addr1", "key1", as_of=42)
+        service.get_wallet("addr1", "key1", as_of=datetime(1970, 1, 1, 0, 1))
+
+        ledger.balance_as_of.assert_any_call(7, transaction_id=42)
+        ledger.balance_as_of.assert_any_call(7, posted_at=60.0)
+        mock_deps["converter"].satoshi_to_btc.assert_called_with(25_000_000)
+
+    def test_get_wallet_as_of_before_history(
+            self, mock_deps: dict[str, Any]) -> None:
+        ledger = MagicMock()
+        ledger.balance_as_of.return_value = None
+        service = WalletService(mock_deps["user"], mock_deps["wallet"],
+                                mock_deps["converter"], ledger)
+        mock_deps["user"].find_user_by_api_key.return_value = MagicMock(id=1)
+        mock_deps["wallet"].get_wallet_by_address.return_value = MagicMock(
+            id=7, user_id=1, wallet_address="addr1")
+
+        with pytest.raises(BalanceHistoryUnavailableError):
+            service.get_wallet("addr1", "key1", as_of=1)
 
     def test_get_wallet_user_not_found(
             self, service: WalletService, mock_deps: dict[str, Any]